@@ -0,0 +1,68 @@
+"""
+Fixtures compartidas por los tests de varias apps
+"""
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+
+@pytest.fixture
+def tablas_fiscales(db):
+    """Carga tablas ISR/subsidio 2024, parámetros IMSS y conceptos"""
+    call_command('cargar_tablas_fiscales', stdout=StringIO())
+
+
+@pytest.fixture
+def empresa(db):
+    from apps.empresas.models import Empresa
+    return Empresa.objects.create(rfc='EMP010101AAA', razon_social='Empresa Prueba SA de CV')
+
+
+@pytest.fixture
+def periodo(empresa, tablas_fiscales):
+    """Primera quincena de 2024 de la empresa"""
+    from apps.nomina.models import PeriodoNomina
+    return PeriodoNomina.objects.create(
+        empresa=empresa,
+        tipo_periodo='quincenal',
+        numero_periodo=1,
+        año=2024,
+        fecha_inicio=date(2024, 1, 1),
+        fecha_fin=date(2024, 1, 15),
+        fecha_pago=date(2024, 1, 15),
+    )
+
+
+@pytest.fixture
+def crear_empleados(empresa):
+    """Crea n empleados activos con salarios escalonados"""
+    from apps.empleados.models import Empleado
+
+    def _crear(n, salario_base=Decimal('250.00'), paso=Decimal('137.35'),
+               fecha_ingreso=date(2020, 1, 1), **extra):
+        return [
+            Empleado.objects.create(
+                empresa=empresa,
+                nombre=f'Empleado{i}',
+                apellido_paterno='Prueba',
+                fecha_ingreso=fecha_ingreso,
+                salario_diario=salario_base + paso * i,
+                **extra
+            )
+            for i in range(n)
+        ]
+    return _crear
+
+
+@pytest.fixture
+def cliente_admin(db):
+    """Cliente API autenticado como administrador"""
+    from rest_framework.test import APIClient
+    from apps.usuarios.models import Usuario
+    usuario = Usuario.objects.create(username='admin', email='admin@rrhh.local', rol='admin')
+    cliente = APIClient()
+    cliente.force_authenticate(usuario)
+    return cliente
@@ -0,0 +1,50 @@
+"""
+Worker local de trabajos en segundo plano (cola en la BD).
+
+Uso:
+    python manage.py procesar_trabajos
+    python manage.py procesar_trabajos --una-vez
+    python manage.py procesar_trabajos --tipos calculo_nomina --intervalo 2
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.core.trabajos import procesar_pendientes
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta los trabajos en segundo plano encolados en la BD'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tipos',
+            nargs='+',
+            help='Solo procesa estos tipos de trabajo'
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=2.0,
+            help='Segundos de espera cuando la cola está vacía (default: 2)'
+        )
+        parser.add_argument(
+            '--una-vez',
+            action='store_true',
+            help='Vacía la cola y termina'
+        )
+
+    def handle(self, *args, **options):
+        tipos = options['tipos']
+        self.stdout.write(self.style.NOTICE('Worker de trabajos iniciado'))
+
+        while True:
+            close_old_connections()
+            ejecutados = procesar_pendientes(tipos)
+            if ejecutados:
+                self.stdout.write(f'  {ejecutados} trabajos ejecutados')
+            if options['una_vez']:
+                break
+            if not ejecutados:
+                time.sleep(options['intervalo'])
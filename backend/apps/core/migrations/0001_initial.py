@@ -0,0 +1,45 @@
+# Generated by Django 5.1.2 on 2026-10-17 04:49
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrabajoSegundoPlano',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('tipo', models.CharField(db_index=True, max_length=50)),
+                ('referencia_id', models.CharField(blank=True, db_index=True, max_length=64)),
+                ('parametros', models.JSONField(blank=True, default=dict)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_proceso', 'En proceso'), ('completado', 'Completado'), ('error', 'Error')], default='pendiente', max_length=20)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('procesados', models.PositiveIntegerField(default=0)),
+                ('resultado', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('fecha_inicio', models.DateTimeField(blank=True, null=True)),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True)),
+                ('solicitado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='trabajos_solicitados', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Trabajo en segundo plano',
+                'verbose_name_plural': 'Trabajos en segundo plano',
+                'db_table': 'core_trabajos',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['estado', 'created_at'], name='core_trabaj_estado_c2dafc_idx')],
+            },
+        ),
+    ]
@@ -29,3 +29,71 @@ class AuditMixin(models.Model):
 
     class Meta:
         abstract = True
+
+
+class TrabajoSegundoPlano(BaseModel):
+    """
+    Trabajo encolado en la BD y ejecutado por el worker local
+    (python manage.py procesar_trabajos), sin brokers externos
+    """
+    class Estado(models.TextChoices):
+        PENDIENTE = 'pendiente', 'Pendiente'
+        EN_PROCESO = 'en_proceso', 'En proceso'
+        COMPLETADO = 'completado', 'Completado'
+        ERROR = 'error', 'Error'
+
+    tipo = models.CharField(max_length=50, db_index=True)
+    referencia_id = models.CharField(max_length=64, blank=True, db_index=True)
+    parametros = models.JSONField(default=dict, blank=True)
+
+    estado = models.CharField(max_length=20, choices=Estado.choices, default=Estado.PENDIENTE)
+
+    # Progreso
+    total = models.PositiveIntegerField(default=0)
+    procesados = models.PositiveIntegerField(default=0)
+
+    resultado = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    intentos = models.PositiveSmallIntegerField(default=0)
+
+    fecha_inicio = models.DateTimeField(null=True, blank=True)
+    fecha_fin = models.DateTimeField(null=True, blank=True)
+
+    solicitado_por = models.ForeignKey(
+        'usuarios.Usuario',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='trabajos_solicitados'
+    )
+
+    class Meta:
+        db_table = 'core_trabajos'
+        verbose_name = 'Trabajo en segundo plano'
+        verbose_name_plural = 'Trabajos en segundo plano'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['estado', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo} {self.referencia_id} ({self.estado})"
+
+    @property
+    def porcentaje(self):
+        if not self.total:
+            return 100 if self.estado == self.Estado.COMPLETADO else 0
+        return round(self.procesados * 100 / self.total, 1)
+
+    @property
+    def eta_segundos(self):
+        """Tiempo restante estimado según el ritmo observado"""
+        from django.utils import timezone
+
+        if self.estado != self.Estado.EN_PROCESO or not self.fecha_inicio:
+            return None
+        if not self.procesados or not self.total:
+            return None
+        transcurrido = (timezone.now() - self.fecha_inicio).total_seconds()
+        restantes = max(self.total - self.procesados, 0)
+        return round(transcurrido / self.procesados * restantes, 1)
@@ -0,0 +1,213 @@
+"""
+Cola de trabajos en segundo plano respaldada por la BD
+
+Cada módulo registra sus tipos de trabajo con registrar_tipo_trabajo() en
+su AppConfig.ready(). Las vistas encolan con encolar_trabajo() y el worker
+(python manage.py procesar_trabajos) los toma y ejecuta uno a uno.
+
+El manejador recibe el trabajo y un callback progreso(procesados, total),
+y retorna un dict serializable que se guarda como resultado.
+
+Un trabajo en proceso cuyo updated_at (que el callback de progreso
+refresca) lleva más de settings.TRABAJOS_MINUTOS_ABANDONO sin cambiar se
+considera abandonado por un worker caído y se vuelve a encolar, hasta
+MAX_INTENTOS_TRABAJO intentos.
+"""
+import logging
+import traceback
+from datetime import timedelta
+from typing import Callable, Dict, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+MINUTOS_ABANDONO_DEFAULT = 30
+MAX_INTENTOS_TRABAJO = 3
+
+# Registro global de tipos de trabajo
+TIPOS_TRABAJO: Dict[str, Callable] = {}
+
+
+def registrar_tipo_trabajo(tipo: str, funcion: Callable):
+    """Registra el manejador de un tipo de trabajo"""
+    TIPOS_TRABAJO[tipo] = funcion
+
+
+def encolar_trabajo(tipo: str, parametros: Dict = None, referencia_id: str = '',
+                    usuario=None, unico: bool = True, solo_pendientes: bool = False):
+    """
+    Encola un trabajo
+    Con unico=True, si ya hay uno pendiente o en proceso para la misma
+    referencia se retorna ese en lugar de crear otro. Con
+    solo_pendientes=True no se reutiliza uno en proceso (cuando el que
+    corre ya leyó insumos que cambiaron)
+    """
+    from .models import TrabajoSegundoPlano
+
+    if tipo not in TIPOS_TRABAJO:
+        raise ValueError(f'Tipo de trabajo no registrado: {tipo}')
+
+    referencia_id = str(referencia_id)
+    if unico and referencia_id:
+        estados = [TrabajoSegundoPlano.Estado.PENDIENTE]
+        if not solo_pendientes:
+            estados.append(TrabajoSegundoPlano.Estado.EN_PROCESO)
+        activo = TrabajoSegundoPlano.objects.filter(
+            tipo=tipo,
+            referencia_id=referencia_id,
+            estado__in=estados
+        ).first()
+        if activo:
+            return activo
+
+    return TrabajoSegundoPlano.objects.create(
+        tipo=tipo,
+        referencia_id=referencia_id,
+        parametros=parametros or {},
+        solicitado_por=usuario if usuario and usuario.is_authenticated else None,
+    )
+
+
+def reclamar_trabajos_abandonados(tipos: list = None) -> int:
+    """
+    Regresa a pendiente los trabajos en proceso sin avance reciente
+    Los que ya agotaron MAX_INTENTOS_TRABAJO quedan en error
+    """
+    from .models import TrabajoSegundoPlano
+
+    minutos = getattr(settings, 'TRABAJOS_MINUTOS_ABANDONO', MINUTOS_ABANDONO_DEFAULT)
+    ahora = timezone.now()
+    qs = TrabajoSegundoPlano.objects.filter(
+        estado=TrabajoSegundoPlano.Estado.EN_PROCESO,
+        updated_at__lt=ahora - timedelta(minutes=minutos)
+    )
+    if tipos:
+        qs = qs.filter(tipo__in=tipos)
+
+    agotados = qs.filter(intentos__gte=MAX_INTENTOS_TRABAJO).update(
+        estado=TrabajoSegundoPlano.Estado.ERROR,
+        error=f'Trabajo abandonado tras {MAX_INTENTOS_TRABAJO} intentos',
+        fecha_fin=ahora,
+        updated_at=ahora,
+    )
+    reencolados = qs.filter(intentos__lt=MAX_INTENTOS_TRABAJO).update(
+        estado=TrabajoSegundoPlano.Estado.PENDIENTE,
+        updated_at=ahora,
+    )
+    if agotados or reencolados:
+        logger.warning(
+            f"Trabajos abandonados: {reencolados} reencolados, {agotados} marcados con error"
+        )
+    return reencolados
+
+
+def tomar_siguiente_trabajo(tipos: list = None):
+    """
+    Marca como en proceso el trabajo pendiente más antiguo y lo retorna
+    Antes reencola los abandonados por un worker caído
+    No toma un trabajo mientras otro del mismo tipo y referencia sigue en
+    proceso: dos ejecuciones sobre lo mismo no corren a la vez
+    En PostgreSQL usa SKIP LOCKED para que varios workers no tomen el mismo
+    """
+    from django.db.models import Exists, OuterRef
+    from .models import TrabajoSegundoPlano
+
+    reclamar_trabajos_abandonados(tipos)
+
+    en_curso = TrabajoSegundoPlano.objects.filter(
+        estado=TrabajoSegundoPlano.Estado.EN_PROCESO,
+        tipo=OuterRef('tipo'),
+        referencia_id=OuterRef('referencia_id'),
+    ).exclude(referencia_id='')
+
+    with transaction.atomic():
+        qs = TrabajoSegundoPlano.objects.select_for_update(skip_locked=True).filter(
+            estado=TrabajoSegundoPlano.Estado.PENDIENTE
+        ).exclude(Exists(en_curso))
+        if tipos:
+            qs = qs.filter(tipo__in=tipos)
+        trabajo = qs.order_by('created_at').first()
+        if trabajo is None:
+            return None
+
+        trabajo.estado = TrabajoSegundoPlano.Estado.EN_PROCESO
+        trabajo.fecha_inicio = timezone.now()
+        trabajo.intentos += 1
+        trabajo.save(update_fields=['estado', 'fecha_inicio', 'intentos', 'updated_at'])
+        return trabajo
+
+
+def _callback_progreso(trabajo) -> Callable:
+    """Callback que guarda el avance con un UPDATE directo"""
+    from .models import TrabajoSegundoPlano
+
+    def progreso(procesados: int, total: int = None):
+        campos = {'procesados': procesados, 'updated_at': timezone.now()}
+        if total is not None:
+            campos['total'] = total
+            trabajo.total = total
+        trabajo.procesados = procesados
+        TrabajoSegundoPlano.objects.filter(pk=trabajo.pk).update(**campos)
+
+    return progreso
+
+
+def ejecutar_trabajo(trabajo) -> None:
+    """
+    Ejecuta un trabajo ya tomado y guarda resultado o error
+    Cualquier excepción deja el trabajo en estado error
+    """
+    from .models import TrabajoSegundoPlano
+
+    funcion = TIPOS_TRABAJO.get(trabajo.tipo)
+    try:
+        if funcion is None:
+            raise ValueError(f'Tipo de trabajo no registrado: {trabajo.tipo}')
+        resultado = funcion(trabajo, _callback_progreso(trabajo))
+        if isinstance(resultado, dict) and resultado.get('error'):
+            trabajo.estado = TrabajoSegundoPlano.Estado.ERROR
+            trabajo.error = str(resultado['error'])
+        else:
+            trabajo.estado = TrabajoSegundoPlano.Estado.COMPLETADO
+        trabajo.resultado = resultado
+    except Exception as e:
+        logger.error(f"Error en trabajo {trabajo.pk} ({trabajo.tipo}): {e}")
+        trabajo.estado = TrabajoSegundoPlano.Estado.ERROR
+        trabajo.error = f"{e}\n{traceback.format_exc(limit=5)}"
+
+    trabajo.fecha_fin = timezone.now()
+    trabajo.save(update_fields=['estado', 'resultado', 'error', 'fecha_fin', 'updated_at'])
+
+
+def procesar_pendientes(tipos: list = None, limite: Optional[int] = None) -> int:
+    """Ejecuta trabajos pendientes hasta vaciar la cola (o llegar al límite)"""
+    ejecutados = 0
+    while limite is None or ejecutados < limite:
+        trabajo = tomar_siguiente_trabajo(tipos)
+        if trabajo is None:
+            break
+        ejecutar_trabajo(trabajo)
+        ejecutados += 1
+    return ejecutados
+
+
+def estado_trabajo(trabajo) -> Dict:
+    """Representación del trabajo para la API de progreso"""
+    return {
+        'id': str(trabajo.pk),
+        'tipo': trabajo.tipo,
+        'referencia_id': trabajo.referencia_id,
+        'estado': trabajo.estado,
+        'total': trabajo.total,
+        'procesados': trabajo.procesados,
+        'porcentaje': trabajo.porcentaje,
+        'eta_segundos': trabajo.eta_segundos,
+        'error': trabajo.error or None,
+        'resultado': trabajo.resultado,
+        'fecha_inicio': trabajo.fecha_inicio,
+        'fecha_fin': trabajo.fecha_fin,
+        'created_at': trabajo.created_at,
+    }
@@ -290,7 +290,7 @@ def accion_consultar_documento(usuario, params: Dict, contexto: Dict) -> Dict:
         from .services import GeneradorEmbeddings, BuscadorSemantico
 
         try:
-            query_embedding = GeneradorEmbeddings.generar_embedding(pregunta)
+            query_embedding = GeneradorEmbeddings.generar_embedding_consulta(pregunta)
 
             fragmentos = FragmentoDocumento.objects.filter(
                 documento=documento,
@@ -299,7 +299,7 @@ def accion_consultar_documento(usuario, params: Dict, contexto: Dict) -> Dict:
 
             resultados = []
             for frag in fragmentos:
-                similitud = BuscadorSemantico.similitud_coseno(query_embedding, frag.embedding)
+                similitud = BuscadorSemantico.similitud_coseno(query_embedding, frag.vector.tolist())
                 if similitud >= 0.2:
                     resultados.append({
                         'contenido': frag.contenido,
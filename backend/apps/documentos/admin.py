@@ -118,7 +118,12 @@ class FragmentoDocumentoAdmin(admin.ModelAdmin):
     list_filter = ['documento__tipo', 'documento__empresa']
     search_fields = ['contenido', 'documento__titulo']
     raw_id_fields = ['documento']
-    readonly_fields = ['embedding', 'num_tokens', 'num_caracteres']
+    exclude = ['embedding']
+    readonly_fields = ['dimension_embedding', 'num_tokens', 'num_caracteres']
+
+    def dimension_embedding(self, obj):
+        return len(obj.vector) if obj.embedding else 0
+    dimension_embedding.short_description = 'Dimensión del embedding'
 
     def tiene_embedding(self, obj):
         return bool(obj.embedding)
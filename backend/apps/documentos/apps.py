@@ -7,7 +7,11 @@ class DocumentosConfig(AppConfig):
     verbose_name = 'Documentos y RAG'
 
     def ready(self):
-        """Registra las acciones de IA"""
+        """Registra las acciones de IA y el trabajo de ingesta"""
+        from apps.core.trabajos import registrar_tipo_trabajo
+        from .services import TIPO_TRABAJO_INGESTA_DOCUMENTO, ejecutar_trabajo_ingesta_documento
+        registrar_tipo_trabajo(TIPO_TRABAJO_INGESTA_DOCUMENTO, ejecutar_trabajo_ingesta_documento)
+
         try:
             from .acciones_ia import registrar_acciones
             registrar_acciones()
@@ -0,0 +1,381 @@
+"""
+Índice vectorial en memoria para la búsqueda semántica (RAG)
+
+Por alcance (empresa o None = documentos globales) se carga una sola vez
+por proceso una matriz float32 (fragmentos x dimensión) con los
+embeddings normalizados. La similitud coseno de una consulta contra todo
+el alcance es un producto matriz-vector y el top-k sale de
+argpartition, en lugar de deserializar y recorrer cada fragmento en
+Python.
+
+El índice no decide permisos: el llamador pasa los documentos
+accesibles (la misma consulta de siempre sobre Documento) y se
+enmascaran las filas de los demás.
+
+Modo IVF opcional (settings.RAG_IVF_MIN_FRAGMENTOS): en alcances con al
+menos ese número de fragmentos se agrupan las filas con k-means esférico
+y cada consulta solo compara contra las listas de los RAG_IVF_SONDAS
+centroides más cercanos. Es aproximado; sin el setting la búsqueda es
+exacta.
+
+Invalidación:
+- Cada índice guarda una versión del alcance (conteo, última alta y
+  último procesamiento de sus documentos) que se verifica con una
+  consulta agregada al pedir el índice; no toca fragmentos. Editar
+  título, acceso o archivo de un documento no la cambia: solo altas,
+  bajas y procesamientos, que son lo único que mueve fragmentos.
+- Si la versión cambió, el índice se refresca de forma incremental: se
+  compara la fecha_procesado de cada documento del alcance (son pocos)
+  con la registrada al cargarlo y solo se leen los fragmentos de los que
+  cambiaron; los borrados se quitan. En modo IVF las filas nuevas se
+  asignan a los centroides existentes: el k-means completo solo corre al
+  construir el alcance desde cero. Así el documento procesado por el
+  worker cuesta en la siguiente búsqueda del proceso web lo que cuesten
+  sus fragmentos, no una reconstrucción completa.
+- En el proceso que procesa el documento, actualizar_documento_indice
+  aplica el mismo refresco sobre el índice cargado.
+"""
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, Max
+
+logger = logging.getLogger(__name__)
+
+SONDAS_DEFAULT = 8
+ITERACIONES_KMEANS = 10
+
+
+def _normalizar(matriz: np.ndarray) -> np.ndarray:
+    """Filas con norma 1 (las de norma 0 quedan en ceros)"""
+    normas = np.linalg.norm(matriz, axis=1, keepdims=True)
+    normas[normas == 0] = 1
+    return matriz / normas
+
+
+class IndiceVectorial:
+    """
+    Embeddings normalizados de los fragmentos de un alcance
+    """
+
+    def __init__(self, empresa_id, fragmento_ids: List, documento_ids: List,
+                 embeddings: np.ndarray, version: str = '', procesados: Dict = None,
+                 centroides: np.ndarray = None, asignacion: np.ndarray = None,
+                 documentos: Tuple[np.ndarray, np.ndarray] = None, normalizada: bool = False):
+        self.empresa_id = empresa_id
+        self.version = version
+        # fecha_procesado de cada documento del alcance al cargarlo
+        self.procesados = procesados or {}
+        self.fragmento_ids = np.asarray(fragmento_ids, dtype=object)
+        # Documento de cada fila como posición en self.documentos
+        # (documentos: par ya calculado por reemplazar_documentos)
+        if documentos is None:
+            documentos = np.unique(np.asarray(documento_ids, dtype=object), return_inverse=True)
+        self.documentos, self.documento_fila = documentos
+        matriz = np.asarray(embeddings, dtype=np.float32)
+        self.matriz = matriz if normalizada else _normalizar(matriz)
+        self.dimension = self.matriz.shape[1] if self.matriz.ndim == 2 and len(self.matriz) else 0
+        self.centroides = None
+        self.asignacion = None
+        self.listas = None
+        minimo = getattr(settings, 'RAG_IVF_MIN_FRAGMENTOS', None)
+        if minimo and len(self.fragmento_ids) >= minimo:
+            if centroides is not None and centroides.shape[1] == self.dimension:
+                self._asignar_ivf(centroides, asignacion)
+            else:
+                self._construir_ivf()
+
+    def __len__(self):
+        return len(self.fragmento_ids)
+
+    def _construir_ivf(self):
+        """k-means esférico: centroides normalizados y filas agrupadas por lista"""
+        total = len(self)
+        num_listas = max(1, int(np.sqrt(total)))
+        azar = np.random.default_rng(0)
+        centroides = self.matriz[azar.choice(total, num_listas, replace=False)]
+        for _ in range(ITERACIONES_KMEANS):
+            asignacion = np.argmax(self.matriz @ centroides.T, axis=1)
+            orden = np.argsort(asignacion, kind='stable')
+            listas, inicios = np.unique(asignacion[orden], return_index=True)
+            sumas = centroides.copy()  # Las listas vacías conservan su centroide
+            sumas[listas] = np.add.reduceat(self.matriz[orden], inicios, axis=0)
+            centroides = _normalizar(sumas)
+        self._agrupar(centroides, np.argmax(self.matriz @ centroides.T, axis=1))
+
+    def _asignar_ivf(self, centroides: np.ndarray, previas: Optional[np.ndarray]):
+        """
+        Reutiliza centroides existentes: las primeras filas conservan su
+        lista (previas) y solo las demás se comparan contra los centroides
+        """
+        inicio = 0 if previas is None else len(previas)
+        nuevas = np.argmax(self.matriz[inicio:] @ centroides.T, axis=1)
+        asignacion = nuevas if previas is None else np.concatenate([previas, nuevas])
+        self._agrupar(centroides, asignacion)
+
+    def _agrupar(self, centroides: np.ndarray, asignacion: np.ndarray):
+        """Listas invertidas: filas de cada centroide"""
+        num_listas = len(centroides)
+        self.centroides = centroides
+        self.asignacion = asignacion
+        orden = np.argsort(asignacion, kind='stable')
+        limites = np.searchsorted(asignacion[orden], np.arange(num_listas + 1))
+        self.listas = [orden[limites[i]:limites[i + 1]] for i in range(num_listas)]
+
+    def _candidatas(self, consulta: np.ndarray) -> Optional[np.ndarray]:
+        """Filas a comparar en modo IVF (None = todas)"""
+        if self.centroides is None:
+            return None
+        sondas = getattr(settings, 'RAG_IVF_SONDAS', SONDAS_DEFAULT)
+        cercanos = np.argsort(self.centroides @ consulta)[::-1][:sondas]
+        return np.concatenate([self.listas[i] for i in cercanos])
+
+    def buscar(self, consulta, documentos_permitidos: Iterable, top_k: int = 5,
+               umbral: float = 0.0) -> List[Tuple[object, object, float]]:
+        """
+        Top-k (fragmento_id, documento_id, similitud) de los documentos
+        permitidos con similitud >= umbral, de mayor a menor
+        """
+        if not len(self) or top_k <= 0:
+            return []
+        consulta = np.asarray(consulta, dtype=np.float32).ravel()
+        if consulta.shape[0] != self.dimension:
+            logger.warning(
+                f"Dimensión de consulta {consulta.shape[0]} distinta a la del índice {self.dimension}"
+            )
+            return []
+        norma = np.linalg.norm(consulta)
+        if norma == 0:
+            return []
+        consulta = consulta / norma
+
+        permitidos = set(documentos_permitidos)
+        documentos_ok = np.fromiter((d in permitidos for d in self.documentos), dtype=bool,
+                                    count=len(self.documentos))
+        filas = self._candidatas(consulta)
+        if filas is None:
+            # Producto contra toda la matriz (sin copiarla) y luego la máscara
+            similitudes = self.matriz @ consulta
+            filas = np.flatnonzero(documentos_ok[self.documento_fila])
+            similitudes = similitudes[filas]
+        else:
+            filas = filas[documentos_ok[self.documento_fila[filas]]]
+            similitudes = self.matriz[filas] @ consulta
+        if not len(filas):
+            return []
+
+        if len(filas) > top_k:
+            mejores = np.argpartition(similitudes, -top_k)[-top_k:]
+        else:
+            mejores = np.arange(len(filas))
+        mejores = mejores[np.argsort(similitudes[mejores])[::-1]]
+
+        resultados = []
+        for i in mejores:
+            similitud = float(similitudes[i])
+            if similitud < umbral:
+                break
+            fila = filas[i]
+            resultados.append((
+                self.fragmento_ids[fila],
+                self.documentos[self.documento_fila[fila]],
+                similitud,
+            ))
+        return resultados
+
+    def reemplazar_documentos(self, reemplazados: Iterable, fragmento_ids: List,
+                              documento_ids: List, embeddings: np.ndarray, version: str = '',
+                              procesados: Dict = None) -> 'IndiceVectorial':
+        """
+        Nuevo índice sin las filas de los documentos reemplazados y con las
+        filas dadas al final (documento_ids debe estar en reemplazados).
+        Las filas que se quedan no se vuelven a normalizar ni agrupar: en
+        modo IVF conservan centroides y listas
+        """
+        reemplazados = set(reemplazados)
+        nuevas = _normalizar(np.asarray(embeddings, dtype=np.float32)) if len(fragmento_ids) else None
+        nuevos, fila_nuevos = np.unique(np.asarray(documento_ids, dtype=object), return_inverse=True)
+        if not len(self):
+            return IndiceVectorial(
+                self.empresa_id, fragmento_ids, documento_ids,
+                nuevas if nuevas is not None else np.empty((0, 0), dtype=np.float32),
+                version, self.procesados if procesados is None else procesados,
+                documentos=(nuevos, fila_nuevos), normalizada=True,
+            )
+
+        quitar = np.fromiter((d in reemplazados for d in self.documentos), dtype=bool,
+                             count=len(self.documentos))
+        conservar = ~quitar[self.documento_fila]
+        quedan = np.flatnonzero(~quitar)
+        posicion = np.full(len(self.documentos), -1, dtype=np.intp)
+        posicion[quedan] = np.arange(len(quedan))
+        documentos = (
+            np.concatenate([self.documentos[quedan], nuevos]),
+            np.concatenate([posicion[self.documento_fila[conservar]], fila_nuevos + len(quedan)]),
+        )
+
+        ids = np.concatenate([self.fragmento_ids[conservar], np.asarray(fragmento_ids, dtype=object)])
+        matriz = self.matriz[conservar]
+        if nuevas is not None:
+            matriz = np.vstack([matriz, nuevas])
+        asignacion = self.asignacion[conservar] if self.asignacion is not None else None
+        return IndiceVectorial(
+            self.empresa_id, ids, None, matriz, version,
+            self.procesados if procesados is None else procesados,
+            centroides=self.centroides, asignacion=asignacion,
+            documentos=documentos, normalizada=True,
+        )
+
+
+_indices: Dict[object, IndiceVectorial] = {}
+_lock = threading.Lock()
+
+
+def _version_alcance(empresa_id) -> str:
+    """
+    Versión de los documentos del alcance en BD: conteo, última alta y
+    último procesamiento (las ediciones de metadatos no la cambian)
+    """
+    from .models import Documento
+
+    agg = Documento.objects.filter(empresa_id=empresa_id).aggregate(
+        total=Count('id'), alta=Max('created_at'), procesado=Max('fecha_procesado')
+    )
+    partes = [str(agg['total'])] + [
+        agg[campo].isoformat() if agg[campo] else '-' for campo in ('alta', 'procesado')
+    ]
+    return '@'.join(partes)
+
+
+def _procesados_alcance(empresa_id) -> Dict:
+    """fecha_procesado de cada documento del alcance"""
+    from .models import Documento
+
+    return dict(Documento.objects.filter(empresa_id=empresa_id).values_list('id', 'fecha_procesado'))
+
+
+def _filas_embeddings(fragmentos) -> Tuple[List, List, np.ndarray]:
+    """
+    (fragmento_ids, documento_ids, matriz float32) descartando dimensiones
+    distintas. Los embeddings empaquetados se unen y se leen con
+    np.frombuffer, sin parsear cada vector
+    """
+    ids, docs, bloques = [], [], []
+    tamaño = None
+    for fragmento_id, documento_id, embedding in fragmentos:
+        if not embedding:
+            continue
+        if tamaño is None:
+            tamaño = len(embedding)
+        elif len(embedding) != tamaño:
+            logger.warning(f"Fragmento {fragmento_id} con dimensión {len(embedding) // 4} distinta a {tamaño // 4}")
+            continue
+        ids.append(fragmento_id)
+        docs.append(documento_id)
+        bloques.append(embedding)
+    if not bloques:
+        return ids, docs, np.empty((0, 0), dtype=np.float32)
+    matriz = np.frombuffer(b''.join(bloques), dtype='<f4').reshape(len(bloques), tamaño // 4)
+    return ids, docs, matriz
+
+
+def construir_indice(empresa_id, version: str = None) -> IndiceVectorial:
+    """Lee los embeddings del alcance y construye el índice"""
+    from .models import FragmentoDocumento
+
+    # Versión y fechas antes que los fragmentos: un cambio intermedio
+    # deja la versión atrasada y se recoge en el siguiente refresco
+    if version is None:
+        version = _version_alcance(empresa_id)
+    procesados = _procesados_alcance(empresa_id)
+
+    fragmentos = FragmentoDocumento.objects.filter(
+        documento__empresa_id=empresa_id, embedding__isnull=False
+    ).values_list('id', 'documento_id', 'embedding').iterator(chunk_size=2000)
+    ids, docs, matriz = _filas_embeddings(fragmentos)
+    return IndiceVectorial(empresa_id, ids, docs, matriz, version, procesados)
+
+
+def refrescar_indice(indice: IndiceVectorial, version: str = None) -> IndiceVectorial:
+    """
+    Índice al día leyendo solo los fragmentos de los documentos cuya
+    fecha_procesado cambió desde que se cargó (y quitando los borrados)
+    """
+    from .models import FragmentoDocumento
+
+    if version is None:
+        version = _version_alcance(indice.empresa_id)
+    procesados = _procesados_alcance(indice.empresa_id)
+
+    cambiados = {
+        documento_id for documento_id, fecha in procesados.items()
+        if documento_id not in indice.procesados or indice.procesados[documento_id] != fecha
+    }
+    eliminados = set(indice.procesados) - set(procesados)
+    if not cambiados and not eliminados:
+        indice.version = version
+        return indice
+
+    fragmentos = FragmentoDocumento.objects.filter(
+        documento_id__in=cambiados, embedding__isnull=False
+    ).values_list('id', 'documento_id', 'embedding')
+    ids, docs, matriz = _filas_embeddings(fragmentos)
+    if len(ids) and indice.dimension and matriz.shape[1] != indice.dimension:
+        return construir_indice(indice.empresa_id, version)
+
+    return indice.reemplazar_documentos(cambiados | eliminados, ids, docs, matriz, version, procesados)
+
+
+def obtener_indice(empresa_id) -> IndiceVectorial:
+    """
+    Índice del proceso para el alcance (empresa_id o None = globales)
+    Cuesta una verificación de versión por consulta, no por fragmento;
+    si cambió, un refresco incremental
+    """
+    version = _version_alcance(empresa_id)
+
+    indice = _indices.get(empresa_id)
+    if indice is not None and indice.version == version:
+        return indice
+
+    if indice is None:
+        indice = construir_indice(empresa_id, version)
+    else:
+        indice = refrescar_indice(indice, version)
+    with _lock:
+        _indices[empresa_id] = indice
+    return indice
+
+
+def actualizar_documento_indice(documento) -> None:
+    """
+    Refresca el índice cargado del alcance de un documento recién
+    procesado. Si el alcance no está cargado no hace nada: se construye
+    completo en la siguiente búsqueda
+
+    El refresco abarca todo el alcance, no solo este documento: así la
+    versión que queda nunca cubre cambios de otro proceso que falten en
+    la matriz
+    """
+    indice = _indices.get(documento.empresa_id)
+    if indice is None:
+        return
+
+    nuevo = refrescar_indice(indice)
+    with _lock:
+        _indices[documento.empresa_id] = nuevo
+
+
+def invalidar_indice(empresa_id=...) -> None:
+    """
+    Descarta índices del proceso
+    Sin argumentos descarta todos; con empresa_id (o None) solo ese alcance
+    """
+    with _lock:
+        if empresa_id is ...:
+            _indices.clear()
+        else:
+            _indices.pop(empresa_id, None)
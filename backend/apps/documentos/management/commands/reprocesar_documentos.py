@@ -0,0 +1,81 @@
+"""
+Management command para regenerar fragmentos y embeddings del corpus RAG.
+
+Extrae y fragmenta en un pool de procesos y manda al modelo lotes grandes
+con fragmentos de varios documentos. Con --reanudar omite los documentos
+ya procesados con la misma configuración (útil si la corrida anterior se
+interrumpió). Los documentos con una ingesta encolada o en proceso se
+saltan.
+
+Uso:
+    python manage.py reprocesar_documentos --workers 8
+    python manage.py reprocesar_documentos --empresa <uuid> --tamaño-fragmento 300 --reanudar
+"""
+from django.core.management.base import BaseCommand
+
+from apps.documentos.services import ProcesadorDocumentos
+
+
+class Command(BaseCommand):
+    help = 'Regenera fragmentos y embeddings de los documentos RAG en paralelo'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--empresa',
+            help='Limita a los documentos de esta empresa (ID)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Procesos para extracción y fragmentación (default: número de CPUs)'
+        )
+        parser.add_argument(
+            '--tamaño-fragmento',
+            dest='tamaño_fragmento',
+            type=int,
+            default=500,
+            help='Palabras aproximadas por fragmento'
+        )
+        parser.add_argument(
+            '--solapamiento',
+            type=int,
+            default=50,
+            help='Palabras de solapamiento entre fragmentos'
+        )
+        parser.add_argument(
+            '--reanudar',
+            action='store_true',
+            help='Omite documentos ya procesados con esta configuración'
+        )
+
+    def handle(self, *args, **options):
+        procesador = ProcesadorDocumentos(
+            tamaño_fragmento=options['tamaño_fragmento'],
+            solapamiento=options['solapamiento']
+        )
+
+        def progreso(procesados, total):
+            self.stdout.write(f"  {procesados}/{total} documentos")
+
+        resultado = procesador.reprocesar_todos(
+            empresa_id=options['empresa'],
+            max_workers=options['workers'],
+            reanudar=options['reanudar'],
+            progreso=progreso
+        )
+
+        for error in resultado['errores']:
+            self.stdout.write(self.style.ERROR(f"  [ERROR] {error['documento']}: {error['error']}"))
+
+        resumen = (
+            f"{resultado['exitosos']}/{resultado['total']} documentos "
+            f"({resultado['omitidos']} omitidos) en {resultado['duracion_segundos']}s "
+            f"({resultado['workers']} workers)"
+        )
+        if resultado['en_ingesta']:
+            resumen += f"; {resultado['en_ingesta']} con ingesta en curso"
+        if resultado['fallidos']:
+            self.stdout.write(self.style.WARNING(resumen))
+        else:
+            self.stdout.write(self.style.SUCCESS(resumen))
@@ -0,0 +1,69 @@
+# Generated by Django 5.1.2 on 2026-10-17 09:12
+
+from django.db import migrations, models
+
+
+def empaquetar_embeddings(apps, schema_editor):
+    """Pasa embedding (lista JSON) a embedding_float32 (bytes float32)"""
+    import numpy as np
+
+    FragmentoDocumento = apps.get_model('documentos', 'FragmentoDocumento')
+    pendientes = (
+        FragmentoDocumento.objects.filter(embedding__isnull=False)
+        .values_list('id', 'embedding')
+        .iterator(chunk_size=500)
+    )
+    lote = []
+    for fragmento_id, embedding in pendientes:
+        lote.append(FragmentoDocumento(
+            id=fragmento_id, embedding_float32=np.asarray(embedding, dtype='<f4').tobytes()
+        ))
+        if len(lote) >= 500:
+            FragmentoDocumento.objects.bulk_update(lote, ['embedding_float32'])
+            lote = []
+    FragmentoDocumento.objects.bulk_update(lote, ['embedding_float32'])
+
+
+def desempaquetar_embeddings(apps, schema_editor):
+    import numpy as np
+
+    FragmentoDocumento = apps.get_model('documentos', 'FragmentoDocumento')
+    pendientes = (
+        FragmentoDocumento.objects.filter(embedding_float32__isnull=False)
+        .values_list('id', 'embedding_float32')
+        .iterator(chunk_size=500)
+    )
+    lote = []
+    for fragmento_id, embedding in pendientes:
+        lote.append(FragmentoDocumento(
+            id=fragmento_id, embedding=np.frombuffer(embedding, dtype='<f4').tolist()
+        ))
+        if len(lote) >= 500:
+            FragmentoDocumento.objects.bulk_update(lote, ['embedding'])
+            lote = []
+    FragmentoDocumento.objects.bulk_update(lote, ['embedding'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documentos', '0004_documento_fragmentodocumento'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fragmentodocumento',
+            name='embedding_float32',
+            field=models.BinaryField(blank=True, null=True, help_text='Vector embedding del fragmento (float32)'),
+        ),
+        migrations.RunPython(empaquetar_embeddings, desempaquetar_embeddings),
+        migrations.RemoveField(
+            model_name='fragmentodocumento',
+            name='embedding',
+        ),
+        migrations.RenameField(
+            model_name='fragmentodocumento',
+            old_name='embedding_float32',
+            new_name='embedding',
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.2 on 2026-10-17 05:39
+
+from django.db import migrations, models
+
+
+def estado_desde_banderas(apps, schema_editor):
+    """Documentos existentes: procesado / error según procesado y error_procesamiento"""
+    Documento = apps.get_model('documentos', 'Documento')
+    Documento.objects.filter(procesado=True).update(estado_procesamiento='procesado')
+    Documento.objects.filter(procesado=False).exclude(error_procesamiento='').update(
+        estado_procesamiento='error'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documentos', '0005_embedding_float32'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documento',
+            name='estado_procesamiento',
+            field=models.CharField(choices=[('pendiente', 'Pendiente'), ('en_proceso', 'En proceso'), ('procesado', 'Procesado'), ('error', 'Error')], default='pendiente', max_length=20),
+        ),
+        migrations.RunPython(estado_desde_banderas, migrations.RunPython.noop),
+    ]
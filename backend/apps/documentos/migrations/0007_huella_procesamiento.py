@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-17 05:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documentos', '0006_estado_procesamiento'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documento',
+            name='huella_procesamiento',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
@@ -23,6 +23,14 @@ class NivelAcceso(models.TextChoices):
     PRIVADO = 'privado', 'Privado (solo quien subió)'
 
 
+class EstadoProcesamiento(models.TextChoices):
+    """Estado de la ingesta de un documento RAG (trabajo en segundo plano)"""
+    PENDIENTE = 'pendiente', 'Pendiente'
+    EN_PROCESO = 'en_proceso', 'En proceso'
+    PROCESADO = 'procesado', 'Procesado'
+    ERROR = 'error', 'Error'
+
+
 class CategoriaDocumento(BaseModel):
     """Categorías de documentos configurables"""
     
@@ -132,8 +140,15 @@ class Documento(BaseModel, AuditMixin):
     )
 
     # Estado de procesamiento
+    estado_procesamiento = models.CharField(
+        max_length=20,
+        choices=EstadoProcesamiento.choices,
+        default=EstadoProcesamiento.PENDIENTE
+    )
     procesado = models.BooleanField(default=False)
     fecha_procesado = models.DateTimeField(null=True, blank=True)
+    # Modelo y configuración de fragmentación con que se procesó
+    huella_procesamiento = models.CharField(max_length=64, blank=True)
     error_procesamiento = models.TextField(blank=True)
 
     # Metadatos adicionales
@@ -203,8 +218,8 @@ class FragmentoDocumento(BaseModel):
     numero_fragmento = models.PositiveIntegerField(default=0)
     pagina = models.PositiveIntegerField(null=True, blank=True)
 
-    # Embedding como JSON (lista de floats)
-    embedding = models.JSONField(null=True, blank=True, help_text='Vector embedding del fragmento')
+    # Embedding como float32 little-endian empaquetado (4 bytes por dimensión)
+    embedding = models.BinaryField(null=True, blank=True, help_text='Vector embedding del fragmento (float32)')
 
     # Metadatos
     num_tokens = models.PositiveIntegerField(default=0)
@@ -225,3 +240,17 @@ class FragmentoDocumento(BaseModel):
         if len(self.contenido) > 100:
             return self.contenido[:100] + "..."
         return self.contenido
+
+    @staticmethod
+    def empaquetar_embedding(vector) -> bytes:
+        """Lista o arreglo de floats a bytes float32 little-endian"""
+        import numpy as np
+        return np.asarray(vector, dtype='<f4').tobytes()
+
+    @property
+    def vector(self):
+        """Embedding como arreglo float32 de solo lectura (sin copia), o None"""
+        if self.embedding is None:
+            return None
+        import numpy as np
+        return np.frombuffer(self.embedding, dtype='<f4')
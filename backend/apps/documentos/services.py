@@ -4,8 +4,13 @@ Servicios para procesamiento de documentos y búsqueda semántica (RAG)
 import os
 import re
 import math
+import hashlib
 import logging
-from typing import List, Dict, Tuple, Optional
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, List, Dict, Tuple, Optional
+from django.db import transaction
 from django.utils import timezone
 from django.db.models import Q
 
@@ -230,11 +235,23 @@ class GeneradorEmbeddings:
     """
     Genera embeddings usando sentence-transformers.
     Usa el modelo multilingüe para español.
+
+    Los embeddings de consultas se guardan en un LRU del proceso por texto
+    normalizado (generar_embedding_consulta). Con
+    settings.RAG_CACHE_EMBEDDINGS_DJANGO también se comparten entre
+    procesos vía el cache de Django (float32 empaquetado).
     """
 
     _modelo = None
     MODELO_DEFAULT = 'paraphrase-multilingual-MiniLM-L12-v2'
 
+    TAMAÑO_CACHE_CONSULTAS = 1024
+    TTL_CACHE_DJANGO = 60 * 60 * 24
+    _cache_consultas = OrderedDict()
+    _lock_cache = threading.Lock()
+    _aciertos = 0
+    _fallos = 0
+
     @classmethod
     def obtener_modelo(cls):
         """Carga el modelo (singleton para eficiencia)"""
@@ -259,6 +276,97 @@ class GeneradorEmbeddings:
         embedding = modelo.encode(texto, convert_to_numpy=True)
         return embedding.tolist()
 
+    @staticmethod
+    def normalizar_consulta(texto: str) -> str:
+        """Minúsculas, espacios colapsados y sin signos de puntuación en los extremos"""
+        texto = unicodedata.normalize('NFKC', texto).casefold()
+        texto = ' '.join(texto.split())
+        return texto.strip('¿?¡!.,;: ')
+
+    @classmethod
+    def generar_embedding_consulta(cls, texto: str) -> List[float]:
+        """
+        Embedding de una consulta con cache LRU por texto normalizado
+        Las consultas repetidas no vuelven a pasar por el modelo
+        """
+        clave = cls.normalizar_consulta(texto)
+        with cls._lock_cache:
+            embedding = cls._cache_consultas.get(clave)
+            if embedding is not None:
+                cls._cache_consultas.move_to_end(clave)
+                cls._aciertos += 1
+                return list(embedding)
+
+        embedding = cls._leer_cache_django(clave)
+        if embedding is None:
+            embedding = cls.generar_embedding(clave)
+            cls._guardar_cache_django(clave, embedding)
+            with cls._lock_cache:
+                cls._fallos += 1
+        else:
+            with cls._lock_cache:
+                cls._aciertos += 1
+
+        with cls._lock_cache:
+            cls._cache_consultas[clave] = tuple(embedding)
+            cls._cache_consultas.move_to_end(clave)
+            while len(cls._cache_consultas) > cls.TAMAÑO_CACHE_CONSULTAS:
+                cls._cache_consultas.popitem(last=False)
+        return list(embedding)
+
+    @classmethod
+    def _clave_cache_django(cls, clave: str) -> Optional[str]:
+        from django.conf import settings
+
+        if not getattr(settings, 'RAG_CACHE_EMBEDDINGS_DJANGO', False):
+            return None
+        resumen = hashlib.sha256(clave.encode('utf-8')).hexdigest()
+        return f'rag:embedding:{cls.MODELO_DEFAULT}:{resumen}'
+
+    @classmethod
+    def _leer_cache_django(cls, clave: str) -> Optional[List[float]]:
+        clave_django = cls._clave_cache_django(clave)
+        if clave_django is None:
+            return None
+        from django.core.cache import cache
+        import numpy as np
+
+        empaquetado = cache.get(clave_django)
+        if empaquetado is None:
+            return None
+        return np.frombuffer(empaquetado, dtype='<f4').tolist()
+
+    @classmethod
+    def _guardar_cache_django(cls, clave: str, embedding: List[float]) -> None:
+        clave_django = cls._clave_cache_django(clave)
+        if clave_django is None:
+            return
+        from django.core.cache import cache
+        import numpy as np
+
+        cache.set(clave_django, np.asarray(embedding, dtype='<f4').tobytes(), cls.TTL_CACHE_DJANGO)
+
+    @classmethod
+    def estadisticas_cache(cls) -> Dict:
+        """Aciertos, fallos y entradas del cache de consultas del proceso"""
+        with cls._lock_cache:
+            total = cls._aciertos + cls._fallos
+            return {
+                'aciertos': cls._aciertos,
+                'fallos': cls._fallos,
+                'tasa_aciertos': round(cls._aciertos / total, 4) if total else 0.0,
+                'entradas': len(cls._cache_consultas),
+                'capacidad': cls.TAMAÑO_CACHE_CONSULTAS,
+            }
+
+    @classmethod
+    def limpiar_cache_consultas(cls) -> None:
+        """Vacía el cache de consultas del proceso y reinicia contadores"""
+        with cls._lock_cache:
+            cls._cache_consultas.clear()
+            cls._aciertos = 0
+            cls._fallos = 0
+
     @classmethod
     def generar_embeddings_batch(cls, textos: List[str]) -> List[List[float]]:
         """Genera embeddings para múltiples textos (más eficiente)"""
@@ -272,7 +380,10 @@ class GeneradorEmbeddings:
 # ============ BUSCADOR SEMÁNTICO ============
 
 class BuscadorSemantico:
-    """Realiza búsqueda semántica usando similitud coseno"""
+    """
+    Realiza búsqueda semántica usando similitud coseno
+    La búsqueda va contra el índice vectorial por empresa (indice.py)
+    """
 
     @staticmethod
     def similitud_coseno(vec1: List[float], vec2: List[float]) -> float:
@@ -311,15 +422,25 @@ class BuscadorSemantico:
         Returns:
             Lista de fragmentos con su similitud
         """
-        from .models import Documento, FragmentoDocumento, NivelAcceso
-
         # Generar embedding de la query
         try:
-            query_embedding = GeneradorEmbeddings.generar_embedding(query)
+            query_embedding = GeneradorEmbeddings.generar_embedding_consulta(query)
         except Exception as e:
             logger.error(f"Error generando embedding para query: {e}")
             return []
 
+        return cls.buscar_por_embedding(
+            query_embedding,
+            cls.documentos_accesibles(usuario, empresa_id),
+            top_k=top_k,
+            umbral_similitud=umbral_similitud
+        )
+
+    @staticmethod
+    def documentos_accesibles(usuario, empresa_id: str = None):
+        """Queryset de documentos procesados que el usuario puede consultar"""
+        from .models import Documento, NivelAcceso
+
         # Construir filtro de documentos accesibles
         filtro_docs = Q(activo=True, procesado=True)
 
@@ -343,37 +464,101 @@ class BuscadorSemantico:
                 NivelAcceso.PUBLICO, NivelAcceso.EMPRESA
             ]) | Q(created_by=usuario)
 
-        # Obtener documentos accesibles
-        docs_accesibles = Documento.objects.filter(filtro_docs).values_list('id', flat=True)
+        return Documento.objects.filter(filtro_docs)
 
-        # Obtener fragmentos con embeddings
-        fragmentos = FragmentoDocumento.objects.filter(
-            documento_id__in=docs_accesibles,
-            embedding__isnull=False
-        ).select_related('documento')
+    @staticmethod
+    def buscar_por_embedding(
+        query_embedding,
+        documentos,
+        top_k: int = 5,
+        umbral_similitud: float = 0.3
+    ) -> List[Dict]:
+        """
+        Top-k fragmentos de los documentos dados contra un embedding,
+        usando el índice vectorial de cada empresa involucrada (indice.py)
+        """
+        from .indice import obtener_indice
+        from .models import FragmentoDocumento
 
-        # Calcular similitud para cada fragmento
-        resultados = []
-        for fragmento in fragmentos:
-            similitud = cls.similitud_coseno(query_embedding, fragmento.embedding)
-            if similitud >= umbral_similitud:
-                resultados.append({
-                    'fragmento_id': str(fragmento.id),
-                    'documento_id': str(fragmento.documento_id),
-                    'documento_titulo': fragmento.documento.titulo,
-                    'documento_tipo': fragmento.documento.tipo,
-                    'contenido': fragmento.contenido,
-                    'similitud': round(similitud, 4),
-                    'numero_fragmento': fragmento.numero_fragmento,
-                })
+        # Documentos accesibles agrupados por alcance (empresa o global)
+        por_empresa = {}
+        for documento_id, empresa_id in documentos.values_list('id', 'empresa_id'):
+            por_empresa.setdefault(empresa_id, set()).add(documento_id)
+
+        candidatos = []
+        for empresa_id, documento_ids in por_empresa.items():
+            candidatos.extend(obtener_indice(empresa_id).buscar(
+                query_embedding, documento_ids, top_k=top_k, umbral=umbral_similitud
+            ))
+        candidatos.sort(key=lambda c: c[2], reverse=True)
+        candidatos = candidatos[:top_k]
+        if not candidatos:
+            return []
 
-        # Ordenar por similitud y limitar
-        resultados.sort(key=lambda x: x['similitud'], reverse=True)
-        return resultados[:top_k]
+        fragmentos = FragmentoDocumento.objects.select_related('documento').only(
+            'contenido', 'numero_fragmento', 'documento_id', 'documento__titulo', 'documento__tipo'
+        ).in_bulk([c[0] for c in candidatos])
+
+        resultados = []
+        for fragmento_id, _, similitud in candidatos:
+            fragmento = fragmentos.get(fragmento_id)
+            if fragmento is None:
+                continue  # Borrado después de construir el índice
+            resultados.append({
+                'fragmento_id': str(fragmento.id),
+                'documento_id': str(fragmento.documento_id),
+                'documento_titulo': fragmento.documento.titulo,
+                'documento_tipo': fragmento.documento.tipo,
+                'contenido': fragmento.contenido,
+                'similitud': round(similitud, 4),
+                'numero_fragmento': fragmento.numero_fragmento,
+            })
+        return resultados
 
 
 # ============ PROCESADOR DE DOCUMENTOS ============
 
+# Trabajo en segundo plano de ingesta de un documento
+TIPO_TRABAJO_INGESTA_DOCUMENTO = 'ingesta_documento'
+LOTE_EMBEDDINGS = 64
+LOTE_FRAGMENTOS = 500
+
+# Reprocesamiento del corpus: documentos por tanda y lote de embeddings
+# con fragmentos de varios documentos
+DOCUMENTOS_POR_TANDA = 32
+LOTE_EMBEDDINGS_CORPUS = 512
+
+# Cambiar al modificar la extracción o la fragmentación: invalida las huellas
+VERSION_INGESTA = '1'
+
+# Campos que escribe el procesamiento: el resto del documento (archivo,
+# título, acceso) puede editarse mientras corre y no se pisa
+CAMPOS_PROCESAMIENTO = [
+    'contenido_texto', 'procesado', 'estado_procesamiento', 'fecha_procesado',
+    'error_procesamiento', 'huella_procesamiento', 'updated_at',
+]
+
+
+def _extraer_y_fragmentar(documento_id, archivo_path: str, tipo_mime: str,
+                          tamaño_fragmento: int, solapamiento: int) -> Tuple:
+    """
+    Extracción y fragmentación de un documento dentro de un worker del pool
+    No usa la BD. Retorna (documento_id, texto, fragmentos, error)
+    """
+    try:
+        texto = ExtractorTexto.extraer(archivo_path, tipo_mime)
+        if not texto:
+            raise ValueError("No se pudo extraer texto del documento")
+        fragmentos = FragmentadorTexto(
+            tamaño_fragmento=tamaño_fragmento, solapamiento=solapamiento
+        ).fragmentar(texto)
+        if not fragmentos:
+            raise ValueError("El documento no produjo fragmentos válidos")
+        return documento_id, texto, fragmentos, None
+    except Exception as e:
+        return documento_id, '', [], str(e)
+
+
 class ProcesadorDocumentos:
     """Orquesta el procesamiento completo de documentos"""
 
@@ -387,18 +572,74 @@ class ProcesadorDocumentos:
             solapamiento=solapamiento
         )
 
-    def procesar_documento(self, documento) -> Dict:
+    @property
+    def huella(self) -> str:
+        """Huella del modelo y la configuración de fragmentación"""
+        partes = [
+            VERSION_INGESTA,
+            GeneradorEmbeddings.MODELO_DEFAULT,
+            str(self.fragmentador.tamaño_fragmento),
+            str(self.fragmentador.solapamiento),
+        ]
+        return hashlib.sha256('|'.join(partes).encode('utf-8')).hexdigest()
+
+    def _guardar_fragmentos(self, documento, texto: str, fragmentos_data: List[Dict],
+                            embeddings: List) -> int:
+        """
+        Reemplaza los fragmentos del documento y lo marca como procesado
+        en una transacción (un DELETE e INSERTs por lote)
+        """
+        from .models import EstadoProcesamiento, FragmentoDocumento
+
+        fragmentos = [
+            FragmentoDocumento(
+                documento=documento,
+                contenido=frag_data['contenido'],
+                numero_fragmento=i,
+                embedding=FragmentoDocumento.empaquetar_embedding(embedding),
+                num_tokens=frag_data['num_tokens_aprox'],
+                num_caracteres=frag_data['num_caracteres']
+            )
+            for i, (frag_data, embedding) in enumerate(zip(fragmentos_data, embeddings))
+        ]
+        with transaction.atomic():
+            FragmentoDocumento.objects.filter(documento=documento).delete()
+            FragmentoDocumento.objects.bulk_create(fragmentos, batch_size=LOTE_FRAGMENTOS)
+
+            documento.contenido_texto = texto
+            documento.procesado = True
+            documento.estado_procesamiento = EstadoProcesamiento.PROCESADO
+            documento.fecha_procesado = timezone.now()
+            documento.error_procesamiento = ''
+            documento.huella_procesamiento = self.huella
+            documento.save(update_fields=CAMPOS_PROCESAMIENTO)
+        return len(fragmentos)
+
+    def _marcar_error(self, documento, error: str) -> None:
+        from .models import EstadoProcesamiento
+
+        documento.procesado = False
+        documento.estado_procesamiento = EstadoProcesamiento.ERROR
+        documento.error_procesamiento = error
+        documento.save(update_fields=['procesado', 'estado_procesamiento', 'error_procesamiento', 'updated_at'])
+
+    def procesar_documento(self, documento, progreso: Callable = None) -> Dict:
         """
         Procesa un documento: extrae texto, fragmenta y genera embeddings.
 
         Args:
             documento: Instancia de Documento
+            progreso: Callback opcional progreso(procesados, total) con los
+                fragmentos con embedding (trabajo en segundo plano)
 
         Returns:
             Diccionario con resultado del procesamiento
         """
-        from .models import FragmentoDocumento
+        from .models import Documento, EstadoProcesamiento
 
+        Documento.objects.filter(pk=documento.pk).update(
+            estado_procesamiento=EstadoProcesamiento.EN_PROCESO
+        )
         try:
             # 1. Extraer texto del archivo
             archivo_path = documento.archivo.path
@@ -408,9 +649,6 @@ class ProcesadorDocumentos:
             if not texto:
                 raise ValueError("No se pudo extraer texto del documento")
 
-            # Guardar texto completo
-            documento.contenido_texto = texto
-
             # 2. Fragmentar texto
             fragmentos_data = self.fragmentador.fragmentar(texto)
             logger.info(f"Documento fragmentado en {len(fragmentos_data)} partes")
@@ -418,31 +656,22 @@ class ProcesadorDocumentos:
             if not fragmentos_data:
                 raise ValueError("El documento no produjo fragmentos válidos")
 
-            # 3. Generar embeddings en batch
+            # 3. Generar embeddings en lotes (con avance entre lotes)
             textos = [f['contenido'] for f in fragmentos_data]
-            embeddings = GeneradorEmbeddings.generar_embeddings_batch(textos)
-
-            # 4. Eliminar fragmentos anteriores
-            FragmentoDocumento.objects.filter(documento=documento).delete()
-
-            # 5. Crear nuevos fragmentos
-            fragmentos_creados = []
-            for i, (frag_data, embedding) in enumerate(zip(fragmentos_data, embeddings)):
-                fragmento = FragmentoDocumento.objects.create(
-                    documento=documento,
-                    contenido=frag_data['contenido'],
-                    numero_fragmento=i,
-                    embedding=embedding,
-                    num_tokens=frag_data['num_tokens_aprox'],
-                    num_caracteres=frag_data['num_caracteres']
+            embeddings = []
+            for inicio in range(0, len(textos), LOTE_EMBEDDINGS):
+                embeddings.extend(
+                    GeneradorEmbeddings.generar_embeddings_batch(textos[inicio:inicio + LOTE_EMBEDDINGS])
                 )
-                fragmentos_creados.append(fragmento)
+                if progreso:
+                    progreso(len(embeddings), len(textos))
 
-            # 6. Marcar como procesado
-            documento.procesado = True
-            documento.fecha_procesado = timezone.now()
-            documento.error_procesamiento = ''
-            documento.save()
+            # 4. Reemplazar fragmentos y marcar como procesado
+            fragmentos_creados = self._guardar_fragmentos(documento, texto, fragmentos_data, embeddings)
+
+            # 5. Actualizar el índice vectorial cargado en este proceso
+            from .indice import actualizar_documento_indice
+            actualizar_documento_indice(documento)
 
             logger.info(f"Documento {documento.titulo} procesado exitosamente")
 
@@ -450,14 +679,12 @@ class ProcesadorDocumentos:
                 'success': True,
                 'documento_id': str(documento.id),
                 'texto_extraido': len(texto),
-                'fragmentos_creados': len(fragmentos_creados),
+                'fragmentos_creados': fragmentos_creados,
             }
 
         except Exception as e:
             logger.error(f"Error procesando documento {documento.id}: {e}")
-            documento.procesado = False
-            documento.error_procesamiento = str(e)
-            documento.save()
+            self._marcar_error(documento, str(e))
 
             return {
                 'success': False,
@@ -465,37 +692,182 @@ class ProcesadorDocumentos:
                 'error': str(e)
             }
 
-    def reprocesar_todos(self, empresa_id: str = None) -> Dict:
+    def reprocesar_todos(self, empresa_id: str = None, max_workers: int = 1,
+                         reanudar: bool = False, progreso: Callable = None) -> Dict:
         """
         Reprocesa todos los documentos (o los de una empresa).
         Útil al cambiar configuración de fragmentación.
+
+        Por tandas de DOCUMENTOS_POR_TANDA documentos: la extracción y
+        fragmentación se reparten en un pool de max_workers procesos
+        (1 = en el proceso actual) y los fragmentos de toda la tanda se
+        mandan al modelo en lotes de LOTE_EMBEDDINGS_CORPUS.
+
+        Cada documento se guarda en su propia transacción junto con la
+        huella de la configuración: con reanudar=True se omiten los que
+        ya tienen la huella vigente, así una corrida interrumpida continúa
+        donde se quedó.
+
+        Al inicio solo se leen los IDs; cada tanda carga sus documentos
+        frescos y solo escribe los campos de procesamiento. Los documentos
+        con una ingesta pendiente o en proceso se saltan (la ingesta los
+        deja al día) y se cuentan en 'en_ingesta'.
         """
+        import os
+        import time
+        from concurrent.futures import ProcessPoolExecutor
+        from django.db import connections
+        from .indice import invalidar_indice
         from .models import Documento
 
+        inicio = time.monotonic()
         filtro = Q(activo=True)
         if empresa_id:
             filtro &= Q(empresa_id=empresa_id)
 
         documentos = Documento.objects.filter(filtro)
+        omitidos = 0
+        if reanudar:
+            vigentes = documentos.filter(procesado=True, huella_procesamiento=self.huella)
+            omitidos = vigentes.count()
+            documentos = documentos.exclude(pk__in=vigentes.values('pk'))
+        ids = list(documentos.order_by('created_at').values_list('pk', flat=True))
+
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        max_workers = max(1, min(max_workers, len(ids) or 1))
+
         resultados = {
-            'total': documentos.count(),
+            'total': len(ids) + omitidos,
             'exitosos': 0,
             'fallidos': 0,
-            'errores': []
+            'omitidos': omitidos,
+            'en_ingesta': 0,
+            'errores': [],
+            'workers': max_workers,
         }
 
-        for doc in documentos:
-            resultado = self.procesar_documento(doc)
-            if resultado['success']:
+        alcances = set()
+        pool = None
+        if max_workers > 1:
+            # Los hijos no deben heredar la conexión abierta del proceso padre
+            connections.close_all()
+            pool = ProcessPoolExecutor(max_workers=max_workers)
+        try:
+            for inicio_tanda in range(0, len(ids), DOCUMENTOS_POR_TANDA):
+                tanda = self._cargar_tanda(ids[inicio_tanda:inicio_tanda + DOCUMENTOS_POR_TANDA], resultados)
+                alcances.update(doc.empresa_id for doc in tanda)
+                self._reprocesar_tanda(tanda, pool, resultados)
+                if progreso:
+                    progreso(
+                        resultados['exitosos'] + resultados['fallidos'] + resultados['en_ingesta'],
+                        len(ids)
+                    )
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            for alcance in alcances:
+                invalidar_indice(alcance)
+
+        resultados['duracion_segundos'] = round(time.monotonic() - inicio, 3)
+        return resultados
+
+    @staticmethod
+    def _cargar_tanda(ids: list, resultados: Dict) -> list:
+        """
+        Documentos de la tanda leídos al momento, sin los que tienen una
+        ingesta pendiente o en proceso (los dos caminos no escriben
+        fragmentos del mismo documento a la vez)
+        """
+        from apps.core.models import TrabajoSegundoPlano
+        from .models import Documento
+
+        en_ingesta = set(
+            TrabajoSegundoPlano.objects.filter(
+                tipo=TIPO_TRABAJO_INGESTA_DOCUMENTO,
+                referencia_id__in=[str(pk) for pk in ids],
+                estado__in=[TrabajoSegundoPlano.Estado.PENDIENTE, TrabajoSegundoPlano.Estado.EN_PROCESO],
+            ).values_list('referencia_id', flat=True)
+        )
+        resultados['en_ingesta'] += len(en_ingesta)
+        documentos = Documento.objects.in_bulk([pk for pk in ids if str(pk) not in en_ingesta])
+        return [documentos[pk] for pk in ids if pk in documentos]
+
+    def _reprocesar_tanda(self, tanda: list, pool, resultados: Dict) -> None:
+        """Extrae en el pool, genera embeddings en lotes grandes y guarda cada documento"""
+        argumentos = []
+        for doc in tanda:
+            try:
+                archivo_path = doc.archivo.path
+            except Exception:
+                archivo_path = ''
+            argumentos.append((
+                doc.id, archivo_path, doc.tipo_mime,
+                self.fragmentador.tamaño_fragmento, self.fragmentador.solapamiento,
+            ))
+        if pool is None:
+            extraidos = [_extraer_y_fragmentar(*args) for args in argumentos]
+        else:
+            extraidos = list(pool.map(_extraer_y_fragmentar, *zip(*argumentos)))
+
+        # Fragmentos de todos los documentos de la tanda en un solo flujo
+        textos = [f['contenido'] for _, _, fragmentos, _ in extraidos for f in fragmentos]
+        embeddings = []
+        for inicio in range(0, len(textos), LOTE_EMBEDDINGS_CORPUS):
+            embeddings.extend(
+                GeneradorEmbeddings.generar_embeddings_batch(textos[inicio:inicio + LOTE_EMBEDDINGS_CORPUS])
+            )
+
+        posicion = 0
+        for doc, (_, texto, fragmentos, error) in zip(tanda, extraidos):
+            propios = embeddings[posicion:posicion + len(fragmentos)]
+            posicion += len(fragmentos)
+            try:
+                if error:
+                    raise ValueError(error)
+                self._guardar_fragmentos(doc, texto, fragmentos, propios)
                 resultados['exitosos'] += 1
-            else:
+            except Exception as e:
+                logger.error(f"Error reprocesando documento {doc.id}: {e}")
+                self._marcar_error(doc, str(e))
                 resultados['fallidos'] += 1
-                resultados['errores'].append({
-                    'documento': doc.titulo,
-                    'error': resultado.get('error', 'Error desconocido')
-                })
+                resultados['errores'].append({'documento': doc.titulo, 'error': str(e)})
 
-        return resultados
+
+# ============ INGESTA EN SEGUNDO PLANO ============
+
+def encolar_procesamiento(documento, usuario=None):
+    """
+    Marca el documento como pendiente y encola su ingesta
+    El worker (python manage.py procesar_trabajos) la ejecuta
+
+    Solo se reutiliza un trabajo pendiente: uno en proceso ya leyó el
+    archivo anterior, así que un reemplazo durante la ingesta encola otro
+    (el worker no lo toma hasta que termine el primero)
+    """
+    from apps.core.trabajos import encolar_trabajo
+    from .models import Documento, EstadoProcesamiento
+
+    Documento.objects.filter(pk=documento.pk).update(
+        estado_procesamiento=EstadoProcesamiento.PENDIENTE
+    )
+    documento.estado_procesamiento = EstadoProcesamiento.PENDIENTE
+    return encolar_trabajo(
+        TIPO_TRABAJO_INGESTA_DOCUMENTO,
+        referencia_id=documento.id,
+        usuario=usuario,
+        solo_pendientes=True
+    )
+
+
+def ejecutar_trabajo_ingesta_documento(trabajo, progreso: Callable) -> Dict:
+    """Manejador del trabajo en segundo plano 'ingesta_documento'"""
+    from .models import Documento
+
+    documento = Documento.objects.filter(pk=trabajo.referencia_id).first()
+    if documento is None:
+        return {'error': 'El documento ya no existe'}
+    return ProcesadorDocumentos().procesar_documento(documento, progreso=progreso)
 
 
 # ============ FUNCIONES DE UTILIDAD ============
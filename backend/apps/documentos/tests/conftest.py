@@ -0,0 +1,20 @@
+"""
+Fixtures de los tests de documentos
+"""
+import numpy as np
+import pytest
+
+from apps.documentos.services import GeneradorEmbeddings
+
+
+@pytest.fixture
+def embeddings_falsos(monkeypatch):
+    """Sin modelo: un vector por texto; registra el tamaño de cada lote"""
+    lotes = []
+
+    def generar(cls, textos):
+        lotes.append(len(textos))
+        return [list(np.full(8, float(len(t)))) for t in textos]
+
+    monkeypatch.setattr(GeneradorEmbeddings, 'generar_embeddings_batch', classmethod(generar))
+    return lotes
@@ -0,0 +1,65 @@
+"""
+Tests del cache de embeddings de consultas
+"""
+import numpy as np
+import pytest
+
+from apps.documentos.services import GeneradorEmbeddings
+
+
+class ModeloFalso:
+    """Cuenta las codificaciones; el vector depende del texto"""
+
+    def __init__(self):
+        self.codificados = []
+
+    def encode(self, texto, convert_to_numpy=True):
+        self.codificados.append(texto)
+        return np.random.default_rng(abs(hash(texto)) % 2 ** 32).normal(size=8).astype(np.float32)
+
+
+@pytest.fixture
+def modelo(monkeypatch):
+    modelo = ModeloFalso()
+    monkeypatch.setattr(GeneradorEmbeddings, '_modelo', modelo)
+    GeneradorEmbeddings.limpiar_cache_consultas()
+    yield modelo
+    GeneradorEmbeddings.limpiar_cache_consultas()
+
+
+def test_consultas_equivalentes_se_codifican_una_vez(modelo):
+    primero = GeneradorEmbeddings.generar_embedding_consulta('¿Cuántos días de vacaciones me tocan?')
+    segundo = GeneradorEmbeddings.generar_embedding_consulta('  cuántos  días de VACACIONES me tocan ')
+    assert primero == segundo
+    assert modelo.codificados == ['cuántos días de vacaciones me tocan']
+
+    # El resultado es una copia: modificarlo no altera el cache
+    segundo.append(0.0)
+    assert GeneradorEmbeddings.generar_embedding_consulta('cuántos días de vacaciones me tocan') == primero
+
+    estadisticas = GeneradorEmbeddings.estadisticas_cache()
+    assert (estadisticas['aciertos'], estadisticas['fallos'], estadisticas['entradas']) == (2, 1, 1)
+
+
+def test_lru_acotado(modelo, monkeypatch):
+    monkeypatch.setattr(GeneradorEmbeddings, 'TAMAÑO_CACHE_CONSULTAS', 2)
+    for consulta in ('aguinaldo', 'prima vacacional', 'aguinaldo', 'finiquito'):
+        GeneradorEmbeddings.generar_embedding_consulta(consulta)
+    # 'prima vacacional' fue la menos reciente y salió del cache
+    GeneradorEmbeddings.generar_embedding_consulta('aguinaldo')
+    GeneradorEmbeddings.generar_embedding_consulta('prima vacacional')
+    assert modelo.codificados == ['aguinaldo', 'prima vacacional', 'finiquito', 'prima vacacional']
+    assert GeneradorEmbeddings.estadisticas_cache()['entradas'] == 2
+
+
+def test_cache_de_django_compartido_entre_procesos(modelo, settings):
+    settings.RAG_CACHE_EMBEDDINGS_DJANGO = True
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+    original = GeneradorEmbeddings.generar_embedding_consulta('reglamento interior')
+    GeneradorEmbeddings.limpiar_cache_consultas()  # Otro proceso: LRU vacío
+    compartido = GeneradorEmbeddings.generar_embedding_consulta('Reglamento interior.')
+
+    assert compartido == pytest.approx(original)
+    assert modelo.codificados == ['reglamento interior']
+    assert GeneradorEmbeddings.estadisticas_cache()['aciertos'] == 1
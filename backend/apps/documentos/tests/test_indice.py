@@ -0,0 +1,207 @@
+"""
+Tests del índice vectorial de la búsqueda semántica
+"""
+import numpy as np
+import pytest
+
+from apps.documentos.indice import invalidar_indice, obtener_indice
+from apps.documentos.models import Documento, FragmentoDocumento, NivelAcceso
+from apps.documentos.services import BuscadorSemantico, ProcesadorDocumentos
+
+DIMENSION = 384
+
+
+@pytest.fixture(autouse=True)
+def _indices_limpios():
+    invalidar_indice()
+    yield
+    invalidar_indice()
+
+
+def _documento(empresa, titulo, vectores, **extra):
+    documento = Documento.objects.create(
+        empresa=empresa, titulo=titulo, archivo=f'documentos_rag/{titulo}.txt', procesado=True, **extra
+    )
+    FragmentoDocumento.objects.bulk_create([
+        FragmentoDocumento(documento=documento, contenido=f'{titulo} {i}', numero_fragmento=i,
+                           embedding=FragmentoDocumento.empaquetar_embedding(vector))
+        for i, vector in enumerate(vectores)
+    ])
+    return documento
+
+
+def _fuerza_bruta(consulta, documentos, top_k, umbral):
+    resultados = [
+        (BuscadorSemantico.similitud_coseno(consulta, f.vector.tolist()), str(f.id))
+        for f in FragmentoDocumento.objects.filter(documento__in=documentos)
+    ]
+    return [r for r in sorted(resultados, reverse=True) if r[0] >= umbral][:top_k]
+
+
+@pytest.mark.django_db
+def test_mismos_resultados_que_la_similitud_coseno(empresa):
+    azar = np.random.default_rng(7)
+    documentos = [_documento(empresa, f'doc{i}', azar.normal(size=(30, DIMENSION))) for i in range(3)]
+    global_ = _documento(None, 'global', azar.normal(size=(10, DIMENSION)))
+    consulta = list(azar.normal(size=DIMENSION))
+
+    resultados = BuscadorSemantico.buscar_por_embedding(
+        consulta, Documento.objects.all(), top_k=5, umbral_similitud=0.0
+    )
+    esperado = _fuerza_bruta(consulta, documentos + [global_], 5, 0.0)
+    assert [r['fragmento_id'] for r in resultados] == [e[1] for e in esperado]
+    assert [r['similitud'] for r in resultados] == pytest.approx([e[0] for e in esperado], abs=1e-4)
+
+    # float32 empaquetado: 4 bytes por dimensión, leído sin parsear
+    fragmento = FragmentoDocumento.objects.filter(documento=global_).first()
+    assert len(fragmento.embedding) == 4 * DIMENSION
+    assert fragmento.vector.dtype == np.float32 and fragmento.vector.shape == (DIMENSION,)
+
+    # Solo los documentos accesibles
+    resultados = BuscadorSemantico.buscar_por_embedding(
+        consulta, Documento.objects.filter(id=documentos[1].id), top_k=50, umbral_similitud=-1
+    )
+    assert len(resultados) == 30
+    assert {r['documento_id'] for r in resultados} == {str(documentos[1].id)}
+
+
+@pytest.mark.django_db
+def test_filtra_por_nivel_de_acceso(empresa):
+    from apps.usuarios.models import Usuario
+
+    vector = [1.0] * DIMENSION
+    publico = _documento(empresa, 'publico', [vector], tipo_acceso=NivelAcceso.PUBLICO)
+    _documento(empresa, 'rrhh', [vector], tipo_acceso=NivelAcceso.RRHH)
+    _documento(empresa, 'inactivo', [vector], activo=False)
+    empleado = Usuario.objects.create(username='empleado', email='e@rrhh.local', rol='empleado')
+    empleado.empresas.add(empresa)
+
+    accesibles = BuscadorSemantico.documentos_accesibles(empleado, str(empresa.id))
+    resultados = BuscadorSemantico.buscar_por_embedding(vector, accesibles, top_k=5)
+    assert [r['documento_id'] for r in resultados] == [str(publico.id)]
+
+
+@pytest.mark.django_db
+def test_procesar_documento_actualiza_el_indice(empresa, monkeypatch, tmp_path, settings):
+    from apps.documentos import services
+
+    settings.MEDIA_ROOT = str(tmp_path)
+    azar = np.random.default_rng(3)
+    _documento(empresa, 'previo', azar.normal(size=(5, DIMENSION)))
+    indice = obtener_indice(empresa.id)
+    assert len(indice) == 5
+    assert obtener_indice(empresa.id) is indice
+
+    nuevo = _documento(empresa, 'nuevo', [])
+    (tmp_path / 'documentos_rag').mkdir()
+    (tmp_path / 'documentos_rag' / 'nuevo.txt').write_text('Política de vacaciones.\n\nSe otorgan doce días.')
+    vector = list(azar.normal(size=DIMENSION))
+    monkeypatch.setattr(
+        services.GeneradorEmbeddings, 'generar_embeddings_batch', classmethod(lambda cls, textos: [vector] * len(textos))
+    )
+    assert ProcesadorDocumentos().procesar_documento(nuevo)['success']
+
+    indice = obtener_indice(empresa.id)
+    assert len(indice) == 6
+    resultado = BuscadorSemantico.buscar_por_embedding(vector, Documento.objects.all(), top_k=1)
+    assert resultado[0]['documento_id'] == str(nuevo.id)
+    assert resultado[0]['similitud'] == pytest.approx(1.0)
+
+    # Borrar el documento cambia la versión del alcance
+    nuevo.delete()
+    assert len(obtener_indice(empresa.id)) == 5
+
+
+def test_ivf_sondea_pocas_listas_y_conserva_el_recall(settings, monkeypatch):
+    from apps.documentos.indice import IndiceVectorial
+
+    azar = np.random.default_rng(11)
+    total, dimension = 5_000, 32
+    matriz = azar.normal(size=(total, dimension)).astype(np.float32)
+    documentos = list(np.arange(total) // 50)
+    permitidos = set(documentos)
+    consultas = matriz[azar.choice(total, 20)] + azar.normal(scale=0.3, size=(20, dimension)).astype(np.float32)
+
+    exacto = IndiceVectorial('e', list(range(total)), documentos, matriz)
+    assert exacto.centroides is None
+
+    settings.RAG_IVF_MIN_FRAGMENTOS = 1_000
+    settings.RAG_IVF_SONDAS = 8
+    aproximado = IndiceVectorial('a', list(range(total)), documentos, matriz)
+    assert len(aproximado.centroides) == int(np.sqrt(total))
+    assert sum(len(lista) for lista in aproximado.listas) == total
+
+    comparadas = []
+    candidatas = IndiceVectorial._candidatas
+
+    def registrar_candidatas(indice, consulta):
+        filas = candidatas(indice, consulta)
+        if indice is aproximado:
+            comparadas.append(filas)
+        return filas
+
+    monkeypatch.setattr(IndiceVectorial, '_candidatas', registrar_candidatas)
+    aciertos = 0
+    for consulta in consultas:
+        esperado = exacto.buscar(consulta, permitidos, top_k=1, umbral=-1)
+        aciertos += aproximado.buscar(consulta, permitidos, top_k=1, umbral=-1)[0][0] == esperado[0][0]
+    assert aciertos >= 18
+
+    # Cada consulta compara solo las filas de RAG_IVF_SONDAS listas
+    assert len(comparadas) == len(consultas)
+    for filas in comparadas:
+        listas = set(aproximado.asignacion[filas].tolist())
+        assert len(listas) <= settings.RAG_IVF_SONDAS
+        assert len(filas) < total / 2
+
+
+@pytest.mark.django_db
+def test_editar_metadatos_no_reconstruye(empresa):
+    documento = _documento(empresa, 'politica', np.ones((3, DIMENSION)))
+    indice = obtener_indice(empresa.id)
+
+    documento.titulo = 'Política 2025'
+    documento.tipo_acceso = NivelAcceso.RRHH
+    documento.save()
+    assert obtener_indice(empresa.id) is indice
+
+
+@pytest.mark.django_db
+def test_refresco_incremental_incluye_cambios_de_otro_proceso(empresa, monkeypatch, tmp_path, settings):
+    from django.utils import timezone
+    from apps.documentos import services
+
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.RAG_IVF_MIN_FRAGMENTOS = 20
+    azar = np.random.default_rng(5)
+    _documento(empresa, 'a', azar.normal(size=(30, DIMENSION)))
+    otro = _documento(empresa, 'b', azar.normal(size=(30, DIMENSION)))
+    indice = obtener_indice(empresa.id)
+    assert indice.centroides is not None
+
+    # Otro proceso (el worker) reprocesa 'b' con un solo fragmento
+    vector_b = azar.normal(size=DIMENSION)
+    FragmentoDocumento.objects.filter(documento=otro).delete()
+    FragmentoDocumento.objects.create(
+        documento=otro, contenido='b nuevo', numero_fragmento=0,
+        embedding=FragmentoDocumento.empaquetar_embedding(vector_b)
+    )
+    Documento.objects.filter(pk=otro.pk).update(fecha_procesado=timezone.now())
+
+    # Este proceso procesa 'c': el refresco del alcance trae también 'b'
+    nuevo = _documento(empresa, 'c', [])
+    (tmp_path / 'documentos_rag').mkdir()
+    (tmp_path / 'documentos_rag' / 'c.txt').write_text('Política de vacaciones.\n\nSe otorgan doce días.')
+    vector_c = list(azar.normal(size=DIMENSION))
+    monkeypatch.setattr(
+        services.GeneradorEmbeddings, 'generar_embeddings_batch', classmethod(lambda cls, textos: [vector_c] * len(textos))
+    )
+    assert ProcesadorDocumentos().procesar_documento(nuevo)['success']
+
+    refrescado = obtener_indice(empresa.id)
+    assert refrescado is not indice
+    assert len(refrescado) == 30 + 1 + len(nuevo.fragmentos.all())
+    assert refrescado.centroides is indice.centroides  # sin k-means de nuevo
+    assert obtener_indice(empresa.id) is refrescado
+    mejor = BuscadorSemantico.buscar_por_embedding(vector_b, Documento.objects.all(), top_k=1)
+    assert mejor[0]['documento_id'] == str(otro.id)
@@ -0,0 +1,128 @@
+"""
+Tests de la ingesta de documentos en segundo plano
+"""
+import numpy as np
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.core.models import TrabajoSegundoPlano
+from apps.core.trabajos import procesar_pendientes
+from apps.documentos.models import Documento, EstadoProcesamiento, FragmentoDocumento
+from apps.documentos.services import GeneradorEmbeddings
+
+
+@pytest.fixture
+def cliente_rrhh(db, settings, tmp_path):
+    from rest_framework.test import APIClient
+    from apps.empresas.models import Empresa
+    from apps.usuarios.models import Usuario
+
+    settings.MEDIA_ROOT = str(tmp_path)
+    empresa = Empresa.objects.create(rfc='EMP010101AAA', razon_social='Empresa Prueba SA de CV')
+    usuario = Usuario.objects.create(username='rrhh', email='rrhh@rrhh.local', rol='empleador')
+    usuario.empresas.add(empresa)
+    cliente = APIClient()
+    cliente.force_authenticate(usuario)
+    cliente.empresa = empresa
+    return cliente
+
+
+def _reglamento(parrafos):
+    texto = '\n\n'.join(f'Artículo {i}. ' + 'palabra ' * 40 for i in range(parrafos))
+    return SimpleUploadedFile('reglamento.txt', texto.encode('utf-8'), content_type='text/plain')
+
+
+@pytest.mark.django_db
+def test_la_carga_encola_y_el_worker_escribe_en_lote(cliente_rrhh, embeddings_falsos):
+    respuesta = cliente_rrhh.post('/api/documentos/rag/', {
+        'empresa': str(cliente_rrhh.empresa.id), 'titulo': 'Reglamento interior', 'archivo': _reglamento(1000),
+    }, format='multipart')
+    assert respuesta.status_code == 201
+    assert respuesta.json()['estado_procesamiento'] == EstadoProcesamiento.PENDIENTE
+    assert embeddings_falsos == []  # Nada se procesó dentro de la petición
+
+    documento = Documento.objects.get()
+    trabajo = TrabajoSegundoPlano.objects.get(referencia_id=str(documento.id))
+    assert trabajo.estado == TrabajoSegundoPlano.Estado.PENDIENTE
+
+    with CaptureQueriesContext(connection) as consultas:
+        assert procesar_pendientes() == 1
+    inserts = [q for q in consultas if q['sql'].startswith('INSERT INTO "fragmentos_documento"')]
+
+    documento.refresh_from_db()
+    total = FragmentoDocumento.objects.filter(documento=documento).count()
+    assert documento.procesado and documento.estado_procesamiento == EstadoProcesamiento.PROCESADO
+    assert total > 64 and max(embeddings_falsos) == 64
+    assert len(inserts) == 1
+
+    trabajo.refresh_from_db()
+    assert trabajo.estado == TrabajoSegundoPlano.Estado.COMPLETADO
+    assert (trabajo.procesados, trabajo.total) == (total, total)
+
+    progreso = cliente_rrhh.get(f'/api/documentos/rag/{documento.id}/progreso/').json()
+    assert progreso['estado'] == 'completado'
+    assert progreso['estado_procesamiento'] == EstadoProcesamiento.PROCESADO
+
+
+@pytest.mark.django_db
+def test_error_de_ingesta_queda_en_el_documento_y_el_trabajo(cliente_rrhh, embeddings_falsos):
+    vacio = SimpleUploadedFile('vacio.txt', b'   ', content_type='text/plain')
+    respuesta = cliente_rrhh.post('/api/documentos/rag/', {
+        'empresa': str(cliente_rrhh.empresa.id), 'titulo': 'Vacío', 'archivo': vacio,
+    }, format='multipart')
+    documento_id = respuesta.json()['id']
+
+    procesar_pendientes()
+    documento = Documento.objects.get(id=documento_id)
+    assert documento.estado_procesamiento == EstadoProcesamiento.ERROR
+    assert documento.error_procesamiento
+    assert TrabajoSegundoPlano.objects.get(referencia_id=documento_id).estado == TrabajoSegundoPlano.Estado.ERROR
+
+    # Reprocesar manualmente vuelve a encolar
+    respuesta = cliente_rrhh.post(f'/api/documentos/rag/{documento_id}/procesar/')
+    assert respuesta.status_code == 202
+    assert Documento.objects.get(id=documento_id).estado_procesamiento == EstadoProcesamiento.PENDIENTE
+
+
+@pytest.mark.django_db
+def test_reemplazo_durante_la_ingesta_encola_otra(cliente_rrhh, embeddings_falsos):
+    from apps.core.trabajos import ejecutar_trabajo, tomar_siguiente_trabajo
+    from apps.documentos.services import encolar_procesamiento
+
+    respuesta = cliente_rrhh.post('/api/documentos/rag/', {
+        'empresa': str(cliente_rrhh.empresa.id), 'titulo': 'Reglamento', 'archivo': _reglamento(5),
+    }, format='multipart')
+    documento = Documento.objects.get(id=respuesta.json()['id'])
+    en_curso = tomar_siguiente_trabajo()
+
+    # Mientras corre la primera, llega otro archivo: no se reutiliza la que ya lo leyó
+    nuevo = encolar_procesamiento(documento)
+    assert nuevo != en_curso and nuevo.estado == TrabajoSegundoPlano.Estado.PENDIENTE
+    assert encolar_procesamiento(documento) == nuevo
+    assert tomar_siguiente_trabajo() is None  # espera a que termine la primera
+
+    ejecutar_trabajo(en_curso)
+    assert procesar_pendientes() == 1
+    nuevo.refresh_from_db()
+    assert nuevo.estado == TrabajoSegundoPlano.Estado.COMPLETADO
+
+
+@pytest.mark.django_db
+def test_ingesta_no_pisa_ediciones_concurrentes(cliente_rrhh, monkeypatch):
+    respuesta = cliente_rrhh.post('/api/documentos/rag/', {
+        'empresa': str(cliente_rrhh.empresa.id), 'titulo': 'Reglamento', 'archivo': _reglamento(5),
+    }, format='multipart')
+    documento_id = respuesta.json()['id']
+
+    def generar(cls, textos):
+        # El usuario edita el documento mientras el worker genera embeddings
+        Documento.objects.filter(pk=documento_id).update(titulo='Reglamento 2025', activo=False)
+        return [list(np.ones(8)) for _ in textos]
+    monkeypatch.setattr(GeneradorEmbeddings, 'generar_embeddings_batch', classmethod(generar))
+
+    procesar_pendientes()
+    documento = Documento.objects.get(pk=documento_id)
+    assert documento.estado_procesamiento == EstadoProcesamiento.PROCESADO
+    assert (documento.titulo, documento.activo) == ('Reglamento 2025', False)
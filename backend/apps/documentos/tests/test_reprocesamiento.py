@@ -0,0 +1,102 @@
+"""
+Tests del reprocesamiento paralelo del corpus
+"""
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from apps.documentos import services
+from apps.documentos.models import Documento, EstadoProcesamiento, FragmentoDocumento
+from apps.documentos.services import GeneradorEmbeddings, ProcesadorDocumentos
+
+
+@pytest.fixture
+def corpus(db, settings, tmp_path):
+    """Seis documentos .txt en disco y uno sin archivo legible"""
+    settings.MEDIA_ROOT = str(tmp_path)
+    (tmp_path / 'documentos_rag').mkdir()
+    documentos = []
+    for i in range(6):
+        nombre = f'documentos_rag/politica{i}.txt'
+        texto = '\n\n'.join(f'Política {i} cláusula {j}. ' + 'texto ' * 30 for j in range(40))
+        (tmp_path / nombre).write_text(texto, encoding='utf-8')
+        documentos.append(Documento.objects.create(titulo=f'Política {i}', archivo=nombre))
+    documentos.append(Documento.objects.create(titulo='Sin archivo', archivo='documentos_rag/no_existe.pdf'))
+    return documentos
+
+
+@pytest.mark.django_db(transaction=True)  # El pool cierra las conexiones del proceso padre
+def test_reprocesa_en_paralelo_con_lotes_de_varios_documentos(corpus, embeddings_falsos, monkeypatch):
+    monkeypatch.setattr(services, 'DOCUMENTOS_POR_TANDA', 4)
+    procesador = ProcesadorDocumentos(tamaño_fragmento=100, solapamiento=10)
+
+    resultado = procesador.reprocesar_todos(max_workers=2)
+
+    assert (resultado['exitosos'], resultado['fallidos'], resultado['workers']) == (6, 1, 2)
+    assert resultado['errores'][0]['documento'] == 'Sin archivo'
+    # Dos tandas: una llamada al modelo por tanda, con fragmentos de varios documentos
+    por_documento = FragmentoDocumento.objects.filter(documento=corpus[0]).count()
+    assert len(embeddings_falsos) == 2 and embeddings_falsos[0] == 4 * por_documento
+
+    for documento in corpus[:6]:
+        documento.refresh_from_db()
+        assert documento.estado_procesamiento == EstadoProcesamiento.PROCESADO
+        assert documento.huella_procesamiento == procesador.huella
+        numeros = list(documento.fragmentos.values_list('numero_fragmento', flat=True))
+        assert numeros == list(range(por_documento))
+    corpus[6].refresh_from_db()
+    assert corpus[6].estado_procesamiento == EstadoProcesamiento.ERROR
+
+    # Mismo resultado que el procesamiento individual
+    fragmentos = list(corpus[1].fragmentos.values_list('contenido', 'embedding'))
+    ProcesadorDocumentos(tamaño_fragmento=100, solapamiento=10).procesar_documento(corpus[1])
+    assert list(corpus[1].fragmentos.values_list('contenido', 'embedding')) == fragmentos
+
+
+def test_corrida_interrumpida_se_reanuda(corpus, embeddings_falsos, monkeypatch):
+    monkeypatch.setattr(services, 'DOCUMENTOS_POR_TANDA', 2)
+    generar = GeneradorEmbeddings.generar_embeddings_batch
+
+    def falla_en_la_segunda_tanda(cls, textos):
+        if len(embeddings_falsos) == 1:
+            raise RuntimeError('Proceso interrumpido')
+        return generar(textos)
+
+    monkeypatch.setattr(GeneradorEmbeddings, 'generar_embeddings_batch', classmethod(falla_en_la_segunda_tanda))
+    with pytest.raises(RuntimeError):
+        ProcesadorDocumentos().reprocesar_todos()
+    assert Documento.objects.filter(estado_procesamiento=EstadoProcesamiento.PROCESADO).count() == 2
+
+    monkeypatch.setattr(GeneradorEmbeddings, 'generar_embeddings_batch', generar)
+    salida = StringIO()
+    call_command('reprocesar_documentos', '--reanudar', '--workers', '1', stdout=salida)
+    assert '4/7 documentos (2 omitidos)' in salida.getvalue()
+    assert Documento.objects.filter(estado_procesamiento=EstadoProcesamiento.PROCESADO).count() == 6
+
+    # Otra configuración cambia la huella: ya no hay nada que omitir
+    otro = ProcesadorDocumentos(tamaño_fragmento=200).reprocesar_todos(reanudar=True)
+    assert otro['omitidos'] == 0 and otro['exitosos'] == 6
+
+
+def test_salta_ingestas_activas_y_no_pisa_ediciones(corpus, embeddings_falsos, monkeypatch):
+    from apps.documentos.services import encolar_procesamiento
+
+    encolar_procesamiento(corpus[0])
+    generar = GeneradorEmbeddings.generar_embeddings_batch
+
+    def con_edicion(cls, textos):
+        # Edición desde la API mientras corre el reprocesamiento
+        Documento.objects.filter(pk=corpus[1].pk).update(titulo='Política editada')
+        return generar(textos)
+
+    monkeypatch.setattr(GeneradorEmbeddings, 'generar_embeddings_batch', classmethod(con_edicion))
+    resultado = ProcesadorDocumentos().reprocesar_todos()
+
+    assert (resultado['exitosos'], resultado['fallidos'], resultado['en_ingesta']) == (5, 1, 1)
+    corpus[0].refresh_from_db()
+    assert corpus[0].estado_procesamiento == EstadoProcesamiento.PENDIENTE
+    assert not corpus[0].fragmentos.exists()
+    corpus[1].refresh_from_db()
+    assert corpus[1].titulo == 'Política editada'
+    assert corpus[1].estado_procesamiento == EstadoProcesamiento.PROCESADO
@@ -3,8 +3,12 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.utils import timezone
 from datetime import timedelta
-from .models import CategoriaDocumento, DocumentoEmpleado, Documento, TipoDocumento, NivelAcceso
-from .services import ProcesadorDocumentos
+from .models import (
+    CategoriaDocumento, DocumentoEmpleado, Documento, EstadoProcesamiento, TipoDocumento, NivelAcceso
+)
+from apps.core.models import TrabajoSegundoPlano
+from apps.core.trabajos import estado_trabajo
+from .services import TIPO_TRABAJO_INGESTA_DOCUMENTO, encolar_procesamiento
 
 
 class CategoriaDocumentoSerializer(serializers.ModelSerializer):
@@ -93,6 +97,9 @@ class DocumentoSerializer(serializers.ModelSerializer):
     empresa_nombre = serializers.CharField(source='empresa.razon_social', read_only=True)
     tipo_display = serializers.CharField(source='get_tipo_display', read_only=True)
     tipo_acceso_display = serializers.CharField(source='get_tipo_acceso_display', read_only=True)
+    estado_procesamiento_display = serializers.CharField(
+        source='get_estado_procesamiento_display', read_only=True
+    )
     total_fragmentos = serializers.IntegerField(read_only=True)
     created_by_email = serializers.CharField(source='created_by.email', read_only=True)
 
@@ -101,13 +108,14 @@ class DocumentoSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'empresa', 'empresa_nombre', 'titulo', 'descripcion',
             'tipo', 'tipo_display', 'archivo', 'tipo_mime', 'tamaño_bytes',
-            'tipo_acceso', 'tipo_acceso_display', 'procesado', 'fecha_procesado',
+            'tipo_acceso', 'tipo_acceso_display', 'estado_procesamiento',
+            'estado_procesamiento_display', 'procesado', 'fecha_procesado',
             'error_procesamiento', 'version', 'fecha_vigencia', 'tags',
             'activo', 'total_fragmentos', 'created_at', 'created_by_email'
         ]
         read_only_fields = [
-            'id', 'tipo_mime', 'tamaño_bytes', 'procesado', 'fecha_procesado',
-            'error_procesamiento', 'total_fragmentos', 'created_at'
+            'id', 'tipo_mime', 'tamaño_bytes', 'estado_procesamiento', 'procesado',
+            'fecha_procesado', 'error_procesamiento', 'total_fragmentos', 'created_at'
         ]
 
 
@@ -119,7 +127,7 @@ class DocumentoViewSet(viewsets.ModelViewSet):
     queryset = Documento.objects.select_related('empresa', 'created_by')
     serializer_class = DocumentoSerializer
     parser_classes = [parsers.MultiPartParser, parsers.FormParser, parsers.JSONParser]
-    filterset_fields = ['empresa', 'tipo', 'tipo_acceso', 'procesado', 'activo']
+    filterset_fields = ['empresa', 'tipo', 'tipo_acceso', 'estado_procesamiento', 'procesado', 'activo']
 
     def get_queryset(self):
         user = self.request.user
@@ -136,7 +144,7 @@ class DocumentoViewSet(viewsets.ModelViewSet):
         return qs.order_by('-created_at')
 
     def perform_create(self, serializer):
-        """Al crear documento, guardar metadatos y procesar automáticamente"""
+        """Al crear documento, guardar metadatos y encolar su procesamiento"""
         archivo = self.request.FILES.get('archivo')
         extra = {
             'created_by': self.request.user,
@@ -149,10 +157,9 @@ class DocumentoViewSet(viewsets.ModelViewSet):
 
         documento = serializer.save(**extra)
 
-        # Procesar automáticamente si hay archivo
+        # Procesar en segundo plano si hay archivo
         if archivo:
-            procesador = ProcesadorDocumentos()
-            procesador.procesar_documento(documento)
+            encolar_procesamiento(documento, self.request.user)
 
     def perform_update(self, serializer):
         """Al actualizar, reprocesar si cambió el archivo"""
@@ -166,29 +173,37 @@ class DocumentoViewSet(viewsets.ModelViewSet):
 
         documento = serializer.save(**extra)
 
-        # Reprocesar si hay nuevo archivo
+        # Reprocesar en segundo plano si hay nuevo archivo
         if archivo:
-            procesador = ProcesadorDocumentos()
-            procesador.procesar_documento(documento)
+            encolar_procesamiento(documento, self.request.user)
 
     @action(detail=True, methods=['post'])
     def procesar(self, request, pk=None):
-        """Procesar/reprocesar un documento manualmente"""
+        """
+        Encola el procesamiento/reprocesamiento de un documento
+        El avance se consulta en /progreso/
+        """
         documento = self.get_object()
+        trabajo = encolar_procesamiento(documento, request.user)
+        return Response(estado_trabajo(trabajo), status=status.HTTP_202_ACCEPTED)
 
-        procesador = ProcesadorDocumentos()
-        resultado = procesador.procesar_documento(documento)
-
-        if resultado['success']:
-            return Response({
-                'mensaje': 'Documento procesado exitosamente',
-                'fragmentos_creados': resultado['fragmentos_creados'],
-                'texto_extraido': resultado['texto_extraido'],
-            })
-        else:
-            return Response({
-                'error': resultado['error']
-            }, status=status.HTTP_400_BAD_REQUEST)
+    @action(detail=True, methods=['get'])
+    def progreso(self, request, pk=None):
+        """Avance de la ingesta más reciente del documento (fragmentos con embedding)"""
+        documento = self.get_object()
+        trabajo = TrabajoSegundoPlano.objects.filter(
+            tipo=TIPO_TRABAJO_INGESTA_DOCUMENTO,
+            referencia_id=str(documento.id)
+        ).order_by('-created_at').first()
+        if not trabajo:
+            return Response(
+                {'error': 'No hay procesamientos registrados para este documento'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response({
+            **estado_trabajo(trabajo),
+            'estado_procesamiento': documento.estado_procesamiento,
+        })
 
     @action(detail=False, methods=['get'])
     def estadisticas(self, request):
@@ -203,10 +218,16 @@ class DocumentoViewSet(viewsets.ModelViewSet):
         for tipo in TipoDocumento:
             por_tipo[tipo.label] = qs.filter(tipo=tipo.value).count()
 
+        por_estado = {
+            estado.value: qs.filter(estado_procesamiento=estado.value).count()
+            for estado in EstadoProcesamiento
+        }
+
         return Response({
             'total': total,
             'procesados': procesados,
             'pendientes': total - procesados,
             'con_error': con_error,
             'por_tipo': por_tipo,
+            'por_estado': por_estado,
         })
@@ -7,6 +7,10 @@ class IntegracionesConfig(AppConfig):
     verbose_name = 'Integraciones Externas'
 
     def ready(self):
+        from apps.core.trabajos import registrar_tipo_trabajo
+        from .timbrado import TIPO_TRABAJO_TIMBRADO_NOMINA, ejecutar_trabajo_timbrado
+        registrar_tipo_trabajo(TIPO_TRABAJO_TIMBRADO_NOMINA, ejecutar_trabajo_timbrado)
+
         try:
             from .acciones_ia import registrar_acciones
             registrar_acciones()
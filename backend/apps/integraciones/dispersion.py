@@ -0,0 +1,250 @@
+"""
+Generador de archivos de dispersión bancaria
+
+Cada ConfiguracionBanco.formato_layout tiene un layout registrado en
+LAYOUTS_DISPERSION: CSV (SPEI estándar) o ancho fijo por banco. Los
+layouts con campos distintos a los de aquí se registran con
+registrar_layout_dispersion().
+
+El archivo se arma sin cargar el periodo en memoria:
+- Totales (registros e importe) con un aggregate en SQL, antes de
+  escribir, porque los encabezados los necesitan.
+- Recibos con values_list().iterator(): solo vive un bloque del cursor.
+- Cada registro se escribe al vuelo a un archivo temporal que después se
+  copia al storage configurado (local o S3) por bloques.
+"""
+import csv
+import io
+import tempfile
+import unicodedata
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional, Tuple
+
+from django.core.files import File
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+TAMANO_BLOQUE_DISPERSION = 2000
+
+# Columnas leídas por recibo (en este orden)
+CAMPOS_REGISTRO = (
+    'empleado__rfc',
+    'empleado__nombre',
+    'empleado__apellido_paterno',
+    'empleado__apellido_materno',
+    'empleado__banco',
+    'empleado__clabe',
+    'neto_a_pagar',
+)
+
+
+def texto_banco(valor: str, largo: int = None) -> str:
+    """Mayúsculas sin acentos ni caracteres fuera de ASCII"""
+    texto = unicodedata.normalize('NFKD', valor or '').encode('ascii', 'ignore').decode('ascii')
+    texto = ' '.join(texto.upper().split())
+    return texto[:largo] if largo else texto
+
+
+def _registro(fila: Tuple, periodo) -> Dict:
+    rfc, nombre, paterno, materno, banco, clabe, neto = fila
+    return {
+        'rfc': rfc or '',
+        'beneficiario': texto_banco(f"{nombre} {paterno} {materno or ''}"),
+        'banco': texto_banco(banco),
+        'clabe': clabe,
+        'importe': neto,
+        'centavos': int(neto * 100),
+        'referencia': f"{periodo.año % 100:02d}{periodo.numero_periodo:02d}",
+        'concepto': texto_banco(f"NOMINA {periodo.get_tipo_periodo_display()} {periodo.numero_periodo}/{periodo.año}"),
+    }
+
+
+class LayoutCSV:
+    """Layout delimitado, con renglón de encabezados"""
+    extension = 'csv'
+    columnas = ['consecutivo', 'clabe', 'beneficiario', 'rfc', 'importe', 'referencia', 'concepto']
+
+    def __init__(self, separador: str = ','):
+        self.separador = separador
+
+    def _linea(self, valores: List) -> str:
+        salida = io.StringIO()
+        csv.writer(salida, delimiter=self.separador, lineterminator='\r\n').writerow(valores)
+        return salida.getvalue()
+
+    def encabezado(self, config_banco, periodo, totales: Dict) -> str:
+        return self._linea(self.columnas)
+
+    def registro(self, consecutivo: int, registro: Dict) -> str:
+        valores = dict(registro, consecutivo=consecutivo, importe=f"{registro['importe']:.2f}")
+        return self._linea([valores[c] for c in self.columnas])
+
+    def pie(self, config_banco, periodo, totales: Dict) -> str:
+        return ''
+
+
+class LayoutAnchoFijo:
+    """
+    Layout de ancho fijo: encabezado 'H', detalle 'D' y totales 'T'
+    campos: (nombre, ancho, numérico); numéricos a la derecha con ceros
+    """
+    extension = 'txt'
+
+    def __init__(self, campos: List[Tuple[str, int, bool]]):
+        self.campos = campos
+
+    @staticmethod
+    def _campo(valor, ancho: int, numerico: bool) -> str:
+        if numerico:
+            return str(valor).rjust(ancho, '0')[-ancho:]
+        return texto_banco(str(valor), ancho).ljust(ancho)
+
+    def encabezado(self, config_banco, periodo, totales: Dict) -> str:
+        return ''.join([
+            'H',
+            self._campo(config_banco.clabe_origen, 18, True),
+            timezone.localdate().strftime('%Y%m%d'),
+            periodo.fecha_pago.strftime('%Y%m%d'),
+            self._campo(totales['total_registros'], 7, True),
+            self._campo(int(totales['total_importe'] * 100), 18, True),
+        ]) + '\r\n'
+
+    def registro(self, consecutivo: int, registro: Dict) -> str:
+        valores = dict(registro, consecutivo=consecutivo, importe=registro['centavos'])
+        return 'D' + ''.join(
+            self._campo(valores[nombre], ancho, numerico) for nombre, ancho, numerico in self.campos
+        ) + '\r\n'
+
+    def pie(self, config_banco, periodo, totales: Dict) -> str:
+        return ''.join([
+            'T',
+            self._campo(totales['total_registros'], 7, True),
+            self._campo(int(totales['total_importe'] * 100), 18, True),
+        ]) + '\r\n'
+
+
+CAMPOS_ANCHO_FIJO = [
+    ('consecutivo', 7, True),
+    ('clabe', 18, True),
+    ('importe', 15, True),
+    ('beneficiario', 40, False),
+    ('rfc', 13, False),
+    ('referencia', 7, True),
+    ('concepto', 30, False),
+]
+
+LAYOUTS_DISPERSION = {
+    'spei': LayoutCSV(),
+    'banamex': LayoutAnchoFijo(CAMPOS_ANCHO_FIJO),
+    'bancomer': LayoutAnchoFijo(CAMPOS_ANCHO_FIJO),
+    'santander': LayoutAnchoFijo(CAMPOS_ANCHO_FIJO),
+    'banorte': LayoutAnchoFijo(CAMPOS_ANCHO_FIJO),
+    'hsbc': LayoutAnchoFijo(CAMPOS_ANCHO_FIJO),
+}
+
+
+def registrar_layout_dispersion(formato: str, layout) -> None:
+    """Registra (o reemplaza) el layout de un formato de banco"""
+    LAYOUTS_DISPERSION[formato] = layout
+
+
+def recibos_dispersables(periodo):
+    """Recibos del periodo con neto positivo y CLABE del empleado"""
+    from apps.nomina.models import ReciboNomina
+
+    return (
+        ReciboNomina.objects.filter(periodo=periodo, neto_a_pagar__gt=0)
+        .exclude(estado=ReciboNomina.Estado.CANCELADO)
+        .exclude(Q(empleado__clabe='') | Q(empleado__clabe__isnull=True))
+    )
+
+
+def totales_dispersion(periodo) -> Dict:
+    """Registros, importe y recibos sin CLABE, calculados en SQL"""
+    from apps.nomina.models import ReciboNomina
+
+    totales = recibos_dispersables(periodo).aggregate(
+        total_registros=Count('id'), total_importe=Sum('neto_a_pagar')
+    )
+    totales['total_importe'] = totales['total_importe'] or Decimal('0')
+    totales['sin_clabe'] = (
+        ReciboNomina.objects.filter(periodo=periodo, neto_a_pagar__gt=0)
+        .exclude(estado=ReciboNomina.Estado.CANCELADO)
+        .filter(Q(empleado__clabe='') | Q(empleado__clabe__isnull=True))
+        .count()
+    )
+    return totales
+
+
+def obtener_config_banco(empresa):
+    """ConfiguracionBanco activa de la empresa (o None)"""
+    from .models import ConfiguracionBanco
+
+    return ConfiguracionBanco.objects.filter(
+        configuracion__empresa=empresa,
+        configuracion__activo=True,
+    ).select_related('configuracion').first()
+
+
+def generar_archivo_dispersion(periodo, config_banco=None,
+                               progreso: Optional[Callable] = None,
+                               tamano_bloque: int = TAMANO_BLOQUE_DISPERSION):
+    """
+    Genera el ArchivoDispersion del periodo con el layout del banco
+    Lanza ValueError si no hay configuración, layout o registros
+    El archivo retornado trae sin_clabe: recibos omitidos por falta de CLABE
+    """
+    from .models import ArchivoDispersion
+
+    config_banco = config_banco or obtener_config_banco(periodo.empresa)
+    if config_banco is None:
+        raise ValueError('La empresa no tiene configuración bancaria activa')
+
+    layout = LAYOUTS_DISPERSION.get(config_banco.formato_layout)
+    if layout is None:
+        raise ValueError(f'No hay layout para el formato {config_banco.formato_layout}')
+
+    totales = totales_dispersion(periodo)
+    if not totales['total_registros']:
+        raise ValueError('No hay recibos con neto a pagar y CLABE registrada')
+
+    filas = (
+        recibos_dispersables(periodo)
+        .order_by('empleado__apellido_paterno', 'empleado__nombre', 'id')
+        .values_list(*CAMPOS_REGISTRO)
+        .iterator(chunk_size=tamano_bloque)
+    )
+
+    nombre_archivo = (
+        f"dispersion_{periodo.empresa.rfc}_{periodo.año}_{periodo.tipo_periodo}_"
+        f"{periodo.numero_periodo:02d}_{config_banco.formato_layout}.{layout.extension}"
+    )
+
+    with tempfile.TemporaryFile(mode='w+b') as temporal:
+        escritor = io.TextIOWrapper(temporal, encoding='ascii', errors='replace', newline='')
+        escritor.write(layout.encabezado(config_banco, periodo, totales))
+        consecutivo = 0
+        for fila in filas:
+            consecutivo += 1
+            escritor.write(layout.registro(consecutivo, _registro(fila, periodo)))
+            if progreso and consecutivo % tamano_bloque == 0:
+                progreso(consecutivo, totales['total_registros'])
+        escritor.write(layout.pie(config_banco, periodo, totales))
+        escritor.flush()
+        temporal.seek(0)
+
+        archivo = ArchivoDispersion(
+            config_banco=config_banco,
+            periodo_nomina=periodo,
+            nombre_archivo=nombre_archivo,
+            total_registros=totales['total_registros'],
+            total_importe=totales['total_importe'],
+        )
+        archivo.archivo.save(nombre_archivo, File(temporal, name=nombre_archivo), save=False)
+        escritor.detach()
+    archivo.save()
+
+    if progreso:
+        progreso(consecutivo, totales['total_registros'])
+    archivo.sin_clabe = totales['sin_clabe']
+    return archivo
@@ -0,0 +1,35 @@
+"""
+Levanta el PAC simulado para desarrollo local.
+
+Uso:
+    python manage.py pac_simulado --puerto 8765 --latencia 0.05 --fallas 0.02
+
+Configura el proveedor PAC con api_url_sandbox = http://127.0.0.1:8765
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.integraciones.pac_simulado import ServidorPACSimulado
+
+
+class Command(BaseCommand):
+    help = 'PAC simulado local para pruebas de timbrado'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--puerto', type=int, default=8765)
+        parser.add_argument('--latencia', type=float, default=0.05, help='Segundos por solicitud')
+        parser.add_argument('--fallas', type=float, default=0.0, help='Tasa de respuestas 503 (0-1)')
+
+    def handle(self, *args, **options):
+        pac = ServidorPACSimulado(
+            options['host'], options['puerto'], options['latencia'], options['fallas']
+        ).iniciar()
+        self.stdout.write(self.style.SUCCESS(f'PAC simulado escuchando en {pac.url}'))
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pac.detener()
+            self.stdout.write(f'{pac.solicitudes} solicitudes, {len(pac.timbres)} timbres')
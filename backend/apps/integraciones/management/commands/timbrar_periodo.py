@@ -0,0 +1,71 @@
+"""
+Management command para timbrar los recibos de un periodo.
+
+Con --pac-simulado levanta el PAC local (pac_simulado.py) y timbra contra
+él: sirve de benchmark del pipeline sin tocar un PAC real.
+
+Uso:
+    python manage.py timbrar_periodo <periodo_id>
+    python manage.py timbrar_periodo <periodo_id> --concurrencia 32
+    python manage.py timbrar_periodo <periodo_id> --pac-simulado --latencia 0.1 --fallas 0.05
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.integraciones.timbrado import (
+    ClientePAC, timbrar_periodo, CONCURRENCIA_TIMBRADO, TAMANO_BLOQUE_TIMBRADO
+)
+
+
+class Command(BaseCommand):
+    help = 'Timbra los recibos calculados de un periodo (reanudable)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('periodo_id', help='ID del periodo')
+        parser.add_argument(
+            '--concurrencia',
+            type=int,
+            default=CONCURRENCIA_TIMBRADO,
+            help=f'Llamadas simultaneas al PAC (default: {CONCURRENCIA_TIMBRADO})'
+        )
+        parser.add_argument(
+            '--bloque',
+            type=int,
+            default=TAMANO_BLOQUE_TIMBRADO,
+            help=f'Recibos por bloque guardado (default: {TAMANO_BLOQUE_TIMBRADO})'
+        )
+        parser.add_argument(
+            '--pac-simulado',
+            action='store_true',
+            help='Timbra contra un PAC simulado local'
+        )
+        parser.add_argument('--latencia', type=float, default=0.05, help='Latencia del PAC simulado (s)')
+        parser.add_argument('--fallas', type=float, default=0.0, help='Tasa de 503 del PAC simulado')
+
+    def handle(self, *args, **options):
+        def progreso(procesados, total):
+            self.stdout.write(f'  {procesados}/{total}')
+
+        parametros = dict(
+            concurrencia=options['concurrencia'],
+            tamano_bloque=options['bloque'],
+            progreso=progreso,
+        )
+
+        if options['pac_simulado']:
+            from apps.integraciones.pac_simulado import ServidorPACSimulado
+
+            with ServidorPACSimulado(latencia=options['latencia'], tasa_fallas=options['fallas']) as pac:
+                cliente = ClientePAC(pac.url, concurrencia=options['concurrencia'])
+                try:
+                    resultado = timbrar_periodo(options['periodo_id'], cliente=cliente, **parametros)
+                finally:
+                    cliente.cerrar()
+        else:
+            resultado = timbrar_periodo(options['periodo_id'], **parametros)
+
+        if resultado.get('error'):
+            raise CommandError(resultado['error'])
+
+        self.stdout.write(json.dumps(resultado, indent=2, ensure_ascii=False))
@@ -0,0 +1,129 @@
+"""
+PAC simulado para pruebas y benchmarks de timbrado
+
+Servidor HTTP local que implementa el protocolo que usa ClientePAC:
+    POST /timbrar  {'xml': <base64>, 'referencia': <id>}
+    Header Idempotency-Key: misma llave -> mismo UUID
+
+Latencia y tasa de fallas (503) configurables para ejercitar la
+concurrencia y los reintentos. No valida ni sella el XML: agrega un
+TimbreFiscalDigital de mentira dentro del Complemento.
+
+Uso:
+    with ServidorPACSimulado(latencia=0.05, tasa_fallas=0.1) as pac:
+        cliente = ClientePAC(pac.url)
+    python manage.py pac_simulado --puerto 8765
+"""
+import base64
+import json
+import random
+import threading
+import time
+import uuid
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _ManejadorPAC(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, formato, *args):
+        pass
+
+    def _responder(self, codigo: int, datos: dict):
+        cuerpo = json.dumps(datos).encode('utf-8')
+        self.send_response(codigo)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def do_POST(self):
+        servidor = self.server
+        largo = int(self.headers.get('Content-Length', 0))
+        cuerpo = self.rfile.read(largo)
+
+        if self.path.rstrip('/') != '/timbrar':
+            return self._responder(404, {'error': 'Ruta no encontrada'})
+
+        if servidor.latencia:
+            time.sleep(servidor.latencia)
+
+        with servidor.lock:
+            servidor.solicitudes += 1
+            falla = servidor.rng.random() < servidor.tasa_fallas
+        if falla:
+            return self._responder(503, {'error': 'PAC saturado, reintente'})
+
+        try:
+            datos = json.loads(cuerpo)
+            xml = base64.b64decode(datos['xml']).decode('utf-8')
+        except (ValueError, KeyError):
+            return self._responder(400, {'error': 'Solicitud inválida'})
+
+        llave = self.headers.get('Idempotency-Key') or datos.get('referencia') or ''
+        with servidor.lock:
+            timbre = servidor.timbres.get(llave)
+            if timbre is None:
+                timbre = {
+                    'uuid': str(uuid.uuid4()).upper(),
+                    'fecha_timbrado': datetime.now().replace(microsecond=0).isoformat(),
+                }
+                servidor.timbres[llave] = timbre
+
+        tfd = (
+            f'<tfd:TimbreFiscalDigital xmlns:tfd="http://www.sat.gob.mx/TimbreFiscalDigital" '
+            f'Version="1.1" UUID="{timbre["uuid"]}" FechaTimbrado="{timbre["fecha_timbrado"]}" '
+            f'RfcProvCertif="SPR190613I52" SelloCFD="SIMULADO" NoCertificadoSAT="00000000000000000000" '
+            f'SelloSAT="SIMULADO"/>'
+        )
+        timbrado = xml.replace('</cfdi:Complemento>', f'{tfd}</cfdi:Complemento>', 1)
+        self._responder(200, {
+            'uuid': timbre['uuid'],
+            'fecha_timbrado': timbre['fecha_timbrado'],
+            'xml': base64.b64encode(timbrado.encode('utf-8')).decode('ascii'),
+        })
+
+
+class ServidorPACSimulado:
+    """PAC simulado en un hilo; puerto 0 = puerto libre"""
+
+    def __init__(self, host: str = '127.0.0.1', puerto: int = 0, latencia: float = 0.0,
+                 tasa_fallas: float = 0.0, semilla: int = None):
+        self.servidor = ThreadingHTTPServer((host, puerto), _ManejadorPAC)
+        self.servidor.daemon_threads = True
+        self.servidor.latencia = latencia
+        self.servidor.tasa_fallas = tasa_fallas
+        self.servidor.rng = random.Random(semilla)
+        self.servidor.lock = threading.Lock()
+        self.servidor.timbres = {}
+        self.servidor.solicitudes = 0
+        self.hilo = None
+
+    @property
+    def url(self) -> str:
+        host, puerto = self.servidor.server_address[:2]
+        return f'http://{host}:{puerto}'
+
+    @property
+    def solicitudes(self) -> int:
+        return self.servidor.solicitudes
+
+    @property
+    def timbres(self) -> dict:
+        return self.servidor.timbres
+
+    def iniciar(self):
+        self.hilo = threading.Thread(target=self.servidor.serve_forever, daemon=True)
+        self.hilo.start()
+        return self
+
+    def detener(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *args):
+        self.detener()
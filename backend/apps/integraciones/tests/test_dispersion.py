@@ -0,0 +1,72 @@
+"""
+Tests del generador de dispersión bancaria
+"""
+from decimal import Decimal
+
+import pytest
+
+from apps.integraciones.dispersion import generar_archivo_dispersion
+from apps.nomina.models import ReciboNomina
+from apps.nomina.services import procesar_nomina_periodo
+
+
+@pytest.fixture
+def config_banco(empresa):
+    from apps.integraciones.models import (
+        ProveedorIntegracion, ConfiguracionIntegracion, ConfiguracionBanco
+    )
+    proveedor = ProveedorIntegracion.objects.create(nombre='Banco Prueba', tipo='banco')
+    configuracion = ConfiguracionIntegracion.objects.create(empresa=empresa, proveedor=proveedor)
+    return ConfiguracionBanco.objects.create(
+        configuracion=configuracion,
+        cuenta_origen='0123456789',
+        clabe_origen='012180001234567897',
+        formato_layout='banorte',
+    )
+
+
+@pytest.fixture
+def periodo_calculado(periodo, crear_empleados, settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    crear_empleados(4, clabe='012180009876543210')
+    crear_empleados(1)
+    procesar_nomina_periodo(periodo.id, None)
+    return periodo
+
+
+def _lineas(archivo):
+    archivo.archivo.open('rb')
+    try:
+        return archivo.archivo.read().decode('ascii').split('\r\n')[:-1]
+    finally:
+        archivo.archivo.close()
+
+
+@pytest.mark.django_db
+def test_ancho_fijo_totales_en_sql(periodo_calculado, config_banco):
+    archivo = generar_archivo_dispersion(periodo_calculado, tamano_bloque=2)
+
+    recibos = ReciboNomina.objects.filter(periodo=periodo_calculado, empleado__clabe__gt='')
+    assert archivo.total_registros == 4
+    assert archivo.total_importe == sum(r.neto_a_pagar for r in recibos)
+    assert archivo.sin_clabe == 1
+
+    lineas = _lineas(archivo)
+    assert [l[0] for l in lineas] == ['H', 'D', 'D', 'D', 'D', 'T']
+    assert len({len(l) for l in lineas if l[0] == 'D'}) == 1
+    centavos = sum(int(l[26:41]) for l in lineas if l[0] == 'D')
+    assert Decimal(centavos) / 100 == archivo.total_importe
+    assert lineas[-1] == 'T' + '4'.rjust(7, '0') + str(centavos).rjust(18, '0')
+
+
+@pytest.mark.django_db
+def test_csv_spei(periodo_calculado, config_banco):
+    config_banco.formato_layout = 'spei'
+    config_banco.save()
+
+    archivo = generar_archivo_dispersion(periodo_calculado)
+
+    lineas = _lineas(archivo)
+    assert archivo.nombre_archivo.endswith('.csv')
+    assert lineas[0].startswith('consecutivo,clabe')
+    assert len(lineas) == 5
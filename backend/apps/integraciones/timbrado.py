@@ -0,0 +1,389 @@
+"""
+Pipeline de timbrado CFDI de nómina
+
+Timbra los recibos de un periodo contra el PAC de la empresa:
+- Los recibos se leen de la BD en bloques; el XML se arma en el hilo
+  principal y solo las llamadas HTTP van al pool de hilos (concurrencia
+  acotada). Las escrituras a la BD se hacen por bloque, en el hilo
+  principal, con bulk_update.
+- Cada llamada se reintenta con backoff exponencial y jitter ante
+  errores transitorios (timeouts, 429, 5xx).
+- Idempotente: solo se toman recibos calculados sin uuid_cfdi, y cada
+  solicitud lleva Idempotency-Key = id del recibo, así que si el proceso
+  se corta después de timbrar y antes de guardar, al reanudar el PAC
+  devuelve el mismo UUID en lugar de timbrar dos veces.
+- Reanudable: el avance queda guardado al terminar cada bloque; volver a
+  ejecutar continúa con los pendientes.
+
+El sellado con el CSD lo hace el PAC (modalidad timbrado + sellado).
+El protocolo HTTP es el de pac_simulado.py:
+    POST {url}/timbrar  {'xml': <base64>, 'referencia': <recibo_id>}
+    200 -> {'uuid', 'fecha_timbrado', 'xml': <base64 timbrado>}
+"""
+import base64
+import logging
+import random
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+TIPO_TRABAJO_TIMBRADO_NOMINA = 'timbrado_nomina'
+TAMANO_BLOQUE_TIMBRADO = 200
+CONCURRENCIA_TIMBRADO = 16
+MAX_INTENTOS_TIMBRADO = 4
+ESPERA_BASE_SEGUNDOS = 0.5
+TIMEOUT_PAC_SEGUNDOS = 30
+
+NS_CFDI = 'http://www.sat.gob.mx/cfd/4'
+NS_NOMINA = 'http://www.sat.gob.mx/nomina12'
+ET.register_namespace('cfdi', NS_CFDI)
+ET.register_namespace('nomina12', NS_NOMINA)
+
+
+class ErrorPAC(Exception):
+    """Error definitivo del PAC (validación del XML, credenciales)"""
+
+
+class ErrorPACTransitorio(ErrorPAC):
+    """Error que vale la pena reintentar (timeout, 429, 5xx)"""
+
+
+# ============ CLIENTE PAC ============
+
+class ClientePAC:
+    """Cliente HTTP del PAC, seguro para usarse desde varios hilos"""
+
+    def __init__(self, url_base: str, api_key: str = '', usuario: str = '', password: str = '',
+                 concurrencia: int = CONCURRENCIA_TIMBRADO, timeout: float = TIMEOUT_PAC_SEGUNDOS):
+        import httpx
+
+        headers = {'Authorization': f'Bearer {api_key}'} if api_key else {}
+        self.http = httpx.Client(
+            base_url=url_base.rstrip('/'),
+            headers=headers,
+            auth=(usuario, password) if usuario else None,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=concurrencia, max_keepalive_connections=concurrencia),
+        )
+
+    @classmethod
+    def desde_configuracion(cls, config_pac, concurrencia: int = CONCURRENCIA_TIMBRADO):
+        configuracion = config_pac.configuracion
+        proveedor = configuracion.proveedor
+        url = proveedor.api_url_sandbox if configuracion.modo_sandbox else proveedor.api_url_produccion
+        if not url:
+            raise ErrorPAC(f'El proveedor {proveedor.nombre} no tiene URL configurada')
+        return cls(url, configuracion.api_key, configuracion.usuario, configuracion.password,
+                   concurrencia=concurrencia)
+
+    def timbrar(self, xml: str, referencia: str) -> Dict:
+        import httpx
+
+        try:
+            respuesta = self.http.post(
+                '/timbrar',
+                json={'xml': base64.b64encode(xml.encode('utf-8')).decode('ascii'), 'referencia': referencia},
+                headers={'Idempotency-Key': referencia},
+            )
+        except httpx.TransportError as e:
+            raise ErrorPACTransitorio(f'Error de conexión con el PAC: {e}') from e
+
+        if respuesta.status_code == 429 or respuesta.status_code >= 500:
+            raise ErrorPACTransitorio(f'PAC respondió {respuesta.status_code}')
+        if respuesta.status_code != 200:
+            raise ErrorPAC(f'PAC rechazó el CFDI ({respuesta.status_code}): {respuesta.text[:300]}')
+
+        datos = respuesta.json()
+        # FechaTimbrado del SAT viene en hora local sin zona
+        fecha = datetime.fromisoformat(datos['fecha_timbrado'])
+        if timezone.is_naive(fecha):
+            fecha = timezone.make_aware(fecha)
+        return {
+            'uuid': datos['uuid'],
+            'fecha_timbrado': fecha,
+            'xml': base64.b64decode(datos['xml']).decode('utf-8'),
+        }
+
+    def cerrar(self):
+        self.http.close()
+
+
+def timbrar_con_reintentos(cliente: ClientePAC, xml: str, referencia: str,
+                           max_intentos: int = MAX_INTENTOS_TIMBRADO,
+                           espera_base: float = None) -> Dict:
+    """Timbra con backoff exponencial y jitter ante errores transitorios"""
+    espera_base = ESPERA_BASE_SEGUNDOS if espera_base is None else espera_base
+    for intento in range(1, max_intentos + 1):
+        try:
+            resultado = cliente.timbrar(xml, referencia)
+            resultado['intentos'] = intento
+            return resultado
+        except ErrorPACTransitorio:
+            if intento == max_intentos:
+                raise
+            time.sleep(espera_base * (2 ** (intento - 1)) * (1 + random.random()))
+
+
+# ============ XML CFDI NÓMINA ============
+
+def _importe(valor) -> str:
+    return f"{Decimal(valor or 0):.2f}"
+
+
+def generar_xml_nomina(recibo, config_pac, folio: int) -> str:
+    """
+    CFDI 4.0 con complemento de nómina 1.2, sin sello
+    recibo debe traer empleado, periodo y detalles__concepto precargados
+    """
+    periodo = recibo.periodo
+    empleado = recibo.empleado
+    percepciones = [d for d in recibo.detalles.all() if d.concepto.tipo == 'percepcion']
+    deducciones = [d for d in recibo.detalles.all() if d.concepto.tipo == 'deduccion']
+    total_deducciones = recibo.total_deducciones or Decimal('0')
+
+    comprobante = ET.Element(f'{{{NS_CFDI}}}Comprobante', {
+        'Version': '4.0',
+        'Serie': config_pac.serie_nomina,
+        'Folio': str(folio),
+        'Fecha': timezone.localtime().strftime('%Y-%m-%dT%H:%M:%S'),
+        'SubTotal': _importe(recibo.total_percepciones + recibo.total_otros_pagos),
+        'Descuento': _importe(total_deducciones),
+        'Moneda': 'MXN',
+        'Total': _importe(recibo.neto_a_pagar),
+        'TipoDeComprobante': 'N',
+        'Exportacion': '01',
+        'MetodoPago': 'PUE',
+        'LugarExpedicion': config_pac.lugar_expedicion,
+    })
+    ET.SubElement(comprobante, f'{{{NS_CFDI}}}Emisor', {
+        'Rfc': config_pac.rfc_emisor,
+        'Nombre': periodo.empresa.razon_social,
+        'RegimenFiscal': config_pac.regimen_fiscal,
+    })
+    ET.SubElement(comprobante, f'{{{NS_CFDI}}}Receptor', {
+        'Rfc': empleado.rfc,
+        'Nombre': empleado.nombre_completo.upper(),
+        'DomicilioFiscalReceptor': empleado.direccion_cp or config_pac.lugar_expedicion,
+        'RegimenFiscalReceptor': '605',
+        'UsoCFDI': 'CN01',
+    })
+    conceptos = ET.SubElement(comprobante, f'{{{NS_CFDI}}}Conceptos')
+    ET.SubElement(conceptos, f'{{{NS_CFDI}}}Concepto', {
+        'ClaveProdServ': '84111505',
+        'Cantidad': '1',
+        'ClaveUnidad': 'ACT',
+        'Descripcion': 'Pago de nómina',
+        'ValorUnitario': _importe(recibo.total_percepciones + recibo.total_otros_pagos),
+        'Importe': _importe(recibo.total_percepciones + recibo.total_otros_pagos),
+        'Descuento': _importe(total_deducciones),
+        'ObjetoImp': '01',
+    })
+
+    complemento = ET.SubElement(comprobante, f'{{{NS_CFDI}}}Complemento')
+    nomina = ET.SubElement(complemento, f'{{{NS_NOMINA}}}Nomina', {
+        'Version': '1.2',
+        'TipoNomina': 'O',
+        'FechaPago': periodo.fecha_pago.isoformat(),
+        'FechaInicialPago': periodo.fecha_inicio.isoformat(),
+        'FechaFinalPago': periodo.fecha_fin.isoformat(),
+        'NumDiasPagados': f"{recibo.dias_pagados:.3f}",
+        'TotalPercepciones': _importe(recibo.total_percepciones),
+        'TotalDeducciones': _importe(total_deducciones),
+    })
+    ET.SubElement(nomina, f'{{{NS_NOMINA}}}Receptor', {
+        'Curp': empleado.curp,
+        'NumSeguridadSocial': empleado.nss_imss,
+        'FechaInicioRelLaboral': empleado.fecha_ingreso.isoformat(),
+        'TipoContrato': '01',
+        'TipoRegimen': '02',
+        'NumEmpleado': str(empleado.pk)[:15],
+        'PeriodicidadPago': {'semanal': '02', 'quincenal': '04', 'mensual': '05'}.get(periodo.tipo_periodo, '99'),
+        'SalarioDiarioIntegrado': _importe(recibo.salario_base_cotizacion),
+        'ClaveEntFed': 'DIF',
+    })
+
+    if percepciones:
+        nodo = ET.SubElement(nomina, f'{{{NS_NOMINA}}}Percepciones', {
+            'TotalSueldos': _importe(recibo.total_percepciones),
+            'TotalGravado': _importe(recibo.total_percepciones_gravadas),
+            'TotalExento': _importe(recibo.total_percepciones_exentas),
+        })
+        for detalle in percepciones:
+            ET.SubElement(nodo, f'{{{NS_NOMINA}}}Percepcion', {
+                'TipoPercepcion': detalle.concepto.codigo_sat or '038',
+                'Clave': detalle.concepto.codigo_interno,
+                'Concepto': detalle.concepto.nombre,
+                'ImporteGravado': _importe(detalle.importe_gravado),
+                'ImporteExento': _importe(detalle.importe_exento),
+            })
+
+    if deducciones:
+        nodo = ET.SubElement(nomina, f'{{{NS_NOMINA}}}Deducciones', {
+            'TotalImpuestosRetenidos': _importe(recibo.isr_retenido),
+            'TotalOtrasDeducciones': _importe(total_deducciones - recibo.isr_retenido),
+        })
+        for detalle in deducciones:
+            ET.SubElement(nodo, f'{{{NS_NOMINA}}}Deduccion', {
+                'TipoDeduccion': detalle.concepto.codigo_sat or '004',
+                'Clave': detalle.concepto.codigo_interno,
+                'Concepto': detalle.concepto.nombre,
+                'Importe': _importe(detalle.importe_total),
+            })
+
+    return ET.tostring(comprobante, encoding='unicode', xml_declaration=True)
+
+
+# ============ PIPELINE ============
+
+def obtener_config_pac(empresa):
+    """ConfiguracionPAC activa de la empresa (o None)"""
+    from .models import ConfiguracionPAC
+
+    return ConfiguracionPAC.objects.filter(
+        configuracion__empresa=empresa,
+        configuracion__activo=True,
+    ).select_related('configuracion', 'configuracion__proveedor').first()
+
+
+def _reservar_folios(config_pac, cantidad: int) -> int:
+    """Reserva un bloque de folios consecutivos y retorna el primero"""
+    from .models import ConfiguracionPAC
+
+    with transaction.atomic():
+        ConfiguracionPAC.objects.filter(pk=config_pac.pk).update(folio_actual=F('folio_actual') + cantidad)
+        siguiente = ConfiguracionPAC.objects.values_list('folio_actual', flat=True).get(pk=config_pac.pk)
+    return siguiente - cantidad
+
+
+def recibos_por_timbrar(periodo_id, recibo_ids: List = None):
+    from apps.nomina.models import ReciboNomina
+
+    qs = ReciboNomina.objects.filter(
+        periodo_id=periodo_id,
+        estado=ReciboNomina.Estado.CALCULADO,
+        uuid_cfdi='',
+    )
+    if recibo_ids:
+        qs = qs.filter(id__in=recibo_ids)
+    return qs
+
+
+def timbrar_periodo(periodo_id, recibo_ids: List = None, cliente: ClientePAC = None,
+                    concurrencia: int = CONCURRENCIA_TIMBRADO,
+                    max_intentos: int = MAX_INTENTOS_TIMBRADO,
+                    tamano_bloque: int = TAMANO_BLOQUE_TIMBRADO,
+                    progreso: Optional[Callable] = None) -> Dict:
+    """
+    Timbra los recibos pendientes del periodo (o solo recibo_ids)
+    Retorna conteos y los errores definitivos por recibo
+    """
+    from apps.nomina.models import PeriodoNomina, ReciboNomina
+    from apps.nomina.services import actualizar_resumen_periodo
+
+    inicio = time.perf_counter()
+    periodo = PeriodoNomina.objects.select_related('empresa').get(pk=periodo_id)
+    config_pac = obtener_config_pac(periodo.empresa)
+    if config_pac is None:
+        return {'error': 'La empresa no tiene PAC configurado'}
+
+    pendientes = list(recibos_por_timbrar(periodo_id, recibo_ids).order_by('id').values_list('id', flat=True))
+    total = len(pendientes)
+    propio = cliente is None
+    cliente = cliente or ClientePAC.desde_configuracion(config_pac, concurrencia)
+
+    timbrados = 0
+    errores = []
+    intentos_totales = 0
+
+    def timbrar(par):
+        recibo, xml = par
+        try:
+            return recibo, timbrar_con_reintentos(cliente, xml, str(recibo.id), max_intentos), None
+        except ErrorPAC as e:
+            logger.warning(f"No se pudo timbrar el recibo {recibo.id}: {e}")
+            return recibo, None, str(e)
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrencia) as pool:
+            for i in range(0, total, tamano_bloque):
+                ids = pendientes[i:i + tamano_bloque]
+                recibos = list(
+                    recibos_por_timbrar(periodo_id).filter(id__in=ids)
+                    .select_related('empleado', 'periodo', 'periodo__empresa')
+                    .prefetch_related('detalles__concepto')
+                )
+                if not recibos:
+                    continue
+                folio = _reservar_folios(config_pac, len(recibos))
+                pares = [(r, generar_xml_nomina(r, config_pac, folio + n)) for n, r in enumerate(recibos)]
+
+                ahora = timezone.now()
+                exitosos = []
+                for recibo, resultado, error in pool.map(timbrar, pares):
+                    if error:
+                        errores.append({'recibo_id': str(recibo.id), 'error': error})
+                        continue
+                    recibo.uuid_cfdi = resultado['uuid']
+                    recibo.fecha_timbrado = resultado['fecha_timbrado']
+                    recibo.guardar_xml_cfdi(resultado['xml'])
+                    recibo.estado = ReciboNomina.Estado.TIMBRADO
+                    recibo.updated_at = ahora
+                    intentos_totales += resultado['intentos']
+                    exitosos.append(recibo)
+
+                ReciboNomina.objects.bulk_update(
+                    exitosos,
+                    ['uuid_cfdi', 'fecha_timbrado', 'hash_xml_cfdi', 'estado', 'updated_at']
+                )
+                timbrados += len(exitosos)
+                if progreso:
+                    progreso(min(i + tamano_bloque, total), total)
+    finally:
+        if propio:
+            cliente.cerrar()
+
+    if timbrados:
+        actualizar_resumen_periodo(periodo_id)
+
+    pendientes_restantes = ReciboNomina.objects.filter(
+        periodo_id=periodo_id, estado=ReciboNomina.Estado.CALCULADO
+    ).exists()
+    # Solo avanza desde calculado/autorizado: un periodo pagado sigue pagado
+    if not pendientes_restantes and periodo.estado in (
+        PeriodoNomina.Estado.CALCULADO, PeriodoNomina.Estado.AUTORIZADO
+    ):
+        periodo.estado = PeriodoNomina.Estado.TIMBRADO
+        periodo.save(update_fields=['estado', 'updated_at'])
+
+    duracion = time.perf_counter() - inicio
+    return {
+        'periodo_id': str(periodo_id),
+        'total': total,
+        'timbrados': timbrados,
+        'fallidos': len(errores),
+        'reintentos': max(intentos_totales - timbrados, 0),
+        'errores': errores[:100],
+        'periodo_timbrado': not pendientes_restantes,
+        'duracion_segundos': round(duracion, 3),
+        'recibos_por_minuto': round(timbrados / duracion * 60) if duracion else 0,
+    }
+
+
+def ejecutar_trabajo_timbrado(trabajo, progreso: Callable) -> Dict:
+    """Manejador del trabajo en segundo plano de timbrado"""
+    parametros = trabajo.parametros or {}
+    return timbrar_periodo(
+        trabajo.referencia_id,
+        recibo_ids=parametros.get('recibo_ids'),
+        concurrencia=parametros.get('concurrencia', CONCURRENCIA_TIMBRADO),
+        progreso=progreso,
+    )
@@ -449,8 +449,6 @@ def accion_calcular_nomina(usuario, params: Dict, contexto: Dict) -> Dict:
                 'isr_retenido': isr,
                 'cuota_imss_obrera': imss,
                 'uuid_cfdi': '',
-                'xml_cfdi': '',
-                'pdf_cfdi': '',
                 'referencia_pago': '',
             }
         )
@@ -599,8 +597,9 @@ def accion_autorizar_nomina(usuario, params: Dict, contexto: Dict) -> Dict:
 
 
 def accion_generar_dispersion(usuario, params: Dict, contexto: Dict) -> Dict:
-    """Genera dispersión bancaria"""
-    from apps.nomina.models import PeriodoNomina, ReciboNomina
+    """Genera el archivo de dispersión bancaria del periodo"""
+    from apps.nomina.models import PeriodoNomina
+    from apps.integraciones.dispersion import generar_archivo_dispersion
     
     periodo_id = params.get('periodo_id')
     
@@ -608,22 +607,31 @@ def accion_generar_dispersion(usuario, params: Dict, contexto: Dict) -> Dict:
         return {'success': False, 'error': 'Especifica periodo_id'}
     
     try:
-        periodo = PeriodoNomina.objects.get(pk=periodo_id)
+        periodo = PeriodoNomina.objects.select_related('empresa').get(pk=periodo_id)
     except PeriodoNomina.DoesNotExist:
         return {'success': False, 'error': 'Periodo no encontrado'}
     
     if periodo.estado != 'autorizado':
         return {'success': False, 'error': 'La nómina debe estar autorizada'}
     
-    recibos = ReciboNomina.objects.filter(periodo=periodo, neto_a_pagar__gt=0)
-    total = sum(r.neto_a_pagar or Decimal('0') for r in recibos)
+    try:
+        archivo = generar_archivo_dispersion(periodo)
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}
     
     periodo.estado = 'pagado'
-    periodo.save()
+    periodo.save(update_fields=['estado', 'updated_at'])
+    
+    mensaje = f'Dispersión generada: {archivo.total_registros} movimientos por ${archivo.total_importe:,.2f}'
+    if archivo.sin_clabe:
+        mensaje += f'. {archivo.sin_clabe} empleados sin CLABE quedaron fuera'
     
     return {
         'success': True,
-        'mensaje': f'Dispersión generada: {recibos.count()} movimientos por ${total:,.2f}',
-        'movimientos': recibos.count(),
-        'total': float(total),
-    }
\ No newline at end of file
+        'mensaje': mensaje,
+        'archivo_id': str(archivo.id),
+        'nombre_archivo': archivo.nombre_archivo,
+        'movimientos': archivo.total_registros,
+        'total': float(archivo.total_importe),
+        'sin_clabe': archivo.sin_clabe,
+    }
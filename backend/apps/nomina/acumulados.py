@@ -0,0 +1,115 @@
+"""
+Acumulados anuales de nómina por empleado
+
+AcumuladoAnualEmpleado guarda, por empleado y año, la suma de sus recibos
+calculados o timbrados de periodos no cancelados (el mismo criterio del
+ajuste anual). Las consultas del año leen una fila en lugar de sumar
+recibos.
+
+Actualización incremental: solo se re-agregan los empleados del periodo
+que cambió, con tres consultas fijas (GROUP BY, upsert y borrado de los
+que se quedaron sin recibos):
+- al calcular/recalcular un periodo (services._procesar_periodo)
+- al cambiar el estado de un periodo desde o hacia 'cancelado'
+- en escrituras individuales de recibos (signals.py)
+
+El comando reconstruir_acumulados rehace un año completo (backfill); la
+migración 0010 puebla la tabla con los recibos existentes y las lecturas
+agregan al vuelo un año o empleado que todavía no tenga filas.
+"""
+from typing import Dict, Optional
+
+from django.db.models import Count, Sum
+
+
+# Campos sumados del recibo (mismo nombre en el acumulado)
+CAMPOS_ACUMULADOS = (
+    'dias_trabajados',
+    'total_percepciones',
+    'total_percepciones_gravadas',
+    'total_percepciones_exentas',
+    'total_deducciones',
+    'isr_retenido',
+    'subsidio_aplicado',
+    'cuota_imss_obrera',
+    'neto_a_pagar',
+)
+
+
+def _recibos_acumulables(empresa_id, año: int):
+    from .models import ReciboNomina, PeriodoNomina
+
+    return (
+        ReciboNomina.objects.filter(
+            periodo__empresa_id=empresa_id,
+            periodo__año=año,
+            estado__in=[ReciboNomina.Estado.CALCULADO, ReciboNomina.Estado.TIMBRADO],
+        )
+        .exclude(periodo__estado=PeriodoNomina.Estado.CANCELADO)
+    )
+
+
+def actualizar_acumulados(empresa_id, año: int, empleados=None) -> int:
+    """
+    Re-agrega los acumulados del año de los empleados indicados
+    (IDs o queryset de IDs; None = toda la empresa). Devuelve filas escritas
+    """
+    from .models import AcumuladoAnualEmpleado
+
+    recibos = _recibos_acumulables(empresa_id, año)
+    existentes = AcumuladoAnualEmpleado.objects.filter(empresa_id=empresa_id, año=año)
+    if empleados is not None:
+        recibos = recibos.filter(empleado_id__in=empleados)
+        existentes = existentes.filter(empleado_id__in=empleados)
+
+    filas = (
+        recibos.values('empleado_id')
+        .annotate(numero_recibos=Count('id'), **{campo: Sum(campo) for campo in CAMPOS_ACUMULADOS})
+        .order_by()
+    )
+    acumulados = [
+        AcumuladoAnualEmpleado(empresa_id=empresa_id, año=año, **fila)
+        for fila in filas
+    ]
+    AcumuladoAnualEmpleado.objects.bulk_create(
+        acumulados,
+        update_conflicts=True,
+        unique_fields=['empleado', 'año'],
+        update_fields=['numero_recibos', *CAMPOS_ACUMULADOS, 'updated_at'],
+    )
+    # Empleados que se quedaron sin recibos acumulables
+    existentes.exclude(empleado_id__in=recibos.values('empleado_id')).delete()
+    return len(acumulados)
+
+
+def actualizar_acumulados_periodo(periodo) -> int:
+    """Acumulados del año de los empleados con recibo en el periodo"""
+    from .models import ReciboNomina
+
+    empleados = ReciboNomina.objects.filter(periodo_id=periodo.id).values('empleado_id')
+    return actualizar_acumulados(periodo.empresa_id, periodo.año, empleados)
+
+
+def acumulado_empleado(empleado_id, año: int) -> Optional[Dict]:
+    """
+    Acumulados del año de un empleado (una fila) o None
+    Sin fila, se agrega desde sus recibos (recibos anteriores a la tabla)
+    """
+    from .models import AcumuladoAnualEmpleado, ReciboNomina
+
+    filas = AcumuladoAnualEmpleado.objects.filter(empleado_id=empleado_id, año=año).values(
+        'año', 'numero_recibos', *CAMPOS_ACUMULADOS
+    )
+    acumulado = filas.first()
+    if acumulado is not None:
+        return acumulado
+
+    empresa_id = (
+        ReciboNomina.objects.filter(empleado_id=empleado_id, periodo__año=año)
+        .values_list('periodo__empresa_id', flat=True)
+        .first()
+    )
+    if empresa_id is None or not actualizar_acumulados(empresa_id, año, [empleado_id]):
+        return None
+    return filas.first()
+
@@ -7,7 +7,14 @@ from .models import (
     ConceptoNomina,
     ReciboNomina,
     DetalleReciboNomina,
-    IncidenciaNomina
+    IncidenciaNomina,
+    PercepcionVariable,
+    DeduccionVariable,
+    ResumenPeriodoNomina,
+    EjecucionNomina,
+    CostoProyectado,
+    AcumuladoAnualEmpleado,
+    AjusteAnualISR
 )
 
 
@@ -56,4 +63,49 @@ class ReciboNominaAdmin(admin.ModelAdmin):
 class IncidenciaNominaAdmin(admin.ModelAdmin):
     list_display = ['empleado', 'tipo', 'fecha_inicio', 'fecha_fin', 'aplicado']
     list_filter = ['tipo', 'aplicado']
-    search_fields = ['empleado__nombre']
\ No newline at end of file
+    search_fields = ['empleado__nombre']
+
+@admin.register(PercepcionVariable)
+class PercepcionVariableAdmin(admin.ModelAdmin):
+    list_display = ['empleado', 'periodo', 'tipo', 'monto', 'es_gravable']
+    list_filter = ['tipo', 'es_gravable']
+    search_fields = ['empleado__nombre', 'concepto']
+
+@admin.register(DeduccionVariable)
+class DeduccionVariableAdmin(admin.ModelAdmin):
+    list_display = ['empleado', 'tipo', 'tipo_calculo', 'valor', 'saldo_pendiente', 'fecha_inicio', 'fecha_fin', 'activa']
+    list_filter = ['tipo', 'tipo_calculo', 'activa']
+    search_fields = ['empleado__nombre', 'numero_credito']
+
+@admin.register(ResumenPeriodoNomina)
+class ResumenPeriodoNominaAdmin(admin.ModelAdmin):
+    list_display = ['periodo', 'recibos_total', 'recibos_calculado', 'recibos_timbrado', 'total_neto', 'updated_at']
+    list_select_related = ['periodo__empresa']
+    readonly_fields = [f.name for f in ResumenPeriodoNomina._meta.fields]
+
+@admin.register(EjecucionNomina)
+class EjecucionNominaAdmin(admin.ModelAdmin):
+    list_display = ['periodo', 'created_at', 'exitosa', 'empleados', 'recibos_recalculados', 'duracion_segundos', 'consultas_sql', 'segundos_sql', 'filas_escritas']
+    list_filter = ['empresa', 'exitosa', 'forzar']
+    list_select_related = ['periodo__empresa']
+    date_hierarchy = 'created_at'
+    readonly_fields = [f.name for f in EjecucionNomina._meta.fields]
+
+@admin.register(CostoProyectado)
+class CostoProyectadoAdmin(admin.ModelAdmin):
+    list_display = ['empresa', 'año', 'mes', 'departamento', 'concepto', 'importe', 'empleados']
+    list_filter = ['empresa', 'año', 'concepto']
+    readonly_fields = [f.name for f in CostoProyectado._meta.fields]
+
+@admin.register(AcumuladoAnualEmpleado)
+class AcumuladoAnualEmpleadoAdmin(admin.ModelAdmin):
+    list_display = ['empleado', 'año', 'numero_recibos', 'total_percepciones', 'isr_retenido', 'cuota_imss_obrera', 'neto_a_pagar']
+    list_filter = ['empresa', 'año']
+    search_fields = ['empleado__nombre', 'empleado__apellido_paterno']
+    readonly_fields = [f.name for f in AcumuladoAnualEmpleado._meta.fields]
+
+@admin.register(AjusteAnualISR)
+class AjusteAnualISRAdmin(admin.ModelAdmin):
+    list_display = ['empleado', 'año', 'ingresos_gravados', 'isr_anual', 'isr_retenido', 'diferencia', 'resultado']
+    list_filter = ['empresa', 'año', 'resultado']
+    search_fields = ['empleado__nombre', 'empleado__apellido_paterno']
@@ -0,0 +1,136 @@
+"""
+Motor de ajuste anual de ISR (Art. 97 LISR)
+
+Los acumulados por empleado (gravado, ISR retenido, subsidio) se leen de
+la tabla de acumulados anuales (acumulados.py); el resultado se recorre
+con un cursor en bloques de tamano_lote y cada bloque se escribe con
+bulk_create. La memoria no depende de la plantilla: solo vive un bloque.
+
+La tarifa anual (TablaISR periodicidad 'anual', Art. 152) se toma del
+índice compilado de tarifas.py.
+"""
+import time
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional
+
+from django.db import transaction
+from django.utils import timezone
+
+from .tarifas import obtener_tarifa
+
+TAMANO_LOTE_AJUSTE = 2000
+
+
+def calcular_isr_anual(tarifa, ingreso: Decimal) -> Decimal:
+    """ISR anual causado según la tarifa anual compilada"""
+    if ingreso <= 0:
+        return Decimal('0')
+    rango = tarifa.rango_isr(ingreso)
+    excedente = ingreso - rango['limite_inferior']
+    isr = rango['cuota_fija'] + excedente * (rango['porcentaje_excedente'] / 100)
+    return isr.quantize(Decimal('0.01'))
+
+
+def acumulados_anuales(empresa_id, año: int):
+    """
+    QuerySet de acumulados por empleado del año (una fila por empleado)
+    Lee la tabla de acumulados (ver acumulados.py): recibos calculados o
+    timbrados de periodos no cancelados. Si el año aún no tiene filas
+    (recibos anteriores a la tabla) se agrega desde los recibos
+    """
+    from django.db.models import F
+    from .acumulados import actualizar_acumulados
+    from .models import AcumuladoAnualEmpleado
+
+    if not AcumuladoAnualEmpleado.objects.filter(empresa_id=empresa_id, año=año).exists():
+        actualizar_acumulados(empresa_id, año)
+
+    return (
+        AcumuladoAnualEmpleado.objects.filter(empresa_id=empresa_id, año=año)
+        .values('empleado_id', 'numero_recibos', 'isr_retenido', 'subsidio_aplicado')
+        .annotate(ingresos_gravados=F('total_percepciones_gravadas'))
+        .order_by('empleado_id')
+    )
+
+
+def _ajuste_desde_fila(fila: Dict, tarifa, empresa_id, año: int, ahora):
+    from .models import AjusteAnualISR
+
+    cero = Decimal('0')
+    gravado = fila['ingresos_gravados'] or cero
+    retenido = fila['isr_retenido'] or cero
+    isr_anual = calcular_isr_anual(tarifa, gravado)
+    diferencia = isr_anual - retenido
+
+    if diferencia > 0:
+        resultado = AjusteAnualISR.Resultado.A_CARGO
+    elif diferencia < 0:
+        resultado = AjusteAnualISR.Resultado.A_FAVOR
+    else:
+        resultado = AjusteAnualISR.Resultado.SIN_DIFERENCIA
+
+    return AjusteAnualISR(
+        empresa_id=empresa_id,
+        empleado_id=fila['empleado_id'],
+        año=año,
+        numero_recibos=fila['numero_recibos'],
+        ingresos_gravados=gravado,
+        isr_retenido=retenido,
+        subsidio_aplicado=fila['subsidio_aplicado'] or cero,
+        isr_anual=isr_anual,
+        diferencia=diferencia,
+        resultado=resultado,
+        fecha_calculo=ahora,
+    )
+
+
+def calcular_ajuste_anual(empresa_id, año: int, tamano_lote: int = TAMANO_LOTE_AJUSTE,
+                          progreso: Optional[Callable] = None) -> Dict:
+    """
+    Calcula y guarda el ajuste anual de todos los empleados de una empresa
+    Reemplaza los ajustes previos de la empresa y año en una transacción
+    """
+    from .models import AjusteAnualISR
+
+    inicio = time.perf_counter()
+    tarifa = obtener_tarifa(año, 'anual')
+    if not tarifa.tiene_isr:
+        return {'error': f'No hay tabla ISR anual para {año}'}
+
+    ahora = timezone.now()
+    total = 0
+    total_a_cargo = Decimal('0')
+    total_a_favor = Decimal('0')
+    lote: List[AjusteAnualISR] = []
+
+    def guardar_lote():
+        AjusteAnualISR.objects.bulk_create(lote)
+        lote.clear()
+        if progreso:
+            progreso(total)
+
+    with transaction.atomic():
+        AjusteAnualISR.objects.filter(empresa_id=empresa_id, año=año).delete()
+
+        for fila in acumulados_anuales(empresa_id, año).iterator(chunk_size=tamano_lote):
+            ajuste = _ajuste_desde_fila(fila, tarifa, empresa_id, año, ahora)
+            if ajuste.diferencia > 0:
+                total_a_cargo += ajuste.diferencia
+            else:
+                total_a_favor -= ajuste.diferencia
+            lote.append(ajuste)
+            total += 1
+            if len(lote) >= tamano_lote:
+                guardar_lote()
+
+        if lote:
+            guardar_lote()
+
+    return {
+        'empresa_id': str(empresa_id),
+        'año': año,
+        'total_empleados': total,
+        'total_a_cargo': float(total_a_cargo),
+        'total_a_favor': float(total_a_favor),
+        'duracion_segundos': round(time.perf_counter() - inicio, 3),
+    }
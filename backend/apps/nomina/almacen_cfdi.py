@@ -0,0 +1,39 @@
+"""
+Almacén direccionado por contenido para artefactos CFDI (XML y PDF)
+
+Cada artefacto se guarda comprimido con gzip en el storage por defecto
+(local o S3) bajo cfdi/<aa>/<sha256>.gz, donde sha256 es el hash del
+contenido sin comprimir. El recibo solo guarda el hash: los listados ya
+no arrastran el XML ni el PDF y un mismo contenido se guarda una vez.
+"""
+import gzip
+import hashlib
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+PREFIJO_CFDI = 'cfdi'
+
+
+def ruta_artefacto(hash_contenido: str) -> str:
+    return f"{PREFIJO_CFDI}/{hash_contenido[:2]}/{hash_contenido}.gz"
+
+
+def guardar_artefacto(contenido: bytes) -> str:
+    """Guarda el contenido (si no existe ya) y retorna su hash sha256"""
+    hash_contenido = hashlib.sha256(contenido).hexdigest()
+    ruta = ruta_artefacto(hash_contenido)
+    if not default_storage.exists(ruta):
+        comprimido = gzip.compress(contenido, compresslevel=6, mtime=0)
+        default_storage.save(ruta, ContentFile(comprimido))
+    return hash_contenido
+
+
+def leer_artefacto(hash_contenido: str) -> bytes:
+    with default_storage.open(ruta_artefacto(hash_contenido), 'rb') as archivo:
+        return gzip.decompress(archivo.read())
+
+
+def existe_artefacto(hash_contenido: str) -> bool:
+    return bool(hash_contenido) and default_storage.exists(ruta_artefacto(hash_contenido))
+
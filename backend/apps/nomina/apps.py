@@ -7,7 +7,12 @@ class NominaConfig(AppConfig):
     verbose_name = 'Nómina'
     
     def ready(self):
-        """Registra las acciones de IA"""
+        """Registra las acciones de IA, las señales y los trabajos en segundo plano"""
+        from . import signals  # noqa: F401
+        from apps.core.trabajos import registrar_tipo_trabajo
+        from .services import TIPO_TRABAJO_CALCULO_NOMINA, ejecutar_trabajo_calculo_nomina
+        registrar_tipo_trabajo(TIPO_TRABAJO_CALCULO_NOMINA, ejecutar_trabajo_calculo_nomina)
+        
         try:
             from .acciones_ia import registrar_acciones
             registrar_acciones()
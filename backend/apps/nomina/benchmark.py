@@ -0,0 +1,210 @@
+"""
+Benchmark de nómina con empresas sintéticas
+
+Siembra una empresa con N empleados, incidencias (faltas, horas extra,
+bonos, comisiones), percepciones variables del periodo y deducciones
+recurrentes (préstamos, FONACOT) y mide cada etapa del flujo de una
+quincena: cálculo, recálculo sin cambios, resumen del periodo y
+reporte Excel. Por etapa registra tiempo, número y tiempo de consultas
+SQL y pico de memoria (tracemalloc).
+
+Uso desde el comando benchmark_nomina.
+"""
+import random
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class MedidorEtapas:
+    """Acumula métricas por etapa: segundos, consultas SQL y memoria pico"""
+
+    def __init__(self, medir_memoria: bool = True):
+        self.medir_memoria = medir_memoria
+        self.etapas: Dict[str, Dict] = {}
+
+    @contextmanager
+    def etapa(self, nombre: str):
+        if self.medir_memoria:
+            tracemalloc.start()
+        inicio = time.perf_counter()
+        with CaptureQueriesContext(connection) as consultas:
+            yield
+        duracion = time.perf_counter() - inicio
+
+        metricas = {
+            'segundos': round(duracion, 4),
+            'consultas': len(consultas.captured_queries),
+            'segundos_sql': round(sum(float(q['time']) for q in consultas.captured_queries), 4),
+        }
+        if self.medir_memoria:
+            _, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            metricas['memoria_pico_mb'] = round(pico / (1024 * 1024), 2)
+        self.etapas[nombre] = metricas
+
+
+def sembrar_empresa_sintetica(num_empleados: int, semilla: int = 42,
+                              porcentaje_incidencias: float = 0.10,
+                              porcentaje_variables: float = 0.05) -> Dict:
+    """
+    Crea empresa, empleados, periodo quincenal, incidencias, percepciones
+    variables y deducciones recurrentes sintéticas
+    Escribe con bulk_create; retorna los objetos principales
+    """
+    from apps.empresas.models import Empresa
+    from apps.empleados.models import Empleado
+    from .models import PeriodoNomina, IncidenciaNomina, PercepcionVariable, DeduccionVariable
+
+    rng = random.Random(semilla)
+    sufijo = f"{num_empleados:07d}"[-7:]
+    empresa = Empresa.objects.create(
+        rfc=f"BEN{sufijo}AAA",
+        razon_social=f"Benchmark {num_empleados} empleados SA de CV",
+        nombre_comercial=f"Benchmark {num_empleados}",
+    )
+
+    departamentos = ['Operaciones', 'Ventas', 'Finanzas', 'Sistemas', 'RRHH', 'Logística']
+    empleados = [
+        Empleado(
+            empresa=empresa,
+            nombre=f"Empleado{i}",
+            apellido_paterno=f"Sintetico{i % 997}",
+            rfc=f"SINT{i:06d}XX0"[:13],
+            fecha_ingreso=date(2015, 1, 1) + timedelta(days=rng.randint(0, 3000)),
+            departamento=rng.choice(departamentos),
+            puesto=f"Puesto {rng.randint(1, 40)}",
+            salario_diario=Decimal(rng.randint(27000, 350000)) / 100,
+        )
+        for i in range(num_empleados)
+    ]
+    Empleado.objects.bulk_create(empleados, batch_size=2000)
+
+    hoy = date(2024, 1, 1)
+    periodo = PeriodoNomina.objects.create(
+        empresa=empresa,
+        tipo_periodo='quincenal',
+        numero_periodo=1,
+        año=2024,
+        fecha_inicio=hoy,
+        fecha_fin=hoy + timedelta(days=14),
+        fecha_pago=hoy + timedelta(days=14),
+    )
+
+    tipos = [
+        ('falta', Decimal('1'), None),
+        ('horas_extra', Decimal('4'), None),
+        ('bono', Decimal('1'), Decimal('750.00')),
+        ('comision', Decimal('1'), Decimal('1250.00')),
+    ]
+    incidencias = []
+    for empleado in rng.sample(empleados, int(num_empleados * porcentaje_incidencias)):
+        tipo, cantidad, monto = rng.choice(tipos)
+        incidencias.append(IncidenciaNomina(
+            empleado=empleado,
+            periodo=periodo,
+            tipo=tipo,
+            fecha_inicio=periodo.fecha_inicio + timedelta(days=rng.randint(0, 13)),
+            cantidad=cantidad,
+            monto=monto,
+        ))
+    IncidenciaNomina.objects.bulk_create(incidencias, batch_size=2000)
+
+    tipos_percepcion = [
+        ('bono_productividad', Decimal('900.00'), True),
+        ('premio', Decimal('400.00'), True),
+        ('vales_despensa', Decimal('600.00'), False),
+    ]
+    percepciones = []
+    for empleado in rng.sample(empleados, int(num_empleados * porcentaje_variables)):
+        tipo, monto, gravable = rng.choice(tipos_percepcion)
+        percepciones.append(PercepcionVariable(
+            empleado=empleado,
+            periodo=periodo,
+            tipo=tipo,
+            monto=monto,
+            es_gravable=gravable,
+        ))
+    PercepcionVariable.objects.bulk_create(percepciones, batch_size=2000)
+
+    tipos_deduccion = [
+        ('prestamo_empresa', Decimal('350.00'), Decimal('5000.00')),
+        ('prestamo_fonacot', Decimal('420.00'), Decimal('8000.00')),
+        ('caja_ahorro', Decimal('200.00'), None),
+    ]
+    deducciones = []
+    for empleado in rng.sample(empleados, int(num_empleados * porcentaje_variables)):
+        tipo, valor, saldo = rng.choice(tipos_deduccion)
+        deducciones.append(DeduccionVariable(
+            empleado=empleado,
+            tipo=tipo,
+            valor=valor,
+            saldo_pendiente=saldo,
+            fecha_inicio=hoy - timedelta(days=rng.randint(30, 365)),
+        ))
+    DeduccionVariable.objects.bulk_create(deducciones, batch_size=2000)
+
+    return {
+        'empresa': empresa,
+        'periodo': periodo,
+        'empleados': len(empleados),
+        'incidencias': len(incidencias),
+        'percepciones_variables': len(percepciones),
+        'deducciones_variables': len(deducciones),
+    }
+
+
+def ejecutar_benchmark(num_empleados: int, usuario, medir_memoria: bool = True,
+                       semilla: int = 42) -> Dict:
+    """
+    Ejecuta todas las etapas para una empresa sintética de num_empleados
+    Debe llamarse dentro de una transacción si no se quieren conservar datos
+    """
+    from rest_framework.test import APIRequestFactory, force_authenticate
+    from apps.reportes.excel_service import ExcelService
+    from .models import ReciboNomina
+    from .services import procesar_nomina_periodo
+    from .views import PeriodoNominaViewSet
+
+    medidor = MedidorEtapas(medir_memoria)
+
+    with medidor.etapa('sembrado'):
+        datos = sembrar_empresa_sintetica(num_empleados, semilla)
+    periodo = datos['periodo']
+
+    with medidor.etapa('calculo'):
+        procesar_nomina_periodo(periodo.id, usuario.id, forzar=True)
+
+    with medidor.etapa('recalculo_sin_cambios'):
+        procesar_nomina_periodo(periodo.id, usuario.id)
+
+    vista_resumen = PeriodoNominaViewSet.as_view({'get': 'resumen'})
+    with medidor.etapa('resumen'):
+        request = APIRequestFactory().get(f'/api/nomina/periodos/{periodo.id}/resumen/')
+        force_authenticate(request, user=usuario)
+        respuesta = vista_resumen(request, pk=periodo.id)
+        respuesta.render()
+
+    with medidor.etapa('reporte_excel'):
+        recibos = list(
+            ReciboNomina.objects.filter(periodo=periodo)
+            .select_related('empleado')
+            .order_by('empleado__apellido_paterno')
+        )
+        buffer = ExcelService.generar_reporte_nomina(periodo, recibos)
+
+    return {
+        'empleados': datos['empleados'],
+        'incidencias': datos['incidencias'],
+        'percepciones_variables': datos['percepciones_variables'],
+        'deducciones_variables': datos['deducciones_variables'],
+        'bytes_resumen': len(respuesta.content),
+        'bytes_excel': buffer.getbuffer().nbytes,
+        'etapas': medidor.etapas,
+    }
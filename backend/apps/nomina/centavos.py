@@ -0,0 +1,129 @@
+"""
+Núcleo de punto fijo para el cálculo de nómina
+
+Versión escalar en enteros de CalculadoraNomina.calcular_sbc,
+calcular_isr y calcular_imss_obrero para el ciclo caliente del motor por
+lotes: importes en centavos (int) y tasas escaladas a enteros, sin crear
+Decimal ni diccionarios intermedios por empleado. Lo usa
+services._calcular_recibo_centavos (recibos sin incidencias ni conceptos
+variables); los resultados se convierten a Decimal una sola vez, al armar
+los campos del recibo que se persisten.
+
+Mismo redondeo que la ruta Decimal: el valor exacto se redondea al
+centavo con ROUND_HALF_EVEN (quantize por defecto), una sola vez por
+importe. Los montos con fracciones de centavo (p. ej. descuentos por
+medio día) no caben en el núcleo: a_centavos regresa None y el llamador
+usa la ruta Decimal.
+
+tests/test_centavos.py verifica la paridad contra CalculadoraNomina en
+todos los renglones de las tarifas.
+"""
+from bisect import bisect_left
+from decimal import Decimal
+from typing import Optional, Tuple
+
+from .vectorizado import _entero, _escala
+
+
+def dividir_redondeando(numerador: int, divisor: int) -> int:
+    """División entera con redondeo al par (ROUND_HALF_EVEN), también para negativos"""
+    cociente, residuo = divmod(numerador, divisor)
+    doble = 2 * residuo
+    if doble > divisor or (doble == divisor and cociente % 2 == 1):
+        return cociente + 1
+    return cociente
+
+
+def a_centavos(valor) -> Optional[int]:
+    """Centavos exactos de un importe, o None si tiene fracciones de centavo"""
+    centavos = Decimal(valor).scaleb(2)
+    entero = int(centavos)
+    return entero if centavos == entero else None
+
+
+def a_pesos(centavos: int) -> Decimal:
+    """Centavos a Decimal con dos decimales (igual que quantize(Decimal('0.01')))"""
+    return Decimal(centavos).scaleb(-2)
+
+
+class NucleoCentavos:
+    """
+    Tarifa ISR/subsidio y parámetros IMSS de una CalculadoraNomina
+    compilados a enteros. Se construye una vez por calculadora
+    """
+
+    def __init__(self, calculadora):
+        from .services import FACTOR_INTEGRACION_MINIMO
+
+        tarifa = calculadora.tarifa
+        self.tiene_isr = tarifa.tiene_isr
+        self.isr_inf = [a_centavos(v) for v in tarifa.isr_limites_inferiores]
+        self.isr_sup = [a_centavos(v) for v in tarifa.isr_limites_superiores]
+        self.isr_cuota = [a_centavos(v) for v in tarifa.isr_cuotas_fijas]
+        # Porcentaje excedente sobre 100 * escala
+        escala_isr = _escala([Decimal(p) for p in tarifa.isr_porcentajes])
+        self.isr_pct = [_entero(p, escala_isr) for p in tarifa.isr_porcentajes]
+        self.divisor_isr = 100 * escala_isr
+
+        self.sub_inf = [a_centavos(v) for v in tarifa.subsidio_limites_inferiores]
+        self.sub_sup = [a_centavos(v) for v in tarifa.subsidio_limites_superiores]
+        self.sub_monto = [a_centavos(v) for v in tarifa.subsidio_montos]
+
+        self.escala_factor = _escala([FACTOR_INTEGRACION_MINIMO])
+        self.factor_minimo = _entero(FACTOR_INTEGRACION_MINIMO, self.escala_factor)
+
+        params = calculadora.params_imss
+        self.tiene_imss = params is not None
+        self.tope_sbc = None
+        if params:
+            self.tope_sbc = a_centavos(params.tope_sbc)
+            tasas = [
+                Decimal(params.porc_enf_mat_obrera),
+                Decimal(params.porc_invalidez_vida_obrera),
+                Decimal(params.porc_cesantia_vejez_obrera),
+            ]
+            self.escala_imss = _escala(tasas)
+            self.tasa_obrera = sum(_entero(t, self.escala_imss) for t in tasas)
+
+    def sbc(self, salario: int, factor_integracion: Decimal = None) -> int:
+        """SBC en centavos: salario * factor, con tope"""
+        if factor_integracion is None:
+            factor, escala = self.factor_minimo, self.escala_factor
+        else:
+            escala = _escala([Decimal(factor_integracion)])
+            factor = _entero(factor_integracion, escala)
+        sbc = salario * factor
+        if self.tope_sbc is not None:
+            sbc = min(sbc, self.tope_sbc * escala)
+        return dividir_redondeando(sbc, escala)
+
+    def isr(self, ingreso: int) -> Tuple[int, int, int]:
+        """(ISR antes de subsidio, subsidio, ISR neto) en centavos"""
+        if not self.tiene_isr:
+            return 0, 0, 0
+
+        # Mismo criterio de rango que TarifaCompilada.indice_isr
+        i = bisect_left(self.isr_sup, ingreso)
+        if i >= len(self.isr_sup) or self.isr_inf[i] > ingreso:
+            i = len(self.isr_inf) - 1
+        divisor = self.divisor_isr
+        isr_antes = self.isr_cuota[i] * divisor + (ingreso - self.isr_inf[i]) * self.isr_pct[i]
+
+        subsidio = 0
+        j = bisect_left(self.sub_sup, ingreso)
+        if j < len(self.sub_sup) and self.sub_inf[j] <= ingreso:
+            subsidio = self.sub_monto[j]
+
+        isr_neto = max(isr_antes - subsidio * divisor, 0)
+        return (
+            dividir_redondeando(isr_antes, divisor),
+            subsidio,
+            dividir_redondeando(isr_neto, divisor),
+        )
+
+    def imss_obrero(self, sbc: int, dias: int) -> int:
+        """Cuota obrera IMSS total en centavos"""
+        if not self.tiene_imss:
+            return 0
+        base = min(sbc, self.tope_sbc) * dias
+        return dividir_redondeando(base * self.tasa_obrera, self.escala_imss)
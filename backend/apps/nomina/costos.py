@@ -0,0 +1,220 @@
+"""
+Cubo de costo patronal proyectado
+
+Proyección anual del costo de la plantilla por departamento, mes y
+concepto (salario, aguinaldo, prima vacacional, IMSS patronal e
+INFONAVIT), guardada en CostoProyectado para que los dashboards la lean
+sin recalcular por solicitud.
+
+- Construcción en lote: una consulta de empleados (values_list) y las
+  tasas IMSS compiladas de imss.py; cálculo en centavos con NumPy.
+- IMSS/INFONAVIT con las mismas fórmulas por ramo que la determinación
+  bimestral (imss.cuotas_por_concepto), sobre los días del mes dentro
+  de la relación laboral.
+- Aguinaldo en diciembre (15 días, proporcional si ingresó en el año,
+  como calcular_aguinaldo) y prima vacacional en el mes del aniversario
+  con los días de ley de ese aniversario.
+- Refresco incremental: al cambiar salario, departamento o fechas de un
+  empleado se reconstruyen solo sus departamentos (ver signals.py).
+"""
+import calendar
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .imss import CONCEPTOS_IMSS, cuotas_por_concepto, obtener_tasas_imss
+from .vectorizado import _a_centavos, _redondear
+
+
+CONCEPTOS_COSTO = ('salario', 'aguinaldo', 'prima_vacacional', 'imss_patronal', 'infonavit')
+
+DIAS_AGUINALDO = 15
+PORCENTAJE_PRIMA_VACACIONAL = 25
+
+# Campos de Empleado que cambian la proyección
+CAMPOS_EMPLEADO_COSTO = ('salario_diario', 'departamento', 'estado', 'fecha_ingreso', 'fecha_baja')
+
+# Conceptos IMSS que suman a la cuota patronal (INFONAVIT va aparte)
+_CONCEPTOS_PATRONALES = [
+    c[0] for c in CONCEPTOS_IMSS if c[2] == 'patronal' and c[0] != 'infonavit'
+]
+
+
+def _empleados_costo(empresa_id, año: int, departamentos: Optional[Iterable[str]] = None) -> List[tuple]:
+    from django.db.models import Q
+    from apps.empleados.models import Empleado
+
+    empleados = Empleado.objects.filter(
+        empresa_id=empresa_id, fecha_ingreso__lte=date(año, 12, 31), salario_diario__gt=0
+    ).filter(
+        Q(estado='activo', fecha_baja__isnull=True) | Q(fecha_baja__gte=date(año, 1, 1))
+    )
+    if departamentos is not None:
+        empleados = empleados.filter(departamento__in=list(departamentos))
+    return list(empleados.values_list('departamento', 'salario_diario', 'fecha_ingreso', 'fecha_baja'))
+
+
+def _dias_vacaciones_ley(años: np.ndarray) -> np.ndarray:
+    """obtener_dias_vacaciones_ley vectorizado"""
+    from apps.empleados.services import VACACIONES_LFT
+
+    limites, dias = zip(*sorted(VACACIONES_LFT.items()))
+    indices = np.searchsorted(np.array(limites), años, side='right') - 1
+    return np.where(años >= limites[0], np.array(dias)[np.maximum(indices, 0)], 0)
+
+
+def _aniversario(fecha_ingreso: date, año: int) -> date:
+    dia = min(fecha_ingreso.day, calendar.monthrange(año, fecha_ingreso.month)[1])
+    return date(año, fecha_ingreso.month, dia)
+
+
+def calcular_cubo_costos(empresa_id, año: int, departamentos: Optional[Iterable[str]] = None,
+                         factor_integracion: Decimal = None) -> Dict[tuple, tuple]:
+    """
+    Celdas del cubo {(departamento, mes, concepto): (centavos, empleados)}
+    Solo incluye celdas con importe
+    """
+    from .services import FACTOR_INTEGRACION_MINIMO
+
+    filas = _empleados_costo(empresa_id, año, departamentos)
+    if not filas:
+        return {}
+
+    nombres = sorted({f[0] for f in filas})
+    posiciones = {nombre: i for i, nombre in enumerate(nombres)}
+    codigos = np.array([posiciones[f[0]] for f in filas], dtype=np.int64)
+    salarios = _a_centavos([f[1] for f in filas])
+    ingresos = np.array([f[2].toordinal() for f in filas], dtype=np.int64)
+    bajas = np.array([(f[3] or date(año, 12, 31)).toordinal() for f in filas], dtype=np.int64)
+
+    celdas = {}
+
+    def acumular(mes, concepto, centavos):
+        totales = np.zeros(len(nombres), dtype=np.int64)
+        np.add.at(totales, codigos, centavos)
+        empleados = np.bincount(codigos, weights=centavos > 0, minlength=len(nombres))
+        for i, nombre in enumerate(nombres):
+            if totales[i]:
+                celdas[(nombre, mes, concepto)] = (int(totales[i]), int(empleados[i]))
+
+    tasas = obtener_tasas_imss(año)
+    factor = factor_integracion or FACTOR_INTEGRACION_MINIMO
+    for mes in range(1, 13):
+        inicio = date(año, mes, 1).toordinal()
+        fin = date(año, mes, calendar.monthrange(año, mes)[1]).toordinal()
+        dias = np.maximum(np.minimum(bajas, fin) - np.maximum(ingresos, inicio) + 1, 0)
+        acumular(mes, 'salario', salarios * dias)
+        if tasas is not None:
+            cuotas = cuotas_por_concepto(tasas, salarios, dias, factor)
+            acumular(mes, 'imss_patronal', sum(cuotas[c] for c in _CONCEPTOS_PATRONALES))
+            acumular(mes, 'infonavit', cuotas['infonavit'])
+
+    # Aguinaldo al 20 de diciembre, proporcional si ingresó en el año
+    calculo = date(año, 12, 20).toordinal()
+    inicio_año = date(año, 1, 1).toordinal()
+    dias_trabajados = np.maximum(calculo - np.maximum(ingresos, inicio_año) + 1, 0)
+    aguinaldo = np.where(
+        ingresos <= inicio_año,
+        salarios * DIAS_AGUINALDO,
+        _redondear(salarios * DIAS_AGUINALDO * dias_trabajados, 365)
+    )
+    acumular(12, 'aguinaldo', np.where(bajas >= calculo, aguinaldo, 0))
+
+    # Prima vacacional en el mes del aniversario, con los días de ese aniversario
+    aniversarios = [_aniversario(f[2], año) for f in filas]
+    años_servicio = np.array([año - f[2].year for f in filas], dtype=np.int64)
+    vigente = np.array([a.toordinal() for a in aniversarios], dtype=np.int64) <= bajas
+    prima = _redondear(
+        salarios * _dias_vacaciones_ley(años_servicio) * PORCENTAJE_PRIMA_VACACIONAL, 100
+    )
+    prima = np.where(vigente, prima, 0)
+    meses_aniversario = np.array([a.month for a in aniversarios], dtype=np.int64)
+    for mes in np.unique(meses_aniversario):
+        acumular(int(mes), 'prima_vacacional', np.where(meses_aniversario == mes, prima, 0))
+
+    return celdas
+
+
+def construir_cubo_costos(empresa_id, año: int, departamentos: Optional[Iterable[str]] = None) -> int:
+    """
+    Reemplaza las celdas del año (o solo de los departamentos indicados)
+    Devuelve el número de celdas escritas
+    """
+    from django.db import transaction
+    from .models import CostoProyectado
+
+    if departamentos is not None:
+        departamentos = set(departamentos)
+    celdas = calcular_cubo_costos(empresa_id, año, departamentos)
+
+    with transaction.atomic():
+        existentes = CostoProyectado.objects.filter(empresa_id=empresa_id, año=año)
+        if departamentos is not None:
+            existentes = existentes.filter(departamento__in=departamentos)
+        existentes.delete()
+        CostoProyectado.objects.bulk_create([
+            CostoProyectado(
+                empresa_id=empresa_id,
+                año=año,
+                mes=mes,
+                departamento=departamento,
+                concepto=concepto,
+                importe=Decimal(centavos) / 100,
+                empleados=empleados,
+            )
+            for (departamento, mes, concepto), (centavos, empleados) in sorted(celdas.items())
+        ])
+    return len(celdas)
+
+
+def refrescar_costos_departamentos(empresa_id, departamentos: Iterable[str]) -> None:
+    """Reconstruye los departamentos en los años ya materializados de la empresa"""
+    from .models import CostoProyectado
+
+    años = (
+        CostoProyectado.objects.filter(empresa_id=empresa_id)
+        .values_list('año', flat=True).distinct().order_by()
+    )
+    for año in list(años):
+        construir_cubo_costos(empresa_id, año, departamentos)
+
+
+def resumen_costos(empresa_id, año: int, departamento: Optional[str] = None) -> Dict:
+    """
+    Lectura del cubo para dashboards: totales por concepto, mes y departamento
+    Construye el año si aún no está materializado
+    """
+    from .models import CostoProyectado
+
+    celdas = CostoProyectado.objects.filter(empresa_id=empresa_id, año=año)
+    filas = list(celdas.values_list('departamento', 'mes', 'concepto', 'importe'))
+    if not filas:
+        construir_cubo_costos(empresa_id, año)
+        filas = list(celdas.values_list('departamento', 'mes', 'concepto', 'importe'))
+    if departamento is not None:
+        filas = [f for f in filas if f[0] == departamento]
+
+    vacio = dict.fromkeys(CONCEPTOS_COSTO, Decimal('0'))
+    por_concepto = dict(vacio)
+    por_mes = {mes: dict(vacio) for mes in range(1, 13)}
+    por_departamento = {}
+    for nombre, mes, concepto, importe in filas:
+        por_concepto[concepto] += importe
+        por_mes[mes][concepto] += importe
+        por_departamento.setdefault(nombre, dict(vacio))[concepto] += importe
+
+    def con_total(conceptos):
+        return {**conceptos, 'total': sum(conceptos.values(), Decimal('0'))}
+
+    return {
+        'año': año,
+        'departamento': departamento,
+        **con_total(por_concepto),
+        'por_mes': [{'mes': mes, **con_total(c)} for mes, c in por_mes.items()],
+        'por_departamento': [
+            {'departamento': nombre, **con_total(c)}
+            for nombre, c in sorted(por_departamento.items())
+        ],
+    }
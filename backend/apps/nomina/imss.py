@@ -0,0 +1,310 @@
+"""
+Determinación bimestral de cuotas IMSS por empresa
+
+Calcula en un solo paso las cuotas obrero-patronales de toda la
+plantilla de un bimestre, por ramo de seguro, y exporta un archivo de
+ancho fijo estilo SUA.
+
+- Parámetros: ParametrosIMSS del año (o el vigente) compilados a tasas
+  enteras y guardados por proceso. Se verifica la versión (pk + última
+  modificación) con una consulta pequeña; las señales invalidan el cache
+  del mismo proceso (ver signals.py).
+- Consultas fijas: versión de parámetros, empleados (values_list) e
+  incidencias del bimestre agregadas por empleado y tipo.
+- Cálculo en centavos con NumPy, mismas fórmulas y redondeo por ramo
+  que CalculadoraNomina.calcular_imss_obrero/_patronal: SBC topado a
+  25 UMA y excedente sobre 3 SMG en enfermedad y maternidad.
+
+Días cotizados: días del bimestre dentro de la relación laboral, menos
+incapacidades y ausencias (las ausencias hasta 7 por bimestre, Art. 31
+LSS). El SUA cotiza días enteros: la suma de ausencias (y la de
+incapacidades) de cada empleado se redondea una vez, mitades hacia
+arriba, así que dos medias faltas descuentan un día.
+"""
+import calendar
+import threading
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .vectorizado import _a_centavos, _entero, _escala, _redondear
+
+
+# (concepto, ramo, cuota, tasa en ParametrosIMSS, base, periodicidad de pago)
+# Base: 'sbc' = SBC topado * días, 'excedente' = (SBC - 3 SMG) * días,
+# 'smg' = SMG * días (cuota fija)
+CONCEPTOS_IMSS = [
+    ('cuota_fija_enf_mat', 'enfermedad_maternidad', 'patronal', 'cuota_fija_enf_mat', 'smg', 'mensual'),
+    ('enf_mat_excedente', 'enfermedad_maternidad', 'patronal', 'porc_enf_mat_patronal', 'excedente', 'mensual'),
+    ('enf_mat_obrera', 'enfermedad_maternidad', 'obrera', 'porc_enf_mat_obrera', 'sbc', 'mensual'),
+    ('riesgo_trabajo', 'riesgo_trabajo', 'patronal', 'porc_riesgo_trabajo', 'sbc', 'mensual'),
+    ('invalidez_vida_patronal', 'invalidez_vida', 'patronal', 'porc_invalidez_vida_patronal', 'sbc', 'mensual'),
+    ('invalidez_vida_obrera', 'invalidez_vida', 'obrera', 'porc_invalidez_vida_obrera', 'sbc', 'mensual'),
+    ('guarderias', 'guarderias', 'patronal', 'porc_guarderias', 'sbc', 'mensual'),
+    ('cesantia_vejez_patronal', 'cesantia_vejez', 'patronal', 'porc_cesantia_vejez_patronal', 'sbc', 'bimestral'),
+    ('cesantia_vejez_obrera', 'cesantia_vejez', 'obrera', 'porc_cesantia_vejez_obrera', 'sbc', 'bimestral'),
+    ('infonavit', 'infonavit', 'patronal', 'porc_infonavit', 'sbc', 'bimestral'),
+]
+
+# Incidencias que reducen los días cotizados
+INCIDENCIAS_AUSENCIA = ('falta', 'permiso_sg')
+INCIDENCIAS_INCAPACIDAD = ('incapacidad',)
+MAX_AUSENCIAS_BIMESTRE = 7
+
+# Archivo estilo SUA: (campo, largo); importes en centavos sin punto
+CAMPOS_SUA = [
+    ('registro_patronal', 11),
+    ('nss', 11),
+    ('rfc', 13),
+    ('curp', 18),
+    ('nombre', 50),
+    ('dias', 2),
+    ('sbc', 7),
+] + [(concepto[0], 9) for concepto in CONCEPTOS_IMSS]
+
+
+class TasasIMSS:
+    """ParametrosIMSS compilados a enteros (centavos y tasas escaladas)"""
+
+    def __init__(self, params):
+        self.version = f"{params.pk}@{params.updated_at.isoformat()}"
+        self.año = params.año
+        self.tope_sbc = int(_a_centavos([params.tope_sbc])[0])
+        self.smg = int(_a_centavos([params.salario_minimo_general])[0])
+        tasas = [Decimal(str(getattr(params, c[3]))) for c in CONCEPTOS_IMSS]
+        self.escala = _escala(tasas)
+        self.tasas = {c[0]: _entero(t, self.escala) for c, t in zip(CONCEPTOS_IMSS, tasas)}
+
+
+_tasas: Dict[int, TasasIMSS] = {}
+_lock = threading.Lock()
+
+
+def obtener_tasas_imss(año: int) -> Optional[TasasIMSS]:
+    """
+    Tasas IMSS del año (o las vigentes si el año no tiene parámetros)
+    Una consulta de versión por llamada; la fila completa solo si cambió
+    """
+    from django.db.models import Q
+    from .models import ParametrosIMSS
+
+    candidatos = list(
+        ParametrosIMSS.objects.filter(Q(año=año) | Q(vigente=True)).values_list('pk', 'año', 'updated_at')
+    )
+    if not candidatos:
+        return None
+    pk, _, actualizado = next((c for c in candidatos if c[1] == año), candidatos[0])
+    version = f"{pk}@{actualizado.isoformat()}"
+
+    tasas = _tasas.get(año)
+    if tasas is not None and tasas.version == version:
+        return tasas
+
+    tasas = TasasIMSS(ParametrosIMSS.objects.get(pk=pk))
+    with _lock:
+        _tasas[año] = tasas
+    return tasas
+
+
+def invalidar_tasas_imss() -> None:
+    """Descarta las tasas compiladas del proceso"""
+    with _lock:
+        _tasas.clear()
+
+
+def fechas_bimestre(año: int, bimestre: int) -> Tuple[date, date]:
+    """Primer y último día del bimestre (1 = ene-feb ... 6 = nov-dic)"""
+    if not 1 <= bimestre <= 6:
+        raise ValueError('El bimestre debe estar entre 1 y 6')
+    mes_fin = bimestre * 2
+    return date(año, mes_fin - 1, 1), date(año, mes_fin, calendar.monthrange(año, mes_fin)[1])
+
+
+class DeterminacionIMSS:
+    """
+    Cuotas del bimestre por empleado en columnas (centavos int64)
+    identidad: lista de (nss, rfc, curp, nombre) en el mismo orden
+    """
+
+    def __init__(self, empresa_id, año: int, bimestre: int, registro_patronal: str,
+                 identidad: List[Tuple], columnas: Dict[str, np.ndarray]):
+        self.empresa_id = empresa_id
+        self.año = año
+        self.bimestre = bimestre
+        self.registro_patronal = registro_patronal
+        self.identidad = identidad
+        self.columnas = columnas
+
+    def __len__(self):
+        return len(self.identidad)
+
+    def _centavos_por_ramo(self) -> Dict:
+        ramos = {}
+        for concepto, ramo, cuota, _, _, pago in CONCEPTOS_IMSS:
+            fila = ramos.setdefault(ramo, {'pago': pago, 'patronal': 0, 'obrera': 0})
+            fila[cuota] += int(self.columnas[concepto].sum())
+        return ramos
+
+    def resumen_por_ramo(self) -> Dict:
+        """Totales patronal/obrera por ramo de seguro, en pesos"""
+        return {
+            ramo: {
+                'pago': fila['pago'],
+                'patronal': fila['patronal'] / 100,
+                'obrera': fila['obrera'] / 100,
+                'total': (fila['patronal'] + fila['obrera']) / 100,
+            }
+            for ramo, fila in self._centavos_por_ramo().items()
+        }
+
+    def resumen(self) -> Dict:
+        centavos = self._centavos_por_ramo()
+        patronal = sum(f['patronal'] for f in centavos.values())
+        obrera = sum(f['obrera'] for f in centavos.values())
+        inicio, fin = fechas_bimestre(self.año, self.bimestre)
+        return {
+            'empresa_id': str(self.empresa_id),
+            'año': self.año,
+            'bimestre': self.bimestre,
+            'fecha_inicio': inicio.isoformat(),
+            'fecha_fin': fin.isoformat(),
+            'total_empleados': len(self),
+            'dias_cotizados': int(self.columnas['dias'].sum()),
+            'total_patronal': patronal / 100,
+            'total_obrera': obrera / 100,
+            'total': (patronal + obrera) / 100,
+            'ramos': self.resumen_por_ramo(),
+        }
+
+    def lineas_sua(self) -> Iterator[str]:
+        """Registros de ancho fijo estilo SUA, uno por empleado"""
+        from apps.integraciones.dispersion import texto_banco
+
+        numericos = [(self.columnas[campo], largo) for campo, largo in CAMPOS_SUA if campo in self.columnas]
+        registro = texto_banco(self.registro_patronal, 11).ljust(11)
+        for i, (nss, rfc, curp, nombre) in enumerate(self.identidad):
+            partes = [
+                registro,
+                (nss or '').ljust(11)[:11],
+                texto_banco(rfc, 13).ljust(13),
+                texto_banco(curp, 18).ljust(18),
+                texto_banco(nombre, 50).ljust(50),
+            ]
+            for valores, largo in numericos:
+                partes.append(str(int(valores[i])).rjust(largo, '0')[-largo:])
+            yield ''.join(partes) + '\r\n'
+
+
+def _dias_cotizados(ingresos: np.ndarray, bajas: np.ndarray, inicio: date, fin: date,
+                    ausencias: np.ndarray, incapacidades: np.ndarray) -> np.ndarray:
+    """Días del bimestre dentro de la relación laboral menos ausencias e incapacidades"""
+    desde = np.maximum(ingresos, inicio.toordinal())
+    hasta = np.minimum(bajas, fin.toordinal())
+    dias = np.maximum(hasta - desde + 1, 0)
+    dias = dias - np.minimum(ausencias, MAX_AUSENCIAS_BIMESTRE) - incapacidades
+    return np.maximum(dias, 0)
+
+
+def cuotas_por_concepto(tasas: TasasIMSS, salarios: np.ndarray, dias: np.ndarray,
+                        factor_integracion: Decimal) -> Dict[str, np.ndarray]:
+    """
+    Cuotas en centavos por concepto de CONCEPTOS_IMSS, más 'sbc' y 'dias'
+    salarios: salario diario en centavos; dias: días cotizados del lapso
+    """
+    # SBC con el mismo redondeo que CalculadoraNomina.calcular_sbc
+    factor = Decimal(str(factor_integracion))
+    escala_factor = _escala([factor])
+    sbc = _redondear(
+        np.minimum(salarios * _entero(factor, escala_factor), tasas.tope_sbc * escala_factor),
+        escala_factor
+    )
+
+    bases = {
+        'sbc': sbc * dias,
+        'excedente': np.maximum(sbc - 3 * tasas.smg, 0) * dias,
+        'smg': tasas.smg * dias,
+    }
+    columnas = {'dias': dias, 'sbc': sbc}
+    for concepto, _, _, _, base, _ in CONCEPTOS_IMSS:
+        columnas[concepto] = _redondear(bases[base] * tasas.tasas[concepto], tasas.escala)
+    return columnas
+
+
+def calcular_cuotas_bimestre(empresa_id, año: int, bimestre: int,
+                             registro_patronal: str = '',
+                             factor_integracion: Decimal = None) -> DeterminacionIMSS:
+    """
+    Cuotas obrero-patronales del bimestre para toda la empresa
+    Número fijo de consultas sin importar el tamaño de la plantilla
+    """
+    from django.db.models import Q, Sum
+    from apps.empleados.models import Empleado
+    from .models import IncidenciaNomina
+    from .services import FACTOR_INTEGRACION_MINIMO
+
+    tasas = obtener_tasas_imss(año)
+    if tasas is None:
+        raise ValueError('No hay parámetros IMSS configurados')
+    inicio, fin = fechas_bimestre(año, bimestre)
+
+    filas = list(
+        Empleado.objects.filter(empresa_id=empresa_id, fecha_ingreso__lte=fin, salario_diario__gt=0)
+        .filter(
+            Q(estado='activo', fecha_baja__isnull=True) | Q(fecha_baja__gte=inicio)
+        )
+        .order_by('apellido_paterno', 'nombre', 'id')
+        .values_list(
+            'id', 'nss_imss', 'rfc', 'curp', 'nombre', 'apellido_paterno', 'apellido_materno',
+            'salario_diario', 'fecha_ingreso', 'fecha_baja'
+        )
+    )
+
+    indices = {fila[0]: i for i, fila in enumerate(filas)}
+    ausencias = np.zeros(len(filas), dtype=np.int64)
+    incapacidades = np.zeros(len(filas), dtype=np.int64)
+    incidencias = (
+        IncidenciaNomina.objects.filter(
+            empleado__empresa_id=empresa_id,
+            tipo__in=INCIDENCIAS_AUSENCIA + INCIDENCIAS_INCAPACIDAD,
+            fecha_inicio__gte=inicio,
+            fecha_inicio__lte=fin,
+        )
+        .values_list('empleado_id', 'tipo')
+        .annotate(dias=Sum('cantidad'))
+        .order_by()
+    )
+    sumas = {}
+    for empleado_id, tipo, dias in incidencias:
+        i = indices.get(empleado_id)
+        if i is None or not dias:
+            continue
+        clave = (tipo in INCIDENCIAS_INCAPACIDAD, i)
+        sumas[clave] = sumas.get(clave, Decimal('0')) + Decimal(dias)
+    for (es_incapacidad, i), dias in sumas.items():
+        destino = incapacidades if es_incapacidad else ausencias
+        destino[i] = int(dias.quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+    identidad = [
+        (f[1], f[2], f[3], ' '.join(filter(None, [f[5], f[6], f[4]])))
+        for f in filas
+    ]
+    ingresos = np.array([f[8].toordinal() for f in filas], dtype=np.int64)
+    bajas = np.array([(f[9] or fin).toordinal() for f in filas], dtype=np.int64)
+    dias = _dias_cotizados(ingresos, bajas, inicio, fin, ausencias, incapacidades)
+
+    salarios = _a_centavos([f[7] for f in filas]) if filas else np.zeros(0, dtype=np.int64)
+    columnas = cuotas_por_concepto(tasas, salarios, dias, factor_integracion or FACTOR_INTEGRACION_MINIMO)
+
+    return DeterminacionIMSS(empresa_id, año, bimestre, registro_patronal, identidad, columnas)
+
+
+def registro_patronal_empresa(empresa_id) -> str:
+    """Registro patronal de la integración IMSS/SUA activa (configuracion_extra)"""
+    from apps.integraciones.models import ConfiguracionIntegracion
+
+    config = ConfiguracionIntegracion.objects.filter(
+        empresa_id=empresa_id, proveedor__tipo='imss', activo=True
+    ).values_list('configuracion_extra', flat=True).first()
+    return (config or {}).get('registro_patronal', '')
@@ -0,0 +1,54 @@
+"""
+Management command para calcular el ajuste anual de ISR.
+
+Uso:
+    python manage.py ajuste_anual_isr --año 2024
+    python manage.py ajuste_anual_isr --año 2024 --empresas <uuid> --lote 5000
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.nomina.ajuste_anual import calcular_ajuste_anual, TAMANO_LOTE_AJUSTE
+
+
+class Command(BaseCommand):
+    help = 'Calcula el ajuste anual de ISR por empleado'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--año',
+            dest='año',
+            type=int,
+            required=True,
+            help='Ejercicio fiscal'
+        )
+        parser.add_argument(
+            '--empresas',
+            nargs='+',
+            help='IDs de empresas (default: todas las activas)'
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=TAMANO_LOTE_AJUSTE,
+            help=f'Empleados por bloque (default: {TAMANO_LOTE_AJUSTE})'
+        )
+
+    def handle(self, *args, **options):
+        from apps.empresas.models import Empresa
+
+        empresas = Empresa.objects.filter(activa=True)
+        if options['empresas']:
+            empresas = Empresa.objects.filter(id__in=options['empresas'])
+
+        for empresa in empresas.only('id', 'razon_social'):
+            resultado = calcular_ajuste_anual(empresa.id, options['año'], options['lote'])
+            if resultado.get('error'):
+                raise CommandError(resultado['error'])
+
+            self.stdout.write(
+                f"  [OK] {empresa.razon_social}: {resultado['total_empleados']} empleados, "
+                f"a cargo ${resultado['total_a_cargo']:,.2f}, "
+                f"a favor ${resultado['total_a_favor']:,.2f} ({resultado['duracion_segundos']}s)"
+            )
+
+        self.stdout.write(self.style.SUCCESS('Ajuste anual terminado'))
@@ -0,0 +1,97 @@
+"""
+Management command para medir el rendimiento de la nómina con empresas
+sintéticas (1k, 10k y 100k empleados por defecto).
+
+Por cada tamaño mide sembrado, cálculo, recálculo sin cambios, resumen del
+periodo y reporte Excel: segundos, consultas SQL y memoria pico. Los datos
+se crean dentro de una transacción que se revierte al terminar.
+
+Uso:
+    python manage.py benchmark_nomina
+    python manage.py benchmark_nomina --tamanos 1000 10000 --salida bench.json
+    python manage.py benchmark_nomina --sin-memoria
+"""
+import json
+import platform
+from datetime import datetime
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from apps.nomina.benchmark import ejecutar_benchmark
+
+
+class Command(BaseCommand):
+    help = 'Benchmark de calculo de nomina con empresas sinteticas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tamanos',
+            nargs='+',
+            type=int,
+            default=[1000, 10000, 100000],
+            help='Numero de empleados por empresa sintetica'
+        )
+        parser.add_argument(
+            '--salida',
+            default='bench_nomina.json',
+            help='Archivo JSON de resultados (default: bench_nomina.json)'
+        )
+        parser.add_argument(
+            '--sin-memoria',
+            action='store_true',
+            help='No mide memoria (tracemalloc agrega overhead a los tiempos)'
+        )
+        parser.add_argument(
+            '--semilla',
+            type=int,
+            default=42,
+            help='Semilla de los datos sinteticos'
+        )
+
+    def handle(self, *args, **options):
+        from apps.nomina.models import TablaISR
+        from apps.usuarios.models import Usuario
+
+        resultados = []
+        for tamano in options['tamanos']:
+            self.stdout.write(self.style.NOTICE(f'Empresa sintetica de {tamano:,} empleados...'))
+
+            with transaction.atomic():
+                if not TablaISR.objects.filter(año=2024, periodicidad='quincenal').exists():
+                    call_command('cargar_tablas_fiscales', stdout=self.stdout)
+
+                usuario = Usuario.objects.create(
+                    username=f'benchmark-{tamano}',
+                    email=f'benchmark-{tamano}@rrhh.local',
+                    rol=Usuario.Rol.ADMIN,
+                )
+                resultado = ejecutar_benchmark(
+                    tamano,
+                    usuario,
+                    medir_memoria=not options['sin_memoria'],
+                    semilla=options['semilla'],
+                )
+                transaction.set_rollback(True)
+
+            resultados.append(resultado)
+            for nombre, metricas in resultado['etapas'].items():
+                memoria = metricas.get('memoria_pico_mb')
+                self.stdout.write(
+                    f"  {nombre:<24} {metricas['segundos']:>9.3f}s  "
+                    f"{metricas['consultas']:>6} consultas"
+                    + (f"  {memoria:>8.1f} MB" if memoria is not None else '')
+                )
+
+        reporte = {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'base_datos': connection.vendor,
+            'medir_memoria': not options['sin_memoria'],
+            'resultados': resultados,
+        }
+        with open(options['salida'], 'w', encoding='utf-8') as f:
+            json.dump(reporte, f, indent=2, ensure_ascii=False)
+
+        self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {options['salida']}"))
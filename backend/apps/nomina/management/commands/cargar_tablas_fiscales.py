@@ -64,7 +64,34 @@ class Command(BaseCommand):
                     'porcentaje_excedente': pct
                 }
             )
-        
+
+        # Tarifa anual Art. 152 LISR (ajuste anual)
+        self.stdout.write('  - Tabla ISR anual 2024...')
+        datos_anuales = [
+            (Decimal('0.01'), Decimal('8952.49'), Decimal('0'), Decimal('1.92')),
+            (Decimal('8952.50'), Decimal('75984.55'), Decimal('171.88'), Decimal('6.40')),
+            (Decimal('75984.56'), Decimal('133536.07'), Decimal('4461.94'), Decimal('10.88')),
+            (Decimal('133536.08'), Decimal('155229.80'), Decimal('10723.55'), Decimal('16.00')),
+            (Decimal('155229.81'), Decimal('185852.57'), Decimal('14194.54'), Decimal('17.92')),
+            (Decimal('185852.58'), Decimal('374837.88'), Decimal('19682.13'), Decimal('21.36')),
+            (Decimal('374837.89'), Decimal('590795.99'), Decimal('60049.40'), Decimal('23.52')),
+            (Decimal('590796.00'), Decimal('1127926.84'), Decimal('110842.74'), Decimal('30.00')),
+            (Decimal('1127926.85'), Decimal('1503902.46'), Decimal('271981.99'), Decimal('32.00')),
+            (Decimal('1503902.47'), Decimal('4511707.37'), Decimal('392294.17'), Decimal('34.00')),
+            (Decimal('4511707.38'), Decimal('999999999'), Decimal('1414947.85'), Decimal('35.00')),
+        ]
+        for lim_inf, lim_sup, cuota, pct in datos_anuales:
+            TablaISR.objects.update_or_create(
+                año=2024,
+                periodicidad='anual',
+                limite_inferior=lim_inf,
+                defaults={
+                    'limite_superior': lim_sup,
+                    'cuota_fija': cuota,
+                    'porcentaje_excedente': pct
+                }
+            )
+
         self.stdout.write(self.style.SUCCESS('    Tabla ISR cargada'))
 
     def _cargar_subsidio_2024(self):
@@ -174,6 +201,8 @@ class Command(BaseCommand):
             ('D009', '009', 'Préstamos personales', False),
             ('D010', '010', 'Adelanto de salarios', False),
             ('D011', '014', 'Cuotas sindicales', False),
+            ('D012', '020', 'Ausencia (ausentismo)', False),
+            ('D013', '006', 'Descuento por incapacidad', False),
         ]
         
         for codigo, sat, nombre, gravable, integrable in percepciones:
@@ -0,0 +1,35 @@
+"""
+Management command para (re)construir el cubo de costos proyectados.
+
+Sin --empresa reconstruye todas las empresas activas. Los cambios de
+empleados lo refrescan solos; esto sirve para la carga inicial y tras
+cambiar ParametrosIMSS.
+
+Uso:
+    python manage.py construir_cubo_costos --año 2025
+    python manage.py construir_cubo_costos --año 2025 --empresa <uuid>
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from apps.empresas.models import Empresa
+from apps.nomina.costos import construir_cubo_costos
+
+
+class Command(BaseCommand):
+    help = 'Construye el cubo de costo patronal proyectado por departamento y mes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--año', dest='año', type=int, default=date.today().year, help='Año')
+        parser.add_argument('--empresa', help='ID de la empresa (default: todas las activas)')
+
+    def handle(self, *args, **options):
+        if options['empresa']:
+            empresas = Empresa.objects.filter(id=options['empresa'])
+        else:
+            empresas = Empresa.objects.filter(activa=True)
+
+        for empresa in empresas:
+            celdas = construir_cubo_costos(empresa.id, options['año'])
+            self.stdout.write(f'{empresa}: {celdas} celdas')
@@ -0,0 +1,45 @@
+"""
+Management command para la determinación bimestral de cuotas IMSS.
+
+Calcula cuotas obrero-patronales de toda la empresa, imprime el resumen
+por ramo y opcionalmente escribe el archivo estilo SUA.
+
+Uso:
+    python manage.py determinacion_imss --empresa <uuid> --año 2024 --bimestre 1
+    python manage.py determinacion_imss --empresa <uuid> --año 2024 --bimestre 1 --salida sua.txt
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.nomina.imss import calcular_cuotas_bimestre, registro_patronal_empresa
+
+
+class Command(BaseCommand):
+    help = 'Determinación bimestral de cuotas IMSS y exportación SUA'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--empresa', required=True, help='ID de la empresa')
+        parser.add_argument('--año', dest='año', type=int, required=True, help='Año')
+        parser.add_argument('--bimestre', type=int, required=True, help='Bimestre (1-6)')
+        parser.add_argument('--salida', help='Ruta del archivo SUA a generar')
+        parser.add_argument(
+            '--registro-patronal',
+            help='Registro patronal (default: el de la integración IMSS de la empresa)'
+        )
+
+    def handle(self, *args, **options):
+        registro = options['registro_patronal'] or registro_patronal_empresa(options['empresa'])
+        try:
+            determinacion = calcular_cuotas_bimestre(
+                options['empresa'], options['año'], options['bimestre'], registro
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='ascii', newline='') as archivo:
+                archivo.writelines(determinacion.lineas_sua())
+            self.stdout.write(f"Archivo SUA: {options['salida']} ({len(determinacion)} registros)")
+
+        self.stdout.write(json.dumps(determinacion.resumen(), indent=2, ensure_ascii=False))
@@ -0,0 +1,93 @@
+"""
+Management command para calcular la nómina de varios periodos en paralelo.
+Reparte los periodos en un pool de procesos, una empresa por worker.
+
+Uso:
+    python manage.py procesar_nominas --desde 2024-01-01 --hasta 2024-01-15
+    python manage.py procesar_nominas --periodos <uuid> <uuid> --workers 8
+"""
+import json
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.nomina.services import procesar_periodos_en_paralelo
+
+
+class Command(BaseCommand):
+    help = 'Calcula la nomina de varios periodos en paralelo (una empresa por worker)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--periodos',
+            nargs='+',
+            help='IDs de los periodos a calcular'
+        )
+        parser.add_argument(
+            '--desde',
+            type=date.fromisoformat,
+            help='Fecha de pago inicial (YYYY-MM-DD)'
+        )
+        parser.add_argument(
+            '--hasta',
+            type=date.fromisoformat,
+            help='Fecha de pago final (YYYY-MM-DD)'
+        )
+        parser.add_argument(
+            '--empresas',
+            nargs='+',
+            help='Limita a estas empresas (IDs)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Procesos del pool (default: numero de CPUs)'
+        )
+        parser.add_argument(
+            '--usuario',
+            help='ID del usuario que se registra como calculado_por'
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Imprime el resultado completo en JSON'
+        )
+
+    def handle(self, *args, **options):
+        if not (options['periodos'] or options['desde'] or options['hasta']):
+            raise CommandError('Indica --periodos o un rango con --desde/--hasta')
+
+        resultado = procesar_periodos_en_paralelo(
+            periodo_ids=options['periodos'],
+            fecha_desde=options['desde'],
+            fecha_hasta=options['hasta'],
+            empresa_ids=options['empresas'],
+            usuario_id=options['usuario'],
+            max_workers=options['workers'],
+        )
+
+        if options['json']:
+            self.stdout.write(json.dumps(resultado, indent=2, ensure_ascii=False))
+            return
+
+        for periodo in resultado['periodos']:
+            if periodo['ok']:
+                self.stdout.write(
+                    f"  [OK] {periodo['periodo']}: {periodo['total_empleados']} empleados, "
+                    f"neto ${periodo['total_neto']:,.2f} ({periodo['duracion_segundos']}s)"
+                )
+            else:
+                self.stdout.write(self.style.ERROR(
+                    f"  [ERROR] periodo {periodo['periodo_id']}: {periodo['error']}"
+                ))
+
+        resumen = (
+            f"{resultado['exitosos']}/{resultado['total_periodos']} periodos de "
+            f"{resultado['total_empresas']} empresas en {resultado['duracion_segundos']}s "
+            f"({resultado['workers']} workers)"
+        )
+        if resultado['fallidos']:
+            self.stdout.write(self.style.WARNING(resumen))
+        else:
+            self.stdout.write(self.style.SUCCESS(resumen))
@@ -0,0 +1,44 @@
+"""
+Management command para reconstruir los acumulados anuales de nómina.
+
+Backfill de AcumuladoAnualEmpleado a partir de los recibos del año; el
+cálculo de periodos los mantiene al día después.
+
+Uso:
+    python manage.py reconstruir_acumulados --año 2024
+    python manage.py reconstruir_acumulados --año 2024 --empresas <uuid>
+"""
+from django.core.management.base import BaseCommand
+
+from apps.nomina.acumulados import actualizar_acumulados
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye los acumulados anuales de nómina por empleado'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--año',
+            dest='año',
+            type=int,
+            required=True,
+            help='Ejercicio fiscal'
+        )
+        parser.add_argument(
+            '--empresas',
+            nargs='+',
+            help='IDs de empresas (default: todas las activas)'
+        )
+
+    def handle(self, *args, **options):
+        from apps.empresas.models import Empresa
+
+        empresas = Empresa.objects.filter(activa=True)
+        if options['empresas']:
+            empresas = Empresa.objects.filter(id__in=options['empresas'])
+
+        for empresa in empresas.only('id', 'razon_social'):
+            filas = actualizar_acumulados(empresa.id, options['año'])
+            self.stdout.write(f"  [OK] {empresa.razon_social}: {filas} empleados")
+
+        self.stdout.write(self.style.SUCCESS('Acumulados reconstruidos'))
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-17 04:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nomina', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recibonomina',
+            name='huella_calculo',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
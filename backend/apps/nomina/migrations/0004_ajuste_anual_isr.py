@@ -0,0 +1,53 @@
+# Generated by Django 5.1.2 on 2026-10-17 04:53
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empleados', '0004_agregar_documento_empleado'),
+        ('empresas', '0002_initial'),
+        ('nomina', '0003_recibonomina_huella_calculo'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tablaisr',
+            name='periodicidad',
+            field=models.CharField(choices=[('mensual', 'Mensual'), ('quincenal', 'Quincenal'), ('semanal', 'Semanal'), ('diario', 'Diario'), ('anual', 'Anual')], max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='tablasubsidio',
+            name='periodicidad',
+            field=models.CharField(choices=[('mensual', 'Mensual'), ('quincenal', 'Quincenal'), ('semanal', 'Semanal'), ('diario', 'Diario'), ('anual', 'Anual')], max_length=20),
+        ),
+        migrations.CreateModel(
+            name='AjusteAnualISR',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('año', models.IntegerField()),
+                ('numero_recibos', models.IntegerField(default=0)),
+                ('ingresos_gravados', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('isr_retenido', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('subsidio_aplicado', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('isr_anual', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('diferencia', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('resultado', models.CharField(choices=[('a_cargo', 'ISR a cargo'), ('a_favor', 'ISR a favor'), ('sin_diferencia', 'Sin diferencia')], max_length=20)),
+                ('fecha_calculo', models.DateTimeField()),
+                ('empleado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ajustes_anuales_isr', to='empleados.empleado')),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ajustes_anuales_isr', to='empresas.empresa')),
+            ],
+            options={
+                'verbose_name': 'Ajuste Anual ISR',
+                'verbose_name_plural': 'Ajustes Anuales ISR',
+                'db_table': 'nomina_ajustes_anuales_isr',
+                'ordering': ['-año', 'empleado'],
+                'unique_together': {('empleado', 'año')},
+            },
+        ),
+    ]
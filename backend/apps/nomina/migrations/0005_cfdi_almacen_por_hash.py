@@ -0,0 +1,97 @@
+# Generated by Django 5.1.2 on 2026-10-17 04:57
+
+import base64
+import binascii
+import gzip
+import hashlib
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+
+# Copia del almacén de apps.nomina.almacen_cfdi al momento de esta
+# migración (cfdi/<aa>/<sha256>.gz): no depende del código vivo
+
+
+def _ruta_artefacto(hash_contenido):
+    return f"cfdi/{hash_contenido[:2]}/{hash_contenido}.gz"
+
+
+def _guardar_artefacto(contenido):
+    hash_contenido = hashlib.sha256(contenido).hexdigest()
+    ruta = _ruta_artefacto(hash_contenido)
+    if not default_storage.exists(ruta):
+        default_storage.save(ruta, ContentFile(gzip.compress(contenido, compresslevel=6, mtime=0)))
+    return hash_contenido
+
+
+def _leer_artefacto(hash_contenido):
+    with default_storage.open(_ruta_artefacto(hash_contenido), 'rb') as archivo:
+        return gzip.decompress(archivo.read())
+
+
+def mover_cfdi_a_almacen(apps, schema_editor):
+    """Pasa xml_cfdi / pdf_cfdi (base64) al almacén y guarda su hash"""
+    ReciboNomina = apps.get_model('nomina', 'ReciboNomina')
+    pendientes = (
+        ReciboNomina.objects.exclude(xml_cfdi='', pdf_cfdi='')
+        .values_list('id', 'xml_cfdi', 'pdf_cfdi')
+        .iterator(chunk_size=200)
+    )
+    for recibo_id, xml, pdf in pendientes:
+        campos = {}
+        if xml:
+            campos['hash_xml_cfdi'] = _guardar_artefacto(xml.encode('utf-8'))
+        if pdf:
+            try:
+                contenido = base64.b64decode(pdf, validate=True)
+            except (binascii.Error, ValueError):
+                contenido = pdf.encode('utf-8')
+            campos['hash_pdf_cfdi'] = _guardar_artefacto(contenido)
+        ReciboNomina.objects.filter(pk=recibo_id).update(**campos)
+
+
+def restaurar_cfdi_desde_almacen(apps, schema_editor):
+    ReciboNomina = apps.get_model('nomina', 'ReciboNomina')
+    pendientes = (
+        ReciboNomina.objects.exclude(hash_xml_cfdi='', hash_pdf_cfdi='')
+        .values_list('id', 'hash_xml_cfdi', 'hash_pdf_cfdi')
+        .iterator(chunk_size=200)
+    )
+    for recibo_id, hash_xml, hash_pdf in pendientes:
+        campos = {}
+        if hash_xml:
+            campos['xml_cfdi'] = _leer_artefacto(hash_xml).decode('utf-8')
+        if hash_pdf:
+            campos['pdf_cfdi'] = base64.b64encode(_leer_artefacto(hash_pdf)).decode('ascii')
+        ReciboNomina.objects.filter(pk=recibo_id).update(**campos)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nomina', '0004_ajuste_anual_isr'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recibonomina',
+            name='hash_pdf_cfdi',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='recibonomina',
+            name='hash_xml_cfdi',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.RunPython(mover_cfdi_a_almacen, restaurar_cfdi_desde_almacen),
+        migrations.RemoveField(
+            model_name='recibonomina',
+            name='pdf_cfdi',
+        ),
+        migrations.RemoveField(
+            model_name='recibonomina',
+            name='xml_cfdi',
+        ),
+    ]
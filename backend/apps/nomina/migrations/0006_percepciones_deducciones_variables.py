@@ -0,0 +1,64 @@
+# Generated by Django 5.1.2 on 2026-10-17 05:02
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empleados', '0004_agregar_documento_empleado'),
+        ('nomina', '0005_cfdi_almacen_por_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeduccionVariable',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('tipo', models.CharField(choices=[('prestamo_empresa', 'Préstamo de Empresa'), ('prestamo_infonavit', 'Crédito INFONAVIT'), ('prestamo_fonacot', 'Crédito FONACOT'), ('pension_alimenticia', 'Pensión Alimenticia'), ('caja_ahorro', 'Caja de Ahorro'), ('seguro_vida', 'Seguro de Vida'), ('seguro_gmm', 'Seguro Gastos Médicos'), ('fondo_retiro', 'Fondo de Retiro'), ('descuento', 'Descuento por Nómina'), ('otro', 'Otro')], max_length=30)),
+                ('concepto', models.CharField(blank=True, max_length=200)),
+                ('tipo_calculo', models.CharField(choices=[('fijo', 'Monto Fijo'), ('porcentaje_sueldo', 'Porcentaje del Sueldo'), ('porcentaje_neto', 'Porcentaje del Neto'), ('factor_vsm', 'Factor Veces Salario Mínimo')], default='fijo', max_length=20)),
+                ('valor', models.DecimalField(decimal_places=2, help_text='Monto, porcentaje o factor', max_digits=12)),
+                ('monto_total', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('saldo_pendiente', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('numero_pagos', models.PositiveIntegerField(blank=True, null=True)),
+                ('pagos_realizados', models.PositiveIntegerField(default=0)),
+                ('fecha_inicio', models.DateField()),
+                ('fecha_fin', models.DateField(blank=True, null=True)),
+                ('activa', models.BooleanField(default=True)),
+                ('numero_credito', models.CharField(blank=True, help_text='No. crédito INFONAVIT/FONACOT', max_length=50)),
+                ('empleado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deducciones_fijas', to='empleados.empleado')),
+            ],
+            options={
+                'verbose_name': 'Deducción Fija/Variable',
+                'verbose_name_plural': 'Deducciones Fijas/Variables',
+                'db_table': 'nomina_deducciones_fijas',
+                'ordering': ['empleado', 'tipo'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PercepcionVariable',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('tipo', models.CharField(choices=[('comision', 'Comisión'), ('bono_productividad', 'Bono de Productividad'), ('bono_puntualidad', 'Bono de Puntualidad'), ('bono_asistencia', 'Bono de Asistencia'), ('premio', 'Premio'), ('gratificacion', 'Gratificación'), ('retroactivo', 'Pago Retroactivo'), ('vales_despensa', 'Vales de Despensa'), ('ayuda_transporte', 'Ayuda de Transporte'), ('ayuda_alimentacion', 'Ayuda de Alimentación'), ('otro', 'Otro')], max_length=30)),
+                ('concepto', models.CharField(blank=True, help_text='Descripción adicional', max_length=200)),
+                ('monto', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('es_gravable', models.BooleanField(default=True)),
+                ('es_integrable_sdi', models.BooleanField(default=False, help_text='Integra al SDI')),
+                ('empleado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='percepciones_variables', to='empleados.empleado')),
+                ('periodo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='percepciones_variables', to='nomina.periodonomina')),
+            ],
+            options={
+                'verbose_name': 'Percepción Variable',
+                'verbose_name_plural': 'Percepciones Variables',
+                'db_table': 'nomina_percepciones_variables',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.2 on 2026-10-17 05:07
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nomina', '0006_percepciones_deducciones_variables'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenPeriodoNomina',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('recibos_total', models.IntegerField(default=0)),
+                ('recibos_borrador', models.IntegerField(default=0)),
+                ('recibos_calculado', models.IntegerField(default=0)),
+                ('recibos_timbrado', models.IntegerField(default=0)),
+                ('recibos_cancelado', models.IntegerField(default=0)),
+                ('total_percepciones', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_deducciones', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_neto', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_isr', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_imss_obrero', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('neto_minimo', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('neto_maximo', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('neto_promedio', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('periodo', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='resumen', to='nomina.periodonomina')),
+            ],
+            options={
+                'verbose_name': 'Resumen de Periodo',
+                'verbose_name_plural': 'Resúmenes de Periodo',
+                'db_table': 'nomina_resumen_periodos',
+            },
+        ),
+    ]
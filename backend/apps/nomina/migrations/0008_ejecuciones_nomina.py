@@ -0,0 +1,48 @@
+# Generated by Django 5.1.2 on 2026-10-17 05:11
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresas', '0002_initial'),
+        ('nomina', '0007_resumen_periodo'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EjecucionNomina',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('forzar', models.BooleanField(default=False)),
+                ('exitosa', models.BooleanField(default=True)),
+                ('error', models.TextField(blank=True)),
+                ('empleados', models.PositiveIntegerField(default=0)),
+                ('recibos_recalculados', models.PositiveIntegerField(default=0)),
+                ('recibos_sin_cambios', models.PositiveIntegerField(default=0)),
+                ('filas_escritas', models.PositiveIntegerField(default=0)),
+                ('duracion_segundos', models.FloatField(default=0)),
+                ('consultas_sql', models.PositiveIntegerField(default=0)),
+                ('segundos_sql', models.FloatField(default=0)),
+                ('etapas', models.JSONField(blank=True, default=dict)),
+                ('filas', models.JSONField(blank=True, default=dict)),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ejecuciones_nomina', to='empresas.empresa')),
+                ('periodo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ejecuciones', to='nomina.periodonomina')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ejecuciones_nomina', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Ejecución de Nómina',
+                'verbose_name_plural': 'Ejecuciones de Nómina',
+                'db_table': 'nomina_ejecuciones',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['empresa', 'created_at'], name='nomina_ejec_empresa_3f63b0_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.2 on 2026-10-17 05:17
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresas', '0002_initial'),
+        ('nomina', '0008_ejecuciones_nomina'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CostoProyectado',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('año', models.IntegerField()),
+                ('mes', models.PositiveSmallIntegerField()),
+                ('departamento', models.CharField(blank=True, max_length=100)),
+                ('concepto', models.CharField(choices=[('salario', 'Salario'), ('aguinaldo', 'Aguinaldo'), ('prima_vacacional', 'Prima vacacional'), ('imss_patronal', 'IMSS patronal'), ('infonavit', 'INFONAVIT')], max_length=20)),
+                ('importe', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('empleados', models.PositiveIntegerField(default=0)),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='costos_proyectados', to='empresas.empresa')),
+            ],
+            options={
+                'verbose_name': 'Costo Proyectado',
+                'verbose_name_plural': 'Costos Proyectados',
+                'db_table': 'nomina_costos_proyectados',
+                'ordering': ['año', 'mes', 'departamento', 'concepto'],
+                'indexes': [models.Index(fields=['empresa', 'año', 'departamento'], name='nomina_cost_empresa_dca35d_idx')],
+                'unique_together': {('empresa', 'año', 'mes', 'departamento', 'concepto')},
+            },
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 5.1.2 on 2026-10-17 05:21
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+CAMPOS_ACUMULADOS = (
+    'dias_trabajados',
+    'total_percepciones',
+    'total_percepciones_gravadas',
+    'total_percepciones_exentas',
+    'total_deducciones',
+    'isr_retenido',
+    'subsidio_aplicado',
+    'cuota_imss_obrera',
+    'neto_a_pagar',
+)
+
+
+def poblar_acumulados(apps, schema_editor):
+    """Acumulados de los recibos existentes (calculados o timbrados, periodo no cancelado)"""
+    ReciboNomina = apps.get_model('nomina', 'ReciboNomina')
+    AcumuladoAnualEmpleado = apps.get_model('nomina', 'AcumuladoAnualEmpleado')
+
+    filas = (
+        ReciboNomina.objects.filter(estado__in=['calculado', 'timbrado'])
+        .exclude(periodo__estado='cancelado')
+        .values('periodo__empresa_id', 'periodo__año', 'empleado_id')
+        .annotate(numero_recibos=Count('id'), **{campo: Sum(campo) for campo in CAMPOS_ACUMULADOS})
+        .order_by()
+    )
+    lote = []
+    for fila in filas.iterator(chunk_size=2000):
+        lote.append(AcumuladoAnualEmpleado(
+            empresa_id=fila.pop('periodo__empresa_id'),
+            año=fila.pop('periodo__año'),
+            **fila,
+        ))
+        if len(lote) >= 2000:
+            AcumuladoAnualEmpleado.objects.bulk_create(lote)
+            lote = []
+    AcumuladoAnualEmpleado.objects.bulk_create(lote)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empleados', '0004_agregar_documento_empleado'),
+        ('empresas', '0002_initial'),
+        ('nomina', '0009_costos_proyectados'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AcumuladoAnualEmpleado',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('año', models.IntegerField()),
+                ('numero_recibos', models.IntegerField(default=0)),
+                ('dias_trabajados', models.IntegerField(default=0)),
+                ('total_percepciones', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_percepciones_gravadas', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_percepciones_exentas', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_deducciones', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('isr_retenido', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('subsidio_aplicado', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cuota_imss_obrera', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('neto_a_pagar', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('empleado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='acumulados_nomina', to='empleados.empleado')),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='acumulados_nomina', to='empresas.empresa')),
+            ],
+            options={
+                'verbose_name': 'Acumulado Anual',
+                'verbose_name_plural': 'Acumulados Anuales',
+                'db_table': 'nomina_acumulados_anuales',
+                'ordering': ['-año', 'empleado'],
+                'indexes': [models.Index(fields=['empresa', 'año'], name='nomina_acum_empresa_bbbbb5_idx')],
+                'unique_together': {('empleado', 'año')},
+            },
+        ),
+        migrations.RunPython(poblar_acumulados, migrations.RunPython.noop),
+    ]
@@ -14,6 +14,7 @@ class TablaISR(BaseModel):
         QUINCENAL = 'quincenal', 'Quincenal'
         SEMANAL = 'semanal', 'Semanal'
         DIARIO = 'diario', 'Diario'
+        ANUAL = 'anual', 'Anual'  # Art. 152 LISR, para el ajuste anual
     
     año = models.IntegerField()
     periodicidad = models.CharField(max_length=20, choices=Periodicidad.choices)
@@ -260,11 +261,15 @@ class ReciboNomina(BaseModel):
     # IMSS
     cuota_imss_obrera = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     
+    # Huella de los insumos del cálculo (recálculo incremental)
+    huella_calculo = models.CharField(max_length=64, blank=True)
+    
     # Timbrado CFDI (para futuro)
     uuid_cfdi = models.CharField(max_length=36, blank=True)
     fecha_timbrado = models.DateTimeField(null=True, blank=True)
-    xml_cfdi = models.TextField(blank=True)
-    pdf_cfdi = models.TextField(blank=True)  # Base64
+    # XML y PDF timbrados en almacen_cfdi, referenciados por sha256
+    hash_xml_cfdi = models.CharField(max_length=64, blank=True)
+    hash_pdf_cfdi = models.CharField(max_length=64, blank=True)
     
     # Pago
     fecha_pago_real = models.DateField(null=True, blank=True)
@@ -280,6 +285,22 @@ class ReciboNomina(BaseModel):
     def __str__(self):
         return f"Recibo {self.empleado} - {self.periodo}"
 
+    def guardar_xml_cfdi(self, xml: str) -> None:
+        from .almacen_cfdi import guardar_artefacto
+        self.hash_xml_cfdi = guardar_artefacto(xml.encode('utf-8'))
+
+    def guardar_pdf_cfdi(self, pdf: bytes) -> None:
+        from .almacen_cfdi import guardar_artefacto
+        self.hash_pdf_cfdi = guardar_artefacto(pdf)
+
+    def obtener_xml_cfdi(self) -> str:
+        from .almacen_cfdi import leer_artefacto
+        return leer_artefacto(self.hash_xml_cfdi).decode('utf-8') if self.hash_xml_cfdi else ''
+
+    def obtener_pdf_cfdi(self) -> bytes:
+        from .almacen_cfdi import leer_artefacto
+        return leer_artefacto(self.hash_pdf_cfdi) if self.hash_pdf_cfdi else b''
+
 
 class DetalleReciboNomina(BaseModel):
     """
@@ -316,6 +337,139 @@ class DetalleReciboNomina(BaseModel):
         return f"{self.recibo} - {self.concepto.nombre}: {self.importe_total}"
 
 
+
+class ResumenPeriodoNomina(BaseModel):
+    """
+    Agregado materializado de los recibos de un periodo
+    Se recalcula al escribir recibos (ver services.actualizar_resumen_periodo)
+    """
+    periodo = models.OneToOneField(
+        PeriodoNomina,
+        on_delete=models.CASCADE,
+        related_name='resumen'
+    )
+    
+    # Recibos por estado
+    recibos_total = models.IntegerField(default=0)
+    recibos_borrador = models.IntegerField(default=0)
+    recibos_calculado = models.IntegerField(default=0)
+    recibos_timbrado = models.IntegerField(default=0)
+    recibos_cancelado = models.IntegerField(default=0)
+    
+    # Totales
+    total_percepciones = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_deducciones = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_neto = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_isr = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_imss_obrero = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    # Estadísticas del neto
+    neto_minimo = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    neto_maximo = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    neto_promedio = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    
+    class Meta:
+        db_table = 'nomina_resumen_periodos'
+        verbose_name = 'Resumen de Periodo'
+        verbose_name_plural = 'Resúmenes de Periodo'
+    
+    def __str__(self):
+        return f"Resumen {self.periodo_id}: {self.recibos_total} recibos"
+
+
+class EjecucionNomina(BaseModel):
+    """
+    Perfil de una ejecución del cálculo de nómina de un periodo
+    Tiempos por etapa, consultas SQL y filas escritas (ver perfilado.py)
+    """
+    periodo = models.ForeignKey(
+        PeriodoNomina,
+        on_delete=models.CASCADE,
+        related_name='ejecuciones'
+    )
+    empresa = models.ForeignKey(
+        'empresas.Empresa',
+        on_delete=models.CASCADE,
+        related_name='ejecuciones_nomina'
+    )
+    usuario = models.ForeignKey(
+        'usuarios.Usuario',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='ejecuciones_nomina'
+    )
+    
+    forzar = models.BooleanField(default=False)
+    exitosa = models.BooleanField(default=True)
+    error = models.TextField(blank=True)
+    
+    # Volumen
+    empleados = models.PositiveIntegerField(default=0)
+    recibos_recalculados = models.PositiveIntegerField(default=0)
+    recibos_sin_cambios = models.PositiveIntegerField(default=0)
+    filas_escritas = models.PositiveIntegerField(default=0)
+    
+    # Totales de la ejecución
+    duracion_segundos = models.FloatField(default=0)
+    consultas_sql = models.PositiveIntegerField(default=0)
+    segundos_sql = models.FloatField(default=0)
+    
+    # {etapa: {segundos, consultas, segundos_sql}} y {tabla/operación: filas}
+    etapas = models.JSONField(default=dict, blank=True)
+    filas = models.JSONField(default=dict, blank=True)
+    
+    class Meta:
+        db_table = 'nomina_ejecuciones'
+        verbose_name = 'Ejecución de Nómina'
+        verbose_name_plural = 'Ejecuciones de Nómina'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['empresa', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.periodo} - {self.duracion_segundos:.2f}s ({self.created_at:%Y-%m-%d %H:%M})"
+
+class CostoProyectado(BaseModel):
+    """
+    Cubo de costo patronal proyectado: empresa × departamento × mes × concepto
+    Se construye en lote y se refresca por departamento (ver costos.py)
+    """
+    class Concepto(models.TextChoices):
+        SALARIO = 'salario', 'Salario'
+        AGUINALDO = 'aguinaldo', 'Aguinaldo'
+        PRIMA_VACACIONAL = 'prima_vacacional', 'Prima vacacional'
+        IMSS_PATRONAL = 'imss_patronal', 'IMSS patronal'
+        INFONAVIT = 'infonavit', 'INFONAVIT'
+    
+    empresa = models.ForeignKey(
+        'empresas.Empresa',
+        on_delete=models.CASCADE,
+        related_name='costos_proyectados'
+    )
+    año = models.IntegerField()
+    mes = models.PositiveSmallIntegerField()
+    departamento = models.CharField(max_length=100, blank=True)
+    concepto = models.CharField(max_length=20, choices=Concepto.choices)
+    
+    importe = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    empleados = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        db_table = 'nomina_costos_proyectados'
+        verbose_name = 'Costo Proyectado'
+        verbose_name_plural = 'Costos Proyectados'
+        ordering = ['año', 'mes', 'departamento', 'concepto']
+        unique_together = ['empresa', 'año', 'mes', 'departamento', 'concepto']
+        indexes = [
+            models.Index(fields=['empresa', 'año', 'departamento']),
+        ]
+    
+    def __str__(self):
+        return f"{self.empresa_id} {self.año}-{self.mes:02d} {self.departamento or '-'} {self.concepto}: {self.importe}"
+
+
 class IncidenciaNomina(BaseModel):
     """
     Incidencias que afectan la nómina:
@@ -375,3 +529,212 @@ class IncidenciaNomina(BaseModel):
         return f"{self.empleado} - {self.get_tipo_display()} ({self.fecha_inicio})"
 
 
+
+
+
+class PercepcionVariable(BaseModel):
+    """
+    Percepciones variables del periodo: comisiones, bonos, premios, etc.
+    """
+    class TipoPercepcion(models.TextChoices):
+        COMISION = 'comision', 'Comisión'
+        BONO_PRODUCTIVIDAD = 'bono_productividad', 'Bono de Productividad'
+        BONO_PUNTUALIDAD = 'bono_puntualidad', 'Bono de Puntualidad'
+        BONO_ASISTENCIA = 'bono_asistencia', 'Bono de Asistencia'
+        PREMIO = 'premio', 'Premio'
+        GRATIFICACION = 'gratificacion', 'Gratificación'
+        RETROACTIVO = 'retroactivo', 'Pago Retroactivo'
+        VALES_DESPENSA = 'vales_despensa', 'Vales de Despensa'
+        AYUDA_TRANSPORTE = 'ayuda_transporte', 'Ayuda de Transporte'
+        AYUDA_ALIMENTACION = 'ayuda_alimentacion', 'Ayuda de Alimentación'
+        OTRO = 'otro', 'Otro'
+    
+    empleado = models.ForeignKey(
+        'empleados.Empleado',
+        on_delete=models.CASCADE,
+        related_name='percepciones_variables'
+    )
+    periodo = models.ForeignKey(
+        PeriodoNomina,
+        on_delete=models.CASCADE,
+        related_name='percepciones_variables'
+    )
+    
+    tipo = models.CharField(max_length=30, choices=TipoPercepcion.choices)
+    concepto = models.CharField(max_length=200, blank=True, help_text='Descripción adicional')
+    monto = models.DecimalField(max_digits=12, decimal_places=2)
+    
+    es_gravable = models.BooleanField(default=True)
+    es_integrable_sdi = models.BooleanField(default=False, help_text='Integra al SDI')
+    
+    class Meta:
+        db_table = 'nomina_percepciones_variables'
+        verbose_name = 'Percepción Variable'
+        verbose_name_plural = 'Percepciones Variables'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.empleado} - {self.get_tipo_display()} ${self.monto}"
+
+
+class DeduccionVariable(BaseModel):
+    """
+    Deducciones recurrentes del empleado: préstamos, pensión alimenticia,
+    créditos INFONAVIT/FONACOT. Se aplican en cada periodo de su vigencia.
+    """
+    class TipoDeduccion(models.TextChoices):
+        PRESTAMO_EMPRESA = 'prestamo_empresa', 'Préstamo de Empresa'
+        PRESTAMO_INFONAVIT = 'prestamo_infonavit', 'Crédito INFONAVIT'
+        PRESTAMO_FONACOT = 'prestamo_fonacot', 'Crédito FONACOT'
+        PENSION_ALIMENTICIA = 'pension_alimenticia', 'Pensión Alimenticia'
+        CAJA_AHORRO = 'caja_ahorro', 'Caja de Ahorro'
+        SEGURO_VIDA = 'seguro_vida', 'Seguro de Vida'
+        SEGURO_GMM = 'seguro_gmm', 'Seguro Gastos Médicos'
+        FONDO_RETIRO = 'fondo_retiro', 'Fondo de Retiro'
+        DESCUENTO_NOMINA = 'descuento', 'Descuento por Nómina'
+        OTRO = 'otro', 'Otro'
+    
+    class TipoCalculo(models.TextChoices):
+        FIJO = 'fijo', 'Monto Fijo'
+        PORCENTAJE_SUELDO = 'porcentaje_sueldo', 'Porcentaje del Sueldo'
+        PORCENTAJE_NETO = 'porcentaje_neto', 'Porcentaje del Neto'
+        FACTOR_VSM = 'factor_vsm', 'Factor Veces Salario Mínimo'
+    
+    empleado = models.ForeignKey(
+        'empleados.Empleado',
+        on_delete=models.CASCADE,
+        related_name='deducciones_fijas'
+    )
+    
+    tipo = models.CharField(max_length=30, choices=TipoDeduccion.choices)
+    concepto = models.CharField(max_length=200, blank=True)
+    
+    tipo_calculo = models.CharField(max_length=20, choices=TipoCalculo.choices, default=TipoCalculo.FIJO)
+    valor = models.DecimalField(max_digits=12, decimal_places=2, help_text='Monto, porcentaje o factor')
+    
+    # Para préstamos
+    monto_total = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    saldo_pendiente = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    numero_pagos = models.PositiveIntegerField(null=True, blank=True)
+    pagos_realizados = models.PositiveIntegerField(default=0)
+    
+    fecha_inicio = models.DateField()
+    fecha_fin = models.DateField(null=True, blank=True)
+    activa = models.BooleanField(default=True)
+    
+    # Referencia externa
+    numero_credito = models.CharField(max_length=50, blank=True, help_text='No. crédito INFONAVIT/FONACOT')
+    
+    class Meta:
+        db_table = 'nomina_deducciones_fijas'
+        verbose_name = 'Deducción Fija/Variable'
+        verbose_name_plural = 'Deducciones Fijas/Variables'
+        ordering = ['empleado', 'tipo']
+    
+    def __str__(self):
+        return f"{self.empleado} - {self.get_tipo_display()}"
+    
+    def calcular_monto(self, salario_base, salario_neto=None):
+        """Calcula el monto de la deducción según el tipo de cálculo"""
+        if self.tipo_calculo == self.TipoCalculo.FIJO:
+            return self.valor
+        elif self.tipo_calculo == self.TipoCalculo.PORCENTAJE_SUELDO:
+            return salario_base * (self.valor / Decimal('100'))
+        elif self.tipo_calculo == self.TipoCalculo.PORCENTAJE_NETO:
+            if salario_neto:
+                return salario_neto * (self.valor / Decimal('100'))
+            return Decimal('0')
+        elif self.tipo_calculo == self.TipoCalculo.FACTOR_VSM:
+            # Salario mínimo 2024
+            sm = Decimal('248.93')
+            return sm * self.valor
+        return self.valor
+
+class AcumuladoAnualEmpleado(BaseModel):
+    """
+    Acumulados del año por empleado (suma de sus recibos calculados o
+    timbrados de periodos no cancelados). Se actualiza por periodo al
+    calcular y al cambiar de estado (ver acumulados.py)
+    """
+    empresa = models.ForeignKey(
+        'empresas.Empresa',
+        on_delete=models.CASCADE,
+        related_name='acumulados_nomina'
+    )
+    empleado = models.ForeignKey(
+        'empleados.Empleado',
+        on_delete=models.CASCADE,
+        related_name='acumulados_nomina'
+    )
+    año = models.IntegerField()
+    
+    numero_recibos = models.IntegerField(default=0)
+    dias_trabajados = models.IntegerField(default=0)
+    
+    total_percepciones = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_percepciones_gravadas = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_percepciones_exentas = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_deducciones = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    isr_retenido = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    subsidio_aplicado = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    cuota_imss_obrera = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    neto_a_pagar = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        db_table = 'nomina_acumulados_anuales'
+        verbose_name = 'Acumulado Anual'
+        verbose_name_plural = 'Acumulados Anuales'
+        unique_together = ['empleado', 'año']
+        ordering = ['-año', 'empleado']
+        indexes = [
+            models.Index(fields=['empresa', 'año']),
+        ]
+    
+    def __str__(self):
+        return f"{self.empleado} - {self.año}: {self.total_percepciones}"
+
+
+class AjusteAnualISR(BaseModel):
+    """
+    Ajuste anual de ISR por empleado (Art. 97 LISR)
+    Compara el ISR anual causado contra lo retenido en los recibos del año
+    """
+    class Resultado(models.TextChoices):
+        A_CARGO = 'a_cargo', 'ISR a cargo'
+        A_FAVOR = 'a_favor', 'ISR a favor'
+        SIN_DIFERENCIA = 'sin_diferencia', 'Sin diferencia'
+
+    empresa = models.ForeignKey(
+        'empresas.Empresa',
+        on_delete=models.CASCADE,
+        related_name='ajustes_anuales_isr'
+    )
+    empleado = models.ForeignKey(
+        'empleados.Empleado',
+        on_delete=models.CASCADE,
+        related_name='ajustes_anuales_isr'
+    )
+    año = models.IntegerField()
+
+    # Acumulados del año (suma de recibos)
+    numero_recibos = models.IntegerField(default=0)
+    ingresos_gravados = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    isr_retenido = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    subsidio_aplicado = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    # Cálculo anual
+    isr_anual = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    diferencia = models.DecimalField(max_digits=14, decimal_places=2, default=0)  # + a cargo, - a favor
+    resultado = models.CharField(max_length=20, choices=Resultado.choices)
+
+    fecha_calculo = models.DateTimeField()
+
+    class Meta:
+        db_table = 'nomina_ajustes_anuales_isr'
+        verbose_name = 'Ajuste Anual ISR'
+        verbose_name_plural = 'Ajustes Anuales ISR'
+        unique_together = ['empleado', 'año']
+        ordering = ['-año', 'empleado']
+
+    def __str__(self):
+        return f"Ajuste {self.año} {self.empleado}: {self.get_resultado_display()} {self.diferencia}"
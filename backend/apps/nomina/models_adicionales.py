@@ -153,120 +153,7 @@ class Incidencia(BaseModel, AuditMixin):
         return 1
 
 
-class PercepcionVariable(BaseModel):
-    """
-    Percepciones variables: comisiones, bonos, premios, etc.
-    """
-    
-    class TipoPercepcion(models.TextChoices):
-        COMISION = 'comision', 'Comisión'
-        BONO_PRODUCTIVIDAD = 'bono_productividad', 'Bono de Productividad'
-        BONO_PUNTUALIDAD = 'bono_puntualidad', 'Bono de Puntualidad'
-        BONO_ASISTENCIA = 'bono_asistencia', 'Bono de Asistencia'
-        PREMIO = 'premio', 'Premio'
-        GRATIFICACION = 'gratificacion', 'Gratificación'
-        RETROACTIVO = 'retroactivo', 'Pago Retroactivo'
-        VALES_DESPENSA = 'vales_despensa', 'Vales de Despensa'
-        AYUDA_TRANSPORTE = 'ayuda_transporte', 'Ayuda de Transporte'
-        AYUDA_ALIMENTACION = 'ayuda_alimentacion', 'Ayuda de Alimentación'
-        OTRO = 'otro', 'Otro'
-    
-    empleado = models.ForeignKey(
-        'empleados.Empleado', on_delete=models.CASCADE, related_name='percepciones_variables'
-    )
-    periodo = models.ForeignKey(
-        PeriodoNomina, on_delete=models.CASCADE, related_name='percepciones_variables'
-    )
-    
-    tipo = models.CharField(max_length=30, choices=TipoPercepcion.choices)
-    concepto = models.CharField(max_length=200, blank=True, help_text='Descripción adicional')
-    monto = models.DecimalField(max_digits=12, decimal_places=2)
-    
-    es_gravable = models.BooleanField(default=True)
-    es_integrable_sdi = models.BooleanField(default=False, help_text='Integra al SDI')
-
-    class Meta:
-        db_table = 'nomina_percepciones_variables'
-        ordering = ['-created_at']
-        verbose_name = 'Percepción Variable'
-        verbose_name_plural = 'Percepciones Variables'
-
-    def __str__(self):
-        return f"{self.empleado.nombre_completo} - {self.get_tipo_display()} ${self.monto}"
-
-
-class DeduccionVariable(BaseModel):
-    """
-    Deducciones variables: préstamos, pensiones alimenticias, etc.
-    """
-    
-    class TipoDeduccion(models.TextChoices):
-        PRESTAMO_EMPRESA = 'prestamo_empresa', 'Préstamo de Empresa'
-        PRESTAMO_INFONAVIT = 'prestamo_infonavit', 'Crédito INFONAVIT'
-        PRESTAMO_FONACOT = 'prestamo_fonacot', 'Crédito FONACOT'
-        PENSION_ALIMENTICIA = 'pension_alimenticia', 'Pensión Alimenticia'
-        CAJA_AHORRO = 'caja_ahorro', 'Caja de Ahorro'
-        SEGURO_VIDA = 'seguro_vida', 'Seguro de Vida'
-        SEGURO_GMM = 'seguro_gmm', 'Seguro Gastos Médicos'
-        FONDO_RETIRO = 'fondo_retiro', 'Fondo de Retiro'
-        DESCUENTO_NOMINA = 'descuento', 'Descuento por Nómina'
-        OTRO = 'otro', 'Otro'
-    
-    class TipoCalculo(models.TextChoices):
-        FIJO = 'fijo', 'Monto Fijo'
-        PORCENTAJE_SUELDO = 'porcentaje_sueldo', 'Porcentaje del Sueldo'
-        PORCENTAJE_NETO = 'porcentaje_neto', 'Porcentaje del Neto'
-        FACTOR_VSM = 'factor_vsm', 'Factor Veces Salario Mínimo'
-    
-    empleado = models.ForeignKey(
-        'empleados.Empleado', on_delete=models.CASCADE, related_name='deducciones_fijas'
-    )
-    
-    tipo = models.CharField(max_length=30, choices=TipoDeduccion.choices)
-    concepto = models.CharField(max_length=200, blank=True)
-    
-    tipo_calculo = models.CharField(max_length=20, choices=TipoCalculo.choices, default=TipoCalculo.FIJO)
-    valor = models.DecimalField(max_digits=12, decimal_places=2, help_text='Monto, porcentaje o factor')
-    
-    # Para préstamos
-    monto_total = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
-    saldo_pendiente = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
-    numero_pagos = models.PositiveIntegerField(null=True, blank=True)
-    pagos_realizados = models.PositiveIntegerField(default=0)
-    
-    fecha_inicio = models.DateField()
-    fecha_fin = models.DateField(null=True, blank=True)
-    activa = models.BooleanField(default=True)
-    
-    # Referencia externa
-    numero_credito = models.CharField(max_length=50, blank=True, help_text='No. crédito INFONAVIT/FONACOT')
-
-    class Meta:
-        db_table = 'nomina_deducciones_fijas'
-        ordering = ['empleado', 'tipo']
-        verbose_name = 'Deducción Fija/Variable'
-        verbose_name_plural = 'Deducciones Fijas/Variables'
-
-    def __str__(self):
-        return f"{self.empleado.nombre_completo} - {self.get_tipo_display()}"
-    
-    def calcular_monto(self, salario_base, salario_neto=None):
-        """Calcula el monto de la deducción según el tipo de cálculo"""
-        from decimal import Decimal
-        
-        if self.tipo_calculo == self.TipoCalculo.FIJO:
-            return self.valor
-        elif self.tipo_calculo == self.TipoCalculo.PORCENTAJE_SUELDO:
-            return salario_base * (self.valor / Decimal('100'))
-        elif self.tipo_calculo == self.TipoCalculo.PORCENTAJE_NETO:
-            if salario_neto:
-                return salario_neto * (self.valor / Decimal('100'))
-            return Decimal('0')
-        elif self.tipo_calculo == self.TipoCalculo.FACTOR_VSM:
-            # Salario mínimo 2024
-            sm = Decimal('248.93')
-            return sm * self.valor
-        return self.valor
+# PercepcionVariable y DeduccionVariable ya viven en apps/nomina/models.py
 
 
 class PreNomina(BaseModel):
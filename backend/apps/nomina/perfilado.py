@@ -0,0 +1,111 @@
+"""
+Perfilado por ejecución del cálculo de nómina
+
+PerfilEjecucion mide cada etapa (segundos, consultas SQL y su tiempo) y
+cuenta las filas escritas. Las consultas se cuentan con
+connection.execute_wrapper, sin guardar su texto: funciona en producción
+(DEBUG=False) y no crece con el tamaño del periodo.
+
+Uso:
+    perfil = PerfilEjecucion()
+    with perfil.medir():
+        with perfil.etapa('carga_insumos'):
+            ...
+        perfil.contar_filas(recibos_creados=120)
+    perfil.guardar(periodo, usuario_id)
+"""
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+from django.db import connection
+
+
+# Etapas de procesar_nomina_periodo, en orden
+ETAPAS_NOMINA = [
+    'carga_insumos',
+    'calculo',
+    'escritura_recibos',
+    'escritura_detalles',
+    'actualizacion_periodo',
+    'actualizacion_acumulados',
+]
+
+
+class PerfilEjecucion:
+    """Acumula tiempos, consultas SQL y filas de una ejecución"""
+
+    def __init__(self):
+        self.etapas: Dict[str, Dict] = {}
+        self.filas: Dict[str, int] = {}
+        self.consultas = 0
+        self.segundos_sql = 0.0
+        self.duracion = 0.0
+
+    def _envoltura_sql(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.consultas += 1
+            self.segundos_sql += time.perf_counter() - inicio
+
+    @contextmanager
+    def medir(self):
+        """Mide la ejecución completa e intercepta las consultas SQL"""
+        inicio = time.perf_counter()
+        try:
+            with connection.execute_wrapper(self._envoltura_sql):
+                yield self
+        finally:
+            self.duracion = time.perf_counter() - inicio
+
+    @contextmanager
+    def etapa(self, nombre: str):
+        """Mide una etapa; si se repite, acumula"""
+        consultas, segundos_sql = self.consultas, self.segundos_sql
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            metricas = self.etapas.setdefault(nombre, {'segundos': 0.0, 'consultas': 0, 'segundos_sql': 0.0})
+            metricas['segundos'] = round(metricas['segundos'] + time.perf_counter() - inicio, 4)
+            metricas['consultas'] += self.consultas - consultas
+            metricas['segundos_sql'] = round(metricas['segundos_sql'] + self.segundos_sql - segundos_sql, 4)
+
+    def contar_filas(self, **filas):
+        for nombre, cantidad in filas.items():
+            self.filas[nombre] = self.filas.get(nombre, 0) + cantidad
+
+    def guardar(self, periodo, usuario_id=None, forzar: bool = False,
+                resultado: Dict = None, error: str = ''):
+        """Registra la ejecución contra el periodo (EjecucionNomina)"""
+        from .models import EjecucionNomina
+
+        resultado = resultado or {}
+        return EjecucionNomina.objects.create(
+            periodo=periodo,
+            empresa_id=periodo.empresa_id,
+            usuario_id=usuario_id,
+            forzar=forzar,
+            exitosa=not error,
+            error=error,
+            empleados=resultado.get('total_empleados', 0),
+            recibos_recalculados=resultado.get('recalculados', 0),
+            recibos_sin_cambios=resultado.get('sin_cambios', 0),
+            filas_escritas=sum(self.filas.values()),
+            duracion_segundos=round(self.duracion, 4),
+            consultas_sql=self.consultas,
+            segundos_sql=round(self.segundos_sql, 4),
+            etapas=self.etapas,
+            filas=self.filas,
+        )
+
+    def como_dict(self) -> Dict:
+        return {
+            'duracion_segundos': round(self.duracion, 4),
+            'consultas_sql': self.consultas,
+            'segundos_sql': round(self.segundos_sql, 4),
+            'etapas': self.etapas,
+            'filas': self.filas,
+        }
@@ -9,7 +9,8 @@ from .models import (
     IncidenciaNomina,
     ParametrosIMSS,
     TablaISR,
-    TablaSubsidio
+    TablaSubsidio,
+    EjecucionNomina
 )
 
 
@@ -122,8 +123,8 @@ class ReciboNominaDetalleSerializer(serializers.ModelSerializer):
             # CFDI
             'uuid_cfdi',
             'fecha_timbrado',
-            'xml_cfdi',
-            'pdf_cfdi',
+            'hash_xml_cfdi',
+            'hash_pdf_cfdi',
             # Detalles
             'detalles',
             'created_at',
@@ -222,3 +223,49 @@ class IncidenciaNominaSerializer(serializers.ModelSerializer):
             'created_at'
         ]
         read_only_fields = ['id', 'aplicado', 'periodo_aplicado', 'created_at']
+
+
+class EjecucionNominaSerializer(serializers.ModelSerializer):
+    usuario_email = serializers.CharField(source='usuario.email', read_only=True, allow_null=True)
+    
+    class Meta:
+        model = EjecucionNomina
+        fields = [
+            'id',
+            'periodo',
+            'empresa',
+            'usuario',
+            'usuario_email',
+            'forzar',
+            'exitosa',
+            'error',
+            'empleados',
+            'recibos_recalculados',
+            'recibos_sin_cambios',
+            'filas_escritas',
+            'duracion_segundos',
+            'consultas_sql',
+            'segundos_sql',
+            'etapas',
+            'filas',
+            'created_at'
+        ]
+        read_only_fields = fields
+
+
+class AjusteSimulacionSerializer(serializers.Serializer):
+    tipo = serializers.ChoiceField(choices=['porcentaje', 'monto'])
+    valor = serializers.DecimalField(max_digits=12, decimal_places=4)
+    departamentos = serializers.ListField(child=serializers.CharField(), required=False)
+    puestos = serializers.ListField(child=serializers.CharField(), required=False)
+    empleados = serializers.ListField(child=serializers.UUIDField(), required=False)
+
+
+class SimulacionNominaSerializer(serializers.Serializer):
+    empresa = serializers.UUIDField()
+    año = serializers.IntegerField(required=False)
+    periodicidad = serializers.ChoiceField(
+        choices=PeriodoNomina.TipoPeriodo.choices, default=PeriodoNomina.TipoPeriodo.QUINCENAL
+    )
+    ajustes = AjusteSimulacionSerializer(many=True)
+    detalle = serializers.BooleanField(default=True)
@@ -4,10 +4,14 @@ Implementa cálculos según LFT, LISR y LSS
 """
 from decimal import Decimal, ROUND_HALF_UP
 from datetime import date, timedelta
-from typing import Dict, Optional, Tuple
+from typing import Callable, Dict, Optional, Tuple
 from django.db.models import Sum
 
 
+# Factor de integración mínimo de ley (primer año)
+FACTOR_INTEGRACION_MINIMO = Decimal('1.0493')
+
+
 class CalculadoraNomina:
     """
     Calculadora de nómina mexicana
@@ -15,26 +19,29 @@ class CalculadoraNomina:
     """
     
     def __init__(self, año: int = None, periodicidad: str = 'quincenal'):
-        from .models import TablaISR, TablaSubsidio, ParametrosIMSS
+        from .models import ParametrosIMSS
+        from .tarifas import obtener_tarifa
         
         self.año = año or date.today().year
         self.periodicidad = periodicidad
         
-        # Cargar tablas vigentes
-        self.tablas_isr = TablaISR.objects.filter(
-            año=self.año, 
-            periodicidad=periodicidad
-        ).order_by('limite_inferior')
-        
-        self.tablas_subsidio = TablaSubsidio.objects.filter(
-            año=self.año,
-            periodicidad=periodicidad
-        ).order_by('limite_inferior')
+        # Tarifas ISR/subsidio compiladas (cache del proceso)
+        self.tarifa = obtener_tarifa(self.año, periodicidad)
         
         try:
             self.params_imss = ParametrosIMSS.objects.get(vigente=True)
         except ParametrosIMSS.DoesNotExist:
             self.params_imss = None
+        
+        self._nucleo = None
+    
+    @property
+    def nucleo(self):
+        """Núcleo de punto fijo (centavos.py), compilado una vez por calculadora"""
+        if self._nucleo is None:
+            from .centavos import NucleoCentavos
+            self._nucleo = NucleoCentavos(self)
+        return self._nucleo
     
     # ============ CÁLCULO DE ISR ============
     
@@ -45,7 +52,7 @@ class CalculadoraNomina:
         """
         ingreso = Decimal(str(ingreso_gravable))
         
-        if not self.tablas_isr.exists():
+        if not self.tarifa.tiene_isr:
             return {
                 'error': f'No hay tablas ISR para {self.año} {self.periodicidad}',
                 'isr': Decimal('0'),
@@ -53,21 +60,13 @@ class CalculadoraNomina:
                 'isr_neto': Decimal('0')
             }
         
-        # Encontrar rango en tabla ISR
-        rango_isr = None
-        for rango in self.tablas_isr:
-            if rango.limite_inferior <= ingreso <= rango.limite_superior:
-                rango_isr = rango
-                break
-        
-        if not rango_isr:
-            # Si excede el último rango, usar el último
-            rango_isr = self.tablas_isr.last()
+        # Encontrar rango en tabla ISR (búsqueda binaria)
+        rango_isr = self.tarifa.rango_isr(ingreso)
         
         # Cálculo de ISR
-        excedente = ingreso - rango_isr.limite_inferior
-        impuesto_marginal = excedente * (rango_isr.porcentaje_excedente / 100)
-        isr_antes_subsidio = rango_isr.cuota_fija + impuesto_marginal
+        excedente = ingreso - rango_isr['limite_inferior']
+        impuesto_marginal = excedente * (rango_isr['porcentaje_excedente'] / 100)
+        isr_antes_subsidio = rango_isr['cuota_fija'] + impuesto_marginal
         
         # Calcular subsidio al empleo
         subsidio = self._calcular_subsidio(ingreso)
@@ -77,11 +76,11 @@ class CalculadoraNomina:
         
         return {
             'ingreso_gravable': ingreso.quantize(Decimal('0.01')),
-            'limite_inferior': rango_isr.limite_inferior,
+            'limite_inferior': rango_isr['limite_inferior'],
             'excedente': excedente.quantize(Decimal('0.01')),
-            'porcentaje': rango_isr.porcentaje_excedente,
+            'porcentaje': rango_isr['porcentaje_excedente'],
             'impuesto_marginal': impuesto_marginal.quantize(Decimal('0.01')),
-            'cuota_fija': rango_isr.cuota_fija,
+            'cuota_fija': rango_isr['cuota_fija'],
             'isr_antes_subsidio': isr_antes_subsidio.quantize(Decimal('0.01')),
             'subsidio': subsidio.quantize(Decimal('0.01')),
             'isr_neto': isr_neto.quantize(Decimal('0.01'))
@@ -89,14 +88,7 @@ class CalculadoraNomina:
     
     def _calcular_subsidio(self, ingreso: Decimal) -> Decimal:
         """Calcula subsidio al empleo según tabla"""
-        if not self.tablas_subsidio.exists():
-            return Decimal('0')
-        
-        for rango in self.tablas_subsidio:
-            if rango.limite_inferior <= ingreso <= rango.limite_superior:
-                return rango.subsidio
-        
-        return Decimal('0')
+        return self.tarifa.subsidio(ingreso)
     
     # ============ CÁLCULO DE IMSS (CUOTA OBRERA) ============
     
@@ -197,7 +189,7 @@ class CalculadoraNomina:
         
         if factor_integracion is None:
             # Factor mínimo para primer año
-            factor_integracion = Decimal('1.0493')
+            factor_integracion = FACTOR_INTEGRACION_MINIMO
         
         sbc = salario * factor_integracion
         
@@ -418,148 +410,850 @@ class CalculadoraPrestaciones:
         }
 
 
-def procesar_nomina_periodo(periodo_id: int, usuario_id: int) -> Dict:
+DIAS_POR_PERIODO = {
+    'semanal': 7,
+    'quincenal': 15,
+    'mensual': 30,
+}
+
+CODIGO_CONCEPTO_SUELDO = 'P001'
+CODIGO_CONCEPTO_ISR = 'D001'
+CODIGO_CONCEPTO_IMSS = 'D002'
+CODIGO_CONCEPTO_HORAS_EXTRA = 'P006'
+CODIGO_CONCEPTO_OTROS_INGRESOS = 'P013'
+CODIGO_CONCEPTO_OTRAS_DEDUCCIONES = 'D004'
+
+# Incidencias de días no pagados -> concepto de descuento
+INCIDENCIAS_DIAS_NO_PAGADOS = {
+    'falta': 'D012',
+    'permiso_sg': 'D012',
+    'incapacidad': 'D013',
+}
+
+# Incidencias con monto -> concepto
+INCIDENCIAS_PERCEPCION = {
+    'bono': CODIGO_CONCEPTO_OTROS_INGRESOS,
+    'comision': 'P011',
+    'otro': CODIGO_CONCEPTO_OTROS_INGRESOS,
+}
+INCIDENCIAS_DEDUCCION = {
+    'descuento': CODIGO_CONCEPTO_OTRAS_DEDUCCIONES,
+    'prestamo': 'D009',
+}
+
+# PercepcionVariable.tipo / DeduccionVariable.tipo -> concepto
+CONCEPTOS_PERCEPCION_VARIABLE = {
+    'comision': 'P011',
+    'vales_despensa': 'P012',
+}
+CONCEPTOS_DEDUCCION_VARIABLE = {
+    'prestamo_infonavit': 'D006',
+    'prestamo_empresa': 'D009',
+    'prestamo_fonacot': 'D009',
+    'pension_alimenticia': 'D008',
+    'caja_ahorro': 'D007',
+    'fondo_retiro': 'D007',
+}
+
+# Horas extra (Art. 67-68 LFT): hasta 9 dobles por semana, el resto triples
+HORAS_DOBLES_POR_SEMANA = Decimal('9')
+HORAS_JORNADA = Decimal('8')
+# Exención Art. 93 fr. I LISR: 50% de las dobles, tope 5 UMA por semana
+UMAS_EXENTAS_HORAS_EXTRA_SEMANA = Decimal('5')
+
+# Tamaño de lote para bulk_create / bulk_update
+BATCH_SIZE_NOMINA = 500
+
+# Campos del recibo que reescribe el cálculo
+CAMPOS_RECIBO_CALCULO = [
+    'salario_diario',
+    'salario_base_cotizacion',
+    'dias_trabajados',
+    'dias_pagados',
+    'estado',
+    'total_percepciones',
+    'total_percepciones_gravadas',
+    'total_percepciones_exentas',
+    'total_deducciones',
+    'base_gravable_isr',
+    'isr_antes_subsidio',
+    'subsidio_aplicado',
+    'isr_retenido',
+    'cuota_imss_obrera',
+    'neto_a_pagar',
+    'huella_calculo',
+    'updated_at',
+]
+
+CAMPOS_DETALLE_CALCULO = [
+    'cantidad',
+    'valor_unitario',
+    'importe_gravado',
+    'importe_exento',
+    'importe_total',
+    'observaciones',
+    'updated_at',
+]
+
+
+# Cambiar al modificar la lógica del cálculo: invalida todas las huellas
+VERSION_MOTOR_NOMINA = '2'
+
+# Trabajo en segundo plano del cálculo de un periodo
+TIPO_TRABAJO_CALCULO_NOMINA = 'calculo_nomina'
+INTERVALO_PROGRESO = 250
+
+
+def dias_del_periodo(tipo_periodo: str) -> int:
+    """Días pagados según el tipo de periodo"""
+    return DIAS_POR_PERIODO.get(tipo_periodo, 30)
+
+
+def _agregar_linea(lineas: Dict, codigo: str, importe: Decimal, gravado: Decimal = None,
+                   exento: Decimal = Decimal('0'), cantidad=1, valor_unitario=Decimal('0'),
+                   observacion: str = '') -> None:
+    """
+    Acumula un importe en la línea del concepto
+    Un recibo tiene una sola línea por concepto: los importes se suman
+    """
+    importe = Decimal(importe).quantize(Decimal('0.01'))
+    exento = Decimal(exento).quantize(Decimal('0.01'))
+    if gravado is None:
+        gravado = importe - exento if codigo.startswith('P') else Decimal('0')
+    gravado = Decimal(gravado).quantize(Decimal('0.01'))
+    linea = lineas.get(codigo)
+    if linea is None:
+        lineas[codigo] = {
+            'cantidad': Decimal(cantidad),
+            'valor_unitario': valor_unitario,
+            'importe_gravado': gravado,
+            'importe_exento': exento,
+            'importe_total': importe,
+            'observaciones': observacion,
+        }
+        return
+    linea['cantidad'] += Decimal(cantidad)
+    linea['importe_gravado'] += gravado
+    linea['importe_exento'] += exento
+    linea['importe_total'] += importe
+    if observacion:
+        linea['observaciones'] = '; '.join(filter(None, [linea['observaciones'], observacion]))[:200]
+
+
+def _importe_horas_extra(calculadora: CalculadoraNomina, salario_diario: Decimal,
+                         horas: Decimal, dias_periodo: int) -> Tuple[Decimal, Decimal]:
+    """
+    Importe y parte exenta de las horas extra del periodo
+    Dobles hasta 9 por semana, triples el excedente
+    """
+    semanas = Decimal(dias_periodo) / 7
+    valor_hora = salario_diario / HORAS_JORNADA
+    horas_dobles = min(horas, HORAS_DOBLES_POR_SEMANA * semanas)
+    importe_dobles = valor_hora * 2 * horas_dobles
+    importe_triples = valor_hora * 3 * (horas - horas_dobles)
+    
+    exento = Decimal('0')
+    if calculadora.params_imss:
+        tope = calculadora.params_imss.uma_diaria * UMAS_EXENTAS_HORAS_EXTRA_SEMANA * semanas
+        exento = min(importe_dobles / 2, tope)
+    return importe_dobles + importe_triples, exento
+
+
+def calcular_recibo_con_detalle(calculadora: CalculadoraNomina, salario_diario: Decimal,
+                                dias_periodo: int, incidencias=(), percepciones=(),
+                                deducciones=()) -> Tuple[Dict, Dict]:
+    """
+    Calcula un recibo en memoria con incidencias y conceptos variables
+    
+    incidencias: IncidenciaNomina del empleado en el periodo
+    percepciones: PercepcionVariable del empleado en el periodo
+    deducciones: DeduccionVariable vigentes del empleado
+    
+    Retorna (campos del recibo, líneas {codigo_concepto: valores})
+    El caso común (solo sueldo) va por el núcleo de punto fijo
+    """
+    if not incidencias and not percepciones and not deducciones:
+        from .centavos import a_centavos
+        salario_c = a_centavos(salario_diario)
+        if salario_c is not None:
+            return _calcular_recibo_centavos(calculadora, salario_diario, salario_c, dias_periodo)
+    return _calcular_recibo_decimal(
+        calculadora, salario_diario, dias_periodo, incidencias, percepciones, deducciones
+    )
+
+
+def _calcular_recibo_centavos(calculadora: CalculadoraNomina, salario_diario: Decimal,
+                              salario_c: int, dias_periodo: int) -> Tuple[Dict, Dict]:
+    """
+    Recibo sin incidencias ni conceptos variables en centavos enteros
+    Mismo resultado que _calcular_recibo_decimal; Decimal solo al final
+    """
+    from .centavos import a_pesos
+    
+    nucleo = calculadora.nucleo
+    sueldo_c = salario_c * dias_periodo
+    sbc_c = nucleo.sbc(salario_c)
+    isr_antes_c, subsidio_c, isr_c = nucleo.isr(sueldo_c)
+    imss_c = nucleo.imss_obrero(sbc_c, dias_periodo)
+    
+    cero = Decimal('0.00')
+    sueldo = a_pesos(sueldo_c)
+    isr = a_pesos(isr_c)
+    imss = a_pesos(imss_c)
+    lineas = {
+        CODIGO_CONCEPTO_SUELDO: {
+            'cantidad': Decimal(dias_periodo),
+            'valor_unitario': salario_diario,
+            'importe_gravado': sueldo,
+            'importe_exento': cero,
+            'importe_total': sueldo,
+            'observaciones': '',
+        },
+    }
+    for codigo, importe_c, importe in ((CODIGO_CONCEPTO_ISR, isr_c, isr), (CODIGO_CONCEPTO_IMSS, imss_c, imss)):
+        if importe_c > 0:
+            lineas[codigo] = {
+                'cantidad': Decimal(1),
+                'valor_unitario': Decimal('0'),
+                'importe_gravado': cero,
+                'importe_exento': cero,
+                'importe_total': importe,
+                'observaciones': '',
+            }
+    
+    deducciones_c = max(isr_c, 0) + max(imss_c, 0)
+    campos = {
+        'dias_trabajados': dias_periodo,
+        'dias_pagados': dias_periodo,
+        'salario_base_cotizacion': a_pesos(sbc_c),
+        'total_percepciones': sueldo,
+        'total_percepciones_gravadas': sueldo,
+        'total_percepciones_exentas': cero,
+        'total_deducciones': a_pesos(deducciones_c),
+        'base_gravable_isr': sueldo,
+        'isr_antes_subsidio': a_pesos(isr_antes_c),
+        'subsidio_aplicado': a_pesos(subsidio_c),
+        'isr_retenido': isr,
+        'cuota_imss_obrera': imss,
+        'neto_a_pagar': a_pesos(sueldo_c - deducciones_c),
+    }
+    return campos, lineas
+
+
+def _calcular_recibo_decimal(calculadora: CalculadoraNomina, salario_diario: Decimal,
+                             dias_periodo: int, incidencias=(), percepciones=(),
+                             deducciones=()) -> Tuple[Dict, Dict]:
+    """Ruta Decimal de calcular_recibo_con_detalle (incidencias y conceptos variables)"""
+    lineas = {}
+    
+    # Días no pagados (faltas, permisos sin goce, incapacidades)
+    dias_no_pagados = Decimal('0')
+    for inc in incidencias:
+        codigo = INCIDENCIAS_DIAS_NO_PAGADOS.get(inc.tipo)
+        if not codigo:
+            continue
+        dias = min(Decimal(inc.cantidad), dias_periodo - dias_no_pagados)
+        if dias <= 0:
+            continue
+        dias_no_pagados += dias
+        _agregar_linea(
+            lineas, codigo, salario_diario * dias, cantidad=dias,
+            valor_unitario=salario_diario, observacion=inc.get_tipo_display()
+        )
+    # Días fraccionarios (media falta) se conservan en Decimal para IMSS y
+    # deducciones; el recibo guarda días enteros redondeados a la mitad
+    # hacia arriba (el campo es entero)
+    dias_pagados = Decimal(dias_periodo) - dias_no_pagados
+    dias_pagados_recibo = int(dias_pagados.quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+    descuento_dias = salario_diario * dias_no_pagados
+    
+    # Percepciones
+    sueldo_periodo = salario_diario * dias_periodo
+    _agregar_linea(
+        lineas, CODIGO_CONCEPTO_SUELDO, sueldo_periodo,
+        cantidad=dias_periodo, valor_unitario=salario_diario
+    )
+    
+    horas_extra = sum(
+        (Decimal(inc.cantidad) for inc in incidencias if inc.tipo == 'horas_extra' and not inc.monto),
+        Decimal('0')
+    )
+    if horas_extra:
+        importe, exento = _importe_horas_extra(calculadora, salario_diario, horas_extra, dias_periodo)
+        _agregar_linea(
+            lineas, CODIGO_CONCEPTO_HORAS_EXTRA, importe, exento=exento,
+            cantidad=horas_extra, valor_unitario=(salario_diario / HORAS_JORNADA).quantize(Decimal('0.01'))
+        )
+    
+    for inc in incidencias:
+        if inc.tipo == 'horas_extra' and inc.monto:
+            _agregar_linea(lineas, CODIGO_CONCEPTO_HORAS_EXTRA, inc.monto, cantidad=inc.cantidad)
+        elif inc.tipo in INCIDENCIAS_PERCEPCION and inc.monto:
+            _agregar_linea(
+                lineas, INCIDENCIAS_PERCEPCION[inc.tipo], inc.monto,
+                observacion=inc.descripcion[:100]
+            )
+    
+    for percepcion in percepciones:
+        codigo = CONCEPTOS_PERCEPCION_VARIABLE.get(percepcion.tipo, CODIGO_CONCEPTO_OTROS_INGRESOS)
+        _agregar_linea(
+            lineas, codigo, percepcion.monto,
+            exento=Decimal('0') if percepcion.es_gravable else percepcion.monto,
+            observacion=percepcion.concepto or percepcion.get_tipo_display()
+        )
+    
+    total_percepciones = Decimal('0')
+    total_gravadas = Decimal('0')
+    total_exentas = Decimal('0')
+    for codigo, linea in lineas.items():
+        if codigo.startswith('P'):
+            total_percepciones += linea['importe_total']
+            total_gravadas += linea['importe_gravado']
+            total_exentas += linea['importe_exento']
+    
+    # ISR sobre lo gravado menos los días no pagados; IMSS sobre días pagados
+    base_isr = total_gravadas - descuento_dias
+    sbc = calculadora.calcular_sbc(salario_diario)
+    resultado_isr = calculadora.calcular_isr(base_isr)
+    isr = resultado_isr.get('isr_neto', Decimal('0'))
+    subsidio = resultado_isr.get('subsidio', Decimal('0'))
+    imss = calculadora.calcular_imss_obrero(sbc, dias_pagados).get('total', Decimal('0'))
+    
+    if isr > 0:
+        _agregar_linea(lineas, CODIGO_CONCEPTO_ISR, isr)
+    if imss > 0:
+        _agregar_linea(lineas, CODIGO_CONCEPTO_IMSS, imss)
+    
+    # Deducciones no obligatorias: nunca dejan el neto en negativo
+    disponible = total_percepciones - descuento_dias - isr - imss
+    otras = [
+        (INCIDENCIAS_DEDUCCION[inc.tipo], Decimal(inc.monto), inc.descripcion[:100])
+        for inc in incidencias
+        if inc.tipo in INCIDENCIAS_DEDUCCION and inc.monto
+    ]
+    sueldo_pagado = salario_diario * dias_pagados
+    for deduccion in deducciones:
+        monto = Decimal(deduccion.calcular_monto(sueldo_pagado, max(disponible, Decimal('0'))))
+        if deduccion.saldo_pendiente is not None:
+            monto = min(monto, deduccion.saldo_pendiente)
+        otras.append((
+            CONCEPTOS_DEDUCCION_VARIABLE.get(deduccion.tipo, CODIGO_CONCEPTO_OTRAS_DEDUCCIONES),
+            monto,
+            deduccion.numero_credito or deduccion.concepto or deduccion.get_tipo_display()
+        ))
+    for codigo, monto, observacion in otras:
+        monto = min(monto.quantize(Decimal('0.01')), disponible)
+        if monto <= 0:
+            continue
+        disponible -= monto
+        _agregar_linea(lineas, codigo, monto, observacion=observacion)
+    
+    total_deducciones = sum(
+        (linea['importe_total'] for codigo, linea in lineas.items() if codigo.startswith('D')),
+        Decimal('0')
+    )
+    
+    campos = {
+        'dias_trabajados': dias_pagados_recibo,
+        'dias_pagados': dias_pagados_recibo,
+        'salario_base_cotizacion': sbc,
+        'total_percepciones': total_percepciones,
+        'total_percepciones_gravadas': total_gravadas,
+        'total_percepciones_exentas': total_exentas,
+        'total_deducciones': total_deducciones,
+        'base_gravable_isr': base_isr,
+        'isr_antes_subsidio': resultado_isr.get('isr_antes_subsidio', Decimal('0')),
+        'subsidio_aplicado': subsidio,
+        'isr_retenido': isr,
+        'cuota_imss_obrera': imss,
+        'neto_a_pagar': total_percepciones - total_deducciones,
+    }
+    return campos, lineas
+
+
+def calcular_recibo(calculadora: CalculadoraNomina, salario_diario: Decimal, dias_periodo: int) -> Dict:
+    """
+    Calcula los importes de un recibo en memoria (sin tocar la BD)
+    Retorna los valores de los campos del recibo
+    """
+    return calcular_recibo_con_detalle(calculadora, salario_diario, dias_periodo)[0]
+
+
+def contexto_huella(calculadora: CalculadoraNomina, dias_periodo: int, conceptos: Dict) -> str:
+    """
+    Parte común de la huella de todos los recibos de un periodo:
+    versión del motor, días, versión de tarifas, parámetros IMSS y conceptos
+    """
+    params = calculadora.params_imss
+    return '|'.join([
+        VERSION_MOTOR_NOMINA,
+        str(dias_periodo),
+        calculadora.tarifa.version,
+        f"{params.pk}@{params.updated_at.isoformat()}" if params else '-',
+        ','.join(sorted(f"{codigo}:{c.pk}" for codigo, c in conceptos.items())),
+    ])
+
+
+def huella_recibo(contexto: str, salario_diario, factor_integracion, incidencias: list,
+                  percepciones: list = (), deducciones: list = ()) -> str:
+    """
+    Huella SHA-256 de los insumos del recibo de un empleado
+    Si no cambia, el recibo calculado sigue siendo válido
+    """
+    import hashlib
+    
+    partes = [contexto, str(salario_diario), str(factor_integracion)]
+    for inc in sorted(incidencias, key=lambda i: str(i.pk)):
+        partes.append(
+            f"{inc.pk}:{inc.tipo}:{inc.fecha_inicio}:{inc.fecha_fin}:"
+            f"{inc.cantidad}:{inc.monto}:{inc.updated_at.isoformat()}"
+        )
+    for per in sorted(percepciones, key=lambda p: str(p.pk)):
+        partes.append(f"P{per.pk}:{per.tipo}:{per.monto}:{per.es_gravable}:{per.updated_at.isoformat()}")
+    for ded in sorted(deducciones, key=lambda d: str(d.pk)):
+        partes.append(
+            f"D{ded.pk}:{ded.tipo}:{ded.tipo_calculo}:{ded.valor}:"
+            f"{ded.saldo_pendiente}:{ded.updated_at.isoformat()}"
+        )
+    return hashlib.sha256('\n'.join(partes).encode('utf-8')).hexdigest()
+
+
+def _cargar_incidencias(periodo) -> Dict:
+    """
+    Incidencias del periodo agrupadas por empleado (una consulta)
+    Incluye las asignadas al periodo y las sin periodo cuyas fechas caen en él
+    """
+    from .models import IncidenciaNomina
+    from django.db.models import Q
+    
+    qs = IncidenciaNomina.objects.filter(
+        Q(periodo=periodo) |
+        Q(periodo__isnull=True,
+          empleado__empresa_id=periodo.empresa_id,
+          fecha_inicio__gte=periodo.fecha_inicio,
+          fecha_inicio__lte=periodo.fecha_fin)
+    )
+    por_empleado = {}
+    for incidencia in qs:
+        por_empleado.setdefault(incidencia.empleado_id, []).append(incidencia)
+    return por_empleado
+
+
+def _cargar_percepciones_variables(periodo) -> Dict:
+    """Percepciones variables del periodo agrupadas por empleado (una consulta)"""
+    from .models import PercepcionVariable
+    
+    por_empleado = {}
+    for percepcion in PercepcionVariable.objects.filter(periodo=periodo):
+        por_empleado.setdefault(percepcion.empleado_id, []).append(percepcion)
+    return por_empleado
+
+
+def _cargar_deducciones_variables(periodo) -> Dict:
+    """
+    Deducciones activas vigentes en el periodo agrupadas por empleado (una consulta)
+    Excluye préstamos ya liquidados (saldo_pendiente = 0)
+    """
+    from .models import DeduccionVariable
+    from django.db.models import Q
+    
+    qs = DeduccionVariable.objects.filter(
+        empleado__empresa_id=periodo.empresa_id,
+        activa=True,
+        fecha_inicio__lte=periodo.fecha_fin,
+    ).filter(
+        Q(fecha_fin__isnull=True) | Q(fecha_fin__gte=periodo.fecha_inicio)
+    ).exclude(saldo_pendiente__lte=0)
+    por_empleado = {}
+    for deduccion in qs:
+        por_empleado.setdefault(deduccion.empleado_id, []).append(deduccion)
+    return por_empleado
+
+
+def _codigos_conceptos_calculo() -> set:
+    """Códigos de concepto que puede generar el cálculo"""
+    return {
+        CODIGO_CONCEPTO_SUELDO, CODIGO_CONCEPTO_ISR, CODIGO_CONCEPTO_IMSS,
+        CODIGO_CONCEPTO_HORAS_EXTRA, CODIGO_CONCEPTO_OTROS_INGRESOS,
+        CODIGO_CONCEPTO_OTRAS_DEDUCCIONES,
+        *INCIDENCIAS_DIAS_NO_PAGADOS.values(),
+        *INCIDENCIAS_PERCEPCION.values(),
+        *INCIDENCIAS_DEDUCCION.values(),
+        *CONCEPTOS_PERCEPCION_VARIABLE.values(),
+        *CONCEPTOS_DEDUCCION_VARIABLE.values(),
+    }
+
+
+def _guardar_detalles(detalles_por_recibo: Dict, ahora, recibos_nuevos: set = frozenset()) -> Dict:
+    """
+    Escribe los detalles de todos los recibos con bulk_create/bulk_update
+    detalles_por_recibo: {recibo_id: [(concepto_id, valores), ...]}
+    recibos_nuevos: ids de recibos recién creados (no se buscan sus detalles)
+    Retorna las filas creadas, actualizadas y eliminadas
+    """
+    from .models import DetalleReciboNomina
+    
+    if not detalles_por_recibo:
+        return {}
+    
+    # Recibos recién creados no tienen detalles previos
+    recibos_previos = [
+        recibo_id for recibo_id in detalles_por_recibo if recibo_id not in recibos_nuevos
+    ]
+    existentes = {
+        (d.recibo_id, d.concepto_id): d
+        for d in DetalleReciboNomina.objects.filter(recibo_id__in=recibos_previos)
+    } if recibos_previos else {}
+    
+    # Líneas de conceptos que ya no aplican (p.ej. incidencia eliminada)
+    vigentes = {
+        (recibo_id, concepto_id)
+        for recibo_id, detalles in detalles_por_recibo.items()
+        for concepto_id, _ in detalles
+    }
+    obsoletos = [d.pk for llave, d in existentes.items() if llave not in vigentes]
+    if obsoletos:
+        DetalleReciboNomina.objects.filter(pk__in=obsoletos).delete()
+    
+    nuevos = []
+    actualizados = []
+    for recibo_id, detalles in detalles_por_recibo.items():
+        for concepto_id, valores in detalles:
+            detalle = existentes.get((recibo_id, concepto_id))
+            if detalle is None:
+                nuevos.append(DetalleReciboNomina(
+                    recibo_id=recibo_id,
+                    concepto_id=concepto_id,
+                    **valores
+                ))
+                continue
+            for campo, valor in valores.items():
+                setattr(detalle, campo, valor)
+            detalle.updated_at = ahora
+            actualizados.append(detalle)
+    
+    if nuevos:
+        DetalleReciboNomina.objects.bulk_create(nuevos, batch_size=BATCH_SIZE_NOMINA)
+    if actualizados:
+        DetalleReciboNomina.objects.bulk_update(
+            actualizados, CAMPOS_DETALLE_CALCULO, batch_size=BATCH_SIZE_NOMINA
+        )
+    return {
+        'detalles_creados': len(nuevos),
+        'detalles_actualizados': len(actualizados),
+        'detalles_eliminados': len(obsoletos),
+    }
+
+
+def _valores_resumen(agregados: Dict) -> Dict:
+    """Normaliza los agregados del resumen (conteos enteros, importes a centavos)"""
+    return {
+        campo: (
+            valor or 0 if campo.startswith('recibos_')
+            else Decimal(str(valor or 0)).quantize(Decimal('0.01'))
+        )
+        for campo, valor in agregados.items()
+    }
+
+
+def _resumen_de_recibos(recibos: list) -> Dict:
+    """Agregados del resumen calculados en memoria a partir de los recibos"""
+    netos = [r.neto_a_pagar for r in recibos]
+    estados = {}
+    for recibo in recibos:
+        estados[recibo.estado] = estados.get(recibo.estado, 0) + 1
+    return _valores_resumen({
+        'recibos_total': len(recibos),
+        'recibos_borrador': estados.get('borrador', 0),
+        'recibos_calculado': estados.get('calculado', 0),
+        'recibos_timbrado': estados.get('timbrado', 0),
+        'recibos_cancelado': estados.get('cancelado', 0),
+        'total_percepciones': sum((r.total_percepciones for r in recibos), Decimal('0')),
+        'total_deducciones': sum((r.total_deducciones for r in recibos), Decimal('0')),
+        'total_neto': sum(netos, Decimal('0')),
+        'total_isr': sum((r.isr_retenido for r in recibos), Decimal('0')),
+        'total_imss_obrero': sum((r.cuota_imss_obrera for r in recibos), Decimal('0')),
+        'neto_minimo': min(netos, default=None),
+        'neto_maximo': max(netos, default=None),
+        'neto_promedio': sum(netos, Decimal('0')) / len(netos) if netos else None,
+    })
+
+
+def _guardar_resumen(periodo_id, valores: Dict, resumen=None, buscar: bool = True):
+    """
+    Escribe el resumen con un solo UPDATE o INSERT
+    buscar=False: el llamador ya sabe que no existe (resumen=None)
+    """
+    from .models import ResumenPeriodoNomina
+    
+    if resumen is None and buscar:
+        resumen = ResumenPeriodoNomina.objects.filter(periodo_id=periodo_id).first()
+    if resumen is None:
+        return ResumenPeriodoNomina.objects.create(periodo_id=periodo_id, **valores)
+    for campo, valor in valores.items():
+        setattr(resumen, campo, valor)
+    resumen.save()
+    return resumen
+
+
+def actualizar_resumen_periodo(periodo_id):
+    """
+    Recalcula el resumen materializado del periodo desde la BD
+    Una consulta de agregación y un upsert, sin importar el número de recibos
+    """
+    from .models import ReciboNomina
+    from django.db.models import Avg, Count, Max, Min, Q
+    
+    estados = ReciboNomina.Estado
+    agregados = ReciboNomina.objects.filter(periodo_id=periodo_id).aggregate(
+        recibos_total=Count('id'),
+        recibos_borrador=Count('id', filter=Q(estado=estados.BORRADOR)),
+        recibos_calculado=Count('id', filter=Q(estado=estados.CALCULADO)),
+        recibos_timbrado=Count('id', filter=Q(estado=estados.TIMBRADO)),
+        recibos_cancelado=Count('id', filter=Q(estado=estados.CANCELADO)),
+        total_percepciones=Sum('total_percepciones'),
+        total_deducciones=Sum('total_deducciones'),
+        total_neto=Sum('neto_a_pagar'),
+        total_isr=Sum('isr_retenido'),
+        total_imss_obrero=Sum('cuota_imss_obrera'),
+        neto_minimo=Min('neto_a_pagar'),
+        neto_maximo=Max('neto_a_pagar'),
+        neto_promedio=Avg('neto_a_pagar'),
+    )
+    return _guardar_resumen(periodo_id, _valores_resumen(agregados))
+
+
+def procesar_nomina_periodo(periodo_id: int, usuario_id: int, forzar: bool = False,
+                            progreso: Callable = None) -> Dict:
     """
     Procesa la nómina completa de un periodo
     Crea recibos para todos los empleados activos
+    
+    Motor por lotes: carga empleados, recibos y conceptos en pocas
+    consultas, calcula en memoria y escribe con bulk_create/bulk_update
+    dentro de una sola transacción.
+    
+    Incidencias, percepciones variables y deducciones vigentes se cargan
+    con una consulta por modelo y se aplican en calcular_recibo_con_detalle.
+    
+    Al final reescribe el resumen materializado (ResumenPeriodoNomina)
+    con los recibos que ya están en memoria.
+    
+    Recálculo incremental: cada recibo guarda la huella de sus insumos y
+    solo se recalculan los empleados cuya huella cambió. forzar=True
+    recalcula todos.
+    
+    Los recibos ya timbrados (con UUID) nunca se recalculan, ni con
+    forzar: sus importes deben coincidir con el CFDI emitido. Entran a los
+    totales del periodo con los importes timbrados.
+    
+    Cada ejecución queda registrada en EjecucionNomina con tiempos por
+    etapa, consultas SQL y filas escritas (también si falla).
+    
+    progreso: callback opcional progreso(procesados, total) que se llama
+    cada INTERVALO_PROGRESO empleados
     """
-    from .models import PeriodoNomina, ReciboNomina, DetalleReciboNomina, ConceptoNomina
+    from .models import PeriodoNomina
+    from .perfilado import PerfilEjecucion
+    
+    perfil = PerfilEjecucion()
+    periodo = None
+    try:
+        with perfil.medir():
+            with perfil.etapa('carga_insumos'):
+                periodo = PeriodoNomina.objects.select_related('empresa', 'resumen').get(pk=periodo_id)
+            
+            # Validar estado
+            if periodo.estado not in ['borrador', 'calculado']:
+                return {'error': 'El periodo no puede ser procesado en este estado'}
+            
+            resultado = _procesar_periodo(periodo, usuario_id, forzar, progreso, perfil)
+    except Exception as exc:
+        if periodo is not None:
+            perfil.guardar(periodo, usuario_id, forzar, error=f'{type(exc).__name__}: {exc}')
+        raise
+    
+    ejecucion = perfil.guardar(periodo, usuario_id, forzar, resultado)
+    resultado['ejecucion_id'] = str(ejecucion.id)
+    resultado['perfil'] = perfil.como_dict()
+    return resultado
+
+
+def _procesar_periodo(periodo, usuario_id, forzar: bool, progreso: Callable, perfil) -> Dict:
+    """Cuerpo de procesar_nomina_periodo, etapa por etapa"""
+    from .models import ReciboNomina, ConceptoNomina, ResumenPeriodoNomina
+    from .acumulados import actualizar_acumulados_periodo
     from apps.empleados.models import Empleado
+    from django.db import transaction
     from django.utils import timezone
     
-    periodo = PeriodoNomina.objects.get(pk=periodo_id)
+    # ---- Carga de insumos ----
+    with perfil.etapa('carga_insumos'):
+        empleados = list(Empleado.objects.filter(
+            empresa=periodo.empresa,
+            estado='activo'
+        ))
     
-    # Validar estado
-    if periodo.estado not in ['borrador', 'calculado']:
-        return {'error': 'El periodo no puede ser procesado en este estado'}
+        conceptos = {
+            c.codigo_interno: c
+            for c in ConceptoNomina.objects.filter(codigo_interno__in=_codigos_conceptos_calculo())
+        }
     
-    # Obtener empleados activos de la empresa
-    empleados = Empleado.objects.filter(
-        empresa=periodo.empresa,
-        estado='activo'
-    )
+        recibos_existentes = {
+            r.empleado_id: r
+            for r in ReciboNomina.objects.filter(periodo=periodo)
+        }
     
-    # Obtener conceptos fijos
-    concepto_sueldo = ConceptoNomina.objects.filter(codigo_interno='P001').first()
-    concepto_isr = ConceptoNomina.objects.filter(codigo_interno='D001').first()
-    concepto_imss = ConceptoNomina.objects.filter(codigo_interno='D002').first()
+        # Una consulta por modelo, sin importar la plantilla
+        incidencias = _cargar_incidencias(periodo)
+        percepciones = _cargar_percepciones_variables(periodo)
+        deducciones = _cargar_deducciones_variables(periodo)
     
-    # Días del periodo
-    if periodo.tipo_periodo == 'quincenal':
-        dias_periodo = 15
-    elif periodo.tipo_periodo == 'semanal':
-        dias_periodo = 7
-    else:
-        dias_periodo = 30
+        dias_periodo = dias_del_periodo(periodo.tipo_periodo)
+        calculadora = CalculadoraNomina(periodo.año, periodo.tipo_periodo)
+        contexto = contexto_huella(calculadora, dias_periodo, conceptos)
+        ahora = timezone.now()
+
+    # ---- Cálculo en memoria ----
+    with perfil.etapa('calculo'):
+        resultados = []
+        recibos_nuevos = []
+        recibos_actualizados = []
+        detalles_por_recibo = {}
+        total_percepciones = Decimal('0')
+        total_deducciones = Decimal('0')
+        total_neto = Decimal('0')
+        sin_cambios = 0
+        timbrados = 0
     
-    calculadora = CalculadoraNomina(periodo.año, periodo.tipo_periodo)
+        if progreso:
+            progreso(0, len(empleados))
     
-    resultados = []
-    total_percepciones = Decimal('0')
-    total_deducciones = Decimal('0')
-    total_neto = Decimal('0')
-    
-    for empleado in empleados:
-        # Crear o actualizar recibo
-        recibo, created = ReciboNomina.objects.update_or_create(
-            periodo=periodo,
-            empleado=empleado,
-            defaults={
-                'salario_diario': empleado.salario_diario or Decimal('0'),
-                'dias_trabajados': dias_periodo,
-                'dias_pagados': dias_periodo,
-                'estado': 'calculado'
-            }
-        )
-        
-        if not empleado.salario_diario:
-            resultados.append({
-                'empleado': str(empleado),
-                'error': 'Sin salario configurado'
-            })
-            continue
-        
-        # Calcular SBC
-        sbc = calculadora.calcular_sbc(empleado.salario_diario)
-        recibo.salario_base_cotizacion = sbc
-        
-        # Calcular sueldo del periodo
-        sueldo_periodo = empleado.salario_diario * dias_periodo
-        
-        # Calcular ISR
-        resultado_isr = calculadora.calcular_isr(sueldo_periodo)
-        isr = resultado_isr.get('isr_neto', Decimal('0'))
-        subsidio = resultado_isr.get('subsidio', Decimal('0'))
-        
-        # Calcular IMSS
-        resultado_imss = calculadora.calcular_imss_obrero(sbc, dias_periodo)
-        imss = resultado_imss.get('total', Decimal('0'))
-        
-        # Actualizar recibo
-        recibo.total_percepciones = sueldo_periodo
-        recibo.total_percepciones_gravadas = sueldo_periodo
-        recibo.total_deducciones = isr + imss
-        recibo.base_gravable_isr = sueldo_periodo
-        recibo.isr_antes_subsidio = resultado_isr.get('isr_antes_subsidio', Decimal('0'))
-        recibo.subsidio_aplicado = subsidio
-        recibo.isr_retenido = isr
-        recibo.cuota_imss_obrera = imss
-        recibo.neto_a_pagar = sueldo_periodo - isr - imss
-        recibo.save()
-        
-        # Crear detalles
-        if concepto_sueldo:
-            DetalleReciboNomina.objects.update_or_create(
-                recibo=recibo,
-                concepto=concepto_sueldo,
-                defaults={
-                    'cantidad': dias_periodo,
-                    'valor_unitario': empleado.salario_diario,
-                    'importe_gravado': sueldo_periodo,
-                    'importe_total': sueldo_periodo
-                }
+        for indice, empleado in enumerate(empleados, start=1):
+            if progreso and indice % INTERVALO_PROGRESO == 0:
+                progreso(indice, len(empleados))
+        
+            recibo = recibos_existentes.get(empleado.id)
+            incidencias_empleado = incidencias.get(empleado.id, [])
+            percepciones_empleado = percepciones.get(empleado.id, [])
+            deducciones_empleado = deducciones.get(empleado.id, [])
+            huella = huella_recibo(
+                contexto, empleado.salario_diario, FACTOR_INTEGRACION_MINIMO,
+                incidencias_empleado, percepciones_empleado, deducciones_empleado
             )
         
-        if concepto_isr and isr > 0:
-            DetalleReciboNomina.objects.update_or_create(
-                recibo=recibo,
-                concepto=concepto_isr,
-                defaults={
-                    'importe_total': isr
-                }
+            timbrado = recibo is not None and (
+                recibo.uuid_cfdi or recibo.estado == ReciboNomina.Estado.TIMBRADO
             )
-        
-        if concepto_imss and imss > 0:
-            DetalleReciboNomina.objects.update_or_create(
-                recibo=recibo,
-                concepto=concepto_imss,
-                defaults={
-                    'importe_total': imss
-                }
+            recalcular = not timbrado and (
+                forzar or recibo is None or not empleado.salario_diario
+                or recibo.estado != 'calculado' or recibo.huella_calculo != huella
             )
         
-        # Acumular totales
-        total_percepciones += sueldo_periodo
-        total_deducciones += (isr + imss)
-        total_neto += recibo.neto_a_pagar
+            if timbrado:
+                # CFDI emitido: el recibo queda congelado
+                timbrados += 1
+            elif not recalcular:
+                # Insumos sin cambios: se conserva el recibo tal cual
+                sin_cambios += 1
+            else:
+                if recibo is None:
+                    recibo = ReciboNomina(
+                        periodo=periodo,
+                        empleado=empleado,
+                        salario_base_cotizacion=Decimal('0')
+                    )
+                    recibos_nuevos.append(recibo)
+                else:
+                    recibo.updated_at = ahora
+                    recibos_actualizados.append(recibo)
+            
+                recibo.salario_diario = empleado.salario_diario or Decimal('0')
+                recibo.dias_trabajados = dias_periodo
+                recibo.dias_pagados = dias_periodo
+                recibo.estado = 'calculado'
+                recibo.huella_calculo = huella
+            
+                if not empleado.salario_diario:
+                    resultados.append({
+                        'empleado': str(empleado),
+                        'error': 'Sin salario configurado'
+                    })
+                    continue
+            
+                campos, lineas = calcular_recibo_con_detalle(
+                    calculadora, empleado.salario_diario, dias_periodo,
+                    incidencias_empleado, percepciones_empleado, deducciones_empleado
+                )
+                for campo, valor in campos.items():
+                    setattr(recibo, campo, valor)
+            
+                detalles_por_recibo[recibo.id] = [
+                    (conceptos[codigo].id, valores)
+                    for codigo, valores in lineas.items()
+                    if codigo in conceptos
+                ]
         
-        resultados.append({
-            'empleado': str(empleado),
-            'sueldo': float(sueldo_periodo),
-            'isr': float(isr),
-            'imss': float(imss),
-            'neto': float(recibo.neto_a_pagar)
-        })
+            # Acumular totales
+            total_percepciones += recibo.total_percepciones
+            total_deducciones += recibo.total_deducciones
+            total_neto += recibo.neto_a_pagar
+        
+            resultados.append({
+                'empleado': str(empleado),
+                'sueldo': float(recibo.total_percepciones),
+                'isr': float(recibo.isr_retenido),
+                'imss': float(recibo.cuota_imss_obrera),
+                'neto': float(recibo.neto_a_pagar)
+            })
+
+    # ---- Escritura en una sola transacción ----
+    with transaction.atomic():
+        with perfil.etapa('escritura_recibos'):
+            if recibos_nuevos:
+                ReciboNomina.objects.bulk_create(recibos_nuevos, batch_size=BATCH_SIZE_NOMINA)
+            if recibos_actualizados:
+                ReciboNomina.objects.bulk_update(
+                    recibos_actualizados, CAMPOS_RECIBO_CALCULO, batch_size=BATCH_SIZE_NOMINA
+                )
+        perfil.contar_filas(
+            recibos_creados=len(recibos_nuevos),
+            recibos_actualizados=len(recibos_actualizados),
+        )
+        
+        with perfil.etapa('escritura_detalles'):
+            filas_detalle = _guardar_detalles(
+                detalles_por_recibo, ahora, {r.id for r in recibos_nuevos}
+            )
+        perfil.contar_filas(**filas_detalle)
+        
+        with perfil.etapa('actualizacion_periodo'):
+            periodo.total_percepciones = total_percepciones
+            periodo.total_deducciones = total_deducciones
+            periodo.total_neto = total_neto
+            periodo.total_empleados = len(resultados)
+            periodo.estado = 'calculado'
+            periodo.fecha_calculo = ahora
+            periodo.calculado_por_id = usuario_id
+            periodo.save()
+            
+            # Todos los recibos del periodo están en memoria: sin re-agregar en la BD
+            recibos_periodo = list(recibos_existentes.values()) + recibos_nuevos
+            try:
+                resumen = periodo.resumen
+            except ResumenPeriodoNomina.DoesNotExist:
+                resumen = None
+            _guardar_resumen(periodo.id, _resumen_de_recibos(recibos_periodo), resumen, buscar=False)
+        perfil.contar_filas(periodos=1, resumenes=1)
+        
+        # Acumulados anuales: solo si algún recibo cambió
+        if recibos_nuevos or recibos_actualizados:
+            with perfil.etapa('actualizacion_acumulados'):
+                acumulados = actualizar_acumulados_periodo(periodo)
+            perfil.contar_filas(acumulados=acumulados)
     
-    # Actualizar periodo
-    periodo.total_percepciones = total_percepciones
-    periodo.total_deducciones = total_deducciones
-    periodo.total_neto = total_neto
-    periodo.total_empleados = len(resultados)
-    periodo.estado = 'calculado'
-    periodo.fecha_calculo = timezone.now()
-    periodo.calculado_por_id = usuario_id
-    periodo.save()
+    if progreso:
+        progreso(len(empleados), len(empleados))
     
     return {
         'periodo': str(periodo),
@@ -567,5 +1261,154 @@ def procesar_nomina_periodo(periodo_id: int, usuario_id: int) -> Dict:
         'total_percepciones': float(total_percepciones),
         'total_deducciones': float(total_deducciones),
         'total_neto': float(total_neto),
+        'recalculados': len(recibos_nuevos) + len(recibos_actualizados),
+        'sin_cambios': sin_cambios,
+        'timbrados': timbrados,
         'recibos': resultados
     }
+
+
+def ejecutar_trabajo_calculo_nomina(trabajo, progreso: Callable) -> Dict:
+    """
+    Manejador del trabajo en segundo plano 'calculo_nomina'
+    La escritura es atómica: si falla, el periodo queda como estaba
+    """
+    parametros = trabajo.parametros or {}
+    return procesar_nomina_periodo(
+        trabajo.referencia_id,
+        parametros.get('usuario_id'),
+        forzar=parametros.get('forzar', False),
+        progreso=progreso
+    )
+
+
+# ============ PROCESAMIENTO PARALELO MULTI-EMPRESA ============
+
+def _inicializar_worker_nomina():
+    """
+    Inicializa un proceso worker del pool
+    Con 'spawn'/'forkserver' el proceso arranca sin Django configurado
+    """
+    import django
+    from django.apps import apps
+    
+    if not apps.ready:
+        django.setup()
+
+
+def _procesar_periodos_empresa(empresa_id, periodo_ids: list, usuario_id) -> list:
+    """
+    Procesa secuencialmente los periodos de una empresa dentro de un worker
+    Cada worker usa su propia conexión a la BD
+    """
+    import time
+    from django.db import close_old_connections
+    
+    close_old_connections()
+    resultados = []
+    for periodo_id in periodo_ids:
+        inicio = time.monotonic()
+        try:
+            resultado = procesar_nomina_periodo(periodo_id, usuario_id)
+        except Exception as e:
+            resultado = {'error': str(e)}
+        
+        resultados.append({
+            'periodo_id': str(periodo_id),
+            'empresa_id': str(empresa_id),
+            'periodo': resultado.get('periodo', ''),
+            'ok': 'error' not in resultado,
+            'error': resultado.get('error'),
+            'total_empleados': resultado.get('total_empleados', 0),
+            'total_neto': resultado.get('total_neto', 0),
+            'duracion_segundos': round(time.monotonic() - inicio, 3),
+        })
+    return resultados
+
+
+def seleccionar_periodos(periodo_ids: list = None, fecha_desde: date = None,
+                         fecha_hasta: date = None, empresa_ids: list = None) -> Dict:
+    """
+    Periodos procesables (borrador/calculado) agrupados por empresa
+    Retorna {empresa_id: [periodo_id, ...]}
+    """
+    from .models import PeriodoNomina
+    
+    qs = PeriodoNomina.objects.filter(estado__in=['borrador', 'calculado'])
+    if periodo_ids:
+        qs = qs.filter(pk__in=periodo_ids)
+    if fecha_desde:
+        qs = qs.filter(fecha_pago__gte=fecha_desde)
+    if fecha_hasta:
+        qs = qs.filter(fecha_pago__lte=fecha_hasta)
+    if empresa_ids:
+        qs = qs.filter(empresa_id__in=empresa_ids)
+    
+    por_empresa = {}
+    for periodo_id, empresa_id in qs.order_by('fecha_inicio').values_list('id', 'empresa_id'):
+        por_empresa.setdefault(empresa_id, []).append(periodo_id)
+    return por_empresa
+
+
+def procesar_periodos_en_paralelo(periodo_ids: list = None, fecha_desde: date = None,
+                                  fecha_hasta: date = None, empresa_ids: list = None,
+                                  usuario_id=None, max_workers: int = None) -> Dict:
+    """
+    Procesa la nómina de varios periodos repartidos en un pool de procesos
+    
+    Los periodos se agrupan por empresa: cada tarea del pool procesa una
+    empresa completa, así dos periodos de la misma empresa nunca corren a
+    la vez. Con max_workers=1 se procesa en el proceso actual.
+    """
+    import os
+    import time
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from django.db import connections
+    
+    inicio = time.monotonic()
+    por_empresa = seleccionar_periodos(periodo_ids, fecha_desde, fecha_hasta, empresa_ids)
+    
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(por_empresa) or 1))
+    
+    resultados = []
+    if max_workers == 1:
+        for empresa_id, ids in por_empresa.items():
+            resultados.extend(_procesar_periodos_empresa(empresa_id, ids, usuario_id))
+    else:
+        # Los hijos no deben heredar la conexión abierta del proceso padre
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=max_workers,
+                                 initializer=_inicializar_worker_nomina) as pool:
+            futuros = {
+                pool.submit(_procesar_periodos_empresa, empresa_id, ids, usuario_id): (empresa_id, ids)
+                for empresa_id, ids in por_empresa.items()
+            }
+            for futuro in as_completed(futuros):
+                empresa_id, ids = futuros[futuro]
+                try:
+                    resultados.extend(futuro.result())
+                except Exception as e:
+                    # El worker murió: todos los periodos de la empresa fallan
+                    resultados.extend({
+                        'periodo_id': str(periodo_id),
+                        'empresa_id': str(empresa_id),
+                        'periodo': '',
+                        'ok': False,
+                        'error': f'Error en worker: {e}',
+                        'total_empleados': 0,
+                        'total_neto': 0,
+                        'duracion_segundos': 0,
+                    } for periodo_id in ids)
+    
+    exitosos = sum(1 for r in resultados if r['ok'])
+    return {
+        'total_empresas': len(por_empresa),
+        'total_periodos': len(resultados),
+        'exitosos': exitosos,
+        'fallidos': len(resultados) - exitosos,
+        'workers': max_workers,
+        'duracion_segundos': round(time.monotonic() - inicio, 3),
+        'periodos': resultados,
+    }
@@ -0,0 +1,167 @@
+"""
+Señales del módulo de Nómina
+"""
+import threading
+import weakref
+
+from django.db import connection, transaction
+from django.db.models.signals import pre_save, post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from apps.empleados.models import Empleado
+
+from .models import TablaISR, TablaSubsidio, ParametrosIMSS, PeriodoNomina, ReciboNomina
+from .tarifas import invalidar_tarifas
+
+
+@receiver([post_save, post_delete], sender=TablaISR)
+@receiver([post_save, post_delete], sender=TablaSubsidio)
+def invalidar_tarifa_compilada(sender, instance, **kwargs):
+    """Descarta la tarifa compilada del año/periodicidad modificado"""
+    invalidar_tarifas(instance.año, instance.periodicidad)
+
+
+@receiver([post_save, post_delete], sender=ParametrosIMSS)
+def invalidar_tasas_imss_compiladas(sender, instance, **kwargs):
+    """Descarta las tasas IMSS compiladas del proceso"""
+    from .imss import invalidar_tasas_imss
+    invalidar_tasas_imss()
+
+
+@receiver([post_save, post_delete], sender=ReciboNomina)
+def actualizar_resumen_por_recibo(sender, instance, **kwargs):
+    """
+    Mantiene al día el resumen del periodo en escrituras individuales
+    Las escrituras masivas (cálculo, timbrado) lo actualizan al terminar
+    """
+    from .acumulados import actualizar_acumulados
+    from .services import actualizar_resumen_periodo
+    actualizar_resumen_periodo(instance.periodo_id)
+    
+    periodo = PeriodoNomina.objects.filter(pk=instance.periodo_id).values('empresa_id', 'año').first()
+    if periodo:
+        actualizar_acumulados(periodo['empresa_id'], periodo['año'], [instance.empleado_id])
+
+
+@receiver(post_init, sender=PeriodoNomina)
+def recordar_estado_periodo(sender, instance, **kwargs):
+    """Estado con el que se cargó el periodo (sin consulta extra)"""
+    instance._estado_original = instance.__dict__.get('estado')
+
+
+@receiver(post_save, sender=PeriodoNomina)
+def actualizar_acumulados_por_estado(sender, instance, created=False, **kwargs):
+    """
+    Los recibos de periodos cancelados no acumulan: re-agrega los
+    empleados del periodo cuando entra o sale de 'cancelado'
+    """
+    from .acumulados import actualizar_acumulados_periodo
+
+    anterior = instance._estado_original
+    instance._estado_original = instance.estado
+    if created or anterior is None or anterior == instance.estado:
+        return
+    if PeriodoNomina.Estado.CANCELADO in (anterior, instance.estado):
+        actualizar_acumulados_periodo(instance)
+
+
+def _campos_costo(instance):
+    """Campos de costo cargados en la instancia (None si alguno está diferido)"""
+    from .costos import CAMPOS_EMPLEADO_COSTO
+
+    valores = instance.__dict__
+    if any(campo not in valores for campo in CAMPOS_EMPLEADO_COSTO):
+        return None
+    return {campo: valores[campo] for campo in CAMPOS_EMPLEADO_COSTO}
+
+
+@receiver(post_init, sender=Empleado)
+def recordar_costo_empleado(sender, instance, **kwargs):
+    """Campos de costo con los que se cargó el empleado (sin consulta extra)"""
+    instance._costo_anterior = _campos_costo(instance)
+
+
+@receiver(pre_save, sender=Empleado)
+def cargar_costo_diferido(sender, instance, update_fields=None, **kwargs):
+    """
+    Solo si los campos de costo venían diferidos (.only/.defer) y el
+    guardado los incluye: los lee de la base antes de escribir
+    """
+    from .costos import CAMPOS_EMPLEADO_COSTO
+
+    if instance._state.adding or instance._costo_anterior is not None:
+        return
+    if update_fields is not None and not set(update_fields) & set(CAMPOS_EMPLEADO_COSTO):
+        return
+    instance._costo_anterior = (
+        Empleado.objects.filter(pk=instance.pk).values(*CAMPOS_EMPLEADO_COSTO).first()
+    )
+
+
+@receiver(post_save, sender=Empleado)
+@receiver(post_delete, sender=Empleado)
+def refrescar_costos_por_empleado(sender, instance, created=False, update_fields=None, **kwargs):
+    """
+    Reconstruye en el cubo de costos los departamentos afectados
+    (el actual y el anterior si cambió) al confirmar la transacción
+    """
+    from .costos import CAMPOS_EMPLEADO_COSTO
+
+    departamentos = set()
+    if kwargs.get('signal') is post_save and not created:
+        if update_fields is not None and not set(update_fields) & set(CAMPOS_EMPLEADO_COSTO):
+            return
+        anterior = instance._costo_anterior
+        instance._costo_anterior = _campos_costo(instance)
+        if anterior is None or all(anterior[c] == getattr(instance, c) for c in CAMPOS_EMPLEADO_COSTO):
+            return
+        departamentos.add(anterior['departamento'])
+    elif created:
+        instance._costo_anterior = _campos_costo(instance)
+
+    departamentos.add(instance.departamento)
+    _programar_refresco_costos(instance.empresa_id, departamentos)
+
+
+class _RefrescoCostos:
+    """
+    Callback on_commit que reconstruye una sola vez cada (empresa,
+    departamento) acumulado en la transacción
+    """
+
+    def __init__(self, claves):
+        self.claves = set(claves)
+
+    def __call__(self):
+        from .costos import refrescar_costos_departamentos
+
+        _refresco_pendiente.callback = None
+        claves, self.claves = self.claves, set()
+        por_empresa = {}
+        for empresa_id, departamento in claves:
+            por_empresa.setdefault(empresa_id, set()).add(departamento)
+        for empresa_id, departamentos in por_empresa.items():
+            refrescar_costos_departamentos(empresa_id, departamentos)
+
+
+# Refresco ya programado en la transacción en curso del hilo. Referencia
+# débil: si la transacción (o el savepoint donde se programó) se revierte,
+# Django descarta el callback y la referencia muere con él
+_refresco_pendiente = threading.local()
+
+
+def _programar_refresco_costos(empresa_id, departamentos) -> None:
+    """
+    Agrega los departamentos al refresco ya programado en la transacción
+    en curso, o programa uno: una importación masiva de N empleados hace
+    una reconstrucción por departamento, no N
+    """
+    claves = {(empresa_id, departamento) for departamento in departamentos}
+    referencia = getattr(_refresco_pendiente, 'callback', None)
+    pendiente = referencia() if referencia is not None else None
+    if pendiente is not None and connection.in_atomic_block:
+        pendiente.claves |= claves
+        return
+    pendiente = _RefrescoCostos(claves)
+    _refresco_pendiente.callback = weakref.ref(pendiente)
+    transaction.on_commit(pendiente)
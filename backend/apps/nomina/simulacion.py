@@ -0,0 +1,145 @@
+"""
+Simulación de escenarios salariales sin escribir en la BD
+
+Responde preguntas como "¿qué pasa si subimos 6% al departamento X?":
+lee la plantilla activa en una consulta, aplica los ajustes del escenario
+en memoria y calcula ISR, IMSS y costo patronal por periodo con el modo
+vectorizado (tarifas compiladas). Nada se guarda.
+
+Escenario:
+    {
+        'ajustes': [
+            {'tipo': 'porcentaje', 'valor': 6, 'departamentos': ['Ventas']},
+            {'tipo': 'monto', 'valor': 50, 'puestos': ['Cajero']},
+            {'tipo': 'porcentaje', 'valor': 10, 'empleados': ['<uuid>']},
+        ]
+    }
+
+Cada ajuste aplica a los empleados que cumplan cualquiera de sus filtros
+(sin filtros, a todos). 'monto' se suma al salario diario. Los ajustes se
+aplican en orden y se acumulan.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, List
+
+import numpy as np
+
+from .services import dias_del_periodo
+
+TIPO_AJUSTE_PORCENTAJE = 'porcentaje'
+TIPO_AJUSTE_MONTO = 'monto'
+
+COLUMNAS_SIMULACION = ['sueldo', 'isr', 'imss_obrero', 'imss_patronal', 'neto', 'costo_empresa']
+
+
+def _aplica(ajuste: Dict, empleado: Dict) -> bool:
+    departamentos = ajuste.get('departamentos') or []
+    puestos = ajuste.get('puestos') or []
+    empleados = [str(e) for e in ajuste.get('empleados') or []]
+    if not (departamentos or puestos or empleados):
+        return True
+    return (
+        empleado['departamento'] in departamentos
+        or empleado['puesto'] in puestos
+        or str(empleado['id']) in empleados
+    )
+
+
+def aplicar_escenario(empleados: List[Dict], ajustes: List[Dict]) -> List[Decimal]:
+    """Salarios diarios simulados, en el mismo orden que empleados"""
+    salarios = []
+    for empleado in empleados:
+        salario = empleado['salario_diario']
+        for ajuste in ajustes:
+            if not _aplica(ajuste, empleado):
+                continue
+            valor = Decimal(str(ajuste['valor']))
+            if ajuste['tipo'] == TIPO_AJUSTE_PORCENTAJE:
+                salario = salario * (1 + valor / 100)
+            else:
+                salario = salario + valor
+        salarios.append(max(salario, Decimal('0')).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
+    return salarios
+
+
+def _calcular(calculadora, salarios: List[Decimal], dias: int) -> Dict[str, np.ndarray]:
+    columnas = calculadora.calcular_lote_centavos(salarios, dias)
+    columnas['costo_empresa'] = columnas['sueldo'] + columnas['imss_patronal']
+    return columnas
+
+
+def _totales(columnas: Dict[str, np.ndarray]) -> Dict[str, float]:
+    return {nombre: int(columnas[nombre].sum()) / 100 for nombre in COLUMNAS_SIMULACION}
+
+
+def simular_escenario(empresa_id, escenario: Dict, año: int = None,
+                      periodicidad: str = 'quincenal', detalle: bool = True) -> Dict:
+    """
+    Simula el escenario sobre la plantilla activa de la empresa
+    Retorna totales actual/simulado/diferencia y, con detalle, el desglose
+    por empleado. Importes por periodo de la periodicidad indicada.
+    """
+    from apps.empleados.models import Empleado
+    from .vectorizado import CalculadoraNominaVectorizada
+
+    ajustes = escenario.get('ajustes') or []
+    empleados = list(
+        Empleado.objects.filter(
+            empresa_id=empresa_id,
+            estado='activo',
+            salario_diario__isnull=False,
+        )
+        .order_by('apellido_paterno', 'nombre')
+        .values('id', 'nombre', 'apellido_paterno', 'departamento', 'puesto', 'salario_diario')
+    )
+
+    calculadora = CalculadoraNominaVectorizada(año, periodicidad)
+    dias = dias_del_periodo(periodicidad)
+
+    salarios_actuales = [e['salario_diario'] for e in empleados]
+    salarios_simulados = aplicar_escenario(empleados, ajustes)
+    actual = _calcular(calculadora, salarios_actuales, dias)
+    simulado = _calcular(calculadora, salarios_simulados, dias)
+
+    totales_actual = _totales(actual)
+    totales_simulado = _totales(simulado)
+    afectados = int(np.count_nonzero(actual['salario_diario'] != simulado['salario_diario']))
+
+    resultado = {
+        'año': calculadora.año,
+        'periodicidad': periodicidad,
+        'dias': dias,
+        'total_empleados': len(empleados),
+        'empleados_afectados': afectados,
+        'totales': {
+            'actual': totales_actual,
+            'simulado': totales_simulado,
+            'diferencia': {
+                nombre: round(totales_simulado[nombre] - totales_actual[nombre], 2)
+                for nombre in COLUMNAS_SIMULACION
+            },
+        },
+    }
+
+    if detalle:
+        # Conversión en bloque a listas de Python: evita un acceso por celda
+        sim = {nombre: (simulado[nombre] / 100).tolist() for nombre in COLUMNAS_SIMULACION}
+        neto_actual = (actual['neto'] / 100).tolist()
+        costo_actual = (actual['costo_empresa'] / 100).tolist()
+        salario_sim = (simulado['salario_diario'] / 100).tolist()
+        resultado['empleados'] = [
+            {
+                'empleado_id': str(e['id']),
+                'nombre': f"{e['nombre']} {e['apellido_paterno']}",
+                'departamento': e['departamento'],
+                'puesto': e['puesto'],
+                'salario_diario_actual': float(e['salario_diario']),
+                'salario_diario_simulado': salario_sim[i],
+                'neto_actual': neto_actual[i],
+                'costo_empresa_actual': costo_actual[i],
+                **{nombre: sim[nombre][i] for nombre in COLUMNAS_SIMULACION},
+            }
+            for i, e in enumerate(empleados)
+        ]
+
+    return resultado
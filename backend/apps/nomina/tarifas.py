@@ -0,0 +1,157 @@
+"""
+Índice compilado en memoria de tarifas ISR y subsidio al empleo
+
+Las tablas de TablaISR/TablaSubsidio se cargan una sola vez por proceso
+y (año, periodicidad) en arreglos ordenados por límite inferior. La
+búsqueda del rango se hace con bisect: O(log n) y sin consultas por
+empleado.
+
+Invalidación:
+- En el mismo proceso, las señales post_save/post_delete de las tablas
+  descartan la tarifa compilada (ver signals.py).
+- Entre procesos (comando cargar_tablas_fiscales vs workers de gunicorn)
+  cada tarifa guarda una versión (conteo + última modificación) que se
+  verifica con una consulta agregada al pedir la tarifa.
+
+Las tablas quincenales se derivan de las mensuales redondeando, por lo
+que rangos contiguos pueden compartir un límite. La búsqueda binaria es
+sobre límites superiores para devolver el primer rango que contiene al
+ingreso, igual que el recorrido lineal.
+"""
+import threading
+from bisect import bisect_left
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from django.db.models import Count, Max
+
+
+class TarifaCompilada:
+    """
+    Tarifa ISR y subsidio de un (año, periodicidad) en arreglos ordenados
+    """
+
+    def __init__(self, año: int, periodicidad: str, filas_isr: List[Tuple],
+                 filas_subsidio: List[Tuple], version: str = ''):
+        self.año = año
+        self.periodicidad = periodicidad
+        self.version = version
+
+        # filas_isr: (limite_inferior, limite_superior, cuota_fija, porcentaje_excedente)
+        filas_isr = sorted(filas_isr, key=lambda f: f[0])
+        self.isr_limites_inferiores = [f[0] for f in filas_isr]
+        self.isr_limites_superiores = [f[1] for f in filas_isr]
+        self.isr_cuotas_fijas = [f[2] for f in filas_isr]
+        self.isr_porcentajes = [f[3] for f in filas_isr]
+
+        # filas_subsidio: (limite_inferior, limite_superior, subsidio)
+        filas_subsidio = sorted(filas_subsidio, key=lambda f: f[0])
+        self.subsidio_limites_inferiores = [f[0] for f in filas_subsidio]
+        self.subsidio_limites_superiores = [f[1] for f in filas_subsidio]
+        self.subsidio_montos = [f[2] for f in filas_subsidio]
+
+    @property
+    def tiene_isr(self) -> bool:
+        return bool(self.isr_limites_inferiores)
+
+    @property
+    def tiene_subsidio(self) -> bool:
+        return bool(self.subsidio_limites_inferiores)
+
+    def indice_isr(self, ingreso: Decimal) -> Optional[int]:
+        """
+        Índice del rango ISR que contiene el ingreso
+        Si no cae en ningún rango se usa el último (mismo criterio que la
+        búsqueda lineal original)
+        """
+        if not self.tiene_isr:
+            return None
+        i = bisect_left(self.isr_limites_superiores, ingreso)
+        if i < len(self.isr_limites_superiores) and self.isr_limites_inferiores[i] <= ingreso:
+            return i
+        return len(self.isr_limites_inferiores) - 1
+
+    def rango_isr(self, ingreso: Decimal) -> Optional[Dict]:
+        """Rango ISR aplicable: límite inferior, cuota fija y porcentaje"""
+        i = self.indice_isr(ingreso)
+        if i is None:
+            return None
+        return {
+            'limite_inferior': self.isr_limites_inferiores[i],
+            'limite_superior': self.isr_limites_superiores[i],
+            'cuota_fija': self.isr_cuotas_fijas[i],
+            'porcentaje_excedente': self.isr_porcentajes[i],
+        }
+
+    def subsidio(self, ingreso: Decimal) -> Decimal:
+        """Subsidio al empleo del rango que contiene el ingreso (0 si ninguno)"""
+        i = bisect_left(self.subsidio_limites_superiores, ingreso)
+        if i < len(self.subsidio_limites_superiores) and self.subsidio_limites_inferiores[i] <= ingreso:
+            return self.subsidio_montos[i]
+        return Decimal('0')
+
+
+_tarifas: Dict[Tuple[int, str], TarifaCompilada] = {}
+_lock = threading.Lock()
+
+
+def _version_tablas(año: int, periodicidad: str) -> str:
+    """Versión de las tablas en BD: conteo y última modificación"""
+    from .models import TablaISR, TablaSubsidio
+
+    partes = []
+    for modelo in (TablaISR, TablaSubsidio):
+        agg = modelo.objects.filter(año=año, periodicidad=periodicidad).aggregate(
+            total=Count('id'), ultima=Max('updated_at')
+        )
+        ultima = agg['ultima'].isoformat() if agg['ultima'] else '-'
+        partes.append(f"{agg['total']}@{ultima}")
+    return '|'.join(partes)
+
+
+def compilar_tarifa(año: int, periodicidad: str, version: str = None) -> TarifaCompilada:
+    """Lee las tablas de la BD y construye la tarifa compilada"""
+    from .models import TablaISR, TablaSubsidio
+
+    if version is None:
+        version = _version_tablas(año, periodicidad)
+
+    filas_isr = list(TablaISR.objects.filter(año=año, periodicidad=periodicidad).values_list(
+        'limite_inferior', 'limite_superior', 'cuota_fija', 'porcentaje_excedente'
+    ))
+    filas_subsidio = list(TablaSubsidio.objects.filter(año=año, periodicidad=periodicidad).values_list(
+        'limite_inferior', 'limite_superior', 'subsidio'
+    ))
+    return TarifaCompilada(año, periodicidad, filas_isr, filas_subsidio, version)
+
+
+def obtener_tarifa(año: int, periodicidad: str) -> TarifaCompilada:
+    """
+    Tarifa compilada del proceso para (año, periodicidad)
+    Cuesta una verificación de versión por llamada, no por empleado
+    """
+    clave = (año, periodicidad)
+    version = _version_tablas(año, periodicidad)
+
+    tarifa = _tarifas.get(clave)
+    if tarifa is not None and tarifa.version == version:
+        return tarifa
+
+    tarifa = compilar_tarifa(año, periodicidad, version)
+    with _lock:
+        _tarifas[clave] = tarifa
+    return tarifa
+
+
+def invalidar_tarifas(año: int = None, periodicidad: str = None) -> None:
+    """
+    Descarta tarifas compiladas del proceso
+    Sin argumentos descarta todas
+    """
+    with _lock:
+        if año is None:
+            _tarifas.clear()
+            return
+        for clave in list(_tarifas):
+            if clave[0] == año and (periodicidad is None or clave[1] == periodicidad):
+                del _tarifas[clave]
@@ -0,0 +1,97 @@
+"""
+Tests de los acumulados anuales por empleado
+"""
+from datetime import date
+from decimal import Decimal
+from importlib import import_module
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Sum
+
+from apps.nomina.acumulados import CAMPOS_ACUMULADOS, acumulado_empleado
+from apps.nomina.models import AcumuladoAnualEmpleado, PeriodoNomina, ReciboNomina
+from apps.nomina.services import procesar_nomina_periodo
+
+
+def _segundo_periodo(periodo):
+    return PeriodoNomina.objects.create(
+        empresa=periodo.empresa, tipo_periodo='quincenal', numero_periodo=2, año=2024,
+        fecha_inicio=date(2024, 1, 16), fecha_fin=date(2024, 1, 31), fecha_pago=date(2024, 1, 31),
+    )
+
+
+def _sumas_recibos(empleado_id, **filtros):
+    return ReciboNomina.objects.filter(empleado_id=empleado_id, **filtros).aggregate(
+        **{campo: Sum(campo) for campo in CAMPOS_ACUMULADOS}
+    )
+
+
+@pytest.mark.django_db
+def test_acumulados_siguen_calculo_recalculo_y_cancelacion(periodo, crear_empleados):
+    empleados = crear_empleados(3)
+    segundo = _segundo_periodo(periodo)
+    procesar_nomina_periodo(periodo.id, None)
+    procesar_nomina_periodo(segundo.id, None)
+
+    acumulado = acumulado_empleado(empleados[0].id, 2024)
+    assert acumulado['numero_recibos'] == 2
+    assert {c: acumulado[c] for c in CAMPOS_ACUMULADOS} == _sumas_recibos(empleados[0].id)
+
+    # Recalcular con otro salario actualiza solo lo que cambió
+    empleados[0].salario_diario = Decimal('1000.00')
+    empleados[0].save()
+    procesar_nomina_periodo(segundo.id, None)
+    assert acumulado_empleado(empleados[0].id, 2024)['total_percepciones'] == (
+        _sumas_recibos(empleados[0].id)['total_percepciones']
+    )
+
+    # Cancelar el periodo saca sus recibos; reabrirlo los devuelve
+    segundo.estado = PeriodoNomina.Estado.CANCELADO
+    segundo.save()
+    acumulado = acumulado_empleado(empleados[0].id, 2024)
+    assert acumulado['numero_recibos'] == 1
+    assert acumulado['neto_a_pagar'] == _sumas_recibos(empleados[0].id, periodo=periodo)['neto_a_pagar']
+
+    periodo.estado = PeriodoNomina.Estado.CANCELADO
+    periodo.save()
+    assert not AcumuladoAnualEmpleado.objects.exists()
+
+    periodo.estado = PeriodoNomina.Estado.CALCULADO
+    periodo.save()
+    assert AcumuladoAnualEmpleado.objects.count() == 3
+
+
+@pytest.mark.django_db
+def test_reconstruir_desde_recibos(periodo, crear_empleados):
+    crear_empleados(4)
+    procesar_nomina_periodo(periodo.id, None)
+    esperado = list(AcumuladoAnualEmpleado.objects.order_by('empleado_id').values('empleado_id', *CAMPOS_ACUMULADOS))
+
+    AcumuladoAnualEmpleado.objects.all().delete()
+    call_command('reconstruir_acumulados', '--año', '2024', stdout=StringIO())
+
+    assert list(
+        AcumuladoAnualEmpleado.objects.order_by('empleado_id').values('empleado_id', *CAMPOS_ACUMULADOS)
+    ) == esperado
+
+
+@pytest.mark.django_db
+def test_migracion_puebla_acumulados_de_recibos_existentes(periodo, crear_empleados):
+    from django.apps import apps as registro
+
+    migracion = import_module('apps.nomina.migrations.0010_acumulados_anuales')
+    empleados = crear_empleados(3)
+    procesar_nomina_periodo(periodo.id, None)
+    esperado = list(AcumuladoAnualEmpleado.objects.order_by('empleado_id').values('empleado_id', *CAMPOS_ACUMULADOS))
+
+    AcumuladoAnualEmpleado.objects.all().delete()
+    assert acumulado_empleado(empleados[0].id, 2024)['numero_recibos'] == 1
+
+    AcumuladoAnualEmpleado.objects.all().delete()
+    migracion.poblar_acumulados(registro, None)
+
+    assert list(
+        AcumuladoAnualEmpleado.objects.order_by('empleado_id').values('empleado_id', *CAMPOS_ACUMULADOS)
+    ) == esperado
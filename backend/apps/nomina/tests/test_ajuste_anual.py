@@ -0,0 +1,82 @@
+"""
+Tests del motor de ajuste anual de ISR
+"""
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from apps.nomina.ajuste_anual import calcular_ajuste_anual, calcular_isr_anual
+from apps.nomina.models import AcumuladoAnualEmpleado, AjusteAnualISR, PeriodoNomina, ReciboNomina
+from apps.nomina.services import procesar_nomina_periodo
+from apps.nomina.tarifas import obtener_tarifa
+
+
+def _periodo(empresa, numero):
+    return PeriodoNomina.objects.create(
+        empresa=empresa,
+        tipo_periodo='quincenal',
+        numero_periodo=numero,
+        año=2024,
+        fecha_inicio=date(2024, 1, 1),
+        fecha_fin=date(2024, 1, 15),
+        fecha_pago=date(2024, 1, 15),
+    )
+
+
+@pytest.mark.django_db
+def test_ajuste_suma_recibos_del_año(empresa, periodo, crear_empleados):
+    empleados = crear_empleados(5)
+    otro = _periodo(empresa, 2)
+    procesar_nomina_periodo(periodo.id, None)
+    procesar_nomina_periodo(otro.id, None)
+
+    resultado = calcular_ajuste_anual(empresa.id, 2024, tamano_lote=2)
+
+    assert resultado['total_empleados'] == len(empleados)
+    tarifa = obtener_tarifa(2024, 'anual')
+    for ajuste in AjusteAnualISR.objects.filter(año=2024):
+        recibos = ReciboNomina.objects.filter(empleado_id=ajuste.empleado_id)
+        gravado = sum(r.total_percepciones_gravadas for r in recibos)
+        retenido = sum(r.isr_retenido for r in recibos)
+        assert ajuste.numero_recibos == 2
+        assert ajuste.ingresos_gravados == gravado
+        assert ajuste.isr_retenido == retenido
+        assert ajuste.isr_anual == calcular_isr_anual(tarifa, gravado)
+        assert ajuste.diferencia == ajuste.isr_anual - retenido
+
+
+@pytest.mark.django_db
+def test_ajuste_reemplaza_y_excluye_cancelados(empresa, periodo, crear_empleados):
+    crear_empleados(3)
+    procesar_nomina_periodo(periodo.id, None)
+    calcular_ajuste_anual(empresa.id, 2024)
+
+    periodo.estado = PeriodoNomina.Estado.CANCELADO
+    periodo.save()
+    resultado = calcular_ajuste_anual(empresa.id, 2024)
+
+    assert resultado['total_empleados'] == 0
+    assert AjusteAnualISR.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_isr_anual_tarifa_art_152(tablas_fiscales):
+    tarifa = obtener_tarifa(2024, 'anual')
+    # 200,000: 19,682.13 + (200,000 - 185,852.58) * 21.36%
+    assert calcular_isr_anual(tarifa, Decimal('200000')) == Decimal('22704.02')
+    assert calcular_isr_anual(tarifa, Decimal('0')) == Decimal('0')
+
+
+@pytest.mark.django_db
+def test_ajuste_con_recibos_sin_acumulados(empresa, periodo, crear_empleados):
+    """Recibos anteriores a la tabla de acumulados (sin señales ni backfill)"""
+    crear_empleados(3)
+    procesar_nomina_periodo(periodo.id, None)
+    AcumuladoAnualEmpleado.objects.all().delete()
+
+    resultado = calcular_ajuste_anual(empresa.id, 2024)
+
+    assert resultado['total_empleados'] == 3
+    assert AjusteAnualISR.objects.filter(año=2024).count() == 3
+    assert AcumuladoAnualEmpleado.objects.filter(año=2024).count() == 3
@@ -0,0 +1,66 @@
+"""
+Tests del almacén de CFDI por hash y su descarga
+"""
+import pytest
+
+from apps.nomina.almacen_cfdi import ruta_artefacto
+from apps.nomina.models import ReciboNomina
+from apps.nomina.services import procesar_nomina_periodo
+
+
+@pytest.fixture
+def recibo_timbrado(periodo, crear_empleados, settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    crear_empleados(2)
+    procesar_nomina_periodo(periodo.id, None)
+    recibo = ReciboNomina.objects.filter(periodo=periodo).first()
+    recibo.guardar_xml_cfdi('<cfdi:Comprobante Version="4.0"/>')
+    recibo.guardar_pdf_cfdi(b'%PDF-1.4 recibo')
+    recibo.save()
+    return recibo
+
+
+
+@pytest.mark.django_db
+def test_artefactos_comprimidos_y_deduplicados(recibo_timbrado, tmp_path):
+    recibo = ReciboNomina.objects.get(pk=recibo_timbrado.pk)
+    assert recibo.obtener_xml_cfdi() == '<cfdi:Comprobante Version="4.0"/>'
+    assert recibo.obtener_pdf_cfdi() == b'%PDF-1.4 recibo'
+    assert (tmp_path / ruta_artefacto(recibo.hash_xml_cfdi)).read_bytes()[:2] == b'\x1f\x8b'
+
+    otro = ReciboNomina.objects.exclude(pk=recibo.pk).get()
+    otro.guardar_xml_cfdi('<cfdi:Comprobante Version="4.0"/>')
+    assert otro.hash_xml_cfdi == recibo.hash_xml_cfdi
+    assert len(list((tmp_path / 'cfdi').rglob('*.gz'))) == 2
+
+
+@pytest.mark.django_db
+def test_descarga_bajo_demanda(recibo_timbrado, cliente_admin):
+    url = f'/api/nomina/recibos/{recibo_timbrado.id}/cfdi/'
+
+    respuesta = cliente_admin.get(url, {'formato': 'xml'})
+    assert respuesta.status_code == 200
+    assert respuesta['Content-Type'] == 'application/xml'
+    assert respuesta.content == b'<cfdi:Comprobante Version="4.0"/>'
+
+    respuesta = cliente_admin.get(url, {'formato': 'xml'}, HTTP_IF_NONE_MATCH=respuesta['ETag'])
+    assert respuesta.status_code == 304
+
+    respuesta = cliente_admin.get(f'/api/nomina/recibos/{recibo_timbrado.id}/pdf/')
+    assert respuesta.content == b'%PDF-1.4 recibo'
+
+    otro = ReciboNomina.objects.exclude(pk=recibo_timbrado.pk).get()
+    assert cliente_admin.get(f'/api/nomina/recibos/{otro.id}/cfdi/').status_code == 404
+
+
+def test_migracion_usa_el_mismo_almacen(settings, tmp_path):
+    """La copia del almacén en la migración 0005 escribe donde lee el código vivo"""
+    from importlib import import_module
+    from apps.nomina.almacen_cfdi import leer_artefacto
+
+    settings.MEDIA_ROOT = tmp_path
+    migracion = import_module('apps.nomina.migrations.0005_cfdi_almacen_por_hash')
+    hash_contenido = migracion._guardar_artefacto(b'<cfdi:Comprobante/>')
+
+    assert leer_artefacto(hash_contenido) == b'<cfdi:Comprobante/>'
+    assert migracion._leer_artefacto(hash_contenido) == b'<cfdi:Comprobante/>'
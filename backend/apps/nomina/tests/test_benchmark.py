@@ -0,0 +1,31 @@
+"""
+Prueba de humo del benchmark de nómina con una empresa mínima
+"""
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from apps.empresas.models import Empresa
+
+
+@pytest.mark.django_db
+def test_benchmark_empresa_minima(tablas_fiscales, tmp_path):
+    salida = tmp_path / 'bench.json'
+    call_command('benchmark_nomina', '--tamanos', '40', '--sin-memoria',
+                 '--salida', str(salida), stdout=StringIO())
+
+    resultado, = json.loads(salida.read_text(encoding='utf-8'))['resultados']
+    assert resultado['empleados'] == 40
+    assert resultado['incidencias'] == 4
+    assert resultado['percepciones_variables'] == 2
+    assert resultado['deducciones_variables'] == 2
+    assert resultado['bytes_excel'] > 0
+    assert set(resultado['etapas']) == {
+        'sembrado', 'calculo', 'recalculo_sin_cambios', 'resumen', 'reporte_excel'
+    }
+    assert resultado['etapas']['calculo']['consultas'] > 0
+    # Los datos sintéticos se revierten al terminar
+    assert not Empresa.objects.filter(razon_social__startswith='Benchmark').exists()
+
@@ -0,0 +1,80 @@
+"""
+Tests de paridad del núcleo de punto fijo contra la ruta Decimal
+"""
+import random
+from decimal import Decimal
+
+import pytest
+
+from apps.nomina.centavos import a_centavos, a_pesos, dividir_redondeando
+from apps.nomina.services import (
+    CalculadoraNomina, _calcular_recibo_decimal, calcular_recibo_con_detalle
+)
+
+
+def _muestras(inferiores, superiores, azar):
+    """Límites de cada renglón, ±1 centavo, punto medio y valores al azar dentro"""
+    for inferior, superior in zip(inferiores, superiores):
+        inf, sup = a_centavos(inferior), min(a_centavos(superior), 10 ** 9)
+        yield from (inf - 1, inf, inf + 1, (inf + sup) // 2, sup - 1, sup, sup + 1)
+        yield from (azar.randint(inf, sup) for _ in range(20))
+
+
+def test_dividir_redondeando_es_half_even():
+    for numerador in range(-250, 251):
+        esperado = (Decimal(numerador) / 100).quantize(Decimal('1'))
+        assert dividir_redondeando(numerador, 100) == int(esperado)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('periodicidad', ['mensual', 'quincenal', 'anual'])
+def test_isr_igual_en_cada_renglon_de_la_tarifa(tablas_fiscales, periodicidad):
+    calculadora = CalculadoraNomina(2024, periodicidad)
+    tarifa, nucleo = calculadora.tarifa, calculadora.nucleo
+    assert tarifa.tiene_isr
+    azar = random.Random(f'isr-{periodicidad}')
+
+    muestras = set(_muestras(tarifa.isr_limites_inferiores, tarifa.isr_limites_superiores, azar))
+    muestras.update(_muestras(tarifa.subsidio_limites_inferiores, tarifa.subsidio_limites_superiores, azar))
+    for ingreso_c in sorted(m for m in muestras if m >= 0):
+        esperado = calculadora.calcular_isr(a_pesos(ingreso_c))
+        isr_antes, subsidio, isr = nucleo.isr(ingreso_c)
+        assert (a_pesos(isr_antes), a_pesos(subsidio), a_pesos(isr)) == (
+            esperado['isr_antes_subsidio'], esperado['subsidio'], esperado['isr_neto']
+        ), ingreso_c
+
+
+@pytest.mark.django_db
+def test_sbc_e_imss_obrero_iguales(tablas_fiscales):
+    calculadora = CalculadoraNomina(2024, 'quincenal')
+    nucleo = calculadora.nucleo
+    azar = random.Random('imss')
+    tope = a_centavos(calculadora.params_imss.tope_sbc)
+
+    salarios = [1, 24891, tope - 1, tope, tope + 1] + [azar.randint(1, tope * 2) for _ in range(500)]
+    for salario_c in salarios:
+        for factor in (None, Decimal('1.0452'), Decimal('1.0712')):
+            sbc_c = nucleo.sbc(salario_c, factor)
+            assert a_pesos(sbc_c) == calculadora.calcular_sbc(a_pesos(salario_c), factor), salario_c
+        dias = azar.randint(1, 31)
+        esperado = calculadora.calcular_imss_obrero(a_pesos(sbc_c), dias)['total']
+        assert a_pesos(nucleo.imss_obrero(sbc_c, dias)) == esperado, (salario_c, dias)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('periodicidad, dias', [('quincenal', 15), ('mensual', 30)])
+def test_recibo_en_centavos_igual_a_ruta_decimal(tablas_fiscales, periodicidad, dias):
+    calculadora = CalculadoraNomina(2024, periodicidad)
+    azar = random.Random(f'recibo-{periodicidad}')
+
+    for _ in range(300):
+        salario = a_pesos(azar.randint(24891, 1_500_000))
+        campos, lineas = calcular_recibo_con_detalle(calculadora, salario, dias)
+        assert (campos, lineas) == _calcular_recibo_decimal(calculadora, salario, dias), salario
+
+    # Fracciones de centavo: se queda en la ruta Decimal
+    salario = Decimal('333.335')
+    assert a_centavos(salario) is None
+    assert calcular_recibo_con_detalle(calculadora, salario, dias) == (
+        _calcular_recibo_decimal(calculadora, salario, dias)
+    )
@@ -0,0 +1,165 @@
+"""
+Tests del cubo de costo patronal proyectado
+"""
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from apps.empleados.services import (
+    calcular_aguinaldo, calcular_prima_vacacional, obtener_dias_vacaciones_ley
+)
+from apps.nomina.costos import construir_cubo_costos, resumen_costos
+from apps.nomina.models import CostoProyectado
+from apps.nomina.services import CalculadoraNomina
+
+
+def _celda(empresa_id, mes, departamento, concepto):
+    return CostoProyectado.objects.get(
+        empresa_id=empresa_id, año=2024, mes=mes, departamento=departamento, concepto=concepto
+    ).importe
+
+
+@pytest.mark.django_db
+def test_cubo_cuadra_con_calculos_individuales(tablas_fiscales, crear_empleados):
+    ventas = crear_empleados(2, departamento='Ventas', fecha_ingreso=date(2019, 3, 15))
+    nuevo = crear_empleados(1, salario_base=Decimal('900.00'), departamento='Sistemas',
+                            fecha_ingreso=date(2024, 6, 10))[0]
+    empresa_id = nuevo.empresa_id
+
+    assert construir_cubo_costos(empresa_id, 2024) > 0
+
+    calculadora = CalculadoraNomina(2024, 'mensual')
+    patronales = ('cuota_fija_enf_mat', 'enf_mat_excedente', 'riesgo_trabajo',
+                  'invalidez_vida', 'cesantia_vejez', 'guarderias')
+    imss_enero = infonavit_enero = Decimal('0')
+    for empleado in ventas:
+        cuotas = calculadora.calcular_imss_patronal(calculadora.calcular_sbc(empleado.salario_diario), 31)
+        imss_enero += sum(cuotas[c] for c in patronales)
+        infonavit_enero += cuotas['infonavit']
+    assert _celda(empresa_id, 1, 'Ventas', 'imss_patronal') == imss_enero
+    assert _celda(empresa_id, 1, 'Ventas', 'infonavit') == infonavit_enero
+    assert _celda(empresa_id, 1, 'Ventas', 'salario') == sum(e.salario_diario for e in ventas) * 31
+
+    # Ingreso a mitad de año: sin costo antes, salario proporcional en junio
+    assert not CostoProyectado.objects.filter(empresa_id=empresa_id, departamento='Sistemas', mes__lt=6).exists()
+    assert _celda(empresa_id, 6, 'Sistemas', 'salario') == nuevo.salario_diario * 21
+
+    for departamento, empleados in (('Ventas', ventas), ('Sistemas', [nuevo])):
+        aguinaldo = sum(
+            calcular_aguinaldo(e.salario_diario, 15, e.fecha_ingreso, date(2024, 12, 20))['monto_bruto']
+            for e in empleados
+        )
+        assert _celda(empresa_id, 12, departamento, 'aguinaldo') == aguinaldo
+
+    # Prima vacacional en el mes del aniversario, con los días del 5.º año
+    prima = sum(calcular_prima_vacacional(obtener_dias_vacaciones_ley(5), e.salario_diario) for e in ventas)
+    assert _celda(empresa_id, 3, 'Ventas', 'prima_vacacional') == prima
+    assert not CostoProyectado.objects.filter(
+        empresa_id=empresa_id, departamento='Sistemas', concepto='prima_vacacional'
+    ).exists()
+
+    resumen = resumen_costos(empresa_id, 2024)
+    assert resumen['total'] == sum(CostoProyectado.objects.values_list('importe', flat=True))
+    assert [d['departamento'] for d in resumen['por_departamento']] == ['Sistemas', 'Ventas']
+
+
+@pytest.mark.django_db
+def test_cambio_de_salario_refresca_solo_su_departamento(
+        tablas_fiscales, crear_empleados, django_capture_on_commit_callbacks):
+    # Las altas se confirman aparte (su refresco no toca el cubo aún vacío)
+    with django_capture_on_commit_callbacks(execute=True):
+        empleado = crear_empleados(2, departamento='Ventas')[0]
+        crear_empleados(1, departamento='Sistemas')
+    construir_cubo_costos(empleado.empresa_id, 2024)
+    sistemas = set(CostoProyectado.objects.filter(departamento='Sistemas').values_list('id', flat=True))
+    salario_enero = _celda(empleado.empresa_id, 1, 'Ventas', 'salario')
+
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        empleado.salario_diario += Decimal('100.00')
+        empleado.save()
+    assert len(callbacks) == 1
+
+    assert _celda(empleado.empresa_id, 1, 'Ventas', 'salario') == salario_enero + Decimal('3100.00')
+    assert set(CostoProyectado.objects.filter(departamento='Sistemas').values_list('id', flat=True)) == sistemas
+
+    # Guardar sin cambios de costo no dispara el refresco
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        empleado.puesto = 'Gerente'
+        empleado.save()
+    assert callbacks == []
+
+    # Cambio de departamento: sale de Ventas y entra a Sistemas
+    with django_capture_on_commit_callbacks(execute=True):
+        empleado.departamento = 'Sistemas'
+        empleado.save()
+    assert CostoProyectado.objects.get(
+        empresa_id=empleado.empresa_id, año=2024, mes=1, departamento='Sistemas', concepto='salario'
+    ).empleados == 2
+
+
+@pytest.mark.django_db
+def test_alta_masiva_refresca_una_vez_por_departamento(
+        tablas_fiscales, crear_empleados, django_capture_on_commit_callbacks, monkeypatch):
+    from apps.nomina import costos
+    refrescos = []
+    monkeypatch.setattr(
+        costos, 'refrescar_costos_departamentos',
+        lambda empresa_id, departamentos: refrescos.append((empresa_id, set(departamentos)))
+    )
+
+    with django_capture_on_commit_callbacks(execute=True):
+        ventas = crear_empleados(5, departamento='Ventas')
+        crear_empleados(3, departamento='Sistemas')
+
+    assert refrescos == [(ventas[0].empresa_id, {'Ventas', 'Sistemas'})]
+
+
+
+@pytest.mark.django_db
+def test_refresco_revertido_no_bloquea_el_siguiente(
+        tablas_fiscales, crear_empleados, django_capture_on_commit_callbacks, monkeypatch):
+    from django.db import transaction
+    from apps.nomina import costos
+    refrescos = []
+    monkeypatch.setattr(
+        costos, 'refrescar_costos_departamentos',
+        lambda empresa_id, departamentos: refrescos.append(set(departamentos))
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        empleado = crear_empleados(1, departamento='Ventas')[0]
+    refrescos.clear()
+
+    # El savepoint revertido descarta su refresco programado
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        with pytest.raises(RuntimeError), transaction.atomic():
+            empleado.departamento = 'Sistemas'
+            empleado.save()
+            raise RuntimeError
+        empleado.departamento = 'Compras'
+        empleado.save()
+    assert len(callbacks) == 1
+    assert refrescos == [{'Sistemas', 'Compras'}]
+
+
+@pytest.mark.django_db
+def test_guardar_empleado_no_relee_sus_costos(tablas_fiscales, crear_empleados, django_capture_on_commit_callbacks):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from apps.empleados.models import Empleado
+
+    with django_capture_on_commit_callbacks(execute=True):
+        crear_empleados(1, departamento='Ventas')
+    empleado = Empleado.objects.get()
+
+    with CaptureQueriesContext(connection) as consultas:
+        empleado.puesto = 'Gerente'
+        empleado.save()
+        empleado.save(update_fields=['puesto'])
+    assert not [q for q in consultas if q['sql'].startswith('SELECT')]
+
+    # Con el salario diferido se lee solo si el guardado lo incluye
+    diferido = Empleado.objects.only('id', 'puesto').get()
+    with CaptureQueriesContext(connection) as consultas:
+        diferido.save(update_fields=['puesto'])
+    assert not [q for q in consultas if q['sql'].startswith('SELECT')]
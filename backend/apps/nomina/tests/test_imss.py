@@ -0,0 +1,116 @@
+"""
+Tests de la determinación bimestral de cuotas IMSS
+"""
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.nomina.imss import CAMPOS_SUA, CONCEPTOS_IMSS, calcular_cuotas_bimestre
+from apps.nomina.services import CalculadoraNomina
+
+
+@pytest.mark.django_db
+def test_cuotas_iguales_a_la_calculadora(tablas_fiscales, crear_empleados):
+    from apps.nomina.models import IncidenciaNomina
+    # Salarios bajo 3 SMG, sobre 3 SMG y sobre el tope de 25 UMA
+    empleados = crear_empleados(3, salario_base=Decimal('300.00'), paso=Decimal('2000.00'))
+    IncidenciaNomina.objects.create(
+        empleado=empleados[0], tipo='falta', fecha_inicio=date(2024, 1, 10), cantidad=Decimal('9')
+    )
+
+    determinacion = calcular_cuotas_bimestre(empleados[0].empresa_id, 2024, 1, 'Y1234567890')
+
+    calculadora = CalculadoraNomina(2024, 'mensual')
+    dias_esperados = [60 - 7, 60, 60]  # faltas topadas a 7 por bimestre
+    columnas = determinacion.columnas
+    for i, empleado in enumerate(sorted(empleados, key=lambda e: e.nombre)):
+        sbc = calculadora.calcular_sbc(empleado.salario_diario)
+        dias = dias_esperados[i]
+        patronal = calculadora.calcular_imss_patronal(sbc, dias)
+        obrero = calculadora.calcular_imss_obrero(sbc, dias)
+        assert int(columnas['dias'][i]) == dias
+        assert Decimal(int(columnas['sbc'][i])) / 100 == sbc
+        esperado = {
+            'cuota_fija_enf_mat': patronal['cuota_fija_enf_mat'],
+            'enf_mat_excedente': patronal['enf_mat_excedente'],
+            'riesgo_trabajo': patronal['riesgo_trabajo'],
+            'invalidez_vida_patronal': patronal['invalidez_vida'],
+            'cesantia_vejez_patronal': patronal['cesantia_vejez'],
+            'guarderias': patronal['guarderias'],
+            'infonavit': patronal['infonavit'],
+            'enf_mat_obrera': obrero['enfermedad_maternidad'],
+            'invalidez_vida_obrera': obrero['invalidez_vida'],
+            'cesantia_vejez_obrera': obrero['cesantia_vejez'],
+        }
+        for concepto, valor in esperado.items():
+            assert Decimal(int(columnas[concepto][i])) / 100 == valor, concepto
+
+    assert int(columnas['enf_mat_excedente'][0]) == 0
+    assert int(columnas['sbc'][2]) == int(calculadora.params_imss.tope_sbc * 100)
+
+    resumen = determinacion.resumen()
+    assert set(resumen['ramos']) == {c[1] for c in CONCEPTOS_IMSS}
+    assert resumen['total'] == pytest.approx(resumen['total_patronal'] + resumen['total_obrera'])
+
+    lineas = list(determinacion.lineas_sua())
+    assert len(lineas) == 3
+    assert {len(l) for l in lineas} == {sum(largo for _, largo in CAMPOS_SUA) + 2}
+    assert lineas[0].startswith('Y1234567890')
+
+
+@pytest.mark.django_db
+def test_consultas_fijas_y_altas_parciales(tablas_fiscales, crear_empleados):
+    def consultas(n):
+        crear_empleados(n, fecha_ingreso=date(2024, 2, 1)) if n else None
+        with CaptureQueriesContext(connection) as contexto:
+            determinacion = calcular_cuotas_bimestre(empresa_id, 2024, 1)
+        return determinacion, len(contexto)
+
+    empresa_id = crear_empleados(1)[0].empresa_id
+    _, primera = consultas(0)
+    determinacion, pocas = consultas(2)
+    assert pocas == primera - 1  # parámetros IMSS ya compilados
+    assert sorted(int(d) for d in determinacion.columnas['dias']) == [29, 29, 60]
+    _, muchas = consultas(30)
+    assert pocas == muchas
+
+
+@pytest.mark.django_db
+def test_endpoint_resumen_y_archivo_sua(tablas_fiscales, crear_empleados, cliente_admin):
+    empresa_id = crear_empleados(4)[0].empresa_id
+    url = '/api/nomina/periodos/cuotas_imss/'
+    parametros = {'empresa': empresa_id, 'año': 2024, 'bimestre': 3}
+
+    respuesta = cliente_admin.get(url, parametros)
+    assert respuesta.status_code == 200
+    assert respuesta.json()['total_empleados'] == 4
+
+    respuesta = cliente_admin.get(url, {**parametros, 'formato': 'sua'})
+    assert respuesta.status_code == 200
+    assert len(b''.join(respuesta.streaming_content).splitlines()) == 4
+
+    assert cliente_admin.get(url, {**parametros, 'bimestre': 7}).status_code == 400
+    respuesta = cliente_admin.get(url, {**parametros, 'empresa': 'abc'})
+    assert respuesta.status_code == 400
+    assert respuesta.json()['error'] == 'empresa inválida'
+
+
+@pytest.mark.django_db
+def test_dias_fraccionarios_se_redondean(tablas_fiscales, crear_empleados):
+    from apps.nomina.models import IncidenciaNomina
+    empleados = crear_empleados(2)
+    for cantidad in ('1.5', '1'):
+        IncidenciaNomina.objects.create(
+            empleado=empleados[0], tipo='falta', fecha_inicio=date(2024, 1, 10), cantidad=Decimal(cantidad)
+        )
+    IncidenciaNomina.objects.create(
+        empleado=empleados[1], tipo='falta', fecha_inicio=date(2024, 1, 10), cantidad=Decimal('0.4')
+    )
+
+    determinacion = calcular_cuotas_bimestre(empleados[0].empresa_id, 2024, 1)
+
+    # 2.5 faltas -> 3 días; 0.4 -> 0
+    assert [int(d) for d in determinacion.columnas['dias']] == [57, 60]
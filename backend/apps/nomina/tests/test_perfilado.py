@@ -0,0 +1,46 @@
+"""
+Tests del perfilado por ejecución del cálculo
+"""
+import pytest
+
+from apps.nomina import services
+from apps.nomina.models import EjecucionNomina
+from apps.nomina.perfilado import ETAPAS_NOMINA
+from apps.nomina.services import procesar_nomina_periodo
+
+
+@pytest.mark.django_db
+def test_registra_etapas_consultas_y_filas(periodo, crear_empleados, cliente_admin):
+    crear_empleados(5)
+    resultado = procesar_nomina_periodo(periodo.id, None)
+
+    ejecucion = EjecucionNomina.objects.get(pk=resultado['ejecucion_id'])
+    assert ejecucion.exitosa
+    assert ejecucion.empresa_id == periodo.empresa_id
+    assert list(ejecucion.etapas) == ETAPAS_NOMINA
+    assert ejecucion.consultas_sql >= sum(e['consultas'] for e in ejecucion.etapas.values()) > 0
+    assert ejecucion.filas['recibos_creados'] == 5
+    assert ejecucion.filas['detalles_creados'] >= 5
+
+    procesar_nomina_periodo(periodo.id, None)
+    respuesta = cliente_admin.get(f'/api/nomina/periodos/{periodo.id}/ejecuciones/')
+    datos = respuesta.json()
+    assert datos['count'] == 2
+    assert datos['results'][0]['recibos_sin_cambios'] == 5
+
+
+@pytest.mark.django_db
+def test_registra_ejecuciones_fallidas(periodo, crear_empleados, monkeypatch):
+    crear_empleados(2)
+
+    def falla(*args, **kwargs):
+        raise RuntimeError('fallo de escritura')
+    monkeypatch.setattr(services, '_guardar_detalles', falla)
+
+    with pytest.raises(RuntimeError):
+        procesar_nomina_periodo(periodo.id, None)
+
+    ejecucion = EjecucionNomina.objects.get(periodo=periodo)
+    assert not ejecucion.exitosa
+    assert 'fallo de escritura' in ejecucion.error
+    assert 'escritura_detalles' in ejecucion.etapas
@@ -0,0 +1,318 @@
+"""
+Tests del motor por lotes de procesar_nomina_periodo
+"""
+from decimal import Decimal
+
+import pytest
+
+from apps.nomina.models import ReciboNomina, DetalleReciboNomina
+from apps.nomina.services import (
+    CalculadoraNomina,
+    procesar_nomina_periodo,
+    procesar_periodos_en_paralelo,
+    seleccionar_periodos,
+)
+
+
+def _totales_por_empleado(periodo, empleados):
+    """Cálculo de referencia, un empleado a la vez con la calculadora"""
+    calculadora = CalculadoraNomina(periodo.año, periodo.tipo_periodo)
+    totales = {}
+    for empleado in empleados:
+        sueldo = empleado.salario_diario * 15
+        sbc = calculadora.calcular_sbc(empleado.salario_diario)
+        isr = calculadora.calcular_isr(sueldo)['isr_neto']
+        imss = calculadora.calcular_imss_obrero(sbc, 15)['total']
+        totales[empleado.id] = (sueldo, isr, imss, sueldo - isr - imss)
+    return totales
+
+
+@pytest.mark.django_db
+class TestProcesarNominaPeriodo:
+
+    def test_totales_iguales_al_calculo_individual(self, periodo, crear_empleados):
+        empleados = crear_empleados(12)
+        esperado = _totales_por_empleado(periodo, empleados)
+
+        resultado = procesar_nomina_periodo(periodo.id, None)
+
+        assert resultado['total_empleados'] == 12
+        for recibo in ReciboNomina.objects.filter(periodo=periodo):
+            sueldo, isr, imss, neto = esperado[recibo.empleado_id]
+            assert recibo.total_percepciones == sueldo
+            assert recibo.isr_retenido == isr
+            assert recibo.cuota_imss_obrera == imss
+            assert recibo.neto_a_pagar == neto
+
+        periodo.refresh_from_db()
+        assert periodo.estado == 'calculado'
+        assert periodo.total_neto == sum(v[3] for v in esperado.values())
+
+    def test_recalculo_actualiza_sin_duplicar(self, periodo, crear_empleados):
+        empleados = crear_empleados(5)
+        procesar_nomina_periodo(periodo.id, None)
+        detalles_iniciales = DetalleReciboNomina.objects.filter(recibo__periodo=periodo).count()
+
+        empleados[0].salario_diario = Decimal('1000.00')
+        empleados[0].save()
+        procesar_nomina_periodo(periodo.id, None)
+
+        assert ReciboNomina.objects.filter(periodo=periodo).count() == 5
+        assert DetalleReciboNomina.objects.filter(recibo__periodo=periodo).count() == detalles_iniciales
+        recibo = ReciboNomina.objects.get(periodo=periodo, empleado=empleados[0])
+        assert recibo.total_percepciones == Decimal('15000.00')
+
+    def test_empleado_sin_salario(self, periodo, crear_empleados):
+        crear_empleados(1, salario_base=Decimal('0'))
+        resultado = procesar_nomina_periodo(periodo.id, None)
+
+        assert resultado['recibos'][0]['error'] == 'Sin salario configurado'
+        assert ReciboNomina.objects.filter(periodo=periodo).count() == 1
+
+    def test_consultas_constantes(self, periodo, crear_empleados, django_assert_max_num_queries):
+        crear_empleados(40)
+        # +1 por el registro de la ejecución (EjecucionNomina)
+        # +3 por los acumulados anuales (agregado, upsert y limpieza)
+        with django_assert_max_num_queries(24):
+            procesar_nomina_periodo(periodo.id, None)
+
+
+@pytest.mark.django_db
+class TestProcesarPeriodosEnParalelo:
+
+    def test_agrupa_por_empresa_y_reporta_por_periodo(self, periodo, crear_empleados):
+        from apps.nomina.models import PeriodoNomina
+        crear_empleados(3)
+        cerrado = PeriodoNomina.objects.create(
+            empresa=periodo.empresa, tipo_periodo='quincenal', numero_periodo=2, año=2024,
+            fecha_inicio=periodo.fecha_inicio, fecha_fin=periodo.fecha_fin,
+            fecha_pago=periodo.fecha_pago, estado='pagado'
+        )
+
+        por_empresa = seleccionar_periodos(fecha_desde=periodo.fecha_pago)
+        assert por_empresa == {periodo.empresa_id: [periodo.id]}
+
+        resultado = procesar_periodos_en_paralelo(
+            periodo_ids=[periodo.id, cerrado.id], max_workers=1
+        )
+        assert resultado['total_periodos'] == 1
+        assert resultado['exitosos'] == 1
+        assert resultado['periodos'][0]['total_empleados'] == 3
+
+
+@pytest.mark.django_db
+class TestRecalculoIncremental:
+
+    def test_solo_recalcula_empleados_con_cambios(self, periodo, crear_empleados):
+        from apps.nomina.models import IncidenciaNomina
+        empleados = crear_empleados(6)
+        primero = procesar_nomina_periodo(periodo.id, None)
+        assert primero['recalculados'] == 6
+
+        sin_cambios = procesar_nomina_periodo(periodo.id, None)
+        assert sin_cambios['recalculados'] == 0
+        assert sin_cambios['sin_cambios'] == 6
+        assert sin_cambios['total_neto'] == primero['total_neto']
+
+        empleados[1].salario_diario = Decimal('777.00')
+        empleados[1].save()
+        IncidenciaNomina.objects.create(
+            empleado=empleados[2], periodo=periodo, tipo='bono',
+            fecha_inicio=periodo.fecha_inicio, monto=Decimal('100')
+        )
+        resultado = procesar_nomina_periodo(periodo.id, None)
+        assert resultado['recalculados'] == 2
+        assert resultado['sin_cambios'] == 4
+
+    def test_forzar_recalcula_todos(self, periodo, crear_empleados):
+        crear_empleados(3)
+        procesar_nomina_periodo(periodo.id, None)
+        assert procesar_nomina_periodo(periodo.id, None, forzar=True)['recalculados'] == 3
+
+
+
+def _crear_variables(periodo, empleado):
+    """Una falta, 4 horas extra, un bono, una percepción y un préstamo"""
+    from datetime import date
+    from apps.nomina.models import IncidenciaNomina, PercepcionVariable, DeduccionVariable
+    IncidenciaNomina.objects.create(
+        empleado=empleado, periodo=periodo, tipo='falta', fecha_inicio=periodo.fecha_inicio,
+        cantidad=Decimal('2')
+    )
+    IncidenciaNomina.objects.create(
+        empleado=empleado, periodo=periodo, tipo='horas_extra', fecha_inicio=periodo.fecha_inicio,
+        cantidad=Decimal('4')
+    )
+    IncidenciaNomina.objects.create(
+        empleado=empleado, periodo=periodo, tipo='bono', fecha_inicio=periodo.fecha_inicio,
+        monto=Decimal('300')
+    )
+    PercepcionVariable.objects.create(
+        empleado=empleado, periodo=periodo, tipo='vales_despensa', monto=Decimal('500'),
+        es_gravable=False
+    )
+    DeduccionVariable.objects.create(
+        empleado=empleado, tipo='prestamo_empresa', valor=Decimal('400'),
+        saldo_pendiente=Decimal('250'), fecha_inicio=date(2023, 6, 1)
+    )
+
+
+@pytest.mark.django_db
+class TestIncidenciasYConceptosVariables:
+
+    def test_aplica_incidencias_y_variables(self, periodo, crear_empleados):
+        empleado, = crear_empleados(1, salario_base=Decimal('400.00'))
+        _crear_variables(periodo, empleado)
+
+        procesar_nomina_periodo(periodo.id, None)
+
+        recibo = ReciboNomina.objects.get(periodo=periodo)
+        lineas = {
+            d.concepto.codigo_interno: d
+            for d in recibo.detalles.select_related('concepto')
+        }
+        assert recibo.dias_pagados == 13
+        assert lineas['D012'].importe_total == Decimal('800.00')
+        assert lineas['P006'].importe_total == Decimal('400.00')  # 4 h dobles a 50/h
+        assert lineas['P006'].importe_exento == Decimal('200.00')
+        assert lineas['P013'].importe_total == Decimal('300.00')
+        assert lineas['P012'].importe_exento == Decimal('500.00')
+        assert lineas['D009'].importe_total == Decimal('250.00')  # topado al saldo
+        assert recibo.total_percepciones == Decimal('7200.00')
+        assert recibo.base_gravable_isr == Decimal('5700.00')
+        assert recibo.total_deducciones == sum(
+            d.importe_total for codigo, d in lineas.items() if codigo.startswith('D')
+        )
+        assert recibo.neto_a_pagar == recibo.total_percepciones - recibo.total_deducciones
+
+        # Al quitar la falta desaparece su línea
+        recibo.empleado.incidencias.filter(tipo='falta').delete()
+        procesar_nomina_periodo(periodo.id, None)
+        assert not recibo.detalles.filter(concepto__codigo_interno='D012').exists()
+
+    def test_media_falta_descuenta_imss(self, periodo, crear_empleados):
+        from apps.nomina.models import IncidenciaNomina
+        from apps.nomina.services import CalculadoraNomina
+        empleado, = crear_empleados(1, salario_base=Decimal('400.00'))
+        IncidenciaNomina.objects.create(
+            empleado=empleado, periodo=periodo, tipo='falta', fecha_inicio=periodo.fecha_inicio,
+            cantidad=Decimal('0.5')
+        )
+
+        procesar_nomina_periodo(periodo.id, None)
+
+        recibo = ReciboNomina.objects.get(periodo=periodo)
+        calculadora = CalculadoraNomina(periodo.año, periodo.tipo_periodo)
+        imss = calculadora.calcular_imss_obrero(recibo.salario_base_cotizacion, Decimal('14.5'))
+        assert recibo.cuota_imss_obrera == imss['total']
+        assert recibo.cuota_imss_obrera < calculadora.calcular_imss_obrero(
+            recibo.salario_base_cotizacion, 15
+        )['total']
+        assert recibo.base_gravable_isr == Decimal('5800.00')
+        assert recibo.dias_pagados == 15  # 14.5 redondeado en el campo entero
+
+    def test_consultas_no_crecen_con_la_plantilla(self, periodo, crear_empleados):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        def consultas(n):
+            ReciboNomina.objects.filter(periodo=periodo).delete()
+            for empleado in crear_empleados(n):
+                _crear_variables(periodo, empleado)
+            with CaptureQueriesContext(connection) as contexto:
+                procesar_nomina_periodo(periodo.id, None)
+            return len(contexto)
+
+        assert consultas(3) == consultas(30)
+
+@pytest.mark.django_db
+class TestTrabajoCalculoNomina:
+
+    def test_trabajo_en_segundo_plano(self, periodo, crear_empleados):
+        from apps.core.trabajos import encolar_trabajo, procesar_pendientes
+        from apps.nomina.services import TIPO_TRABAJO_CALCULO_NOMINA
+        crear_empleados(4)
+
+        trabajo = encolar_trabajo(TIPO_TRABAJO_CALCULO_NOMINA, referencia_id=periodo.id)
+        assert encolar_trabajo(TIPO_TRABAJO_CALCULO_NOMINA, referencia_id=periodo.id) == trabajo
+        assert ReciboNomina.objects.filter(periodo=periodo).count() == 0
+
+        assert procesar_pendientes() == 1
+        trabajo.refresh_from_db()
+        assert trabajo.estado == 'completado'
+        assert (trabajo.procesados, trabajo.total) == (4, 4)
+        assert trabajo.resultado['total_empleados'] == 4
+        assert ReciboNomina.objects.filter(periodo=periodo).count() == 4
+
+    def test_falla_no_deja_recibos_a_medias(self, periodo, crear_empleados, monkeypatch):
+        from apps.core.trabajos import encolar_trabajo, procesar_pendientes
+        from apps.nomina import services
+        crear_empleados(3)
+
+        def falla(*args, **kwargs):
+            raise RuntimeError('fallo de escritura')
+        monkeypatch.setattr(services, '_guardar_detalles', falla)
+
+        trabajo = encolar_trabajo(services.TIPO_TRABAJO_CALCULO_NOMINA, referencia_id=periodo.id)
+        procesar_pendientes()
+
+        trabajo.refresh_from_db()
+        periodo.refresh_from_db()
+        assert trabajo.estado == 'error'
+        assert 'fallo de escritura' in trabajo.error
+        assert periodo.estado == 'borrador'
+        assert ReciboNomina.objects.filter(periodo=periodo).count() == 0
+
+    def test_trabajo_abandonado_se_reencola(self, periodo, crear_empleados):
+        from datetime import timedelta
+        from django.utils import timezone
+        from apps.core.models import TrabajoSegundoPlano
+        from apps.core.trabajos import encolar_trabajo, procesar_pendientes, tomar_siguiente_trabajo
+        from apps.nomina.services import TIPO_TRABAJO_CALCULO_NOMINA
+        crear_empleados(2)
+
+        # Un worker lo tomó y murió sin terminar
+        trabajo = encolar_trabajo(TIPO_TRABAJO_CALCULO_NOMINA, referencia_id=periodo.id)
+        assert tomar_siguiente_trabajo() == trabajo
+        assert encolar_trabajo(TIPO_TRABAJO_CALCULO_NOMINA, referencia_id=periodo.id) == trabajo
+        assert procesar_pendientes() == 0
+
+        TrabajoSegundoPlano.objects.filter(pk=trabajo.pk).update(
+            updated_at=timezone.now() - timedelta(hours=2)
+        )
+        assert procesar_pendientes() == 1
+        trabajo.refresh_from_db()
+        assert trabajo.estado == 'completado'
+        assert trabajo.intentos == 2
+        assert ReciboNomina.objects.filter(periodo=periodo).count() == 2
+
+    def test_trabajo_abandonado_agota_intentos(self, periodo):
+        from datetime import timedelta
+        from django.utils import timezone
+        from apps.core.models import TrabajoSegundoPlano
+        from apps.core.trabajos import MAX_INTENTOS_TRABAJO, encolar_trabajo, procesar_pendientes
+        from apps.nomina.services import TIPO_TRABAJO_CALCULO_NOMINA
+
+        trabajo = encolar_trabajo(TIPO_TRABAJO_CALCULO_NOMINA, referencia_id=periodo.id)
+        TrabajoSegundoPlano.objects.filter(pk=trabajo.pk).update(
+            estado='en_proceso', intentos=MAX_INTENTOS_TRABAJO,
+            updated_at=timezone.now() - timedelta(hours=2)
+        )
+        assert procesar_pendientes() == 0
+        trabajo.refresh_from_db()
+        assert trabajo.estado == 'error'
+        assert 'abandonado' in trabajo.error
+        # Ya no bloquea encolar un cálculo nuevo
+        assert encolar_trabajo(TIPO_TRABAJO_CALCULO_NOMINA, referencia_id=periodo.id) != trabajo
+
+    def test_progreso_valida_el_trabajo(self, periodo, cliente_admin):
+        from apps.core.trabajos import encolar_trabajo
+        from apps.nomina.services import TIPO_TRABAJO_CALCULO_NOMINA
+
+        trabajo = encolar_trabajo(TIPO_TRABAJO_CALCULO_NOMINA, referencia_id=periodo.id)
+        url = f'/api/nomina/periodos/{periodo.id}/progreso/'
+
+        assert cliente_admin.get(url, {'trabajo': str(trabajo.id)}).status_code == 200
+        respuesta = cliente_admin.get(url, {'trabajo': 'abc'})
+        assert respuesta.status_code == 400
+        assert respuesta.json()['error'] == 'trabajo inválido'
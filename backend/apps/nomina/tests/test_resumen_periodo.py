@@ -0,0 +1,57 @@
+"""
+Tests del resumen materializado del periodo
+"""
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.nomina.models import ReciboNomina, ResumenPeriodoNomina
+from apps.nomina.services import procesar_nomina_periodo
+
+
+@pytest.mark.django_db
+def test_resumen_se_mantiene_al_dia(periodo, crear_empleados):
+    crear_empleados(4)
+    procesar_nomina_periodo(periodo.id, None)
+
+    resumen = ResumenPeriodoNomina.objects.get(periodo=periodo)
+    netos = list(ReciboNomina.objects.filter(periodo=periodo).values_list('neto_a_pagar', flat=True))
+    assert resumen.recibos_total == resumen.recibos_calculado == 4
+    assert resumen.total_neto == sum(netos)
+    assert (resumen.neto_minimo, resumen.neto_maximo) == (min(netos), max(netos))
+
+    recibo = ReciboNomina.objects.filter(periodo=periodo).first()
+    recibo.estado = 'timbrado'
+    recibo.save()
+    resumen.refresh_from_db()
+    assert (resumen.recibos_calculado, resumen.recibos_timbrado) == (3, 1)
+
+    recibo.delete()
+    resumen.refresh_from_db()
+    assert resumen.recibos_total == 3
+
+
+@pytest.mark.django_db
+def test_endpoint_paginado_con_consultas_constantes(periodo, crear_empleados, cliente_admin):
+    url = f'/api/nomina/periodos/{periodo.id}/resumen/'
+
+    def consultar(n):
+        crear_empleados(n)
+        procesar_nomina_periodo(periodo.id, None)
+        with CaptureQueriesContext(connection) as contexto:
+            respuesta = cliente_admin.get(url)
+        assert respuesta.status_code == 200
+        return respuesta.json(), len(contexto)
+
+    datos, consultas_chico = consultar(3)
+    assert datos['total_empleados'] == 3
+    assert len(datos['recibos']) == 3
+
+    datos, consultas_grande = consultar(40)
+    assert datos['recibos_total'] == 43
+    assert len(datos['recibos']) == 20
+    assert datos['recibos_siguiente']
+    assert Decimal(str(datos['total_neto'])) > 0
+    assert consultas_grande == consultas_chico
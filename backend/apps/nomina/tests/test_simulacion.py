@@ -0,0 +1,50 @@
+"""
+Tests de la simulación de escenarios salariales
+"""
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.nomina.models import ReciboNomina
+from apps.nomina.services import CalculadoraNomina, calcular_recibo
+from apps.nomina.simulacion import simular_escenario
+
+
+@pytest.mark.django_db
+def test_simulacion_coincide_con_calculo_y_no_escribe(tablas_fiscales, crear_empleados):
+    empleados = crear_empleados(6, departamento='Ventas')
+    empleados += crear_empleados(4, departamento='Sistemas')
+    escenario = {'ajustes': [{'tipo': 'porcentaje', 'valor': 6, 'departamentos': ['Ventas']}]}
+
+    with CaptureQueriesContext(connection) as consultas:
+        resultado = simular_escenario(empleados[0].empresa_id, escenario, año=2024)
+
+    assert all(q['sql'].lstrip().upper().startswith('SELECT') for q in consultas.captured_queries)
+    assert ReciboNomina.objects.count() == 0
+    assert resultado['total_empleados'] == 10
+    assert resultado['empleados_afectados'] == 6
+
+    calculadora = CalculadoraNomina(2024, 'quincenal')
+    por_id = {str(e.id): e for e in empleados}
+    for fila in resultado['empleados']:
+        empleado = por_id[fila['empleado_id']]
+        factor = Decimal('1.06') if empleado.departamento == 'Ventas' else Decimal('1')
+        salario = (empleado.salario_diario * factor).quantize(Decimal('0.01'))
+        esperado = calcular_recibo(calculadora, salario, 15)
+        assert Decimal(str(fila['neto'])) == esperado['neto_a_pagar']
+        assert Decimal(str(fila['isr'])) == esperado['isr_retenido']
+
+
+@pytest.mark.django_db
+def test_simulacion_monto_por_empleado(tablas_fiscales, crear_empleados):
+    empleados = crear_empleados(3)
+    escenario = {'ajustes': [{'tipo': 'monto', 'valor': 100, 'empleados': [empleados[1].id]}]}
+
+    resultado = simular_escenario(empleados[0].empresa_id, escenario, año=2024)
+
+    assert resultado['empleados_afectados'] == 1
+    diferencia = resultado['totales']['diferencia']
+    assert diferencia['sueldo'] == 1500.0
+    assert diferencia['costo_empresa'] > diferencia['sueldo']
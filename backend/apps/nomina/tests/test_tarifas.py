@@ -0,0 +1,63 @@
+"""
+Tests del índice compilado de tarifas ISR/subsidio
+"""
+from decimal import Decimal
+
+import pytest
+
+from apps.nomina.models import TablaISR, TablaSubsidio
+from apps.nomina.tarifas import obtener_tarifa
+
+
+def _rango_lineal(filas, ingreso):
+    """Búsqueda lineal original sobre las tablas"""
+    for fila in filas:
+        if fila.limite_inferior <= ingreso <= fila.limite_superior:
+            return fila
+    return None
+
+
+@pytest.mark.django_db
+class TestTarifaCompilada:
+
+    def test_coincide_con_busqueda_lineal(self, tablas_fiscales):
+        tarifa = obtener_tarifa(2024, 'quincenal')
+        filas_isr = list(TablaISR.objects.filter(año=2024, periodicidad='quincenal').order_by('limite_inferior'))
+        filas_sub = list(TablaSubsidio.objects.filter(año=2024, periodicidad='quincenal').order_by('limite_inferior'))
+
+        ingresos = []
+        for fila in filas_isr + filas_sub:
+            ingresos += [fila.limite_inferior, fila.limite_superior,
+                         (fila.limite_inferior + fila.limite_superior) / 2]
+
+        for ingreso in ingresos:
+            esperado = _rango_lineal(filas_isr, ingreso) or filas_isr[-1]
+            assert tarifa.rango_isr(ingreso)['limite_inferior'] == esperado.limite_inferior
+
+            sub = _rango_lineal(filas_sub, ingreso)
+            assert tarifa.subsidio(ingreso) == (sub.subsidio if sub else Decimal('0'))
+
+    def test_busqueda_sin_consultas(self, tablas_fiscales, django_assert_num_queries):
+        tarifa = obtener_tarifa(2024, 'quincenal')
+        with django_assert_num_queries(0):
+            for i in range(100):
+                tarifa.rango_isr(Decimal(i * 123))
+                tarifa.subsidio(Decimal(i * 123))
+
+    def test_reutiliza_tarifa_del_proceso(self, tablas_fiscales):
+        assert obtener_tarifa(2024, 'quincenal') is obtener_tarifa(2024, 'quincenal')
+
+    def test_invalida_al_modificar_tabla(self, tablas_fiscales):
+        tarifa = obtener_tarifa(2024, 'quincenal')
+        fila = TablaISR.objects.filter(año=2024, periodicidad='quincenal').order_by('limite_inferior').first()
+        fila.cuota_fija = Decimal('99.99')
+        fila.save()
+
+        nueva = obtener_tarifa(2024, 'quincenal')
+        assert nueva is not tarifa
+        assert nueva.rango_isr(fila.limite_inferior)['cuota_fija'] == Decimal('99.99')
+
+    def test_sin_tablas(self, db):
+        tarifa = obtener_tarifa(1999, 'quincenal')
+        assert not tarifa.tiene_isr
+        assert tarifa.subsidio(Decimal('1000')) == Decimal('0')
@@ -0,0 +1,118 @@
+"""
+Tests del pipeline de timbrado contra el PAC simulado
+"""
+import pytest
+
+from apps.integraciones import timbrado
+from apps.integraciones.pac_simulado import ServidorPACSimulado
+from apps.integraciones.timbrado import timbrar_periodo
+from apps.nomina.models import ReciboNomina
+from apps.nomina.services import procesar_nomina_periodo
+
+
+@pytest.fixture
+def pac():
+    with ServidorPACSimulado(tasa_fallas=0.3, semilla=7) as servidor:
+        yield servidor
+
+
+@pytest.fixture
+def config_pac(empresa, pac):
+    from apps.integraciones.models import (
+        ProveedorIntegracion, ConfiguracionIntegracion, ConfiguracionPAC
+    )
+    proveedor = ProveedorIntegracion.objects.create(
+        nombre='PAC Simulado', tipo='pac', api_url_sandbox=pac.url
+    )
+    configuracion = ConfiguracionIntegracion.objects.create(empresa=empresa, proveedor=proveedor)
+    return ConfiguracionPAC.objects.create(
+        configuracion=configuracion,
+        rfc_emisor=empresa.rfc,
+        regimen_fiscal='601',
+        lugar_expedicion='06600',
+    )
+
+
+@pytest.fixture
+def periodo_calculado(periodo, crear_empleados, settings, tmp_path, monkeypatch):
+    settings.MEDIA_ROOT = tmp_path
+    monkeypatch.setattr(timbrado, 'ESPERA_BASE_SEGUNDOS', 0)
+    crear_empleados(12, rfc='XAXX010101000')
+    procesar_nomina_periodo(periodo.id, None)
+    return periodo
+
+
+@pytest.mark.django_db
+def test_timbra_todo_con_reintentos(periodo_calculado, config_pac, pac):
+    resultado = timbrar_periodo(periodo_calculado.id, concurrencia=4, tamano_bloque=5, max_intentos=10)
+
+    assert resultado['timbrados'] == 12
+    assert resultado['fallidos'] == 0
+    assert resultado['reintentos'] > 0
+    assert resultado['periodo_timbrado']
+
+    recibos = list(ReciboNomina.objects.filter(periodo=periodo_calculado))
+    assert {r.estado for r in recibos} == {'timbrado'}
+    assert len({r.uuid_cfdi for r in recibos}) == 12
+    assert recibos[0].uuid_cfdi in recibos[0].obtener_xml_cfdi()
+    config_pac.refresh_from_db()
+    assert config_pac.folio_actual == 13
+
+
+@pytest.mark.django_db
+def test_reanudar_es_idempotente(periodo_calculado, config_pac, pac):
+    timbrar_periodo(periodo_calculado.id, concurrencia=4, max_intentos=10)
+    recibo = ReciboNomina.objects.filter(periodo=periodo_calculado).first()
+    uuid_original = recibo.uuid_cfdi
+
+    # Corte entre la respuesta del PAC y el guardado: el recibo quedó sin UUID
+    ReciboNomina.objects.filter(pk=recibo.pk).update(uuid_cfdi='', estado='calculado')
+    timbres = len(pac.timbres)
+
+    resultado = timbrar_periodo(periodo_calculado.id, concurrencia=4, max_intentos=10)
+
+    assert resultado['total'] == 1
+    assert resultado['timbrados'] == 1
+    recibo.refresh_from_db()
+    assert recibo.uuid_cfdi == uuid_original
+    assert len(pac.timbres) == timbres
+
+
+@pytest.mark.django_db
+def test_recalculo_no_toca_recibos_timbrados(periodo_calculado, config_pac, pac):
+    from decimal import Decimal
+    from django.db.models import Sum
+
+    recibo = ReciboNomina.objects.filter(periodo=periodo_calculado).order_by('id').first()
+    timbrar_periodo(periodo_calculado.id, recibo_ids=[recibo.id], max_intentos=10)
+    periodo_calculado.refresh_from_db()
+    assert periodo_calculado.estado == 'calculado'
+
+    recibo.refresh_from_db()
+    uuid_original, neto_original = recibo.uuid_cfdi, recibo.neto_a_pagar
+    recibo.empleado.salario_diario += Decimal('100')
+    recibo.empleado.save()
+
+    resultado = procesar_nomina_periodo(periodo_calculado.id, None, forzar=True)
+
+    assert resultado['timbrados'] == 1
+    assert resultado['recalculados'] == 11
+    recibo.refresh_from_db()
+    assert recibo.estado == 'timbrado'
+    assert recibo.uuid_cfdi == uuid_original
+    assert recibo.neto_a_pagar == neto_original
+    periodo_calculado.refresh_from_db()
+    suma = ReciboNomina.objects.filter(periodo=periodo_calculado).aggregate(t=Sum('neto_a_pagar'))['t']
+    assert periodo_calculado.total_neto == suma
+
+
+@pytest.mark.django_db
+def test_periodo_pagado_sigue_pagado(periodo_calculado, config_pac, pac):
+    periodo_calculado.estado = 'pagado'
+    periodo_calculado.save()
+
+    resultado = timbrar_periodo(periodo_calculado.id, concurrencia=4, max_intentos=10)
+
+    assert resultado['periodo_timbrado']
+    periodo_calculado.refresh_from_db()
+    assert periodo_calculado.estado == 'pagado'
@@ -0,0 +1,42 @@
+"""
+Tests del modo vectorizado: debe coincidir al centavo con la ruta Decimal
+"""
+import random
+from decimal import Decimal
+
+import pytest
+
+from apps.nomina.vectorizado import CalculadoraNominaVectorizada
+
+
+@pytest.mark.django_db
+class TestCalculadoraNominaVectorizada:
+
+    def test_concilia_con_ruta_decimal(self, tablas_fiscales):
+        calc = CalculadoraNominaVectorizada(2024, 'quincenal')
+        rng = random.Random(2024)
+        salarios = [Decimal(rng.randint(10000, 900000)) / 100 for _ in range(400)]
+        # Salarios que caen exactamente en límites de la tarifa
+        salarios += [Decimal(int(c)) / 1500 for c in calc.isr_inf if c % 15 == 0]
+
+        conciliacion = calc.conciliar_con_decimal(salarios, dias=15)
+
+        assert conciliacion['ok'], conciliacion['diferencias'][:5]
+        assert conciliacion['total_comparados'] == len(salarios)
+
+    def test_sbc_y_dias_explicitos(self, tablas_fiscales):
+        calc = CalculadoraNominaVectorizada(2024, 'quincenal')
+        salarios = [Decimal('300.00'), Decimal('1500.50'), Decimal('5000.00')]
+        sbc = [Decimal('320.11'), Decimal('1600.00'), Decimal('9000.00')]
+        dias = [15, 10, 7]
+
+        conciliacion = calc.conciliar_con_decimal(salarios, dias=dias, sbc=sbc)
+
+        assert conciliacion['ok'], conciliacion['diferencias']
+
+    def test_columnas_en_pesos(self, tablas_fiscales):
+        calc = CalculadoraNominaVectorizada(2024, 'quincenal')
+        resultado = calc.calcular_lote([500, 800], dias=15)
+
+        assert list(resultado['sueldo']) == [7500.0, 12000.0]
+        assert all(resultado['neto'] == resultado['sueldo'] - resultado['isr'] - resultado['imss_obrero'])
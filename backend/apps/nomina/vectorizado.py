@@ -0,0 +1,286 @@
+"""
+Cálculo vectorizado de nómina con NumPy
+
+Modo por lotes para simulaciones y proyecciones sobre toda la plantilla:
+recibe arreglos de salarios diarios, SBC y días, y regresa columnas con
+ISR, subsidio e IMSS obrero/patronal.
+
+Los importes se manejan como enteros (centavos y tasas escaladas) para
+reproducir al centavo el redondeo de CalculadoraNomina (quantize a 0.01,
+ROUND_HALF_EVEN). conciliar_con_decimal() lo verifica contra la ruta
+Decimal antes de confiar en los resultados.
+"""
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .services import CalculadoraNomina, FACTOR_INTEGRACION_MINIMO
+
+
+COLUMNAS_RESULTADO = [
+    'salario_diario',
+    'sbc',
+    'dias',
+    'sueldo',
+    'isr_antes_subsidio',
+    'subsidio',
+    'isr',
+    'imss_obrero',
+    'imss_patronal',
+    'neto',
+]
+
+
+def _escala(valores: List[Decimal]) -> int:
+    """Potencia de 10 que convierte todos los valores en enteros exactos"""
+    decimales = max((max(-v.normalize().as_tuple().exponent, 0) for v in valores), default=0)
+    return 10 ** decimales
+
+
+def _entero(valor: Decimal, escala: int) -> int:
+    return int(Decimal(str(valor)) * escala)
+
+
+def _a_centavos(valores) -> np.ndarray:
+    """Convierte montos en pesos (float, Decimal o int) a centavos int64"""
+    arreglo = np.asarray(valores, dtype=object)
+    return np.array(
+        [int((Decimal(str(v)) * 100).to_integral_value()) for v in arreglo.ravel()],
+        dtype=np.int64
+    ).reshape(arreglo.shape)
+
+
+def _redondear(numerador: np.ndarray, divisor: int) -> np.ndarray:
+    """División entera con redondeo al par (ROUND_HALF_EVEN)"""
+    cociente = np.floor_divide(numerador, divisor)
+    residuo = numerador - cociente * divisor
+    doble = 2 * residuo
+    sube = (doble > divisor) | ((doble == divisor) & (cociente % 2 == 1))
+    return cociente + sube.astype(np.int64)
+
+
+class CalculadoraNominaVectorizada:
+    """
+    Versión vectorizada de CalculadoraNomina
+    Usa las mismas tarifas compiladas y parámetros IMSS vigentes
+    """
+
+    def __init__(self, año: int = None, periodicidad: str = 'quincenal',
+                 calculadora: CalculadoraNomina = None):
+        self.calculadora = calculadora or CalculadoraNomina(año, periodicidad)
+        self.año = self.calculadora.año
+        self.periodicidad = self.calculadora.periodicidad
+        self._compilar_tarifa()
+        self._compilar_imss()
+
+    def _compilar_tarifa(self):
+        tarifa = self.calculadora.tarifa
+        self.tiene_isr = tarifa.tiene_isr
+
+        self.isr_inf = _a_centavos(tarifa.isr_limites_inferiores)
+        self.isr_sup = _a_centavos(tarifa.isr_limites_superiores)
+        self.isr_cuota = _a_centavos(tarifa.isr_cuotas_fijas)
+        # Porcentaje excedente como entero sobre 100 * escala
+        self.isr_pct_escala = _escala(list(tarifa.isr_porcentajes))
+        self.isr_pct = np.array(
+            [_entero(p, self.isr_pct_escala) for p in tarifa.isr_porcentajes], dtype=np.int64
+        )
+
+        self.sub_inf = _a_centavos(tarifa.subsidio_limites_inferiores)
+        self.sub_sup = _a_centavos(tarifa.subsidio_limites_superiores)
+        self.sub_monto = _a_centavos(tarifa.subsidio_montos)
+
+    def _compilar_imss(self):
+        params = self.calculadora.params_imss
+        self.tiene_imss = params is not None
+        if not params:
+            return
+
+        self.tope_sbc = int(_a_centavos([params.tope_sbc])[0])
+        self.smg = int(_a_centavos([params.salario_minimo_general])[0])
+
+        tasas_obreras = [
+            params.porc_enf_mat_obrera,
+            params.porc_invalidez_vida_obrera,
+            params.porc_cesantia_vejez_obrera,
+        ]
+        tasas_patronales = [
+            params.porc_riesgo_trabajo,
+            params.porc_enf_mat_patronal,
+            params.porc_invalidez_vida_patronal,
+            params.porc_cesantia_vejez_patronal,
+            params.porc_guarderias,
+            params.porc_infonavit,
+            params.cuota_fija_enf_mat,
+        ]
+        tasas = [Decimal(str(t)) for t in tasas_obreras + tasas_patronales]
+        self.escala_tasas = _escala(tasas)
+
+        self.tasa_obrera = sum(_entero(t, self.escala_tasas) for t in tasas_obreras)
+        self.tasa_enf_mat_patronal = _entero(params.porc_enf_mat_patronal, self.escala_tasas)
+        self.tasa_cuota_fija = _entero(params.cuota_fija_enf_mat, self.escala_tasas)
+        # Cuotas patronales sobre la base completa
+        self.tasa_patronal_base = sum(_entero(t, self.escala_tasas) for t in [
+            params.porc_riesgo_trabajo,
+            params.porc_invalidez_vida_patronal,
+            params.porc_cesantia_vejez_patronal,
+            params.porc_guarderias,
+            params.porc_infonavit,
+        ])
+
+    # ============ CÁLCULO POR COLUMNAS ============
+
+    def calcular_sbc(self, salarios_c: np.ndarray, factor_integracion: Decimal = None) -> np.ndarray:
+        """SBC en centavos: salario * factor, con tope, redondeado a centavos"""
+        factor = Decimal(str(factor_integracion or FACTOR_INTEGRACION_MINIMO))
+        escala = _escala([factor])
+        sbc = salarios_c * _entero(factor, escala)
+        if self.tiene_imss:
+            sbc = np.minimum(sbc, self.tope_sbc * escala)
+        return _redondear(sbc, escala)
+
+    def calcular_isr(self, ingresos_c: np.ndarray) -> Dict[str, np.ndarray]:
+        """ISR antes de subsidio, subsidio e ISR neto en centavos"""
+        ceros = np.zeros_like(ingresos_c)
+        if not self.tiene_isr:
+            return {'isr_antes_subsidio': ceros, 'subsidio': ceros, 'isr': ceros}
+
+        # Primer rango con límite superior >= ingreso; si no lo contiene, el último
+        n = len(self.isr_sup)
+        idx = np.searchsorted(self.isr_sup, ingresos_c, side='left')
+        dentro = idx < n
+        idx_seguro = np.minimum(idx, n - 1)
+        dentro &= self.isr_inf[idx_seguro] <= ingresos_c
+        idx = np.where(dentro, idx_seguro, n - 1)
+
+        # Unidades: centavos * 100 * escala del porcentaje
+        divisor = 100 * self.isr_pct_escala
+        excedente = ingresos_c - self.isr_inf[idx]
+        isr_antes = self.isr_cuota[idx] * divisor + excedente * self.isr_pct[idx]
+
+        subsidio = ceros
+        if len(self.sub_sup):
+            m = len(self.sub_sup)
+            j = np.searchsorted(self.sub_sup, ingresos_c, side='left')
+            j_seguro = np.minimum(j, m - 1)
+            en_rango = (j < m) & (self.sub_inf[j_seguro] <= ingresos_c)
+            subsidio = np.where(en_rango, self.sub_monto[j_seguro], 0)
+
+        isr_neto = np.maximum(isr_antes - subsidio * divisor, 0)
+        return {
+            'isr_antes_subsidio': _redondear(isr_antes, divisor),
+            'subsidio': subsidio,
+            'isr': _redondear(isr_neto, divisor),
+        }
+
+    def calcular_imss(self, sbc_c: np.ndarray, dias: np.ndarray) -> Dict[str, np.ndarray]:
+        """Cuotas IMSS obrera y patronal en centavos"""
+        if not self.tiene_imss:
+            ceros = np.zeros_like(sbc_c)
+            return {'imss_obrero': ceros, 'imss_patronal': ceros}
+
+        sbc_topado = np.minimum(sbc_c, self.tope_sbc)
+        base = sbc_topado * dias
+        excedente = np.maximum(sbc_topado - 3 * self.smg, 0) * dias
+
+        obrero = base * self.tasa_obrera
+        patronal = (
+            self.smg * dias * self.tasa_cuota_fija
+            + excedente * self.tasa_enf_mat_patronal
+            + base * self.tasa_patronal_base
+        )
+        return {
+            'imss_obrero': _redondear(obrero, self.escala_tasas),
+            'imss_patronal': _redondear(patronal, self.escala_tasas),
+        }
+
+    def calcular_lote_centavos(self, salarios_diarios, dias=15, sbc=None,
+                               factor_integracion: Decimal = None) -> Dict[str, np.ndarray]:
+        """
+        Calcula la nómina de un lote de empleados
+        Todas las columnas en centavos (int64), excepto 'dias'
+        """
+        salarios_c = _a_centavos(salarios_diarios)
+        dias = np.broadcast_to(np.asarray(dias, dtype=np.int64), salarios_c.shape)
+
+        if sbc is None:
+            sbc_c = self.calcular_sbc(salarios_c, factor_integracion)
+        else:
+            sbc_c = _a_centavos(sbc)
+
+        sueldo = salarios_c * dias
+        isr = self.calcular_isr(sueldo)
+        imss = self.calcular_imss(sbc_c, dias)
+
+        return {
+            'salario_diario': salarios_c,
+            'sbc': sbc_c,
+            'dias': dias,
+            'sueldo': sueldo,
+            'isr_antes_subsidio': isr['isr_antes_subsidio'],
+            'subsidio': isr['subsidio'],
+            'isr': isr['isr'],
+            'imss_obrero': imss['imss_obrero'],
+            'imss_patronal': imss['imss_patronal'],
+            'neto': sueldo - isr['isr'] - imss['imss_obrero'],
+        }
+
+    def calcular_lote(self, salarios_diarios, dias=15, sbc=None,
+                      factor_integracion: Decimal = None) -> Dict[str, np.ndarray]:
+        """
+        Calcula la nómina de un lote de empleados
+        Retorna columnas float64 en pesos (redondeadas al centavo)
+        """
+        columnas = self.calcular_lote_centavos(salarios_diarios, dias, sbc, factor_integracion)
+        return {
+            nombre: (valores if nombre == 'dias' else valores / 100.0)
+            for nombre, valores in columnas.items()
+        }
+
+    # ============ CONCILIACIÓN ============
+
+    def conciliar_con_decimal(self, salarios_diarios, dias=15, sbc=None,
+                              factor_integracion: Decimal = None,
+                              muestra: Optional[int] = None) -> Dict:
+        """
+        Compara al centavo el modo vectorizado contra CalculadoraNomina
+        muestra: limita la comparación a los primeros N empleados
+        """
+        columnas = self.calcular_lote_centavos(salarios_diarios, dias, sbc, factor_integracion)
+        total = len(columnas['salario_diario'])
+        n = total if muestra is None else min(muestra, total)
+        calc = self.calculadora
+        centavo = Decimal('100')
+
+        diferencias = []
+        for i in range(n):
+            salario = Decimal(int(columnas['salario_diario'][i])) / centavo
+            dias_i = int(columnas['dias'][i])
+            sbc_i = (calc.calcular_sbc(salario, factor_integracion) if sbc is None
+                     else Decimal(int(columnas['sbc'][i])) / centavo)
+            sueldo = salario * dias_i
+            res_isr = calc.calcular_isr(sueldo)
+            esperado = {
+                'sbc': sbc_i,
+                'isr_antes_subsidio': res_isr.get('isr_antes_subsidio', Decimal('0')),
+                'subsidio': res_isr.get('subsidio', Decimal('0')),
+                'isr': res_isr.get('isr_neto', Decimal('0')),
+                'imss_obrero': calc.calcular_imss_obrero(sbc_i, dias_i)['total'],
+                'imss_patronal': calc.calcular_imss_patronal(sbc_i, dias_i)['total'],
+            }
+            for campo, valor in esperado.items():
+                vectorizado = Decimal(int(columnas[campo][i])) / centavo
+                if vectorizado != valor:
+                    diferencias.append({
+                        'indice': i,
+                        'campo': campo,
+                        'decimal': valor,
+                        'vectorizado': vectorizado,
+                    })
+
+        return {
+            'total_comparados': n,
+            'diferencias': diferencias,
+            'ok': not diferencias,
+        }
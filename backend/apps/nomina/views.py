@@ -1,9 +1,12 @@
 """
 Vistas API para el módulo de Nómina
 """
+import uuid
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db.models import Prefetch
 from django.utils import timezone
 from apps.core.permissions import (
     EsEmpleadorOAdmin, 
@@ -27,9 +30,13 @@ from .serializers import (
     IncidenciaNominaSerializer,
     ParametrosIMSSSerializer,
     TablaISRSerializer,
-    TablaSubsidioSerializer
+    TablaSubsidioSerializer,
+    SimulacionNominaSerializer,
+    EjecucionNominaSerializer
 )
-from .services import procesar_nomina_periodo, CalculadoraNomina
+from apps.core.models import TrabajoSegundoPlano
+from apps.core.trabajos import encolar_trabajo, estado_trabajo
+from .services import CalculadoraNomina, TIPO_TRABAJO_CALCULO_NOMINA
 
 
 class ParametrosIMSSViewSet(viewsets.ModelViewSet):
@@ -69,7 +76,14 @@ class PeriodoNominaViewSet(EmpresaFilterMixin, viewsets.ModelViewSet):
     permission_classes = [EsEmpleadorOAdmin]
 
     def get_queryset(self):
-        qs = PeriodoNomina.objects.select_related('empresa').prefetch_related('recibos')
+        qs = PeriodoNomina.objects.select_related('empresa')
+        if self.action == 'retrieve':
+            qs = qs.prefetch_related(Prefetch(
+                'recibos',
+                queryset=ReciboNomina.objects.select_related('empleado', 'periodo__empresa')
+            ))
+        elif self.action == 'resumen':
+            qs = qs.select_related('resumen')
         user = self.request.user
 
         # Filtrar por empresa del header X-Empresa-ID
@@ -106,9 +120,12 @@ class PeriodoNominaViewSet(EmpresaFilterMixin, viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def calcular(self, request, pk=None):
         """
-        Calcula la nómina del periodo
+        Encola el cálculo de la nómina del periodo y responde de inmediato
+        El avance se consulta en /progreso/ con el id del trabajo
+        Solo recalcula los recibos cuyos insumos cambiaron, salvo forzar=true
         """
         periodo = self.get_object()
+        forzar = str(request.data.get('forzar', '')).lower() in ('1', 'true')
         
         if periodo.estado not in ['borrador', 'calculado']:
             return Response(
@@ -116,14 +133,74 @@ class PeriodoNominaViewSet(EmpresaFilterMixin, viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        try:
-            resultado = procesar_nomina_periodo(periodo.id, request.user.id)
-            return Response(resultado)
-        except Exception as e:
+        trabajo = encolar_trabajo(
+            TIPO_TRABAJO_CALCULO_NOMINA,
+            parametros={'usuario_id': str(request.user.id), 'forzar': forzar},
+            referencia_id=periodo.id,
+            usuario=request.user
+        )
+        return Response(estado_trabajo(trabajo), status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=True, methods=['get'])
+    def progreso(self, request, pk=None):
+        """
+        Avance del cálculo: empleados procesados, ETA y errores
+        Sin ?trabajo=<id> retorna el trabajo más reciente del periodo
+        ?tipo=timbrado_nomina consulta el timbrado en lugar del cálculo
+        """
+        periodo = self.get_object()
+        trabajos = TrabajoSegundoPlano.objects.filter(
+            tipo=request.query_params.get('tipo', TIPO_TRABAJO_CALCULO_NOMINA),
+            referencia_id=str(periodo.id)
+        )
+        trabajo_id = request.query_params.get('trabajo')
+        if trabajo_id:
+            try:
+                trabajos = trabajos.filter(pk=uuid.UUID(trabajo_id))
+            except ValueError:
+                return Response({'error': 'trabajo inválido'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        trabajo = trabajos.order_by('-created_at').first()
+        if not trabajo:
+            return Response(
+                {'error': 'No hay cálculos registrados para este periodo'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(estado_trabajo(trabajo))
+    
+    @action(detail=True, methods=['get'])
+    def ejecuciones(self, request, pk=None):
+        """
+        Historial de ejecuciones del cálculo del periodo (más reciente primero)
+        Tiempos por etapa, consultas SQL y filas escritas
+        """
+        periodo = self.get_object()
+        ejecuciones = periodo.ejecuciones.select_related('usuario').order_by('-created_at')
+        pagina = self.paginate_queryset(ejecuciones)
+        serializer = EjecucionNominaSerializer(pagina, many=True)
+        return self.get_paginated_response(serializer.data)
+    
+    @action(detail=True, methods=['post'])
+    def timbrar(self, request, pk=None):
+        """
+        Encola el timbrado de los recibos calculados del periodo
+        Reanudable: volver a llamar continúa con los pendientes
+        """
+        from apps.integraciones.timbrado import TIPO_TRABAJO_TIMBRADO_NOMINA
+
+        periodo = self.get_object()
+        if periodo.estado not in ['calculado', 'autorizado', 'pagado']:
             return Response(
-                {'error': str(e)},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                {'error': 'El periodo debe estar calculado para timbrarse'},
+                status=status.HTTP_400_BAD_REQUEST
             )
+
+        trabajo = encolar_trabajo(
+            TIPO_TRABAJO_TIMBRADO_NOMINA,
+            referencia_id=periodo.id,
+            usuario=request.user
+        )
+        return Response(estado_trabajo(trabajo), status=status.HTTP_202_ACCEPTED)
     
     @action(detail=True, methods=['post'])
     def aprobar(self, request, pk=None):
@@ -146,29 +223,127 @@ class PeriodoNominaViewSet(EmpresaFilterMixin, viewsets.ModelViewSet):
         serializer = self.get_serializer(periodo)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['post'])
+    def simular(self, request):
+        """
+        Simula un escenario salarial sobre la plantilla activa sin escribir
+        en la BD: totales actual/simulado y desglose por empleado
+        """
+        from .simulacion import simular_escenario
+
+        serializer = SimulacionNominaSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        datos = serializer.validated_data
+
+        empresa_id = datos['empresa']
+        if not request.user.es_admin and not request.user.get_empresas_acceso().filter(id=empresa_id).exists():
+            return Response(
+                {'error': 'No tiene acceso a esta empresa'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        resultado = simular_escenario(
+            empresa_id,
+            {'ajustes': datos['ajustes']},
+            año=datos.get('año'),
+            periodicidad=datos['periodicidad'],
+            detalle=datos['detalle'],
+        )
+        return Response(resultado)
+    
+    @action(detail=False, methods=['get'])
+    def cuotas_imss(self, request):
+        """
+        Determinación bimestral de cuotas IMSS de una empresa
+        ?empresa=<id>&año=2024&bimestre=1 -> resumen por ramo
+        &formato=sua -> archivo de ancho fijo estilo SUA (streaming)
+        """
+        from django.http import StreamingHttpResponse
+        from .imss import calcular_cuotas_bimestre, registro_patronal_empresa
+
+        empresa_id = request.query_params.get('empresa') or request.headers.get('X-Empresa-ID')
+        try:
+            año = int(request.query_params.get('año') or request.query_params.get('anio'))
+            bimestre = int(request.query_params.get('bimestre'))
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'Se requieren año y bimestre'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not empresa_id:
+            return Response({'error': 'Se requiere empresa'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            empresa_id = uuid.UUID(str(empresa_id))
+        except ValueError:
+            return Response({'error': 'empresa inválida'}, status=status.HTTP_400_BAD_REQUEST)
+        if not request.user.es_admin and not request.user.get_empresas_acceso().filter(id=empresa_id).exists():
+            return Response(
+                {'error': 'No tiene acceso a esta empresa'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        try:
+            determinacion = calcular_cuotas_bimestre(
+                empresa_id, año, bimestre, registro_patronal_empresa(empresa_id)
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if request.query_params.get('formato') == 'sua':
+            respuesta = StreamingHttpResponse(
+                determinacion.lineas_sua(), content_type='text/plain; charset=ascii'
+            )
+            respuesta['Content-Disposition'] = f'attachment; filename="sua_{año}_{bimestre}.txt"'
+            return respuesta
+        return Response(determinacion.resumen())
+    
     @action(detail=True, methods=['get'])
     def resumen(self, request, pk=None):
         """
-        Obtiene resumen del periodo con lista de recibos
+        Obtiene resumen del periodo con lista paginada de recibos
+        
+        Totales y conteos salen del resumen materializado
+        (ResumenPeriodoNomina); los recibos se paginan con ?page=
         """
+        from .models import ResumenPeriodoNomina
+        from .services import actualizar_resumen_periodo
+        
         periodo = self.get_object()
+        try:
+            resumen = periodo.resumen
+        except ResumenPeriodoNomina.DoesNotExist:
+            # Periodos anteriores al resumen materializado
+            resumen = actualizar_resumen_periodo(periodo.id)
 
-        # Obtener recibos del periodo
-        recibos = periodo.recibos.select_related('empleado').order_by('empleado__nombre')
-        recibos_data = ReciboNominaSerializer(recibos, many=True).data
+        recibos = ReciboNomina.objects.filter(periodo=periodo).select_related(
+            'empleado', 'periodo__empresa'
+        ).order_by('empleado__nombre', 'id')
+        pagina = self.paginate_queryset(recibos)
+        recibos_data = ReciboNominaSerializer(pagina, many=True).data
 
         return Response({
             'periodo': str(periodo),
             'estado': periodo.estado,
-            'total_empleados': periodo.total_empleados or recibos.count(),
-            'total_percepciones': float(periodo.total_percepciones or 0),
-            'total_deducciones': float(periodo.total_deducciones or 0),
-            'total_neto': float(periodo.total_neto or 0),
+            'total_empleados': resumen.recibos_total,
+            'total_percepciones': float(resumen.total_percepciones),
+            'total_deducciones': float(resumen.total_deducciones),
+            'total_neto': float(resumen.total_neto),
+            'total_isr': float(resumen.total_isr),
+            'total_imss_obrero': float(resumen.total_imss_obrero),
+            'neto': {
+                'minimo': float(resumen.neto_minimo),
+                'maximo': float(resumen.neto_maximo),
+                'promedio': float(resumen.neto_promedio),
+            },
             'recibos_por_estado': {
-                'borrador': periodo.recibos.filter(estado='borrador').count(),
-                'calculado': periodo.recibos.filter(estado='calculado').count(),
-                'timbrado': periodo.recibos.filter(estado='timbrado').count(),
+                'borrador': resumen.recibos_borrador,
+                'calculado': resumen.recibos_calculado,
+                'timbrado': resumen.recibos_timbrado,
+                'cancelado': resumen.recibos_cancelado,
             },
+            'recibos_total': resumen.recibos_total,
+            'recibos_siguiente': self.paginator.get_next_link(),
+            'recibos_anterior': self.paginator.get_previous_link(),
             'recibos': recibos_data,
         })
 
@@ -219,11 +394,8 @@ class ReciboNominaViewSet(EmpleadoFilterMixin, viewsets.ModelViewSet):
         recibo = self.get_object()
         
         # Si ya tiene PDF timbrado, retornarlo
-        if recibo.pdf_cfdi:
-            return Response({
-                'url': recibo.pdf_cfdi.url,
-                'uuid': recibo.uuid_cfdi
-            })
+        if recibo.hash_pdf_cfdi:
+            return self._descargar_cfdi(recibo, 'pdf')
         
         # Generar PDF simple (sin timbrar)
         # TODO: Implementar generación de PDF
@@ -232,11 +404,51 @@ class ReciboNominaViewSet(EmpleadoFilterMixin, viewsets.ModelViewSet):
             'recibo_id': recibo.id
         })
     
+    @action(detail=True, methods=['get'])
+    def cfdi(self, request, pk=None):
+        """
+        Descarga el XML (?formato=xml, default) o PDF timbrado del recibo
+        Se lee del almacén de CFDI solo en esta petición
+        """
+        recibo = self.get_object()
+        formato = request.query_params.get('formato', 'xml')
+        if formato not in ('xml', 'pdf'):
+            return Response(
+                {'error': 'Formato inválido, use xml o pdf'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return self._descargar_cfdi(recibo, formato)
+    
+    def _descargar_cfdi(self, recibo, formato):
+        from django.http import HttpResponse
+        from .almacen_cfdi import existe_artefacto, leer_artefacto
+        
+        hash_contenido = recibo.hash_xml_cfdi if formato == 'xml' else recibo.hash_pdf_cfdi
+        if not existe_artefacto(hash_contenido):
+            return Response(
+                {'error': f'El recibo no tiene {formato.upper()} timbrado'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        etag = f'"{hash_contenido}"'
+        if self.request.headers.get('If-None-Match') == etag:
+            return HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        
+        tipo = 'application/xml' if formato == 'xml' else 'application/pdf'
+        respuesta = HttpResponse(leer_artefacto(hash_contenido), content_type=tipo)
+        nombre = f"recibo_{recibo.uuid_cfdi or recibo.id}.{formato}"
+        respuesta['Content-Disposition'] = f'attachment; filename="{nombre}"'
+        respuesta['ETag'] = etag
+        respuesta['Cache-Control'] = 'private, max-age=31536000, immutable'
+        return respuesta
+    
     @action(detail=True, methods=['post'])
     def timbrar(self, request, pk=None):
         """
         Timbra el recibo con el PAC configurado
         """
+        from apps.integraciones.timbrado import timbrar_periodo
+
         recibo = self.get_object()
 
         # Solo admin puede timbrar
@@ -252,11 +464,13 @@ class ReciboNominaViewSet(EmpleadoFilterMixin, viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # TODO: Implementar timbrado con PAC
-        return Response({
-            'mensaje': 'Timbrado pendiente de configurar PAC',
-            'recibo_id': recibo.id
-        })
+        resultado = timbrar_periodo(recibo.periodo_id, recibo_ids=[recibo.id], concurrencia=1)
+        if resultado.get('error') or resultado['fallidos']:
+            error = resultado.get('error') or resultado['errores'][0]['error']
+            return Response({'error': error}, status=status.HTTP_502_BAD_GATEWAY)
+
+        recibo.refresh_from_db()
+        return Response(ReciboNominaSerializer(recibo).data)
 
     @action(detail=False, methods=['get'])
     def mis_recibos(self, request):
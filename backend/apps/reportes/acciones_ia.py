@@ -382,7 +382,7 @@ def accion_exportar_nomina_excel(usuario, params: Dict, contexto: Dict) -> Dict:
         'success': True,
         'mensaje': f'Reporte de nomina generado: {len(recibos)} recibos',
         'archivo': {
-            'nombre': f'nomina_{periodo.tipo_periodo}_{periodo.numero_periodo}_{periodo.ano}.xlsx',
+            'nombre': f'nomina_{periodo.tipo_periodo}_{periodo.numero_periodo}_{periodo.año}.xlsx',
             'contenido_base64': excel_base64,
             'tipo': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
         }
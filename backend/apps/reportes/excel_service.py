@@ -119,7 +119,7 @@ class ExcelService:
         ws.append([f'Reporte de Nomina'])
         ws['A1'].font = Font(bold=True, size=14)
 
-        ws.append([f'Periodo: {periodo.tipo_periodo} {periodo.numero_periodo}/{periodo.ano}'])
+        ws.append([f'Periodo: {periodo.tipo_periodo} {periodo.numero_periodo}/{periodo.año}'])
         ws.append([f'Fecha: {periodo.fecha_inicio.strftime("%d/%m/%Y")} - {periodo.fecha_fin.strftime("%d/%m/%Y")}'])
         ws.append([f'Estado: {periodo.estado}'])
         ws.append([])
@@ -292,3 +292,50 @@ class ExcelService:
         buffer.seek(0)
 
         return buffer
+
+    @classmethod
+    def generar_reporte_liquidaciones(cls, lote: dict, empresa_nombre: str) -> BytesIO:
+        """Genera el detalle de finiquitos/liquidaciones masivas"""
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "Liquidaciones"
+
+        ws.append([f'{lote["tipo"].capitalize()} masivo - {empresa_nombre}'])
+        ws['A1'].font = Font(bold=True, size=14)
+        ws.append([f'Fecha de baja: {lote["fecha_baja"]}'])
+        ws.append([])
+
+        columnas = [
+            ('Empleado', 'nombre_completo'), ('RFC', 'rfc'), ('Departamento', 'departamento'),
+            ('Puesto', 'puesto'), ('Fecha Ingreso', 'fecha_ingreso'), ('Anos', 'anos_antiguedad'),
+            ('Salario Diario', 'salario_diario'), ('Aguinaldo', 'aguinaldo_proporcional'),
+            ('Vacaciones', 'vacaciones_proporcionales_monto'), ('Prima Vacacional', 'prima_vacacional'),
+            ('Finiquito', 'subtotal_finiquito'), ('Indem. 3 Meses', 'indemnizacion_3_meses'),
+            ('Indem. 20 Dias', 'indemnizacion_20_dias_ano'), ('Prima Antiguedad', 'prima_antiguedad'),
+            ('Liquidacion', 'subtotal_liquidacion'), ('Total', 'total_a_pagar'),
+        ]
+        ws.append([titulo for titulo, _ in columnas])
+        cls._aplicar_estilos_encabezado(ws, len(columnas), fila=4)
+
+        for fila in lote['detalle']:
+            ws.append([
+                float(fila[campo]) if isinstance(fila[campo], Decimal) else fila[campo]
+                for _, campo in columnas
+            ])
+
+        # Totales de las columnas de importe
+        fila_totales = 5 + len(lote['detalle'])
+        ws.append(['TOTALES'] + [
+            f'=SUM({get_column_letter(col)}5:{get_column_letter(col)}{fila_totales - 1})' if col > 7 else ''
+            for col in range(2, len(columnas) + 1)
+        ])
+        for col in range(1, len(columnas) + 1):
+            ws.cell(row=fila_totales, column=col).font = Font(bold=True)
+
+        cls._ajustar_anchos(ws)
+
+        buffer = BytesIO()
+        wb.save(buffer)
+        buffer.seek(0)
+
+        return buffer
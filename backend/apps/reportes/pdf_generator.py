@@ -201,6 +201,8 @@ class PDFDashboardEmpresa(GeneradorPDFBase):
             ['Concepto', 'Proyección'],
             ['Aguinaldo (Diciembre)', self._formato_moneda(costos['aguinaldo_proyectado'])],
             ['Prima Vacacional', self._formato_moneda(costos['prima_vacacional_proyectada'])],
+            ['IMSS Patronal', self._formato_moneda(costos['imss_patronal_proyectado'])],
+            ['INFONAVIT', self._formato_moneda(costos['infonavit_proyectado'])],
             ['Costo Anual Estimado', self._formato_moneda(costos['costo_anual_estimado'])],
         ]
         elementos.append(Paragraph("Costos Proyectados", self.styles['SeccionTitulo']))
@@ -33,8 +33,13 @@ class MetricaVacacionesSerializer(serializers.Serializer):
 class CostosProyectadosSerializer(serializers.Serializer):
     aguinaldo_proyectado = serializers.DecimalField(max_digits=14, decimal_places=2)
     prima_vacacional_proyectada = serializers.DecimalField(max_digits=14, decimal_places=2)
+    imss_patronal_proyectado = serializers.DecimalField(max_digits=14, decimal_places=2)
+    infonavit_proyectado = serializers.DecimalField(max_digits=14, decimal_places=2)
     nomina_mensual = serializers.DecimalField(max_digits=14, decimal_places=2)
+    salario_mes_actual = serializers.DecimalField(max_digits=14, decimal_places=2, required=False)
     costo_anual_estimado = serializers.DecimalField(max_digits=14, decimal_places=2)
+    por_mes = serializers.ListField(required=False)
+    por_departamento = serializers.ListField(required=False)
 
 
 class AlertaSerializer(serializers.Serializer):
@@ -116,6 +121,7 @@ class HistorialNominaSerializer(serializers.Serializer):
     total_percepciones_12m = serializers.DecimalField(max_digits=14, decimal_places=2)
     total_deducciones_12m = serializers.DecimalField(max_digits=14, decimal_places=2)
     promedio_neto_mensual = serializers.DecimalField(max_digits=12, decimal_places=2)
+    acumulado_ano = serializers.DictField(required=False, allow_null=True)
 
 
 class FiniquitoSerializer(serializers.Serializer):
@@ -160,3 +166,12 @@ class DashboardEmpleadoSerializer(serializers.Serializer):
 class SolicitudLiquidacionSerializer(serializers.Serializer):
     fecha_baja = serializers.DateField(required=False, allow_null=True)
     es_despido_injustificado = serializers.BooleanField(default=True)
+
+
+class SolicitudLiquidacionMasivaSerializer(serializers.Serializer):
+    empresa = serializers.UUIDField()
+    empleados = serializers.ListField(child=serializers.UUIDField(), required=False, allow_empty=False)
+    departamento = serializers.CharField(required=False)
+    fecha_baja = serializers.DateField()
+    tipo = serializers.ChoiceField(choices=['finiquito', 'liquidacion'], default='liquidacion')
+    formato = serializers.ChoiceField(choices=['json', 'xlsx'], default='json')
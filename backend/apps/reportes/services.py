@@ -135,28 +135,27 @@ class MetricasEmpresa:
         }
     
     def _costos_proyectados(self) -> Dict:
-        empleados_activos = Empleado.objects.filter(empresa=self.empresa, estado='activo')
-        
-        total_aguinaldo = Decimal('0')
-        total_prima = Decimal('0')
-        
-        for emp in empleados_activos:
-            if emp.salario_diario:
-                ag = calcular_aguinaldo(emp.salario_diario, 15, emp.fecha_ingreso)
-                total_aguinaldo += ag['monto_bruto']
-                
-                ant = calcular_antiguedad(emp.fecha_ingreso)
-                dias_vac = obtener_dias_vacaciones_ley(ant['anos'])
-                prima = calcular_prima_vacacional(dias_vac, emp.salario_diario)
-                total_prima += prima
-        
-        nomina_mensual = self._metricas_empleados()['nomina_mensual_estimada']
+        """Lee el cubo de costos materializado del año (apps.nomina.costos)"""
+        from apps.nomina.costos import resumen_costos
+        
+        cubo = resumen_costos(self.empresa.id, self.hoy.year)
+        mes_actual = cubo['por_mes'][self.hoy.month - 1]
+        # Nómina mensual estimada (misma fórmula que _metricas_empleados)
+        activos = Empleado.objects.filter(empresa=self.empresa, estado='activo').aggregate(
+            salario_promedio=Avg('salario_diario'), total=Count('id')
+        )
+        salario_promedio = activos['salario_promedio'] or Decimal('0')
         
         return {
-            'aguinaldo_proyectado': round(total_aguinaldo, 2),
-            'prima_vacacional_proyectada': round(total_prima, 2),
-            'nomina_mensual': nomina_mensual,
-            'costo_anual_estimado': round(nomina_mensual * 12 + total_aguinaldo + total_prima, 2),
+            'aguinaldo_proyectado': cubo['aguinaldo'],
+            'prima_vacacional_proyectada': cubo['prima_vacacional'],
+            'imss_patronal_proyectado': cubo['imss_patronal'],
+            'infonavit_proyectado': cubo['infonavit'],
+            'nomina_mensual': round(salario_promedio * 30 * activos['total'], 2),
+            'salario_mes_actual': mes_actual['salario'],
+            'costo_anual_estimado': cubo['total'],
+            'por_mes': cubo['por_mes'],
+            'por_departamento': cubo['por_departamento'],
         }
     
     def _generar_alertas(self) -> List[Dict]:
@@ -296,18 +295,21 @@ class MetricasEmpleado:
         }
     
     def _historial_nomina(self) -> Dict:
-        recibos = ReciboNomina.objects.filter(
+        from apps.nomina.acumulados import acumulado_empleado
+        
+        recibos = list(ReciboNomina.objects.filter(
             empleado=self.empleado
-        ).order_by('-periodo__fecha_fin')[:12]
+        ).order_by('-periodo__fecha_fin').values('total_percepciones', 'total_deducciones')[:12])
         
-        total_percepciones = sum(r.total_percepciones or 0 for r in recibos)
-        total_deducciones = sum(r.total_deducciones or 0 for r in recibos)
+        total_percepciones = sum(r['total_percepciones'] or 0 for r in recibos)
+        total_deducciones = sum(r['total_deducciones'] or 0 for r in recibos)
         
         return {
-            'recibos_count': recibos.count(),
+            'recibos_count': len(recibos),
             'total_percepciones_12m': round(total_percepciones, 2),
             'total_deducciones_12m': round(total_deducciones, 2),
-            'promedio_neto_mensual': round((total_percepciones - total_deducciones) / 12, 2) if recibos.count() > 0 else 0,
+            'promedio_neto_mensual': round((total_percepciones - total_deducciones) / 12, 2) if recibos else 0,
+            'acumulado_ano': acumulado_empleado(self.empleado.id, self.hoy.year),
         }
     
     def _proximo_aniversario(self) -> str:
@@ -318,87 +320,167 @@ class MetricasEmpleado:
         return proximo.isoformat()
     
     def calcular_liquidacion(self, fecha_baja: date = None, es_despido_injustificado: bool = True) -> Dict:
-        """
-        Calcula liquidación/finiquito según LFT
-        
-        Finiquito (renuncia voluntaria o despido justificado):
-        - Salarios pendientes
-        - Aguinaldo proporcional
-        - Vacaciones no disfrutadas + prima vacacional
-        
-        Liquidación (despido injustificado) = Finiquito +:
-        - 3 meses de salario (indemnización constitucional)
-        - 20 días por año trabajado (indemnización Art. 50 LFT)
-        - Prima de antigüedad (12 días por año, tope 2 salarios mínimos)
-        """
-        if fecha_baja is None:
-            fecha_baja = self.hoy
-        
-        sd = self.empleado.salario_diario or Decimal('0')
-        sdi = sd * Decimal('1.0493')  # Factor de integración aproximado
-        
-        ant = calcular_antiguedad(self.empleado.fecha_ingreso, fecha_baja)
-        anos_completos = ant['anos']
-        
-        # === FINIQUITO (siempre aplica) ===
-        aguinaldo = calcular_aguinaldo(sd, 15, self.empleado.fecha_ingreso, fecha_baja)
-        
-        dias_vac_ley = obtener_dias_vacaciones_ley(anos_completos)
-        dias_del_ano = (fecha_baja - date(fecha_baja.year, 1, 1)).days + 1
-        
-        dias_vac_proporcional = dias_vac_ley * Decimal(dias_del_ano) / Decimal('365')
-        vacaciones_monto = round(sd * dias_vac_proporcional, 2)
-        prima_vac = round(vacaciones_monto * Decimal('0.25'), 2)
+        """Calcula liquidación/finiquito según LFT (ver calcular_liquidacion_empleado)"""
+        return calcular_liquidacion_empleado(
+            self.empleado.salario_diario,
+            self.empleado.fecha_ingreso,
+            fecha_baja or self.hoy,
+            es_despido_injustificado
+        )
+
+
+def calcular_liquidacion_empleado(salario_diario: Optional[Decimal], fecha_ingreso: date,
+                                  fecha_baja: date, es_despido_injustificado: bool = True) -> Dict:
+    """
+    Calcula liquidación/finiquito según LFT
+    
+    Finiquito (renuncia voluntaria o despido justificado):
+    - Salarios pendientes
+    - Aguinaldo proporcional
+    - Vacaciones no disfrutadas + prima vacacional
+    
+    Liquidación (despido injustificado) = Finiquito +:
+    - 3 meses de salario (indemnización constitucional)
+    - 20 días por año trabajado (indemnización Art. 50 LFT)
+    - Prima de antigüedad (12 días por año, tope 2 salarios mínimos)
+    """
+    sd = salario_diario or Decimal('0')
+    sdi = sd * Decimal('1.0493')  # Factor de integración aproximado
+    
+    ant = calcular_antiguedad(fecha_ingreso, fecha_baja)
+    anos_completos = ant['anos']
+    
+    # === FINIQUITO (siempre aplica) ===
+    aguinaldo = calcular_aguinaldo(sd, 15, fecha_ingreso, fecha_baja)
+    
+    dias_vac_ley = obtener_dias_vacaciones_ley(anos_completos)
+    dias_del_ano = (fecha_baja - date(fecha_baja.year, 1, 1)).days + 1
+    
+    dias_vac_proporcional = dias_vac_ley * Decimal(dias_del_ano) / Decimal('365')
+    vacaciones_monto = round(sd * dias_vac_proporcional, 2)
+    prima_vac = round(vacaciones_monto * Decimal('0.25'), 2)
+    
+    finiquito = {
+        'aguinaldo_proporcional': round(aguinaldo['monto_bruto'], 2),
+        'vacaciones_proporcionales_dias': round(dias_vac_proporcional, 2),
+        'vacaciones_proporcionales_monto': vacaciones_monto,
+        'prima_vacacional': prima_vac,
+        'subtotal_finiquito': round(
+            aguinaldo['monto_bruto'] + vacaciones_monto + prima_vac, 2
+        ),
+    }
+    
+    # === LIQUIDACIÓN (solo despido injustificado) ===
+    liquidacion = {
+        'aplica': es_despido_injustificado,
+        'indemnizacion_3_meses': Decimal('0'),
+        'indemnizacion_20_dias_ano': Decimal('0'),
+        'prima_antiguedad': Decimal('0'),
+        'subtotal_liquidacion': Decimal('0'),
+    }
+    
+    if es_despido_injustificado:
+        indem_3_meses = round(sdi * 90, 2)
+        indem_20_dias = round(sdi * 20 * anos_completos, 2)
         
-        finiquito = {
-            'aguinaldo_proporcional': round(aguinaldo['monto_bruto'], 2),
-            'vacaciones_proporcionales_dias': round(dias_vac_proporcional, 2),
-            'vacaciones_proporcionales_monto': vacaciones_monto,
-            'prima_vacacional': prima_vac,
-            'subtotal_finiquito': round(
-                aguinaldo['monto_bruto'] + vacaciones_monto + prima_vac, 2
-            ),
-        }
+        salario_minimo = Decimal('248.93')  # 2024
+        tope_prima = salario_minimo * 2
+        salario_prima = min(sd, tope_prima)
+        prima_antiguedad = round(salario_prima * 12 * anos_completos, 2)
         
-        # === LIQUIDACIÓN (solo despido injustificado) ===
         liquidacion = {
-            'aplica': es_despido_injustificado,
-            'indemnizacion_3_meses': Decimal('0'),
-            'indemnizacion_20_dias_ano': Decimal('0'),
-            'prima_antiguedad': Decimal('0'),
-            'subtotal_liquidacion': Decimal('0'),
-        }
-        
-        if es_despido_injustificado:
-            indem_3_meses = round(sdi * 90, 2)
-            indem_20_dias = round(sdi * 20 * anos_completos, 2)
-            
-            salario_minimo = Decimal('248.93')  # 2024
-            tope_prima = salario_minimo * 2
-            salario_prima = min(sd, tope_prima)
-            prima_antiguedad = round(salario_prima * 12 * anos_completos, 2)
-            
-            liquidacion = {
-                'aplica': True,
-                'indemnizacion_3_meses': indem_3_meses,
-                'indemnizacion_20_dias_ano': indem_20_dias,
-                'anos_para_calculo': anos_completos,
-                'prima_antiguedad': prima_antiguedad,
-                'subtotal_liquidacion': round(
-                    indem_3_meses + indem_20_dias + prima_antiguedad, 2
-                ),
-            }
-        
-        total = finiquito['subtotal_finiquito'] + liquidacion['subtotal_liquidacion']
-        
-        return {
-            'fecha_baja': fecha_baja.isoformat(),
-            'tipo': 'Liquidación (Despido Injustificado)' if es_despido_injustificado else 'Finiquito (Renuncia/Despido Justificado)',
-            'salario_diario': sd,
-            'salario_diario_integrado': round(sdi, 2),
-            'antiguedad': ant,
-            'finiquito': finiquito,
-            'liquidacion': liquidacion,
-            'total_a_pagar': round(total, 2),
-            'desglose': {'concepto': []},
+            'aplica': True,
+            'indemnizacion_3_meses': indem_3_meses,
+            'indemnizacion_20_dias_ano': indem_20_dias,
+            'anos_para_calculo': anos_completos,
+            'prima_antiguedad': prima_antiguedad,
+            'subtotal_liquidacion': round(
+                indem_3_meses + indem_20_dias + prima_antiguedad, 2
+            ),
         }
+    
+    total = finiquito['subtotal_finiquito'] + liquidacion['subtotal_liquidacion']
+    
+    return {
+        'fecha_baja': fecha_baja.isoformat(),
+        'tipo': 'Liquidación (Despido Injustificado)' if es_despido_injustificado else 'Finiquito (Renuncia/Despido Justificado)',
+        'salario_diario': sd,
+        'salario_diario_integrado': round(sdi, 2),
+        'antiguedad': ant,
+        'finiquito': finiquito,
+        'liquidacion': liquidacion,
+        'total_a_pagar': round(total, 2),
+        'desglose': {'concepto': []},
+    }
+
+
+# Columnas de Empleado que necesita el cálculo masivo (una sola consulta)
+CAMPOS_LIQUIDACION_MASIVA = (
+    'id', 'nombre', 'apellido_paterno', 'apellido_materno',
+    'rfc', 'departamento', 'puesto', 'salario_diario', 'fecha_ingreso',
+)
+
+
+def calcular_liquidaciones_masivas(empleados, fecha_baja: date, es_despido_injustificado: bool = True) -> Dict:
+    """
+    Finiquitos/liquidaciones de un conjunto de empleados (queryset)
+    Una consulta de empleados; mismo cálculo que MetricasEmpleado.calcular_liquidacion
+    Los empleados con ingreso posterior a la baja se reportan en 'omitidos'
+    """
+    detalle = []
+    omitidos = []
+    for fila in empleados.order_by('departamento', 'apellido_paterno', 'nombre').values(*CAMPOS_LIQUIDACION_MASIVA):
+        nombre_completo = ' '.join(filter(None, [fila['nombre'], fila['apellido_paterno'], fila['apellido_materno']]))
+        if fila['fecha_ingreso'] > fecha_baja:
+            omitidos.append({
+                'empleado_id': str(fila['id']),
+                'nombre_completo': nombre_completo,
+                'fecha_ingreso': fila['fecha_ingreso'].isoformat(),
+                'motivo': 'Fecha de ingreso posterior a la fecha de baja',
+            })
+            continue
+        calculo = calcular_liquidacion_empleado(
+            fila['salario_diario'], fila['fecha_ingreso'], fecha_baja, es_despido_injustificado
+        )
+        detalle.append({
+            'empleado_id': str(fila['id']),
+            'nombre_completo': nombre_completo,
+            'rfc': fila['rfc'] or '',
+            'departamento': fila['departamento'] or '',
+            'puesto': fila['puesto'] or '',
+            'fecha_ingreso': fila['fecha_ingreso'].isoformat(),
+            'anos_antiguedad': calculo['antiguedad']['anos'],
+            'salario_diario': calculo['salario_diario'],
+            **calculo['finiquito'],
+            'indemnizacion_3_meses': calculo['liquidacion']['indemnizacion_3_meses'],
+            'indemnizacion_20_dias_ano': calculo['liquidacion']['indemnizacion_20_dias_ano'],
+            'prima_antiguedad': calculo['liquidacion']['prima_antiguedad'],
+            'subtotal_liquidacion': calculo['liquidacion']['subtotal_liquidacion'],
+            'total_a_pagar': calculo['total_a_pagar'],
+        })
+    
+    def sumar(campo):
+        return sum((d[campo] for d in detalle), Decimal('0'))
+    
+    por_departamento = {}
+    for d in detalle:
+        grupo = por_departamento.setdefault(d['departamento'], {'empleados': 0, 'total_a_pagar': Decimal('0')})
+        grupo['empleados'] += 1
+        grupo['total_a_pagar'] += d['total_a_pagar']
+    
+    return {
+        'fecha_baja': fecha_baja.isoformat(),
+        'tipo': 'liquidacion' if es_despido_injustificado else 'finiquito',
+        'resumen': {
+            'empleados': len(detalle),
+            'omitidos': len(omitidos),
+            'subtotal_finiquito': sumar('subtotal_finiquito'),
+            'subtotal_liquidacion': sumar('subtotal_liquidacion'),
+            'total_a_pagar': sumar('total_a_pagar'),
+            'por_departamento': [
+                {'departamento': nombre, **valores} for nombre, valores in sorted(por_departamento.items())
+            ],
+        },
+        'detalle': detalle,
+        'omitidos': omitidos,
+    }
@@ -0,0 +1,37 @@
+"""
+Tests del endpoint de costos proyectados por departamento
+"""
+import pytest
+from rest_framework.test import APIClient
+
+from apps.usuarios.models import Usuario
+
+
+@pytest.mark.django_db
+def test_endpoint_requiere_acceso_a_la_empresa(tablas_fiscales, crear_empleados, cliente_admin):
+    empresa_id = crear_empleados(2, departamento='Ventas')[0].empresa_id
+    url = f'/api/reportes/empresa/{empresa_id}/costos/?año=2024'
+
+    assert APIClient().get(url).status_code in (401, 403)
+
+    ajeno = APIClient()
+    ajeno.force_authenticate(Usuario.objects.create(
+        username='rh-otra', email='rh@otra.local', rol='empleador'
+    ))
+    assert ajeno.get(url).status_code == 403
+
+    respuesta = cliente_admin.get(url)
+    assert respuesta.status_code == 200
+    assert [d['departamento'] for d in respuesta.json()['por_departamento']] == ['Ventas']
+
+
+@pytest.mark.django_db
+def test_nomina_mensual_es_la_estimada_de_la_plantilla(tablas_fiscales, crear_empleados):
+    from apps.reportes.services import MetricasEmpresa
+
+    empleados = crear_empleados(3, departamento='Ventas')
+    metricas = MetricasEmpresa(empleados[0].empresa)
+
+    costos = metricas._costos_proyectados()
+    assert costos['nomina_mensual'] == metricas._metricas_empleados()['nomina_mensual_estimada']
+    assert 'salario_mes_actual' in costos
@@ -0,0 +1,60 @@
+"""
+Tests del cálculo masivo de finiquitos/liquidaciones
+"""
+from datetime import date
+from io import BytesIO
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from openpyxl import load_workbook
+
+from apps.empleados.models import Empleado
+from apps.reportes.services import MetricasEmpleado, calcular_liquidaciones_masivas
+
+
+@pytest.mark.django_db
+def test_lote_igual_al_calculo_individual(crear_empleados):
+    empleados = crear_empleados(3, departamento='Ventas', fecha_ingreso=date(2018, 5, 2))
+    posterior, = crear_empleados(1, departamento='Sistemas', fecha_ingreso=date(2025, 1, 1))
+    fecha_baja = date(2024, 9, 30)
+
+    with CaptureQueriesContext(connection) as consultas:
+        lote = calcular_liquidaciones_masivas(Empleado.objects.all(), fecha_baja, True)
+    assert len(consultas) == 1
+
+    assert lote['resumen']['empleados'] == 3
+    assert lote['resumen']['omitidos'] == 1
+    assert [o['empleado_id'] for o in lote['omitidos']] == [str(posterior.id)]
+    assert 'posterior' in lote['omitidos'][0]['motivo']
+    for fila in lote['detalle']:
+        individual = MetricasEmpleado(Empleado.objects.get(id=fila['empleado_id'])).calcular_liquidacion(fecha_baja, True)
+        assert fila['subtotal_finiquito'] == individual['finiquito']['subtotal_finiquito']
+        assert fila['prima_antiguedad'] == individual['liquidacion']['prima_antiguedad']
+        assert fila['total_a_pagar'] == individual['total_a_pagar']
+    assert lote['resumen']['total_a_pagar'] == sum(f['total_a_pagar'] for f in lote['detalle'])
+    assert lote['resumen']['por_departamento'] == [
+        {'departamento': 'Ventas', 'empleados': 3, 'total_a_pagar': lote['resumen']['total_a_pagar']}
+    ]
+
+    finiquitos = calcular_liquidaciones_masivas(Empleado.objects.filter(id=empleados[0].id), fecha_baja, False)
+    assert finiquitos['resumen']['subtotal_liquidacion'] == 0
+
+
+@pytest.mark.django_db
+def test_endpoint_json_y_hoja_de_detalle(crear_empleados, cliente_admin):
+    empleados = crear_empleados(500, departamento='Operaciones')
+    url = '/api/reportes/liquidaciones/'
+    solicitud = {'empresa': str(empleados[0].empresa_id), 'fecha_baja': '2024-06-30', 'tipo': 'liquidacion'}
+
+    respuesta = cliente_admin.post(url, solicitud, format='json')
+    assert respuesta.status_code == 200
+    assert respuesta.json()['resumen']['empleados'] == 500
+
+    respuesta = cliente_admin.post(
+        url, {**solicitud, 'empleados': [str(e.id) for e in empleados[:3]], 'formato': 'xlsx'}, format='json'
+    )
+    assert respuesta.status_code == 200
+    hoja = load_workbook(BytesIO(respuesta.content)).active
+    assert hoja.max_row == 4 + 3 + 1
+    assert hoja.cell(row=hoja.max_row, column=1).value == 'TOTALES'
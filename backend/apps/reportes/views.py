@@ -12,12 +12,13 @@ from django.shortcuts import get_object_or_404
 
 from apps.empresas.models import Empresa
 from apps.empleados.models import Empleado
-from .services import MetricasEmpresa, MetricasEmpleado
+from .services import MetricasEmpresa, MetricasEmpleado, calcular_liquidaciones_masivas
 from .serializers import (
     DashboardEmpresaSerializer, 
     DashboardEmpleadoSerializer,
     LiquidacionSerializer,
-    SolicitudLiquidacionSerializer
+    SolicitudLiquidacionSerializer,
+    SolicitudLiquidacionMasivaSerializer
 )
 from .pdf_generator import PDFDashboardEmpresa, PDFDashboardEmpleado
 
@@ -53,6 +54,24 @@ class DashboardEmpresaPDFView(APIView):
         return response
 
 
+class CostosProyectadosView(APIView):
+    """GET /api/reportes/empresa/{id}/costos/?año=2025&departamento=Ventas"""
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, empresa_id):
+        from apps.nomina.costos import resumen_costos
+        
+        empresa = get_object_or_404(Empresa, id=empresa_id)
+        if not request.user.es_admin and not request.user.get_empresas_acceso().filter(id=empresa.id).exists():
+            return Response({'error': 'No tiene acceso a esta empresa'}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            año = int(request.query_params.get('año') or request.query_params.get('anio') or date.today().year)
+        except ValueError:
+            return Response({'error': 'año inválido'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(resumen_costos(empresa.id, año, request.query_params.get('departamento')))
+
+
 class DashboardEmpleadoView(APIView):
     """GET /api/reportes/empleado/{id}/dashboard/"""
     permission_classes = [AllowAny]  # Temporal para pruebas
@@ -203,3 +222,48 @@ class LiquidacionPDFView(APIView):
         response = HttpResponse(pdf_buffer, content_type='application/pdf')
         response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}"'
         return response
+
+
+class LiquidacionesMasivasView(APIView):
+    """
+    POST /api/reportes/liquidaciones/
+    Finiquitos/liquidaciones de varios empleados a la vez: lista de IDs o
+    filtro por departamento (default: todos los activos de la empresa).
+    formato=xlsx devuelve la hoja de detalle.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        from .excel_service import ExcelService
+        
+        solicitud = SolicitudLiquidacionMasivaSerializer(data=request.data)
+        solicitud.is_valid(raise_exception=True)
+        datos = solicitud.validated_data
+        
+        empresa = get_object_or_404(Empresa, id=datos['empresa'])
+        if not request.user.es_admin and not request.user.get_empresas_acceso().filter(id=empresa.id).exists():
+            return Response({'error': 'No tiene acceso a esta empresa'}, status=status.HTTP_403_FORBIDDEN)
+        
+        empleados = Empleado.objects.filter(empresa=empresa)
+        if datos.get('empleados'):
+            empleados = empleados.filter(id__in=datos['empleados'])
+        else:
+            empleados = empleados.filter(estado='activo')
+        if datos.get('departamento'):
+            empleados = empleados.filter(departamento=datos['departamento'])
+        
+        lote = calcular_liquidaciones_masivas(
+            empleados, datos['fecha_baja'], datos['tipo'] == 'liquidacion'
+        )
+        
+        if datos['formato'] == 'xlsx':
+            buffer = ExcelService.generar_reporte_liquidaciones(lote, empresa.razon_social)
+            nombre_archivo = f"{lote['tipo']}_masivo_{empresa.rfc}_{lote['fecha_baja']}.xlsx"
+            response = HttpResponse(
+                buffer.getvalue(),
+                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            )
+            response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}"'
+            return response
+        
+        return Response(lote)
@@ -508,9 +508,9 @@ export function PayrollWizard({ periodo, onClose, onComplete }: PayrollWizardPro
                         ))}
                       </tbody>
                     </table>
-                    {(resumen?.recibos?.length || 0) > 5 && (
+                    {(resumen?.recibos_total || 0) > 5 && (
                       <div className="p-3 text-center text-sm text-warm-500 bg-warm-50">
-                        Y {resumen.recibos.length - 5} empleados mas...
+                        Y {resumen.recibos_total - 5} empleados mas...
                       </div>
                     )}
                   </div>
@@ -15,6 +15,9 @@ import type {
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
 
+// Tiempo maximo de espera para trabajos en segundo plano
+const ESPERA_MAXIMA_TRABAJO_MS = 15 * 60 * 1000;
+
 export const api = axios.create({
   baseURL: `${API_URL}/api`,
   headers: {
@@ -213,7 +216,29 @@ export const nominaApi = {
   },
 
   calcularPeriodo: async (id: string) => {
+    // El calculo corre en segundo plano: se consulta el progreso hasta que termine
     const response = await api.post(`/nomina/periodos/${id}/calcular/`);
+    let trabajo = response.data;
+    const limite = Date.now() + ESPERA_MAXIMA_TRABAJO_MS;
+    while (trabajo.estado === "pendiente" || trabajo.estado === "en_proceso") {
+      if (Date.now() > limite) {
+        throw new Error(
+          "El calculo de la nomina sigue en proceso; consulta el progreso mas tarde"
+        );
+      }
+      await new Promise((resolve) => setTimeout(resolve, 1500));
+      trabajo = await nominaApi.getProgresoCalculo(id, trabajo.id);
+    }
+    if (trabajo.estado === "error") {
+      throw new Error(trabajo.error || "Error al calcular la nomina");
+    }
+    return trabajo.resultado;
+  },
+
+  getProgresoCalculo: async (id: string, trabajoId?: string) => {
+    const response = await api.get(`/nomina/periodos/${id}/progreso/`, {
+      params: trabajoId ? { trabajo: trabajoId } : undefined,
+    });
     return response.data;
   },
 
@@ -69,8 +69,8 @@ export interface ReciboNomina {
   // CFDI
   uuid_fiscal?: string;
   fecha_timbrado?: string;
-  xml_cfdi?: string;
-  pdf_cfdi?: string;
+  hash_xml_cfdi?: string;
+  hash_pdf_cfdi?: string;
 
   estado: "borrador" | "calculado" | "timbrado" | "cancelado";
   estado_display?: string;
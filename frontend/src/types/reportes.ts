@@ -38,7 +38,10 @@ export interface DashboardEmpresa {
   costos_proyectados: {
     aguinaldo_proyectado: number;
     prima_vacacional_proyectada: number;
+    imss_patronal_proyectado: number;
+    infonavit_proyectado: number;
     nomina_mensual: number;
+    salario_mes_actual?: number;
     costo_anual_estimado: number;
   };
   alertas: Array<{